@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import subprocess
+
+# -----------------------------
+# เปรียบเทียบ storage backend (.bin กับ SQLite)
+# -----------------------------
+# ใช้: python benchmark_backends.py [จำนวนครั้งต่อ workload]
+# ทำงานบนสำเนาของโฟลเดอร์ main ในไดเรกทอรีชั่วคราว ข้อมูลจริงจึงไม่เปลี่ยน
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_OPERATIONS = 200
+
+# ไฟล์/โฟลเดอร์ที่ไม่ต้องคัดลอก
+COPY_IGNORE = shutil.ignore_patterns('__pycache__', 'index', '*.db', '*.db-wal', '*.db-shm',
+                                     'metrics.prom', 'trace.json', 'snapshots', 'rosters')
+
+def time_workload(func):
+    """คืนเวลาที่ใช้ (ms) ของ workload"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+def run_workloads(backend, operations, seed=0):
+    """รัน workload CRUD และรายงานกับ backend หนึ่งตัว คืนรายการ (ชื่อ workload, ms)"""
+    from module.cache import invalidate_cache
+
+    rng = random.Random(seed)
+    student_ids = [s['STUDENT ID'] for s in backend['list_students']()]
+    course_ids = [c['COURSE ID'] for c in backend['list_courses']()]
+    results = []
+
+    def read_all():
+        invalidate_cache()
+        backend['list_students']()
+        backend['list_courses']()
+        backend['list_registrations']()
+    results.append(("อ่านข้อมูลทั้งหมด", time_workload(read_all)))
+
+    register_ids = [r['ID'] for r in backend['list_registrations']()]
+    sample_students = [rng.choice(student_ids) for _ in range(operations)] if student_ids else []
+    sample_registrations = [rng.choice(register_ids) for _ in range(operations)] if register_ids else []
+
+    results.append(("ค้นหานักเรียนตามรหัส", time_workload(
+        lambda: [backend['get_student'](sid) for sid in sample_students])))
+    results.append(("ค้นหาการลงทะเบียนตาม ID", time_workload(
+        lambda: [backend['get_registration'](rid) for rid in sample_registrations])))
+
+    new_ids = []
+    def insert():
+        for i in range(operations):
+            new_ids.append(backend['add_registration'](
+                rng.choice(student_ids) if student_ids else f"B{i}",
+                rng.choice(course_ids) if course_ids else f"C{i}", 1))
+    results.append(("เพิ่มการลงทะเบียน", time_workload(insert)))
+
+    results.append(("แก้สถานะการลงทะเบียน", time_workload(
+        lambda: [backend['set_registration_status'](rid, 0) for rid in new_ids])))
+
+    updates = sample_students[:max(operations // 10, 1)]
+    results.append(("แก้ไขข้อมูลนักเรียน", time_workload(
+        lambda: [backend['update_student'](sid, {'YEAR': 2}) for sid in updates])))
+
+    deletes = new_ids[:max(operations // 4, 1)]
+    results.append(("ลบการลงทะเบียน", time_workload(
+        lambda: [backend['delete_registration'](rid) for rid in deletes])))
+
+    def report():
+        invalidate_cache()
+        backend['count_registrations_by_course']()
+        for course_id in course_ids:
+            backend['find_registrations'](course_id=course_id, status=1)
+    results.append(("รายงานรายวิชา", time_workload(report)))
+    return results
+
+def run_in_copy(operations):
+    """รันทุก backend บนข้อมูลในโฟลเดอร์ปัจจุบัน (ต้องเป็นสำเนา) แล้วแสดงผลเปรียบเทียบ"""
+    import contextlib
+    import io
+    from module.storage_backend import get_backend
+    from migrate_to_sqlite import migrate
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(replace=True)
+
+    table = {}
+    for name in ('bin', 'sqlite'):
+        backend = get_backend(name)
+        for workload, ms in run_workloads(backend, operations):
+            table.setdefault(workload, {})[name] = ms
+        backend['close']()
+
+    print(f"===== เปรียบเทียบ backend ({operations} ครั้งต่อ workload) =====")
+    headers = ["WORKLOAD", "BIN (ms)", "SQLITE (ms)"]
+    col_widths = [28, 12, 12]
+    header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
+    print(header_line)
+    print("-" * len(header_line))
+    for workload, timings in table.items():
+        row_data = [workload, f"{timings['bin']:.1f}", f"{timings['sqlite']:.1f}"]
+        print(" | ".join(f"{row_data[i]:<{col_widths[i]}}" for i in range(len(headers))))
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--in-copy']
+    operations = int(args[0]) if args else DEFAULT_OPERATIONS
+    if '--in-copy' in sys.argv[1:]:
+        run_in_copy(operations)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='compro-bench-')
+    try:
+        copy_dir = os.path.join(work_dir, 'main')
+        shutil.copytree(current_dir, copy_dir, ignore=COPY_IGNORE)
+        env = dict(os.environ, COMPRO_WARMUP='0')
+        env.pop('COMPRO_SQLITE_PATH', None)
+        subprocess.run([sys.executable, os.path.join(copy_dir, 'benchmark_backends.py'), str(operations), '--in-copy'],
+                       cwd=copy_dir, env=env, check=False)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from module import compact_layout, report
+
+# -----------------------------
+# เปรียบเทียบขนาดไฟล์และความเร็วการสแกนของรูปแบบ v1 กับ v2
+# -----------------------------
+# ใช้: python benchmark_layout.py [จำนวนนักเรียน] [จำนวนการลงทะเบียนต่อคน]
+# สร้างข้อมูลจำลองจากชื่อ/สาขา/รายวิชาในไฟล์ปัจจุบันลงไดเรกทอรีชั่วคราว ข้อมูลจริงไม่เปลี่ยน
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_STUDENTS = 20000
+DEFAULT_REGISTRATIONS_PER_STUDENT = 6
+SCAN_RUNS = 3
+
+def synthesize(student_count, per_student, seed=0):
+    """คืน (แถวนักเรียน, แถวการลงทะเบียน) จำลองตามค่าที่พบในข้อมูลปัจจุบัน"""
+    rng = random.Random(seed)
+    students = compact_layout.read_rows(os.path.join(current_dir, 'student.bin'), 'student')
+    courses = [c['course_id'] for c in report.read_courses_from_disk(os.path.join(current_dir, 'CourseSubject.bin'))]
+    first_names = [s[1] for s in students] or ['Somchai']
+    last_names = [s[2] for s in students] or ['Jaidee']
+    majors = [s[3] for s in students] or ['Computer']
+    courses = courses or ['CS101']
+
+    student_rows = [(f"STU{600000 + i}", rng.choice(first_names), rng.choice(last_names),
+                     rng.choice(majors), rng.randint(1, 4), rng.randint(0, 1))
+                    for i in range(student_count)]
+    base_ts = 1717200000
+    registration_rows = []
+    for row in student_rows:
+        for _ in range(per_student):
+            registration_rows.append((len(registration_rows) + 1, row[0], rng.choice(courses),
+                                      float(base_ts + rng.randint(0, 180 * 86400)), rng.randint(0, 1)))
+    return student_rows, registration_rows
+
+def best_scan_ms(func, path):
+    """คืนเวลาที่ดีที่สุด (ms) ของการสแกนไฟล์ SCAN_RUNS รอบ และจำนวน record"""
+    best = None
+    count = 0
+    for _ in range(SCAN_RUNS):
+        start = time.perf_counter()
+        count = len(func(path))
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+def main():
+    student_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_STUDENTS
+    per_student = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REGISTRATIONS_PER_STUDENT
+    student_rows, registration_rows = synthesize(student_count, per_student)
+
+    work_dir = tempfile.mkdtemp(prefix='compro-layout-')
+    try:
+        tables = [('student', student_rows, report.read_students_from_disk),
+                  ('registration', registration_rows, report.read_registrations_from_disk)]
+        print(f"===== รูปแบบไฟล์ v1 กับ v2 ({len(student_rows):,} นักเรียน, "
+              f"{len(registration_rows):,} การลงทะเบียน) =====")
+        headers = ["FILE", "V1 BYTES", "V2 BYTES", "RATIO", "V1 SCAN (ms)", "V2 SCAN (ms)", "SPEEDUP"]
+        col_widths = [14, 12, 12, 7, 13, 13, 8]
+        header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
+        print(header_line)
+        print("-" * len(header_line))
+        for kind, rows, scan in tables:
+            sizes = {}
+            timings = {}
+            for version in (1, 2):
+                path = os.path.join(work_dir, f"{kind}_v{version}.bin")
+                sizes[version] = compact_layout.write_rows(path, kind, rows, version)
+                timings[version], _ = best_scan_ms(scan, path)
+            row_data = [kind, f"{sizes[1]:,}", f"{sizes[2]:,}", f"{sizes[1] / sizes[2]:.2f}x",
+                        f"{timings[1]:.1f}", f"{timings[2]:.1f}", f"{timings[1] / timings[2]:.2f}x"]
+            print(" | ".join(f"{row_data[i]:<{col_widths[i]}}" for i in range(len(headers))))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import subprocess
+from statistics import median
+
+# -----------------------------
+# วัดเวลาเริ่มโปรแกรมจนถึงเมนูหลัก
+# -----------------------------
+# ใช้: python benchmark_startup.py [จำนวนรอบ]
+# จบด้วย exit code 1 หากค่ามัธยฐานเกินงบเวลา
+current_dir = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT_PATH = os.path.join(current_dir, 'main.py')
+
+# งบเวลาตั้งแต่เริ่มโปรเซสจนขึ้นเมนูหลัก (มิลลิวินาที)
+STARTUP_BUDGET_MS = 250
+
+DEFAULT_RUNS = 5
+
+FIRST_PROMPT = "กรุณาเลือกเมนูหลัก".encode('utf-8')
+
+# ระบบย่อยที่ import ตอนเลือกเมนู (วัดแยกเพื่อดูว่าตัวไหนหนัก)
+SUBSYSTEMS = ['module.student', 'module.course', 'module.register', 'module.report', 'module.integrity']
+
+def time_to_first_prompt():
+    """รัน main.py แล้วคืนเวลา (ms) จนกว่าเมนูหลักจะถามตัวเลือกครั้งแรก"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, MAIN_SCRIPT_PATH], cwd=current_dir, env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = b""
+    while FIRST_PROMPT not in output:
+        byte = proc.stdout.read(1)
+        if not byte:
+            break
+        output += byte
+    elapsed = (time.perf_counter() - start) * 1000
+    proc.communicate(b"0\n")
+    return elapsed
+
+def time_subsystem_import(module_name):
+    """คืนเวลา (ms) ที่ใช้ import ระบบย่อยหนึ่งตัวในโปรเซสใหม่"""
+    code = ("import time; t = time.perf_counter(); "
+            f"import {module_name}; print((time.perf_counter() - t) * 1000)")
+    result = subprocess.run([sys.executable, '-c', code], cwd=current_dir,
+                            capture_output=True, text=True)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return float('nan')
+
+def run_benchmark(runs=DEFAULT_RUNS):
+    """วัดเวลาเริ่มโปรแกรมหลายรอบและแสดงผล คืนค่า True หากอยู่ในงบเวลา"""
+    timings = [time_to_first_prompt() for _ in range(runs)]
+    startup = median(timings)
+
+    print("===== เวลาเริ่มโปรแกรม =====")
+    print(f"รอบที่วัด: {', '.join(f'{t:.1f}' for t in timings)} ms")
+    print(f"ค่ามัธยฐาน: {startup:.1f} ms (งบ {STARTUP_BUDGET_MS} ms)")
+
+    print("\n===== เวลา import ระบบย่อย (ตอนเปิดเมนูครั้งแรก) =====")
+    for module_name in SUBSYSTEMS:
+        print(f"- {module_name}: {time_subsystem_import(module_name):.1f} ms")
+
+    within_budget = startup <= STARTUP_BUDGET_MS
+    print("\n✅ อยู่ในงบเวลา" if within_budget else "\n❌ เกินงบเวลา")
+    return within_budget
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    sys.exit(0 if run_benchmark(runs) else 1)
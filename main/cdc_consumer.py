@@ -0,0 +1,81 @@
+import sys
+import json
+import time
+from module import cdc
+
+# -----------------------------
+# อ่าน CDC event ของการลงทะเบียน
+# -----------------------------
+# ใช้: python cdc_consumer.py <ชื่อผู้อ่าน> [--batch N] [--from OFFSET] [--follow] [--no-commit]
+# พิมพ์ event ละหนึ่งบรรทัด (JSON) แล้วบันทึกตำแหน่งของผู้อ่านหลังพิมพ์ครบแต่ละ batch
+#   --from OFFSET  เริ่มอ่านจาก offset ที่ระบุแทนตำแหน่งที่บันทึกไว้
+#   --follow       รอ event ใหม่ต่อเมื่ออ่านจนหมด (หยุดด้วย Ctrl+C)
+#   --no-commit    ไม่บันทึกตำแหน่ง (อ่านดูอย่างเดียว)
+
+# ระยะเวลารอก่อนตรวจ event ใหม่ในโหมด --follow (วินาที)
+FOLLOW_INTERVAL = 1.0
+
+def parse_arguments(argv):
+    """คืน dict ตัวเลือกจากบรรทัดคำสั่ง หรือ None หากไม่ถูกต้อง"""
+    options = {'consumer': None, 'batch': cdc.DEFAULT_BATCH_SIZE, 'from': None,
+               'follow': False, 'commit': True}
+    i = 0
+    try:
+        while i < len(argv):
+            arg = argv[i]
+            if arg == '--batch':
+                options['batch'] = int(argv[i + 1])
+                i += 1
+            elif arg == '--from':
+                options['from'] = int(argv[i + 1])
+                i += 1
+            elif arg == '--follow':
+                options['follow'] = True
+            elif arg == '--no-commit':
+                options['commit'] = False
+            elif options['consumer'] is None:
+                options['consumer'] = arg
+            else:
+                return None
+            i += 1
+    except (IndexError, ValueError):
+        return None
+    if options['consumer'] is None or options['batch'] <= 0:
+        return None
+    return options
+
+def consume(options):
+    """พิมพ์ event ตั้งแต่ตำแหน่งของผู้อ่านจนหมด (หรือรอต่อในโหมด follow) คืนจำนวน event ที่อ่าน"""
+    consumer = options['consumer']
+    offset = options['from'] if options['from'] is not None else cdc.get_consumer_offset(consumer)
+    total = 0
+    while True:
+        events = cdc.read_events(offset, options['batch'])
+        if not events:
+            if not options['follow']:
+                return total
+            time.sleep(FOLLOW_INTERVAL)
+            continue
+        for event in events:
+            print(json.dumps(event, ensure_ascii=False))
+        sys.stdout.flush()
+        offset = events[-1]['offset'] + 1
+        total += len(events)
+        if options['commit']:
+            cdc.commit_offset(consumer, offset)
+
+if __name__ == "__main__":
+    options = parse_arguments(sys.argv[1:])
+    if options is None:
+        print("ใช้: python cdc_consumer.py <ชื่อผู้อ่าน> [--batch N] [--from OFFSET] [--follow] [--no-commit]",
+              file=sys.stderr)
+        sys.exit(2)
+    try:
+        count = consume(options)
+    except KeyboardInterrupt:
+        count = None
+    except IOError as e:
+        print(f"เกิดข้อผิดพลาดในการอ่าน CDC log: {e}", file=sys.stderr)
+        sys.exit(1)
+    if count is not None:
+        print(f"อ่าน {count} event (ล่าสุดทั้งหมด {cdc.event_count()} event)", file=sys.stderr)
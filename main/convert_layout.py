@@ -0,0 +1,49 @@
+import os
+import sys
+from module import compact_layout
+
+# -----------------------------
+# แปลงรูปแบบไฟล์นักเรียน/การลงทะเบียนระหว่าง v1 กับ v2
+# -----------------------------
+# ใช้: python convert_layout.py <v1|v2> <ไฟล์ หรือโฟลเดอร์> ...
+# ใช้กับสำเนาที่อ่านอย่างเดียว เช่นโฟลเดอร์ snapshot หรือไฟล์ส่งออก
+# ไฟล์ข้อมูลที่โปรแกรมใช้งานอยู่ใน main/ ต้องเป็น v1 เพราะมีการแก้ไข record ในตำแหน่งเดิมและดัชนีอ้างถึงตำแหน่ง record
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+LIVE_FILES = {os.path.join(current_dir, name) for name in compact_layout.FILE_KINDS}
+
+def expand_targets(paths):
+    """คืนรายการไฟล์ที่แปลงได้จากไฟล์หรือโฟลเดอร์ที่ระบุ"""
+    targets = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            targets += [os.path.join(path, name) for name in compact_layout.FILE_KINDS
+                        if os.path.exists(os.path.join(path, name))]
+        else:
+            targets.append(path)
+    return targets
+
+def convert(version, paths):
+    """แปลงทุกไฟล์เป็นเวอร์ชันที่ระบุ คืนจำนวนไฟล์ที่แปลงไม่สำเร็จ"""
+    failed = 0
+    for path in expand_targets(paths):
+        if path in LIVE_FILES:
+            print(f"ข้าม {path}: ไฟล์ข้อมูลที่ใช้งานอยู่ต้องเป็นรูปแบบ v1")
+            failed += 1
+            continue
+        try:
+            old_size, new_size = compact_layout.convert_file(path, version)
+        except (IOError, OSError, ValueError) as e:
+            print(f"เกิดข้อผิดพลาดในการแปลง {path}: {e}")
+            failed += 1
+            continue
+        ratio = old_size / new_size if new_size else 0
+        print(f"{path}: v{version} {old_size:,} -> {new_size:,} ไบต์ ({ratio:.2f}x)")
+    return failed
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('v1', 'v2'):
+        print("ใช้: python convert_layout.py <v1|v2> <ไฟล์ หรือโฟลเดอร์> ...")
+        sys.exit(2)
+    sys.exit(1 if convert(int(sys.argv[1][1]), sys.argv[2:]) else 0)
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+from module.roster import export_rosters, ROSTER_DIR, ROSTER_FORMATS, ROSTER_WORKERS
+
+# -----------------------------
+# ส่งออกรายชื่อผู้ลงทะเบียนแยกไฟล์ละรายวิชา
+# -----------------------------
+# ใช้: python export_rosters.py [--term ปี/ภาค] [--format txt,csv] [--workers N] [--out โฟลเดอร์]
+#   --term     เฉพาะรายวิชาของปีการศึกษา/ภาคเรียน เช่น 2567/1 หรือ 2567
+#   --format   รูปแบบไฟล์ที่เขียน (ค่าเริ่มต้น txt,csv)
+#   --workers  จำนวน worker (ค่าเริ่มต้น = จำนวน core หรือ COMPRO_ROSTER_WORKERS, 1 = ไม่ใช้ pool)
+
+def parse_arguments(argv):
+    """คืน dict ตัวเลือกจากบรรทัดคำสั่ง หรือ None หากไม่ถูกต้อง"""
+    options = {'academic_year': None, 'semester': None, 'formats': ROSTER_FORMATS,
+               'workers': ROSTER_WORKERS, 'out_dir': ROSTER_DIR}
+    i = 0
+    try:
+        while i < len(argv):
+            arg, value = argv[i], argv[i + 1]
+            if arg == '--term':
+                year_text, _, semester_text = value.partition('/')
+                options['academic_year'] = int(year_text)
+                options['semester'] = int(semester_text) if semester_text else None
+            elif arg == '--format':
+                options['formats'] = tuple(f.strip() for f in value.split(',') if f.strip())
+            elif arg == '--workers':
+                options['workers'] = int(value)
+            elif arg == '--out':
+                options['out_dir'] = os.path.abspath(value)
+            else:
+                return None
+            i += 2
+    except (IndexError, ValueError):
+        return None
+    if not options['formats'] or any(f not in ROSTER_FORMATS for f in options['formats']) \
+            or options['workers'] <= 0:
+        return None
+    return options
+
+if __name__ == "__main__":
+    options = parse_arguments(sys.argv[1:])
+    if options is None:
+        print("ใช้: python export_rosters.py [--term ปี/ภาค] [--format txt,csv] [--workers N] [--out โฟลเดอร์]",
+              file=sys.stderr)
+        sys.exit(2)
+    start = time.perf_counter()
+    try:
+        results = export_rosters(**options)
+    except (IOError, OSError, ValueError) as e:
+        print(f"เกิดข้อผิดพลาดในการส่งออกรายชื่อ: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+    print(f"ส่งออกรายชื่อ {len(results)} รายวิชา ({sum(r[1] for r in results)} รายการ, "
+          f"{sum(r[2] for r in results) / 1024:.0f} KB) ไปยัง {options['out_dir']} "
+          f"ใน {elapsed:.2f} วินาที ({options['workers']} worker)")
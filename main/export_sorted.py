@@ -0,0 +1,75 @@
+import os
+import sys
+import csv
+from module.external_sort import sort_records, MEMORY_BUDGET
+from module.student import read_student_record
+from module.register import read_registration_record
+from module import lsm
+
+# -----------------------------
+# ส่งออกข้อมูลเรียงลำดับเป็น CSV (external merge sort)
+# -----------------------------
+# ใช้: python export_sorted.py <students|registrations> <ไฟล์ CSV> [--desc] [--memory-mb N]
+#   students       นักเรียนเรียงตามนามสกุล ชื่อ (ลำดับพจนานุกรมไทย)
+#   registrations  การลงทะเบียนเรียงตามวันที่ลงทะเบียน
+#   --desc         เรียงจากมากไปน้อย
+#   --memory-mb N  งบหน่วยความจำของการเรียง (ค่าเริ่มต้นจาก COMPRO_SORT_MEMORY_MB)
+# เขียน CSV ทีละแถวระหว่าง merge จึงไม่ต้องโหลดทั้งตารางในหน่วยความจำ
+
+EXPORTS = {
+    'students': ('student_last_name', read_student_record,
+                 ['STUDENT ID', 'FIRST NAME', 'LAST NAME', 'MAJOR', 'YEAR', 'STATUS']),
+    'registrations': ('registration_date', read_registration_record,
+                      ['ID', 'STUDENT ID', 'COURSE ID', 'REGISTRATION DATE', 'STATUS']),
+}
+
+def parse_arguments(argv):
+    """คืน dict ตัวเลือกจากบรรทัดคำสั่ง หรือ None หากไม่ถูกต้อง"""
+    options = {'table': None, 'output': None, 'reverse': False, 'memory': MEMORY_BUDGET}
+    positional = []
+    i = 0
+    try:
+        while i < len(argv):
+            if argv[i] == '--desc':
+                options['reverse'] = True
+            elif argv[i] == '--memory-mb':
+                options['memory'] = int(float(argv[i + 1]) * 1024 * 1024)
+                i += 1
+            else:
+                positional.append(argv[i])
+            i += 1
+    except (IndexError, ValueError):
+        return None
+    if len(positional) != 2 or positional[0] not in EXPORTS or options['memory'] <= 0:
+        return None
+    options['table'], options['output'] = positional
+    return options
+
+def export_sorted(options):
+    """เขียน CSV ของตารางที่เรียงแล้ว คืนจำนวนแถว"""
+    order, decode, headers = EXPORTS[options['table']]
+    # อ่าน WAL/segment ของโหมด LSM แบบอ่านอย่างเดียวแล้ว merge ระหว่างเรียง (ไม่รวมเข้าไฟล์หลักจากโปรเซสนี้)
+    pending = lsm.overlay() if options['table'] == 'registrations' and lsm.has_pending() else None
+    count = 0
+    with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for data in sort_records(order, options['reverse'], options['memory'], pending):
+            record = decode(data)
+            if record:
+                writer.writerow([record[h] for h in headers])
+                count += 1
+    return count
+
+if __name__ == "__main__":
+    options = parse_arguments(sys.argv[1:])
+    if options is None:
+        print("ใช้: python export_sorted.py <students|registrations> <ไฟล์ CSV> [--desc] [--memory-mb N]",
+              file=sys.stderr)
+        sys.exit(2)
+    try:
+        count = export_sorted(options)
+    except IOError as e:
+        print(f"เกิดข้อผิดพลาดในการส่งออก: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"ส่งออก {count} รายการไปยัง {os.path.abspath(options['output'])}")
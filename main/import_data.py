@@ -0,0 +1,57 @@
+import os
+import sys
+import csv
+import time
+from module.bulk_import import import_file, print_import_result, IMPORT_TABLES, IMPORT_BATCH_ROWS
+
+# -----------------------------
+# นำเข้านักเรียน/รายวิชาจำนวนมากจากไฟล์ CSV หรือ JSONL
+# -----------------------------
+# ใช้: python import_data.py <students|courses> <ไฟล์ .csv|.jsonl> [--rejects ไฟล์] [--dry-run] [--batch N]
+#   --rejects  ไฟล์ของแถวที่ไม่ผ่านการตรวจ รูปแบบเดียวกับต้นทาง (ค่าเริ่มต้น <ไฟล์ต้นทาง>.rejects.csv/.jsonl)
+#   --dry-run  ตรวจอย่างเดียวไม่เขียน student.bin/CourseSubject.bin
+#   --batch N  จำนวนแถวต่อชุด (ค่าเริ่มต้นจาก COMPRO_IMPORT_BATCH)
+
+def parse_arguments(argv):
+    """คืน dict ตัวเลือกจากบรรทัดคำสั่ง หรือ None หากไม่ถูกต้อง"""
+    options = {'table': None, 'source_path': None, 'rejects_path': None, 'dry_run': False,
+               'batch_rows': IMPORT_BATCH_ROWS}
+    positional = []
+    i = 0
+    try:
+        while i < len(argv):
+            if argv[i] == '--dry-run':
+                options['dry_run'] = True
+            elif argv[i] == '--rejects':
+                options['rejects_path'] = argv[i + 1]
+                i += 1
+            elif argv[i] == '--batch':
+                options['batch_rows'] = int(argv[i + 1])
+                i += 1
+            else:
+                positional.append(argv[i])
+            i += 1
+    except (IndexError, ValueError):
+        return None
+    if len(positional) != 2 or positional[0] not in IMPORT_TABLES or options['batch_rows'] <= 0:
+        return None
+    options['table'], options['source_path'] = positional
+    return options
+
+if __name__ == "__main__":
+    options = parse_arguments(sys.argv[1:])
+    if options is None:
+        print("ใช้: python import_data.py <students|courses> <ไฟล์ .csv|.jsonl> "
+              "[--rejects ไฟล์] [--dry-run] [--batch N]", file=sys.stderr)
+        sys.exit(2)
+    if not os.path.isfile(options['source_path']):
+        print(f"ไม่พบไฟล์ {options['source_path']}", file=sys.stderr)
+        sys.exit(2)
+    start = time.perf_counter()
+    try:
+        result = import_file(**options)
+    except (IOError, OSError, ValueError, csv.Error) as e:
+        print(f"เกิดข้อผิดพลาดในการนำเข้าข้อมูล: {e}", file=sys.stderr)
+        sys.exit(1)
+    print_import_result(result, options['dry_run'])
+    print(f"ใช้เวลา {time.perf_counter() - start:.2f} วินาที")
@@ -1,9 +1,8 @@
-import struct
-import os
-from module.student import *
-from module.register import *
-from module.course import *
-from module.report import *
+import sys
+from module.trace import enable_tracing
+from module.warmup import start_index_warmup
+
+# แต่ละระบบย่อยถูก import เมื่อผู้ใช้เลือกเมนูนั้นครั้งแรก เพื่อให้เมนูหลักขึ้นเร็ว
 
 
 
@@ -19,23 +18,48 @@ def main_menu():
         print("2. จัดการข้อมูลรายวิชา")
         print("3. จัดการข้อมูลการลงทะเบียน")
         print("4. สร้างไฟล์รายงาน")
+        print("5. ตรวจสอบความถูกต้องของข้อมูล")
+        print("6. สำรองข้อมูล (snapshot)")
         print("0. ออกจากโปรแกรม")
 
         choice = input("กรุณาเลือกเมนูหลัก: ")
 
         if choice == '1':
+            from module.student import student_menu
             student_menu()
         elif choice == '2':
+            from module.course import course_menu
             course_menu()
         elif choice == '3':
+            from module.register import registration_menu
             registration_menu()
         elif choice == '4':
+            from module.report import generate_report
             generate_report()
+        elif choice == '5':
+            from module.integrity import check_data_integrity
+            check_data_integrity()
+        elif choice == '6':
+            from module.snapshot import snapshot_menu
+            snapshot_menu()
         elif choice == '0':
             print("ออกจากโปรแกรม...")
             break
         else:
             print("ตัวเลือกไม่ถูกต้อง กรุณาลองใหม่อีกครั้ง")
 
+def parse_trace_argument(argv):
+    """อ่านตัวเลือก --trace [ไฟล์] จากบรรทัดคำสั่ง คืนค่า (เปิดหรือไม่, path ของไฟล์ trace)"""
+    if '--trace' not in argv:
+        return False, None
+    i = argv.index('--trace')
+    if i + 1 < len(argv) and not argv[i + 1].startswith('--'):
+        return True, argv[i + 1]
+    return True, None
+
 if __name__ == "__main__":
+    trace_enabled, trace_path = parse_trace_argument(sys.argv[1:])
+    if trace_enabled:
+        enable_tracing(trace_path)
+    start_index_warmup()
     main_menu()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import os
+import sys
+from module.bin_backend import list_students, list_courses, list_registrations
+from module import sqlite_backend
+
+# -----------------------------
+# ย้ายข้อมูลจากไฟล์ .bin ไปยังฐานข้อมูล SQLite
+# -----------------------------
+# ใช้: python migrate_to_sqlite.py [path ของฐานข้อมูล] [--replace]
+# --replace ล้างข้อมูลเดิมในฐานข้อมูลก่อนนำเข้า (ไม่ระบุ = ข้ามแถวที่คีย์ซ้ำ)
+
+def migrate(db_path=sqlite_backend.SQLITE_FILE_PATH, replace=False):
+    """อ่านข้อมูลทั้งหมดจากไฟล์ .bin (รวมการลงทะเบียนของภาคเรียนที่จัดเก็บแล้ว) แล้วนำเข้า SQLite คืนผลการนำเข้าของแต่ละตาราง"""
+    students = list_students()
+    courses = list_courses()
+    registrations = list_registrations()
+    result = sqlite_backend.import_records(students, courses, registrations, db_path, replace)
+
+    print(f"===== ย้ายข้อมูลไปยัง {db_path} =====")
+    for table, (imported, skipped) in result.items():
+        line = f"- {table}: นำเข้า {imported} รายการ"
+        if skipped:
+            line += f", ข้าม {skipped} รายการ (คีย์ซ้ำ)"
+        print(line)
+    print("จำนวนแถวในฐานข้อมูล:", ", ".join(
+        f"{table} {count}" for table, count in sqlite_backend.count_rows(db_path).items()))
+    return result
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != '--replace']
+    path = os.path.abspath(args[0]) if args else sqlite_backend.SQLITE_FILE_PATH
+    migrate(path, replace='--replace' in sys.argv[1:])
+    sqlite_backend.close()
@@ -0,0 +1,232 @@
+from datetime import datetime
+from module import student, course, register, segments, lsm
+from module.storage_backend import status_code
+from module.course_index import find_course_offset_by_id
+from module.integrity import find_dependent_registrations
+from module.time_index import find_registration_offsets_between
+
+# -----------------------------
+# Backend ไฟล์ .bin (ความกว้างคงที่) ใช้ฟังก์ชันและดัชนีเดิมของแต่ละโมดูล
+# -----------------------------
+
+# -----------------------------
+# นักเรียน
+# -----------------------------
+def list_students():
+    """คืนข้อมูลนักเรียนทั้งหมด"""
+    return student.read_all_records_from_file()
+
+def get_student(student_id):
+    """คืนข้อมูลนักเรียนตามรหัส หรือ None"""
+    for record in student.read_all_records_from_file():
+        if record['STUDENT ID'] == student_id:
+            return record
+    return None
+
+def pack_student(record):
+    return student.create_student_record(
+        record['STUDENT ID'],
+        record['FIRST NAME'],
+        record['LAST NAME'],
+        record['MAJOR'],
+        record['YEAR'],
+        status_code(record['STATUS'])
+    )
+
+def add_student(record):
+    """เพิ่มนักเรียนใหม่ คืนค่า True หากสำเร็จ"""
+    packed = pack_student(record)
+    if not packed:
+        return False
+    student.write_record_to_file(packed)
+    student.index_appended_student(record['FIRST NAME'], record['LAST NAME'])
+    student.record_student_bitmaps(packed)
+    return True
+
+def update_student(student_id, changes):
+    """แก้ไขฟิลด์ของนักเรียนตาม dict changes (เขียนไฟล์ใหม่ทั้งไฟล์)"""
+    records = student.read_all_records_from_file()
+    found = False
+    for record in records:
+        if record['STUDENT ID'] == student_id:
+            record.update(changes)
+            found = True
+    if not found:
+        return False
+    student.rewrite_student_file([packed for packed in map(pack_student, records) if packed])
+    return True
+
+def delete_student(student_id):
+    """ลบนักเรียน (ไม่ลบการลงทะเบียนที่อ้างถึง)"""
+    records = student.read_all_records_from_file()
+    remaining = [r for r in records if r['STUDENT ID'] != student_id]
+    if len(remaining) == len(records):
+        return False
+    student.rewrite_student_file([packed for packed in map(pack_student, remaining) if packed])
+    return True
+
+# -----------------------------
+# รายวิชา
+# -----------------------------
+def list_courses():
+    """คืนข้อมูลรายวิชาทั้งหมด"""
+    return course.read_all_records_from_file()
+
+def get_course(course_id):
+    """คืนข้อมูลรายวิชาตามรหัส (อ่านจากตำแหน่งในดัชนี) หรือ None"""
+    offset = find_course_offset_by_id(course_id)
+    if offset is None:
+        return None
+    return course.read_course_at(offset)
+
+def pack_course(record):
+    return course.create_course_record(
+        record['COURSE ID'],
+        record['COURSE NAME'],
+        record['CREDIT'],
+        record['ACADEMIC YEAR'],
+        record['SEMESTER'],
+        status_code(record['STATUS'])
+    )
+
+def add_course(record):
+    """เพิ่มรายวิชาใหม่ คืนค่า True หากสำเร็จ"""
+    packed = pack_course(record)
+    if not packed:
+        return False
+    course.write_record_to_file(packed)
+    course.index_appended_course(record['COURSE NAME'])
+    return True
+
+def update_course(course_id, changes):
+    """แก้ไขฟิลด์ของรายวิชาตาม dict changes (เขียนไฟล์ใหม่ทั้งไฟล์)"""
+    records = course.read_all_records_from_file()
+    found = False
+    for record in records:
+        if record['COURSE ID'] == course_id:
+            record.update(changes)
+            found = True
+    if not found:
+        return False
+    course.rewrite_course_file([packed for packed in map(pack_course, records) if packed])
+    return True
+
+def delete_course(course_id):
+    """ลบรายวิชา (ไม่ลบการลงทะเบียนที่อ้างถึง)"""
+    records = course.read_all_records_from_file()
+    remaining = [r for r in records if r['COURSE ID'] != course_id]
+    if len(remaining) == len(records):
+        return False
+    course.rewrite_course_file([packed for packed in map(pack_course, remaining) if packed])
+    return True
+
+# -----------------------------
+# การลงทะเบียน
+# -----------------------------
+def list_registrations():
+    """คืนข้อมูลการลงทะเบียนทั้งหมด รวมภาคเรียนที่จัดเก็บแล้ว (เรียงจากภาคเรียนเก่าไปภาคเรียนปัจจุบัน)"""
+    archived = [register.read_registration_record(record_data)
+                for key, _ in segments.list_archived_terms()
+                for record_data in segments.read_archived_term(key)]
+    return [r for r in archived if r] + register.read_all_records_from_file()
+
+def get_registration(register_id):
+    """คืนข้อมูลการลงทะเบียนตาม ID หรือ None"""
+    reg, _ = register.find_registration(register_id)
+    if reg is None:
+        record_data = segments.find_archived_registration(register_id)
+        return register.read_registration_record(record_data) if record_data else None
+    return reg
+
+def add_registration(student_id, course_id, status, registration_date=None):
+    """เพิ่มการลงทะเบียนใหม่ (ไม่ตรวจเงื่อนไขการลงทะเบียน) คืน ID ใหม่ หรือ None"""
+    register_id = register.get_next_register_id()
+    if registration_date is None:
+        registration_date = datetime.now().timestamp()
+    if not register.append_registration(register_id, student_id, course_id, registration_date, status):
+        return None
+    return register_id
+
+def set_registration_status(register_id, status):
+    """แก้สถานะของการลงทะเบียน (เขียนทับ record เดิมในไฟล์)"""
+    reg, offset = register.find_registration(register_id)
+    if reg is None:
+        return False
+    return register.write_registration_status(reg, offset, status)
+
+def delete_registration(register_id):
+    """ลบการลงทะเบียนตาม ID"""
+    reg, offset = register.find_registration(register_id)
+    if reg is None:
+        return False
+    return register.remove_registration(reg, offset)
+
+def find_registrations(student_id=None, course_id=None, status=None, date_from=None, date_to=None):
+    """ค้นหาการลงทะเบียนตามเงื่อนไข (ใช้ดัชนีนักเรียน/รายวิชา/เวลา เพื่ออ่านเฉพาะ record ที่เกี่ยวข้อง)
+
+    date_from/date_to เป็น datetime หรือ timestamp ช่วง [date_from, date_to)
+    """
+    candidates = None
+    if student_id is not None:
+        candidates = set(find_dependent_registrations('student', student_id))
+    if course_id is not None:
+        by_course = set(find_dependent_registrations('course', course_id))
+        candidates = by_course if candidates is None else candidates & by_course
+    if date_from is not None or date_to is not None:
+        by_date = {offset // register.REGISTRATION_RECORD_SIZE
+                   for offset in find_registration_offsets_between(date_from, date_to)}
+        candidates = by_date if candidates is None else candidates & by_date
+
+    if candidates is None:
+        # read_all_records_from_file รวมการเขียนที่ค้างในโหมด LSM แล้ว
+        records = register.read_all_records_from_file()
+    else:
+        records = register.read_registrations_at(
+            [record_no * register.REGISTRATION_RECORD_SIZE for record_no in sorted(candidates)])
+        if lsm.has_pending():
+            # ดัชนียังไม่รวมการเขียนที่ค้างในโหมด LSM จึงแทน/เพิ่ม record จาก LSM ที่ตรงเงื่อนไข
+            date_from = date_from.timestamp() if isinstance(date_from, datetime) else date_from
+            date_to = date_to.timestamp() if isinstance(date_to, datetime) else date_to
+            records = lsm.overlay_matching(
+                records, register.read_registration_record, 'ID',
+                lambda r: (student_id is None or r['STUDENT ID'] == student_id)
+                and (course_id is None or r['COURSE ID'] == course_id)
+                and (date_from is None or r['REGISTRATION DATE'].timestamp() >= date_from)
+                and (date_to is None or r['REGISTRATION DATE'].timestamp() < date_to))
+    if status is not None:
+        records = [r for r in records if status_code(r['STATUS']) == status_code(status)]
+    return records
+
+def count_registrations_by_course():
+    """คืน dict รหัสวิชา -> {'registered': n, 'dropped': n}"""
+    counts = {}
+    for record in register.read_all_records_from_file():
+        bucket = counts.setdefault(record['COURSE ID'], {'registered': 0, 'dropped': 0})
+        bucket['registered' if record['STATUS'] == 'Registered' else 'dropped'] += 1
+    return counts
+
+def close():
+    """backend ไฟล์ไม่มีการเชื่อมต่อค้างไว้"""
+    pass
+
+BACKEND = {
+    'name': 'bin',
+    'list_students': list_students,
+    'get_student': get_student,
+    'add_student': add_student,
+    'update_student': update_student,
+    'delete_student': delete_student,
+    'list_courses': list_courses,
+    'get_course': get_course,
+    'add_course': add_course,
+    'update_course': update_course,
+    'delete_course': delete_course,
+    'list_registrations': list_registrations,
+    'get_registration': get_registration,
+    'add_registration': add_registration,
+    'set_registration_status': set_registration_status,
+    'delete_registration': delete_registration,
+    'find_registrations': find_registrations,
+    'count_registrations_by_course': count_registrations_by_course,
+    'close': close,
+}
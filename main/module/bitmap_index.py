@@ -0,0 +1,276 @@
+import os
+import re
+import struct
+from array import array
+from module.index_store import load_index, append_index_delta, get_index_for_append
+
+# -----------------------------
+# ดัชนี bitmap ของนักเรียน (สาขา, ชั้นปี, สถานะ)
+# -----------------------------
+# bitmap ในหน่วยความจำเป็น int ของ Python (บิตที่ i = record ลำดับที่ i) AND/OR/NOT จึงเป็น & | ~ ของ int
+# ตอนบันทึกลงดิสก์บีบอัดแบบ roaring: แบ่งเป็นก้อนละ 65536 record
+# ก้อนที่มีสมาชิกไม่เกิน 4096 ตัวเก็บเป็นอาร์เรย์ uint16 ที่เหลือเก็บเป็น bitmap 8 KB
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+STUDENT_FILE_PATH = os.path.join(main_dir, 'student.bin')
+
+STUDENT_RECORD_FORMAT = '<16s50s50s20sBB'
+STUDENT_RECORD_SIZE = struct.calcsize(STUDENT_RECORD_FORMAT)
+
+CHUNK_BITS = 1 << 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+ARRAY_CONTAINER_LIMIT = 4096
+CONTAINER_HEADER_FORMAT = '<HBI'    # ลำดับก้อน, ชนิด (0 = อาร์เรย์, 1 = bitmap), จำนวนสมาชิก
+CONTAINER_HEADER_SIZE = struct.calcsize(CONTAINER_HEADER_FORMAT)
+ARRAY_CONTAINER = 0
+BITMAP_CONTAINER = 1
+
+# ฟิลด์ที่กรองได้ -> ฟังก์ชันแปลงค่าที่ผู้ใช้ป้อนเป็นคีย์ของ bitmap
+FILTER_FIELDS = {
+    'major': lambda value: value.strip().lower(),
+    'year': lambda value: int(value),
+    'status': lambda value: {'active': 1, 'inactive': 0, '1': 1, '0': 0}[value.strip().lower()],
+}
+
+# -----------------------------
+# บีบอัด bitmap (roaring)
+# -----------------------------
+def encode_bitmap(bitmap, key=0):
+    """แปลง bitmap (int) เป็นไบต์แบบ roaring (key คือลำดับก้อนของบิตที่ 0 ของ bitmap)"""
+    chunks = []
+    while bitmap:
+        chunk = bitmap & CHUNK_MASK
+        bitmap >>= CHUNK_BITS
+        if chunk:
+            count = bin(chunk).count('1')
+            if count <= ARRAY_CONTAINER_LIMIT:
+                members = array('H', bitmap_members(chunk))
+                chunks.append(struct.pack(CONTAINER_HEADER_FORMAT, key, ARRAY_CONTAINER, count) + members.tobytes())
+            else:
+                chunks.append(struct.pack(CONTAINER_HEADER_FORMAT, key, BITMAP_CONTAINER, count)
+                              + chunk.to_bytes(CHUNK_BITS // 8, 'little'))
+        key += 1
+    return b''.join(chunks)
+
+def decode_bitmap(data):
+    """แปลงไบต์แบบ roaring กลับเป็น bitmap (int)"""
+    bitmap = 0
+    pos = 0
+    while pos < len(data):
+        key, kind, count = struct.unpack_from(CONTAINER_HEADER_FORMAT, data, pos)
+        pos += CONTAINER_HEADER_SIZE
+        if kind == ARRAY_CONTAINER:
+            members = array('H')
+            members.frombytes(data[pos:pos + count * 2])
+            pos += count * 2
+            chunk = 0
+            for member in members:
+                chunk |= 1 << member
+        else:
+            chunk = int.from_bytes(data[pos:pos + CHUNK_BITS // 8], 'little')
+            pos += CHUNK_BITS // 8
+        bitmap |= chunk << (key * CHUNK_BITS)
+    return bitmap
+
+def append_encoded_bit(data, position):
+    """ตั้งบิต position ที่สูงกว่าทุกบิตใน bitmap ที่บีบอัดแล้ว โดยเข้ารหัสใหม่เฉพาะก้อนสุดท้าย"""
+    key = position // CHUNK_BITS
+    pos = 0
+    last = None
+    while pos < len(data):
+        last = pos
+        _, kind, count = struct.unpack_from(CONTAINER_HEADER_FORMAT, data, pos)
+        pos += CONTAINER_HEADER_SIZE + (count * 2 if kind == ARRAY_CONTAINER else CHUNK_BITS // 8)
+    chunk = 0
+    if last is not None and struct.unpack_from(CONTAINER_HEADER_FORMAT, data, last)[0] == key:
+        chunk = decode_bitmap(data[last:]) >> (key * CHUNK_BITS)
+        data = data[:last]
+    return data + encode_bitmap(chunk | 1 << (position % CHUNK_BITS), key)
+
+# ค่าไบต์ -> ตำแหน่งบิตที่เป็น 1 ในไบต์นั้น
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+def bitmap_members(bitmap):
+    """คืนลำดับ record ที่บิตเป็น 1 เรียงจากน้อยไปมาก (ไล่ทีละไบต์ ข้ามไบต์ที่เป็นศูนย์)"""
+    members = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for byte_no, value in enumerate(data):
+        if value:
+            base = byte_no * 8
+            members.extend(base + bit for bit in BYTE_BITS[value])
+    return members
+
+def bitmap_count(bitmap):
+    return bin(bitmap).count('1')
+
+# -----------------------------
+# สร้างและโหลดดัชนี
+# -----------------------------
+def add_student_bits(bitmaps, record_no, major, year_level, status):
+    bit = 1 << record_no
+    bitmaps['major'][major.lower()] = bitmaps['major'].get(major.lower(), 0) | bit
+    bitmaps['year'][year_level] = bitmaps['year'].get(year_level, 0) | bit
+    bitmaps['status'][status] = bitmaps['status'].get(status, 0) | bit
+
+def build_student_bitmaps(file_path=STUDENT_FILE_PATH):
+    """อ่าน student.bin หนึ่งรอบแล้วสร้าง bitmap ของแต่ละค่า (int ที่ยังไม่บีบอัด)"""
+    bitmaps = {'major': {}, 'year': {}, 'status': {}}
+    record_count = 0
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % STUDENT_RECORD_SIZE
+        for record_no, unpacked in enumerate(struct.iter_unpack(STUDENT_RECORD_FORMAT, data[:usable])):
+            major = unpacked[3].strip(b'\x00').decode('utf-8', errors='replace')
+            add_student_bits(bitmaps, record_no, major, unpacked[4], unpacked[5])
+            record_count = record_no + 1
+    return bitmaps, record_count
+
+def compress_bitmaps(bitmaps, record_count):
+    """คืนดัชนีที่บีบอัดแล้วสำหรับบันทึกลงดิสก์"""
+    return {
+        'record_count': record_count,
+        'bitmaps': {field: {key: encode_bitmap(bitmap) for key, bitmap in values.items()}
+                    for field, values in bitmaps.items()}
+    }
+
+def decompress_bitmaps(index):
+    """คืน (bitmap ที่คลายแล้วของแต่ละฟิลด์, จำนวน record)"""
+    return ({field: {key: decode_bitmap(data) for key, data in values.items()}
+             for field, values in index['bitmaps'].items()}, index['record_count'])
+
+# (ดัชนีที่บีบอัดแล้วจาก index_store, ผลที่คลายแล้ว) คลายใหม่เฉพาะเมื่อดัชนีเปลี่ยน
+_decoded = (None, None)
+
+def get_student_bitmaps(file_path=STUDENT_FILE_PATH):
+    """คืน (bitmap ของแต่ละฟิลด์, จำนวน record) (สร้างใหม่อัตโนมัติเมื่อไฟล์เปลี่ยน)"""
+    global _decoded
+    index = load_index('student_bitmap', [file_path],
+                       lambda: compress_bitmaps(*build_student_bitmaps(file_path)), apply_appended_student)
+    if _decoded[0] is not index:
+        _decoded = (index, decompress_bitmaps(index))
+    return _decoded[1]
+
+def apply_appended_student(index, record):
+    """ตั้งบิตของ record ไบนารีที่ต่อท้าย student.bin ในดัชนีที่บีบอัดแล้ว (เข้ารหัสใหม่เฉพาะ bitmap ที่เปลี่ยน)"""
+    unpacked = struct.unpack(STUDENT_RECORD_FORMAT, record)
+    major = unpacked[3].strip(b'\x00').decode('utf-8', errors='replace')
+    record_no = index['record_count']
+    for field, key in (('major', major.lower()), ('year', unpacked[4]), ('status', unpacked[5])):
+        values = index['bitmaps'][field]
+        values[key] = append_encoded_bit(values.get(key, b''), record_no)
+    index['record_count'] = record_no + 1
+    return index
+
+def record_student_bitmaps(record, file_path=STUDENT_FILE_PATH):
+    """เพิ่มบิตของ record ไบนารีที่เพิ่งต่อท้าย student.bin โดยไม่ต้องสร้างดัชนีใหม่ทั้งหมด (บันทึกเฉพาะ delta)"""
+    global _decoded
+    index = get_index_for_append('student_bitmap', file_path, STUDENT_RECORD_SIZE)
+    if index is None:
+        return
+    if _decoded[0] is index:
+        # ปรับ bitmap ที่คลายไว้แล้วไปพร้อมกัน ไม่ต้องคลายใหม่ทั้งดัชนี
+        bitmaps, record_count = _decoded[1]
+        unpacked = struct.unpack(STUDENT_RECORD_FORMAT, record)
+        major = unpacked[3].strip(b'\x00').decode('utf-8', errors='replace')
+        add_student_bits(bitmaps, record_count, major, unpacked[4], unpacked[5])
+        _decoded = (index, (bitmaps, record_count + 1))
+    append_index_delta('student_bitmap', [file_path], apply_appended_student(index, record), record)
+
+# -----------------------------
+# เงื่อนไขการกรอง
+# -----------------------------
+# วงเล็บ, field="ค่าที่มีช่องว่าง" หรือคำที่ไม่มีช่องว่าง
+TOKEN_PATTERN = re.compile(r'\(|\)|[^\s()=]+="[^"]*"|[^\s()]+')
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text)
+
+def parse_filter(text):
+    """แปลงเงื่อนไขเช่น "major=physics and (year=1 or year=2) and not status=inactive" เป็นต้นไม้
+
+    ค่าที่มีช่องว่างใส่ในเครื่องหมายคำพูด เช่น major="computer science"
+    คืน tuple ('and', a, b), ('or', a, b), ('not', a) หรือ ('eq', ฟิลด์, คีย์) ยกข้อผิดพลาด ValueError หากไม่ถูกต้อง
+    """
+    tokens = tokenize(text)
+    pos = 0
+
+    def peek():
+        return tokens[pos].lower() if pos < len(tokens) else None
+
+    def parse_or():
+        nonlocal pos
+        node = parse_and()
+        while peek() == 'or':
+            pos += 1
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and():
+        nonlocal pos
+        node = parse_not()
+        while peek() == 'and':
+            pos += 1
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not():
+        nonlocal pos
+        if peek() == 'not':
+            pos += 1
+            return ('not', parse_not())
+        return parse_term()
+
+    def parse_term():
+        nonlocal pos
+        token = peek()
+        if token is None:
+            raise ValueError("เงื่อนไขไม่ครบ")
+        if token == '(':
+            pos += 1
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError("วงเล็บไม่ครบคู่")
+            pos += 1
+            return node
+        field, sep, value = tokens[pos].partition('=')
+        field = field.lower()
+        value = value.strip('"')
+        if not sep or field not in FILTER_FIELDS or not value:
+            raise ValueError(f"เงื่อนไขไม่ถูกต้อง: {tokens[pos]} (ใช้ major=, year=, status=)")
+        try:
+            key = FILTER_FIELDS[field](value)
+        except (KeyError, ValueError):
+            raise ValueError(f"ค่าของ {field} ไม่ถูกต้อง: {value}")
+        pos += 1
+        return ('eq', field, key)
+
+    node = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"เงื่อนไขไม่ถูกต้องที่: {tokens[pos]}")
+    return node
+
+def evaluate_filter(node, bitmaps, record_count):
+    """คำนวณ bitmap ของเงื่อนไขด้วยการดำเนินการระดับบิต (ไม่ถอดรหัส record)"""
+    kind = node[0]
+    if kind == 'eq':
+        return bitmaps[node[1]].get(node[2], 0)
+    if kind == 'not':
+        return ((1 << record_count) - 1) & ~evaluate_filter(node[1], bitmaps, record_count)
+    left = evaluate_filter(node[1], bitmaps, record_count)
+    right = evaluate_filter(node[2], bitmaps, record_count)
+    return left & right if kind == 'and' else left | right
+
+def filter_students(text, file_path=STUDENT_FILE_PATH):
+    """คืน (bitmap, จำนวน) ของนักเรียนที่ตรงเงื่อนไข"""
+    bitmaps, record_count = get_student_bitmaps(file_path)
+    bitmap = evaluate_filter(parse_filter(text), bitmaps, record_count)
+    return bitmap, bitmap_count(bitmap)
+
+def count_students(text, file_path=STUDENT_FILE_PATH):
+    """นับนักเรียนที่ตรงเงื่อนไขโดยไม่ถอดรหัส record"""
+    return filter_students(text, file_path)[1]
+
+def bitmap_offsets(bitmap):
+    """คืน offset ใน student.bin ของ record ใน bitmap"""
+    return [record_no * STUDENT_RECORD_SIZE for record_no in bitmap_members(bitmap)]
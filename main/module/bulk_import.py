@@ -0,0 +1,303 @@
+import os
+import csv
+import json
+import shutil
+import struct
+from module.cache import bump_generation, writing
+from module import metrics, trace
+
+# -----------------------------
+# นำเข้านักเรียน/รายวิชาจำนวนมากจาก CSV หรือ JSONL
+# -----------------------------
+# อ่านไฟล์ทีละแถว ตรวจแถวเป็นชุด (ความยาวเป็นไบต์หลังแปลงเป็น UTF-8, ช่วงของตัวเลข, รหัสซ้ำ)
+# แถวที่ผ่านถูก pack_into ลงบัฟเฟอร์ที่จองไว้ครั้งเดียว แล้วเขียนลงไฟล์พักครั้งละหนึ่งชุด
+# เมื่ออ่านครบทุกแถวจึงต่อท้ายไฟล์ข้อมูลครั้งเดียว หากล้มเหลวกลางทางไฟล์ข้อมูลจะถูกตัดกลับเป็นขนาดเดิม
+# แถวที่ไม่ผ่านเขียนลงไฟล์ rejects รูปแบบเดียวกับต้นทาง (ค่าเดิมทุกคอลัมน์ + บรรทัดและเหตุผล) แก้แล้วนำเข้าซ้ำได้
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+STUDENT_FILE_PATH = os.path.join(main_dir, 'student.bin')
+COURSE_FILE_PATH = os.path.join(main_dir, 'CourseSubject.bin')
+
+# จำนวนแถวต่อชุด (ขนาดบัฟเฟอร์ = จำนวนแถว x ขนาด record) ตั้งด้วย COMPRO_IMPORT_BATCH
+IMPORT_BATCH_ROWS = int(os.environ.get('COMPRO_IMPORT_BATCH', '50000'))
+
+STATUS_VALUES = {'active': 1, 'inactive': 0, '1': 1, '0': 0}
+
+# คอลัมน์ที่เพิ่มท้ายแถวในไฟล์ rejects (ไม่ใช่ฟิลด์ของตาราง จึงถูกข้ามเมื่อนำเข้าไฟล์ rejects ซ้ำ)
+REJECT_COLUMNS = ['REJECT LINE', 'REJECT REASON']
+
+# ตาราง -> ไฟล์, รูปแบบ record และฟิลด์ (ชื่อคอลัมน์, ชนิด, ความกว้างไบต์หรือช่วงค่า, ต้องมีค่า)
+# ฟิลด์แรกคือรหัสที่ห้ามซ้ำ
+IMPORT_TABLES = {
+    'students': {
+        'file': STUDENT_FILE_PATH,
+        'format': '<16s50s50s20sBB',
+        'fields': [
+            ('STUDENT ID', 'text', 16, True),
+            ('FIRST NAME', 'text', 50, True),
+            ('LAST NAME', 'text', 50, True),
+            ('MAJOR', 'text', 20, False),
+            ('YEAR', 'int', (1, 255), True),
+            ('STATUS', 'status', None, False),
+        ],
+    },
+    'courses': {
+        'file': COURSE_FILE_PATH,
+        'format': '<10s50sB H B B',
+        'fields': [
+            ('COURSE ID', 'text', 10, True),
+            ('COURSE NAME', 'text', 50, True),
+            ('CREDIT', 'int', (0, 255), True),
+            ('ACADEMIC YEAR', 'int', (0, 65535), True),
+            ('SEMESTER', 'int', (1, 3), True),
+            ('STATUS', 'status', None, False),
+        ],
+    },
+}
+
+# -----------------------------
+# อ่านไฟล์ต้นทาง
+# -----------------------------
+def normalize_key(key):
+    """ชื่อคอลัมน์ไม่สนตัวพิมพ์ และใช้ _ แทนช่องว่างได้ (student_id = STUDENT ID)"""
+    return str(key).strip().upper().replace('_', ' ')
+
+def is_jsonl(path):
+    return path.lower().endswith(('.jsonl', '.ndjson'))
+
+def read_csv_header(path):
+    """คืนรายการชื่อคอลัมน์ (แถวแรก) ของไฟล์ CSV"""
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f), [])
+
+def iter_source_rows(path):
+    """คืน (เลขบรรทัด, dict หรือ None, ข้อมูลเดิม) ทีละแถวจากไฟล์ .csv หรือ .jsonl
+
+    ข้อมูลเดิมของ CSV คือรายการค่าทุกคอลัมน์ตามที่อ่านได้ ของ JSONL คือ object เดิมหรือข้อความบรรทัดที่แปลงไม่ได้
+    """
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        if is_jsonl(path):
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                if not isinstance(row, dict):
+                    yield line_no, None, line.rstrip('\r\n')
+                    continue
+                yield line_no, {normalize_key(k): v for k, v in row.items()}, row
+        else:
+            reader = csv.reader(f)
+            header = [normalize_key(k) for k in next(reader, [])]
+            for values in reader:
+                if not values:
+                    continue
+                # คอลัมน์เกินหัวตาราง = แถวผิดรูปแบบ, ขาดไปถือว่าว่าง
+                if len(values) > len(header):
+                    yield reader.line_num, None, values
+                    continue
+                yield reader.line_num, dict(zip(header, values + [''] * (len(header) - len(values)))), values
+
+def read_existing_ids(file_path, record_size, id_width):
+    """คืน set ของรหัส (ไบต์ UTF-8) ที่มีอยู่แล้วในไฟล์ อ่านเฉพาะไบต์ของรหัส"""
+    ids = set()
+    if not os.path.exists(file_path):
+        return ids
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % record_size
+    for pos in range(0, usable, record_size):
+        ids.add(data[pos:pos + id_width].rstrip(b'\x00'))
+    return ids
+
+# -----------------------------
+# ตรวจแถว
+# -----------------------------
+def convert_field(value, kind, limit, required, name):
+    """แปลงค่าของฟิลด์ให้พร้อม pack คืน (ค่า, None) หรือ (None, เหตุผลที่ไม่ผ่าน)"""
+    text = '' if value is None else str(value).strip()
+    if not text:
+        if required:
+            return None, f"{name} ว่าง"
+        if kind == 'status':
+            return 1, None
+        if kind == 'int':
+            return None, f"{name} ว่าง"
+    if kind == 'text':
+        encoded = text.encode('utf-8')
+        if len(encoded) > limit:
+            return None, f"{name} ยาว {len(encoded)} ไบต์ (UTF-8) เกิน {limit} ไบต์"
+        return encoded, None
+    if kind == 'status':
+        code = STATUS_VALUES.get(text.lower())
+        if code is None:
+            return None, f"{name} ไม่ถูกต้อง: {text}"
+        return code, None
+    try:
+        number = int(text)
+    except ValueError:
+        return None, f"{name} ไม่ใช่ตัวเลข: {text}"
+    if not limit[0] <= number <= limit[1]:
+        return None, f"{name} ต้องอยู่ระหว่าง {limit[0]}-{limit[1]}: {number}"
+    return number, None
+
+def validate_batch(batch, fields, known_ids):
+    """ตรวจแถวทั้งชุด คืน (ค่าที่พร้อม pack, [(เลขบรรทัด, เหตุผล, ข้อความเดิม)]) และเพิ่มรหัสที่ผ่านลง known_ids"""
+    accepted = []
+    rejected = []
+    id_name = fields[0][0]
+    for line_no, row, raw in batch:
+        if row is None:
+            rejected.append((line_no, "รูปแบบแถวไม่ถูกต้อง", raw))
+            continue
+        missing = [name for name, _, _, required in fields if required and name not in row]
+        if missing:
+            rejected.append((line_no, f"ไม่มีคอลัมน์ {', '.join(missing)}", raw))
+            continue
+        values = []
+        reason = None
+        for name, kind, limit, required in fields:
+            value, reason = convert_field(row.get(name), kind, limit, required, name)
+            if reason:
+                break
+            values.append(value)
+        if reason is None and values[0] in known_ids:
+            reason = f"{id_name} ซ้ำ: {values[0].decode('utf-8')}"
+        if reason:
+            rejected.append((line_no, reason, raw))
+            continue
+        known_ids.add(values[0])
+        accepted.append(values)
+    return accepted, rejected
+
+# -----------------------------
+# นำเข้า
+# -----------------------------
+def default_rejects_path(source_path):
+    return os.path.splitext(source_path)[0] + ('.rejects.jsonl' if is_jsonl(source_path) else '.rejects.csv')
+
+def open_rejects_writer(rejects_path, source_path):
+    """เปิดไฟล์ rejects รูปแบบเดียวกับไฟล์ต้นทาง คืน (ไฟล์, ฟังก์ชันเขียน [(เลขบรรทัด, เหตุผล, ข้อมูลเดิม)])"""
+    f = open(rejects_path, 'w', newline='', encoding='utf-8')
+    if is_jsonl(source_path):
+        def write_rows(rows):
+            for line_no, reason, raw in rows:
+                # บรรทัดที่ไม่ใช่ JSON object เก็บข้อความเดิมไว้ใน REJECT RAW
+                row = dict(raw) if isinstance(raw, dict) else {'REJECT RAW': raw}
+                row.update(zip(REJECT_COLUMNS, (line_no, reason)))
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return f, write_rows
+    header = read_csv_header(source_path)
+    width = len(header)
+    # นำเข้าไฟล์ rejects ซ้ำ: แทนคอลัมน์ REJECT เดิมด้วยผลของรอบนี้
+    if [normalize_key(k) for k in header[-len(REJECT_COLUMNS):]] == REJECT_COLUMNS:
+        header = header[:-len(REJECT_COLUMNS)]
+    writer = csv.writer(f)
+    writer.writerow(header + REJECT_COLUMNS)
+
+    def write_rows(rows):
+        for line_no, reason, raw in rows:
+            # เติมคอลัมน์ที่ขาดให้ครบ คอลัมน์ REJECT จึงอยู่ตำแหน่งเดียวกันทุกแถว (แถวที่เกินหัวตารางเก็บไว้ทั้งหมด)
+            if len(raw) <= width:
+                raw = (raw + [''] * (width - len(raw)))[:len(header)]
+            writer.writerow(raw + [line_no, reason])
+    return f, write_rows
+
+@metrics.timed('storage_operation_seconds', op='bulk_import', file='import')
+def import_file(table, source_path, rejects_path=None, dry_run=False, batch_rows=None):
+    """นำเข้าแถวจากไฟล์ CSV/JSONL ต่อท้าย student.bin หรือ CourseSubject.bin
+
+    คืน dict: rows (แถวทั้งหมด), imported (แถวที่เขียน), rejected (แถวที่ไม่ผ่าน), rejects_path
+    dry_run=True ตรวจอย่างเดียวไม่เขียนไฟล์ข้อมูล (ยังเขียนไฟล์ rejects)
+    """
+    spec = IMPORT_TABLES[table]
+    file_path = spec['file']
+    record_format = struct.Struct(spec['format'])
+    fields = spec['fields']
+    batch_rows = batch_rows or IMPORT_BATCH_ROWS
+    rejects_path = rejects_path or default_rejects_path(source_path)
+    staging_path = file_path + '.import'
+
+    result = {'rows': 0, 'imported': 0, 'rejected': 0, 'rejects_path': None}
+    # จองบัฟเฟอร์ครั้งเดียวและใช้ซ้ำทุกชุด
+    buffer = bytearray(batch_rows * record_format.size)
+    rejects = {'file': None, 'write': None}
+
+    def flush_batch(batch, known_ids, out):
+        accepted, rejected = validate_batch(batch, fields, known_ids)
+        result['rows'] += len(batch)
+        for i, values in enumerate(accepted):
+            record_format.pack_into(buffer, i * record_format.size, *values)
+        if out is not None and accepted:
+            out.write(memoryview(buffer)[:len(accepted) * record_format.size])
+        result['imported'] += len(accepted)
+        if rejected:
+            if rejects['write'] is None:
+                rejects['file'], rejects['write'] = open_rejects_writer(rejects_path, source_path)
+                result['rejects_path'] = rejects_path
+            rejects['write'](rejected)
+            result['rejected'] += len(rejected)
+
+    with trace.span('bulk import', cat='storage', table=table, dry_run=dry_run), \
+            writing(file_path, copy_on_write=not dry_run):
+        known_ids = read_existing_ids(file_path, record_format.size, fields[0][2])
+        out = None if dry_run else open(staging_path, 'w+b')
+        try:
+            batch = []
+            for row in iter_source_rows(source_path):
+                batch.append(row)
+                if len(batch) == batch_rows:
+                    flush_batch(batch, known_ids, out)
+                    batch = []
+            if batch:
+                flush_batch(batch, known_ids, out)
+            if out is not None and result['imported']:
+                out.seek(0)
+                append_staged_records(out, file_path)
+                bump_generation(file_path)
+        finally:
+            if out is not None:
+                out.close()
+                os.remove(staging_path)
+            if rejects['file'] is not None:
+                rejects['file'].close()
+
+    if not dry_run and result['imported']:
+        metrics.record_write(os.path.basename(file_path), result['imported'] * record_format.size)
+        metrics.inc('bulk_imported_records_total', result['imported'], table=table)
+    return result
+
+def append_staged_records(staged, file_path):
+    """ต่อท้ายไฟล์ข้อมูลด้วย record จากไฟล์พัก หากเขียนไม่ครบจะตัดไฟล์ข้อมูลกลับเป็นขนาดเดิม"""
+    with open(file_path, 'ab') as live:
+        start = live.tell()
+        try:
+            shutil.copyfileobj(staged, live)
+            live.flush()
+        except BaseException:
+            live.truncate(start)
+            raise
+
+def print_import_result(result, dry_run=False):
+    print(f"อ่าน {result['rows']} แถว {'ผ่านการตรวจ' if dry_run else 'นำเข้า'} {result['imported']} แถว "
+          f"ไม่ผ่าน {result['rejected']} แถว")
+    if result['rejects_path']:
+        print(f"แถวที่ไม่ผ่านพร้อมเหตุผลอยู่ใน {result['rejects_path']}")
+
+def import_menu(table):
+    """เมนูนำเข้าข้อมูลจากไฟล์ CSV/JSONL"""
+    names = [name for name, _, _, _ in IMPORT_TABLES[table]['fields']]
+    print(f"คอลัมน์: {', '.join(names)} (STATUS ไม่ระบุ = Active)")
+    source_path = input("ป้อนพาธไฟล์ .csv หรือ .jsonl: ").strip().strip('"')
+    if not os.path.isfile(source_path):
+        print("ไม่พบไฟล์ที่ระบุ")
+        return
+    dry_run = input("ตรวจอย่างเดียวโดยไม่บันทึก? (y/n): ").lower() in ('y', 'yes')
+    try:
+        result = import_file(table, source_path, dry_run=dry_run)
+    except (IOError, OSError, ValueError, csv.Error) as e:
+        print(f"เกิดข้อผิดพลาดในการนำเข้าข้อมูล: {e}")
+        return
+    print_import_result(result, dry_run)
@@ -0,0 +1,248 @@
+import os
+import re
+import mmap
+import struct
+from module.cache import bump_generation, writing
+from module import metrics, trace, compact_layout
+from module.query import new_query, where_text, FIELDS, OPERATORS
+
+# -----------------------------
+# อัปเดตนักเรียนแบบกลุ่ม (เงื่อนไข + การกำหนดค่า) ในตำแหน่งเดิม
+# -----------------------------
+# map student.bin เข้าหน่วยความจำแล้วไล่ทุก record ครั้งเดียว อ่านเฉพาะไบต์ของฟิลด์ที่เงื่อนไขใช้
+# และเขียนทับเฉพาะไบต์ของฟิลด์ที่ค่าเปลี่ยน ไม่ถอดรหัสทั้ง record และไม่เขียนไฟล์ใหม่ทั้งไฟล์
+#
+#   bulk_update("status=active and year=4", "status=inactive")
+#   year_end_promotion()                  # เลื่อนชั้นปีและปิดสถานะผู้จบการศึกษาในรอบเดียว
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+STUDENT_FILE_PATH = os.path.join(main_dir, 'student.bin')
+
+STUDENT_RECORD_FORMAT = '<16s50s50s20sBB'
+STUDENT_RECORD_SIZE = struct.calcsize(STUDENT_RECORD_FORMAT)
+
+# ชื่อฟิลด์ (เหมือน query) -> (ตำแหน่งใน record, ความกว้างเป็นไบต์)
+FIELD_LAYOUT = {
+    'id': (0, 16),
+    'first': (16, 50),
+    'last': (66, 50),
+    'major': (116, 20),
+    'year': (136, 1),
+    'status': (137, 1),
+}
+YEAR_POS = FIELD_LAYOUT['year'][0]
+STATUS_POS = FIELD_LAYOUT['status'][0]
+
+# รหัสนักเรียนเป็นคีย์ที่การลงทะเบียนอ้างถึง จึงแก้แบบกลุ่มไม่ได้
+UPDATABLE_FIELDS = ('first', 'last', 'major', 'year', 'status')
+STATUS_CODES = {'active': 1, 'inactive': 0, '1': 1, '0': 0}
+
+# ชั้นปีสุดท้าย นักเรียนที่อยู่ชั้นปีนี้ (หรือสูงกว่า) ถือว่าจบการศึกษาเมื่อสิ้นปีการศึกษา
+FINAL_YEAR = int(os.environ.get('COMPRO_FINAL_YEAR', '4'))
+
+ASSIGNMENT_PATTERN = re.compile(r'^(\w+)\s*(\+=|-=|=)\s*(.+)$')
+
+# -----------------------------
+# อ่านฟิลด์จากไบต์ของ record
+# -----------------------------
+def field_reader(field):
+    """คืนฟังก์ชัน (buffer, pos) -> ค่าของฟิลด์ในรูปแบบเดียวกับที่ query ใช้เปรียบเทียบ"""
+    start, width = FIELD_LAYOUT[field]
+    adjust = FIELDS['student'][field][2] or (lambda v: v)
+    if field == 'year':
+        return lambda buf, pos: buf[pos + start]
+    if field == 'status':
+        return lambda buf, pos: adjust('Active' if buf[pos + start] == 1 else 'Inactive')
+    return lambda buf, pos: adjust(buf[pos + start:pos + start + width].strip(b'\x00')
+                                   .decode('utf-8', errors='replace'))
+
+def compile_predicates(text):
+    """แปลงเงื่อนไขแบบเดียวกับเมนู query ('year=4 and status=active') เป็นฟังก์ชัน (buffer, pos) -> bool"""
+    query = new_query('student')
+    if text and text.strip():
+        where_text(query, text)
+    if query['joins']:
+        raise ValueError("อัปเดตแบบกลุ่มใช้ได้เฉพาะเงื่อนไขของฟิลด์นักเรียน")
+    checks = [(field_reader(field), OPERATORS[op], value) for _, field, op, value in query['where']]
+
+    def matches(buf, pos):
+        for read, compare, value in checks:
+            try:
+                if not compare(read(buf, pos), value):
+                    return False
+            except TypeError:
+                return False
+        return True
+    return matches
+
+def parse_assignments(text):
+    """แปลง 'year+=1, status=inactive' เป็นรายการ (ฟิลด์, ตัวดำเนินการ, ค่า)
+
+    ฟิลด์ข้อความต้องมีความยาวไม่เกินความกว้างของฟิลด์หลังแปลงเป็น UTF-8 (ไม่ตัดทิ้งเงียบ ๆ)
+    """
+    assignments = []
+    for part in text.split(','):
+        match = ASSIGNMENT_PATTERN.match(part.strip())
+        if not match:
+            raise ValueError(f"การกำหนดค่าไม่ถูกต้อง: {part.strip()}")
+        field, op, value_text = match.groups()
+        field = field.lower()
+        value_text = value_text.strip().strip('"')
+        if field not in UPDATABLE_FIELDS:
+            raise ValueError(f"แก้ฟิลด์ {field} แบบกลุ่มไม่ได้ (ใช้ได้: {', '.join(UPDATABLE_FIELDS)})")
+        if op != '=' and field != 'year':
+            raise ValueError(f"ใช้ {op} ได้เฉพาะกับ year")
+        if field == 'year':
+            try:
+                value = int(value_text)
+            except ValueError:
+                raise ValueError(f"ค่าของ year ไม่ถูกต้อง: {value_text}")
+        elif field == 'status':
+            if value_text.lower() not in STATUS_CODES:
+                raise ValueError(f"ค่าของ status ไม่ถูกต้อง: {value_text}")
+            value = STATUS_CODES[value_text.lower()]
+        else:
+            value = value_text.encode('utf-8')
+            width = FIELD_LAYOUT[field][1]
+            if len(value) > width:
+                raise ValueError(f"ค่าของ {field} ยาว {len(value)} ไบต์ เกินความกว้าง {width} ไบต์")
+            value = value.ljust(width, b'\x00')
+        assignments.append((field, op, value))
+    return assignments
+
+def compile_assignments(assignments):
+    """คืนฟังก์ชัน (buffer, pos) -> True หาก record เปลี่ยน (เขียนทับเฉพาะไบต์ที่ค่าต่างจากเดิม)
+
+    ชั้นปีที่คำนวณแล้วอยู่นอกช่วง 0-255 ทำให้ record นั้นไม่ถูกแก้ (คืน None)
+    """
+    def apply(buf, pos):
+        changes = []
+        for field, op, value in assignments:
+            start, width = FIELD_LAYOUT[field]
+            if field == 'year':
+                new = buf[pos + start] + value if op == '+=' else buf[pos + start] - value if op == '-=' else value
+                if not 0 <= new <= 255:
+                    return None
+                new = bytes((new,))
+            elif field == 'status':
+                new = bytes((value,))
+            else:
+                new = value
+            if buf[pos + start:pos + start + width] != new:
+                changes.append((pos + start, width, new))
+        for at, width, new in changes:
+            buf[at:at + width] = new
+        return bool(changes)
+    return apply
+
+# -----------------------------
+# ไล่ record ครั้งเดียวและแก้ในตำแหน่งเดิม
+# -----------------------------
+def stream_update(matches, apply, dry_run=False, file_path=STUDENT_FILE_PATH):
+    """ไล่ทุก record ของ student.bin แล้วแก้ record ที่ตรงเงื่อนไขในตำแหน่งเดิม
+
+    คืน dict: records (จำนวนทั้งหมด), matched (ตรงเงื่อนไข), changed (ค่าเปลี่ยน), skipped (แก้ไม่ได้)
+    dry_run=True นับผลโดยไม่เขียนไฟล์
+    """
+    result = {'records': 0, 'matched': 0, 'changed': 0, 'skipped': 0}
+    if not os.path.exists(file_path) or os.path.getsize(file_path) < STUDENT_RECORD_SIZE:
+        return result
+    if compact_layout.detect_version(file_path) == 2:
+        raise ValueError("student.bin เป็นรูปแบบ v2 แปลงกลับเป็น v1 ด้วย convert_layout.py ก่อน")
+
+    with trace.span('bulk update students', cat='storage', dry_run=dry_run), \
+            writing(file_path, copy_on_write=not dry_run), open(file_path, 'r+b') as f:
+        # ACCESS_COPY ให้แก้ได้ในหน่วยความจำโดยไม่เขียนกลับไฟล์ (ใช้ตอน dry run)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY if dry_run else mmap.ACCESS_WRITE)
+        try:
+            usable = len(mm) - len(mm) % STUDENT_RECORD_SIZE
+            result['records'] = usable // STUDENT_RECORD_SIZE
+            for pos in range(0, usable, STUDENT_RECORD_SIZE):
+                if not matches(mm, pos):
+                    continue
+                result['matched'] += 1
+                changed = apply(mm, pos)
+                if changed is None:
+                    result['skipped'] += 1
+                elif changed:
+                    result['changed'] += 1
+            if result['changed'] and not dry_run:
+                mm.flush()
+        finally:
+            mm.close()
+
+    metrics.record_read('student.bin', usable, result['records'])
+    if result['changed'] and not dry_run:
+        # การเขียนผ่าน mmap ไม่รับประกันว่า mtime เปลี่ยนทันที ตั้งเองเพื่อให้ดัชนีที่อ้างถึงไฟล์สร้างใหม่
+        os.utime(file_path)
+        bump_generation(file_path)
+        metrics.record_write('student.bin', result['changed'] * STUDENT_RECORD_SIZE)
+        metrics.inc('bulk_updated_records_total', result['changed'])
+    return result
+
+@metrics.timed('storage_operation_seconds', op='bulk_update', file='student.bin')
+def bulk_update(condition, assignments, dry_run=False, file_path=STUDENT_FILE_PATH):
+    """แก้ทุกนักเรียนที่ตรงเงื่อนไข เช่น bulk_update("major=it and year=1", "major=Information Tech")"""
+    return stream_update(compile_predicates(condition), compile_assignments(parse_assignments(assignments)),
+                         dry_run, file_path)
+
+@metrics.timed('storage_operation_seconds', op='bulk_update', file='student.bin')
+def year_end_promotion(final_year=FINAL_YEAR, dry_run=False, file_path=STUDENT_FILE_PATH):
+    """เลื่อนชั้นปีของนักเรียน Active ทุกคน และเปลี่ยนผู้ที่อยู่ชั้นปี final_year ขึ้นไปเป็น Inactive (รอบเดียว)"""
+    def is_active(buf, pos):
+        return buf[pos + STATUS_POS] == 1
+
+    def promote(buf, pos):
+        year = buf[pos + YEAR_POS]
+        if year >= final_year:
+            buf[pos + STATUS_POS] = 0
+        else:
+            buf[pos + YEAR_POS] = year + 1
+        return True
+    return stream_update(is_active, promote, dry_run, file_path)
+
+# -----------------------------
+# เมนู
+# -----------------------------
+def print_bulk_result(result, done):
+    print(f"ตรวจ {result['records']} รายการ ตรงเงื่อนไข {result['matched']} รายการ "
+          f"{'แก้ไขแล้ว' if done else 'จะถูกแก้ไข'} {result['changed']} รายการ"
+          + (f" (แก้ไม่ได้ {result['skipped']} รายการ)" if result['skipped'] else ""))
+
+def bulk_update_menu():
+    """เมนูอัปเดตนักเรียนแบบกลุ่ม (แสดงจำนวนที่จะเปลี่ยนก่อนยืนยัน)"""
+    print("1. เลื่อนชั้นปีเมื่อสิ้นปีการศึกษา (ชั้นปี +1, ชั้นปีสุดท้ายเปลี่ยนเป็น Inactive)")
+    print("2. กำหนดเงื่อนไขและค่าที่ต้องการแก้เอง")
+    choice = input("กรุณาเลือก (1-2): ").strip()
+    if choice == '1':
+        text = input(f"ชั้นปีสุดท้าย (Enter = {FINAL_YEAR}): ").strip()
+        try:
+            final_year = int(text) if text else FINAL_YEAR
+        except ValueError:
+            print("ชั้นปีไม่ถูกต้อง")
+            return
+        run = lambda dry_run: year_end_promotion(final_year, dry_run)
+    elif choice == '2':
+        condition = input("เงื่อนไข เช่น status=active and year=4 (Enter = ทุกคน): ").strip()
+        assignments = input("ค่าที่ต้องการแก้ เช่น year+=1, status=inactive: ").strip()
+        try:
+            matches = compile_predicates(condition)
+            apply = compile_assignments(parse_assignments(assignments))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        run = lambda dry_run: stream_update(matches, apply, dry_run)
+    else:
+        print("ตัวเลือกไม่ถูกต้อง")
+        return
+
+    try:
+        preview = run(True)
+        print_bulk_result(preview, done=False)
+        if not preview['changed']:
+            return
+        if input("ยืนยันการแก้ไข? (y/n): ").lower() not in ('y', 'yes'):
+            return
+        print_bulk_result(run(False), done=True)
+    except (IOError, OSError, ValueError) as e:
+        print(f"เกิดข้อผิดพลาดในการอัปเดตข้อมูลนักเรียน: {e}")
@@ -0,0 +1,152 @@
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from module import metrics, trace
+
+# -----------------------------
+# แคชข้อมูลที่ถอดรหัสแล้ว (LRU)
+# -----------------------------
+# งบหน่วยความจำสูงสุดของแคช (ไบต์)
+CACHE_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# ตัวคูณประมาณขนาดของ dict ที่ถอดรหัสแล้วเทียบกับขนาดไฟล์ .bin
+DECODED_SIZE_FACTOR = 8
+
+# key -> (signature, records, cost)
+_cache = OrderedDict()
+_cache_bytes = 0
+
+# เลข generation ของแต่ละไฟล์ เพิ่มขึ้นทุกครั้งที่มีการเขียนไฟล์ในโปรเซสนี้
+_generations = {}
+
+# ล็อกการแก้ _cache, _cache_bytes และ _generations (เธรด warm-up กับเมนูใช้แคชพร้อมกันได้)
+# ไม่ถือล็อกระหว่างอ่านไฟล์ด้วย loader
+_cache_lock = threading.RLock()
+
+def file_generation(file_path):
+    """คืนค่า generation ปัจจุบันของไฟล์"""
+    return _generations.get(os.path.abspath(file_path), 0)
+
+def bump_generation(file_path):
+    """เพิ่ม generation ของไฟล์ ต้องเรียกทุกครั้งหลังเขียนหรือลบไฟล์"""
+    path = os.path.abspath(file_path)
+    with _cache_lock:
+        _generations[path] = _generations.get(path, 0) + 1
+        return _generations[path]
+
+# -----------------------------
+# การเขียนไฟล์ขณะมี snapshot
+# -----------------------------
+# snapshot ถือล็อกนี้ระหว่างสร้าง hardlink เพื่อให้ทุกไฟล์เป็นข้อมูล ณ จุดเวลาเดียวกัน
+_write_lock = threading.RLock()
+
+def write_lock():
+    """คืนล็อกการเขียนไฟล์ข้อมูลของโปรเซสนี้"""
+    return _write_lock
+
+def detach_shared_file(file_path):
+    """หากไฟล์ยังใช้ inode ร่วมกับ snapshot (มี hardlink) ให้คัดลอกเป็นไฟล์ใหม่แทน (copy-on-write)
+
+    copy2 คง mtime เดิมไว้ แคชและดัชนีที่ผูกกับลายเซ็นของไฟล์จึงยังใช้ได้
+    """
+    try:
+        if os.stat(file_path).st_nlink <= 1:
+            return False
+    except OSError:
+        return False
+    tmp_path = file_path + '.cow'
+    shutil.copy2(file_path, tmp_path)
+    os.replace(tmp_path, file_path)
+    return True
+
+@contextmanager
+def writing(file_path, copy_on_write=True):
+    """ครอบการเขียนไฟล์ข้อมูล: ถือล็อกการเขียน และแยกไฟล์ออกจาก snapshot ก่อนเขียนแบบ in-place
+
+    การเขียนที่สร้างไฟล์ใหม่แล้ว os.replace ไม่แตะ inode เดิม ใช้ copy_on_write=False ได้
+    """
+    with _write_lock:
+        if copy_on_write:
+            detach_shared_file(file_path)
+        yield
+
+def file_signature(file_path):
+    """คืนลายเซ็นของไฟล์ (mtime, size, generation) หรือ None หากไม่มีไฟล์"""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, file_generation(file_path))
+
+def _evict(budget):
+    """ลบรายการที่ใช้ล่าสุดนานที่สุดออกจนขนาดรวมไม่เกินงบ (ผู้เรียกถือ _cache_lock)"""
+    global _cache_bytes
+    while _cache and _cache_bytes > budget:
+        _, (_, _, cost) = _cache.popitem(last=False)
+        _cache_bytes -= cost
+
+def get_cached_records(file_path, kind, loader, copy=True):
+    """คืนรายการ record ที่ถอดรหัสแล้วจากแคช หรือโหลดใหม่จากไฟล์เมื่อข้อมูลเปลี่ยน
+
+    kind แยกรูปแบบการถอดรหัสของไฟล์เดียวกัน (เช่น student.py กับ report.py)
+    หาก copy เป็น True จะคืนสำเนาของแต่ละ dict เพื่อให้ผู้เรียกแก้ไขได้โดยไม่กระทบแคช
+    """
+    global _cache_bytes
+    key = (os.path.abspath(file_path), kind)
+    signature = file_signature(file_path)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        hit = entry is not None and entry[0] == signature
+        if hit:
+            _cache.move_to_end(key)
+            records = entry[1]
+        elif entry is not None:
+            del _cache[key]
+            _cache_bytes -= entry[2]
+    if hit:
+        metrics.inc('cache_requests_total', result='hit', kind=kind)
+    else:
+        metrics.inc('cache_requests_total', result='miss', kind=kind)
+        with trace.span(f'cache miss {kind}', cat='cache') as span_args:
+            records = loader(file_path)
+            span_args['records'] = len(records)
+        # อ่านลายเซ็นอีกครั้ง หากไฟล์เปลี่ยนระหว่างอ่านจะไม่เก็บลงแคช
+        if file_signature(file_path) == signature:
+            cost = max(signature[1] if signature else 0, 1) * DECODED_SIZE_FACTOR
+            with _cache_lock:
+                # อีกเธรดอาจเก็บหรือแทนรายการนี้ไปแล้วระหว่างอ่านไฟล์
+                old = _cache.pop(key, None)
+                if old is not None:
+                    _cache_bytes -= old[2]
+                if cost <= CACHE_MEMORY_BUDGET:
+                    _cache[key] = (signature, records, cost)
+                    _cache_bytes += cost
+                    _evict(CACHE_MEMORY_BUDGET)
+
+    if copy:
+        return [dict(r) for r in records]
+    return records
+
+def invalidate_cache(file_path=None):
+    """ล้างแคชของไฟล์ที่ระบุ หรือทั้งหมดหากไม่ระบุ"""
+    global _cache_bytes
+    with _cache_lock:
+        if file_path is None:
+            _cache.clear()
+            _cache_bytes = 0
+            return
+        path = os.path.abspath(file_path)
+        for key in [k for k in _cache if k[0] == path]:
+            _cache_bytes -= _cache.pop(key)[2]
+
+def cache_info():
+    """คืนข้อมูลสรุปของแคช (จำนวนรายการ, ขนาดโดยประมาณ, งบ)"""
+    with _cache_lock:
+        return {
+            'entries': len(_cache),
+            'bytes': _cache_bytes,
+            'budget': CACHE_MEMORY_BUDGET
+        }
@@ -0,0 +1,133 @@
+import os
+import json
+import struct
+from datetime import datetime
+from module.cache import writing
+from module import metrics
+
+# -----------------------------
+# Change data capture (CDC) ของการลงทะเบียน
+# -----------------------------
+# ทุกการเพิ่ม/แก้ไข/ลบการลงทะเบียนถูกต่อท้ายเป็น event ใน cdc/events.log (ไม่แก้ไขย้อนหลัง)
+# event มีขนาดคงที่ offset ของ event จึงเป็นลำดับของ event ในไฟล์ และอ่านจาก offset ใดก็ได้ด้วยการ seek
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+CDC_DIR = os.path.join(main_dir, 'cdc')
+EVENT_LOG_FILE_PATH = os.path.join(CDC_DIR, 'events.log')
+OFFSETS_FILE_PATH = os.path.join(CDC_DIR, 'offsets.json')
+
+# offset, ชนิด event, เวลาที่เกิด event แล้วตามด้วย record การลงทะเบียนหลังเปลี่ยน (รูปแบบเดียวกับ registration.bin)
+EVENT_HEADER_FORMAT = '<QBd'
+EVENT_HEADER_SIZE = struct.calcsize(EVENT_HEADER_FORMAT)
+REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
+REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
+EVENT_SIZE = EVENT_HEADER_SIZE + REGISTRATION_RECORD_SIZE
+
+OPERATIONS = {'add': 1, 'update': 2, 'delete': 3}
+OPERATION_NAMES = {code: name for name, code in OPERATIONS.items()}
+
+# จำนวน event ต่อ batch เริ่มต้นของผู้อ่าน
+DEFAULT_BATCH_SIZE = 100
+
+def event_count(file_path=EVENT_LOG_FILE_PATH):
+    """คืนจำนวน event ที่เขียนครบในไฟล์ (= offset ของ event ถัดไป)"""
+    try:
+        return os.path.getsize(file_path) // EVENT_SIZE
+    except OSError:
+        return 0
+
+# -----------------------------
+# เขียน event
+# -----------------------------
+def append_events(operation, records, file_path=EVENT_LOG_FILE_PATH):
+    """ต่อท้าย event ชนิด operation ('add', 'update', 'delete') ของ record การลงทะเบียนไบนารีแต่ละรายการ
+
+    คืน offset ของ event แรกที่เขียน (หรือ None หากเขียนไม่สำเร็จ)
+    """
+    if not records:
+        return None
+    code = OPERATIONS[operation]
+    now = datetime.now().timestamp()
+    try:
+        os.makedirs(CDC_DIR, exist_ok=True)
+        with writing(file_path), open(file_path, 'ab') as f:
+            # ตัด event ท้ายไฟล์ที่เขียนไม่ครบ (เช่นโปรแกรมหยุดกลางคัน) offset จึงต่อเนื่องเสมอ
+            first_offset = f.tell() // EVENT_SIZE
+            if f.tell() != first_offset * EVENT_SIZE:
+                f.truncate(first_offset * EVENT_SIZE)
+                f.seek(first_offset * EVENT_SIZE)
+            f.write(b''.join(struct.pack(EVENT_HEADER_FORMAT, first_offset + i, code, now) + record
+                             for i, record in enumerate(records)))
+        metrics.record_write('cdc', len(records) * EVENT_SIZE)
+        metrics.inc('cdc_events_total', len(records), op=operation)
+        return first_offset
+    except IOError as e:
+        print(f"เกิดข้อผิดพลาดในการบันทึก CDC event: {e}")
+        return None
+
+def append_event(operation, record):
+    return append_events(operation, [record])
+
+# -----------------------------
+# อ่าน event
+# -----------------------------
+def decode_event(event_data):
+    """แปลง event ไบนารีเป็น dict"""
+    offset, code, event_time = struct.unpack_from(EVENT_HEADER_FORMAT, event_data)
+    register_id, student_id, course_id, registration_date, status = struct.unpack_from(
+        REGISTRATION_RECORD_FORMAT, event_data, EVENT_HEADER_SIZE)
+    return {
+        'offset': offset,
+        'op': OPERATION_NAMES.get(code, 'unknown'),
+        'time': datetime.fromtimestamp(event_time).isoformat(),
+        'register_id': register_id,
+        'student_id': student_id.strip(b'\x00').decode('utf-8', errors='replace'),
+        'course_id': course_id.strip(b'\x00').decode('utf-8', errors='replace'),
+        'registration_date': datetime.fromtimestamp(registration_date).isoformat(),
+        'status': 'Registered' if status == 1 else 'Dropped'
+    }
+
+def read_events(from_offset=0, limit=DEFAULT_BATCH_SIZE, file_path=EVENT_LOG_FILE_PATH):
+    """คืน event ตั้งแต่ offset from_offset ไม่เกิน limit รายการ (อ่านเฉพาะช่วงที่ต้องการ)"""
+    end = min(event_count(file_path), from_offset + limit)
+    if from_offset >= end:
+        return []
+    with open(file_path, 'rb') as f:
+        f.seek(from_offset * EVENT_SIZE)
+        data = f.read((end - from_offset) * EVENT_SIZE)
+    metrics.record_read('cdc', len(data), end - from_offset)
+    return [decode_event(data[pos:pos + EVENT_SIZE]) for pos in range(0, len(data), EVENT_SIZE)]
+
+# -----------------------------
+# ตำแหน่งของผู้อ่าน
+# -----------------------------
+def load_offsets():
+    """คืน dict ชื่อผู้อ่าน -> offset ของ event ถัดไปที่ต้องอ่าน"""
+    try:
+        with open(OFFSETS_FILE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+def get_consumer_offset(consumer):
+    return load_offsets().get(consumer, 0)
+
+def commit_offset(consumer, offset):
+    """บันทึกตำแหน่งของผู้อ่าน (offset ของ event ถัดไปที่ต้องอ่าน)"""
+    offsets = load_offsets()
+    offsets[consumer] = offset
+    os.makedirs(CDC_DIR, exist_ok=True)
+    tmp_path = OFFSETS_FILE_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(offsets, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, OFFSETS_FILE_PATH)
+
+def poll(consumer, batch_size=DEFAULT_BATCH_SIZE, commit=True):
+    """อ่าน event batch ถัดไปของผู้อ่าน หาก commit เป็น True จะบันทึกตำแหน่งใหม่ทันที
+
+    ผู้อ่านที่ต้องการประมวลผลให้สำเร็จก่อนขยับตำแหน่ง ใช้ commit=False แล้วเรียก commit_offset เอง
+    """
+    events = read_events(get_consumer_offset(consumer), batch_size)
+    if events and commit:
+        commit_offset(consumer, events[-1]['offset'] + 1)
+    return events
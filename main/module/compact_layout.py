@@ -0,0 +1,250 @@
+import os
+import struct
+
+# -----------------------------
+# รูปแบบไฟล์ v2 (กะทัดรัด) ของนักเรียนและการลงทะเบียน
+# -----------------------------
+# v1 คือ record ความกว้างคงที่เดิม (student 138 ไบต์, registration 45 ไบต์) ที่โปรแกรมใช้แก้ไขในตำแหน่งเดิม
+# v2 เก็บสตริงไว้ใน heap (ความยาว 1 ไบต์ + ข้อความ ไม่ซ้ำกัน) และ record อ้างถึงด้วย offset
+# ฟิลด์ที่มีค่าไม่กี่แบบ (MAJOR, รหัสนักเรียน/รายวิชาในการลงทะเบียน) เก็บเป็นรหัสของ dictionary
+# และเวลาลงทะเบียนเก็บเป็น uint32 (ความละเอียดระดับวินาที)
+#
+# ไฟล์ v2: header | dictionary 1 | dictionary 2 | record | heap (dictionary เก็บสตริงเรียงกันตามรหัส)
+# ไฟล์ v1 ไม่มี header: record แรกของนักเรียนขึ้นต้นด้วยรหัสนักเรียน และของการลงทะเบียนขึ้นต้นด้วย ID ที่ไม่เป็น 0
+# magic ที่ขึ้นต้นด้วยไบต์ 0 สี่ไบต์จึงแยกสองรูปแบบออกจากกันได้
+LAYOUT_MAGIC = b'\x00\x00\x00\x00CRV2'
+HEADER_FORMAT = '<8sBBIIII'     # magic, ชนิดไฟล์, เวอร์ชัน, จำนวน record, ไบต์ของ dictionary 1, ไบต์ของ dictionary 2, ขนาด heap
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+KIND_CODES = {'student': 1, 'registration': 2}
+
+# ชื่อไฟล์ -> ชนิดไฟล์ที่แปลงรูปแบบได้
+FILE_KINDS = {'student.bin': 'student', 'registration.bin': 'registration'}
+
+STUDENT_V1_FORMAT = '<16s50s50s20sBB'
+STUDENT_V1_SIZE = struct.calcsize(STUDENT_V1_FORMAT)
+# offset รหัสนักเรียน, offset ชื่อ, offset นามสกุล, รหัส MAJOR, ชั้นปี, สถานะ
+STUDENT_V2_FORMAT = '<IIIHBB'
+STUDENT_V2_SIZE = struct.calcsize(STUDENT_V2_FORMAT)
+
+REGISTRATION_V1_FORMAT = '<I16s16sdB'
+REGISTRATION_V1_SIZE = struct.calcsize(REGISTRATION_V1_FORMAT)
+# ID, รหัสนักเรียน (dictionary 1), รหัสรายวิชา (dictionary 2), เวลา (วินาที), สถานะ
+# รหัสนักเรียนใช้ 2 ไบต์เมื่อ dictionary มีไม่เกิน 65536 ค่า (ดูจากขนาด dictionary ใน header)
+REGISTRATION_V2_FORMAT = '<IHHIB'
+REGISTRATION_V2_WIDE_FORMAT = '<IIHIB'
+
+def registration_row_format(student_count):
+    return REGISTRATION_V2_FORMAT if student_count <= 0x10000 else REGISTRATION_V2_WIDE_FORMAT
+
+# แถวที่อ่าน/เขียนเป็น tuple ชุดเดียวกันทั้งสองเวอร์ชัน
+#   นักเรียน: (รหัสนักเรียน, ชื่อ, นามสกุล, สาขา, ชั้นปี, สถานะ)
+#   การลงทะเบียน: (ID, รหัสนักเรียน, รหัสวิชา, timestamp, สถานะ)
+
+def detect_version(file_path):
+    """คืนเวอร์ชันของไฟล์ (1 หรือ 2) จาก magic ของ header ไฟล์ที่ว่างหรือไม่มีถือเป็น v1"""
+    try:
+        with open(file_path, 'rb') as f:
+            magic = f.read(len(LAYOUT_MAGIC))
+    except IOError:
+        return 1
+    return 2 if magic == LAYOUT_MAGIC else 1
+
+def kind_for_path(file_path):
+    """คืนชนิดไฟล์ตามชื่อไฟล์ หรือ None หากไม่รองรับ"""
+    return FILE_KINDS.get(os.path.basename(file_path))
+
+def decode_text(raw):
+    return raw.strip(b'\x00').decode('utf-8', errors='replace')
+
+# -----------------------------
+# heap ของสตริง
+# -----------------------------
+def encode_string(text):
+    """คืนไบต์ของสตริง (ความยาว 1 ไบต์ + ข้อความ UTF-8)"""
+    raw = text.encode('utf-8')
+    if len(raw) > 255:
+        raise ValueError(f"ข้อความยาวเกิน 255 ไบต์: {text[:20]}...")
+    return bytes([len(raw)]) + raw
+
+def new_heap():
+    """สร้าง heap ว่างสำหรับสะสมสตริงที่ไม่ซ้ำกัน"""
+    return {'offsets': {}, 'chunks': [], 'size': 0}
+
+def heap_add(heap, text):
+    """คืน offset ของสตริงใน heap (เพิ่มใหม่หากยังไม่มี)"""
+    offset = heap['offsets'].get(text)
+    if offset is None:
+        encoded = encode_string(text)
+        offset = heap['size']
+        heap['offsets'][text] = offset
+        heap['chunks'].append(encoded)
+        heap['size'] += len(encoded)
+    return offset
+
+def heap_reader(heap):
+    """คืนฟังก์ชันอ่านสตริงจาก offset ใน heap (จำสตริงที่ถอดรหัสแล้วไว้ เพราะค่าซ้ำกันบ่อย)"""
+    decoded = {}
+
+    def string_at(offset):
+        text = decoded.get(offset)
+        if text is None:
+            length = heap[offset]
+            text = heap[offset + 1:offset + 1 + length].decode('utf-8', errors='replace')
+            decoded[offset] = text
+        return text
+    return string_at
+
+def build_dictionary(values):
+    """คืน (dict ค่า -> รหัส, ไบต์ของ dictionary) รหัสเรียงตามลำดับที่พบ"""
+    codes = {}
+    for value in values:
+        if value not in codes:
+            codes[value] = len(codes)
+    return codes, b''.join(encode_string(value) for value in codes)
+
+def read_dictionary(data):
+    """คืนรายการสตริงของ dictionary ตามรหัส"""
+    values = []
+    pos = 0
+    while pos < len(data):
+        length = data[pos]
+        values.append(data[pos + 1:pos + 1 + length].decode('utf-8', errors='replace'))
+        pos += 1 + length
+    return values
+
+def split_v2(data, kind):
+    """ตรวจ header แล้วคืน (จำนวน record, dictionary 1, dictionary 2, ไบต์ของ record, heap)"""
+    if len(data) < HEADER_SIZE:
+        raise ValueError("ไฟล์ v2 สั้นกว่า header")
+    magic, kind_code, version, count, dict1_size, dict2_size, heap_size = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != LAYOUT_MAGIC or version != 2 or kind_code != KIND_CODES[kind]:
+        raise ValueError("header ของไฟล์ v2 ไม่ถูกต้อง")
+    dict2_start = HEADER_SIZE + dict1_size
+    rows_start = dict2_start + dict2_size
+    heap_start = len(data) - heap_size
+    if heap_start < rows_start:
+        raise ValueError("ขนาดไฟล์ v2 ไม่ตรงกับ header")
+    return (count, read_dictionary(data[HEADER_SIZE:dict2_start]), read_dictionary(data[dict2_start:rows_start]),
+            data[rows_start:heap_start], data[heap_start:])
+
+def check_rows(rows_data, count, row_format):
+    if len(rows_data) != count * struct.calcsize(row_format):
+        raise ValueError("ขนาดไฟล์ v2 ไม่ตรงกับ header")
+
+# -----------------------------
+# นักเรียน
+# -----------------------------
+def encode_students_v2(rows):
+    """แปลงแถวนักเรียนเป็นไบต์ของไฟล์ v2"""
+    heap = new_heap()
+    majors, major_table = build_dictionary(row[3] for row in rows)
+    if len(majors) > 0x10000:
+        raise ValueError("จำนวน MAJOR เกินกว่าที่ v2 รองรับ")
+    packed = b''.join(struct.pack(STUDENT_V2_FORMAT, heap_add(heap, student_id), heap_add(heap, first_name),
+                                  heap_add(heap, last_name), majors[major], year_level, status)
+                      for student_id, first_name, last_name, major, year_level, status in rows)
+    header = struct.pack(HEADER_FORMAT, LAYOUT_MAGIC, KIND_CODES['student'], 2,
+                         len(rows), len(major_table), 0, heap['size'])
+    return header + major_table + packed + b''.join(heap['chunks'])
+
+def decode_students_v2(data):
+    count, majors, _, rows_data, heap = split_v2(data, 'student')
+    check_rows(rows_data, count, STUDENT_V2_FORMAT)
+    string_at = heap_reader(heap)
+    return [(string_at(sid), string_at(first), string_at(last), majors[major], year_level, status)
+            for sid, first, last, major, year_level, status in struct.iter_unpack(STUDENT_V2_FORMAT, rows_data)]
+
+def encode_students_v1(rows):
+    return b''.join(struct.pack(STUDENT_V1_FORMAT,
+                                student_id.encode('utf-8')[:16].ljust(16, b'\x00'),
+                                first_name.encode('utf-8')[:50].ljust(50, b'\x00'),
+                                last_name.encode('utf-8')[:50].ljust(50, b'\x00'),
+                                major.encode('utf-8')[:20].ljust(20, b'\x00'),
+                                year_level, status)
+                    for student_id, first_name, last_name, major, year_level, status in rows)
+
+def decode_students_v1(data):
+    usable = len(data) - len(data) % STUDENT_V1_SIZE
+    return [(decode_text(sid), decode_text(first), decode_text(last), decode_text(major), year_level, status)
+            for sid, first, last, major, year_level, status in
+            struct.iter_unpack(STUDENT_V1_FORMAT, data[:usable])]
+
+# -----------------------------
+# การลงทะเบียน
+# -----------------------------
+def encode_registrations_v2(rows):
+    """แปลงแถวการลงทะเบียนเป็นไบต์ของไฟล์ v2 (สตริงทั้งหมดอยู่ใน dictionary จึงไม่มี heap)"""
+    students, student_table = build_dictionary(row[1] for row in rows)
+    courses, course_table = build_dictionary(row[2] for row in rows)
+    if len(courses) > 0x10000:
+        raise ValueError("จำนวนรายวิชาเกินกว่าที่ v2 รองรับ")
+    row_format = registration_row_format(len(students))
+    packed = []
+    for register_id, student_id, course_id, timestamp, status in rows:
+        if not 0 <= timestamp < 2 ** 32:
+            raise ValueError(f"เวลาลงทะเบียนของ ID {register_id} อยู่นอกช่วงของ uint32")
+        packed.append(struct.pack(row_format, register_id, students[student_id],
+                                  courses[course_id], int(timestamp), status))
+    header = struct.pack(HEADER_FORMAT, LAYOUT_MAGIC, KIND_CODES['registration'], 2,
+                         len(rows), len(student_table), len(course_table), 0)
+    return header + student_table + course_table + b''.join(packed)
+
+def decode_registrations_v2(data):
+    count, students, courses, rows_data, _ = split_v2(data, 'registration')
+    row_format = registration_row_format(len(students))
+    check_rows(rows_data, count, row_format)
+    return [(register_id, students[student], courses[course], float(timestamp), status)
+            for register_id, student, course, timestamp, status in
+            struct.iter_unpack(row_format, rows_data)]
+
+def encode_registrations_v1(rows):
+    return b''.join(struct.pack(REGISTRATION_V1_FORMAT, register_id,
+                                student_id.encode('utf-8')[:16].ljust(16, b'\x00'),
+                                course_id.encode('utf-8')[:16].ljust(16, b'\x00'),
+                                timestamp, status)
+                    for register_id, student_id, course_id, timestamp, status in rows)
+
+def decode_registrations_v1(data):
+    usable = len(data) - len(data) % REGISTRATION_V1_SIZE
+    return [(register_id, decode_text(student_id), decode_text(course_id), timestamp, status)
+            for register_id, student_id, course_id, timestamp, status in
+            struct.iter_unpack(REGISTRATION_V1_FORMAT, data[:usable])]
+
+# -----------------------------
+# อ่าน/เขียนไฟล์ทั้งสองเวอร์ชัน
+# -----------------------------
+CODECS = {
+    ('student', 1): (encode_students_v1, decode_students_v1),
+    ('student', 2): (encode_students_v2, decode_students_v2),
+    ('registration', 1): (encode_registrations_v1, decode_registrations_v1),
+    ('registration', 2): (encode_registrations_v2, decode_registrations_v2),
+}
+
+def read_rows(file_path, kind):
+    """อ่านแถวทั้งหมดของไฟล์ (ตรวจเวอร์ชันจาก header) คืนรายการ tuple"""
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    version = 2 if data.startswith(LAYOUT_MAGIC) else 1
+    return CODECS[(kind, version)][1](data)
+
+def write_rows(file_path, kind, rows, version=2):
+    """เขียนแถวทั้งหมดเป็นไฟล์เวอร์ชันที่ระบุ (เขียนไฟล์ชั่วคราวแล้ว os.replace) คืนขนาดไฟล์"""
+    data = CODECS[(kind, version)][0](rows)
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, file_path)
+    return len(data)
+
+def convert_file(file_path, version, kind=None):
+    """แปลงไฟล์เป็นเวอร์ชันที่ระบุ คืน (ขนาดเดิม, ขนาดใหม่)"""
+    kind = kind or kind_for_path(file_path)
+    if kind is None:
+        raise ValueError(f"ไม่รองรับการแปลงไฟล์ {os.path.basename(file_path)}")
+    old_size = os.path.getsize(file_path)
+    if detect_version(file_path) == version:
+        return old_size, old_size
+    return old_size, write_rows(file_path, kind, read_rows(file_path, kind), version)
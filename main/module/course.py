@@ -1,5 +1,11 @@
 import struct
 import os
+from module.cache import get_cached_records, bump_generation, writing
+from module import metrics, trace
+from module.search import search_courses, index_appended_course
+from module.course_index import get_term_summary
+from module.integrity import resolve_dependent_registrations
+from module.bulk_import import import_menu
 
 COURSE_FILE_NAME = 'CourseSubject.bin'
 COURSE_RECORD_FORMAT = '<10s50sB H B B'
@@ -46,15 +52,24 @@ def read_course_record(record_data):
         print(f"เกิดข้อผิดพลาดในการอันแพ็คข้อมูล: {e}")
         return None
 
+@metrics.timed('storage_operation_seconds', op='record_write', file='CourseSubject.bin')
 def write_record_to_file(record, file_path=COURSE_FILE_PATH):
     """เขียนบันทึกข้อมูลลงในไฟล์ไบนารี"""
     try:
-        with open(file_path, 'ab') as f:
+        with writing(file_path), open(file_path, 'ab') as f:
             f.write(record)
+        bump_generation(file_path)
+        metrics.record_write('CourseSubject.bin', len(record))
     except IOError as e:
         print(f"เกิดข้อผิดพลาดในการเขียนไฟล์: {e}")
 
 def read_all_records_from_file(file_path=COURSE_FILE_PATH):
+    """อ่านบันทึกข้อมูลทั้งหมด (ผ่านแคช อ่านดิสก์ใหม่เฉพาะเมื่อไฟล์เปลี่ยน)"""
+    return get_cached_records(file_path, 'course', read_records_from_disk)
+
+@trace.traced('full scan CourseSubject.bin', cat='storage')
+@metrics.timed('storage_operation_seconds', op='full_scan', file='CourseSubject.bin')
+def read_records_from_disk(file_path=COURSE_FILE_PATH):
     """อ่านบันทึกข้อมูลทั้งหมดจากไฟล์ไบนารี"""
     records = []
     try:
@@ -68,10 +83,52 @@ def read_all_records_from_file(file_path=COURSE_FILE_PATH):
                 record = read_course_record(record_data)
                 if record:
                     records.append(record)
+            metrics.record_read('CourseSubject.bin', f.tell(), len(records))
     except IOError as e:
         print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
     return records
 
+@metrics.timed('storage_operation_seconds', op='record_read', file='CourseSubject.bin')
+def read_course_at(offset, file_path=COURSE_FILE_PATH):
+    """อ่านบันทึกข้อมูลรายวิชาหนึ่งรายการจากตำแหน่ง (offset) ในไฟล์"""
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            record_data = f.read(COURSE_RECORD_SIZE)
+        if len(record_data) != COURSE_RECORD_SIZE:
+            return None
+        return read_course_record(record_data)
+    except (IOError, UnicodeDecodeError) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
+        return None
+
+@metrics.timed('storage_operation_seconds', op='record_read', file='CourseSubject.bin')
+def read_courses_at(offsets, file_path=COURSE_FILE_PATH):
+    """อ่านบันทึกข้อมูลรายวิชาเฉพาะตำแหน่งที่ระบุ (เปิดไฟล์ครั้งเดียว)"""
+    records = []
+    try:
+        with open(file_path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                record_data = f.read(COURSE_RECORD_SIZE)
+                if len(record_data) != COURSE_RECORD_SIZE:
+                    continue
+                record = read_course_record(record_data)
+                if record:
+                    records.append(record)
+    except (IOError, UnicodeDecodeError) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
+    return records
+
+@metrics.timed('storage_operation_seconds', op='rewrite', file='CourseSubject.bin')
+def rewrite_course_file(records, file_path=COURSE_FILE_PATH):
+    """เขียนไฟล์รายวิชาใหม่ทั้งไฟล์จากรายการ record ไบนารี"""
+    with writing(file_path), open(file_path, 'wb') as f:
+        for record in records:
+            f.write(record)
+    bump_generation(file_path)
+    metrics.record_write('CourseSubject.bin', len(records) * COURSE_RECORD_SIZE)
+
 def print_course_report(records, title="รายงานรายวิชา"):
     """แสดงรายงานรายวิชาในรูปแบบตาราง"""
     report = ""
@@ -114,6 +171,7 @@ def add_course():
     record = create_course_record(course_id, course_name, credit, academic_year, semester, is_active)
     if record:
         write_record_to_file(record)
+        index_appended_course(course_name)
         print("เพิ่มข้อมูลรายวิชาสำเร็จ!")
 
 def view_all_courses():
@@ -148,63 +206,118 @@ def view_single_course():
     if not found:
         print("ไม่พบรหัสวิชาที่ต้องการดู")
 
+def search_courses_by_name():
+    """ค้นหารายวิชาด้วยชื่อวิชา (ขึ้นต้นด้วย หรือสะกดใกล้เคียง)"""
+    query = input("ป้อนชื่อวิชาที่ต้องการค้นหา: ").strip()
+    if not query:
+        print("กรุณาป้อนคำค้นหา")
+        return
+
+    results = search_courses(query)
+    courses = []
+    for offset, _ in results:
+        course = read_course_at(offset)
+        if course:
+            courses.append(course)
+
+    if not courses:
+        print("ไม่พบรายวิชาที่ตรงกับคำค้นหา")
+        return
+
+    print_course_report(courses, title=f"ผลการค้นหา \"{query}\" ({len(courses)} รายการ)")
+
 def view_filtered_courses():
-    """แสดงข้อมูลรายวิชาที่กรองตามเงื่อนไข"""
+    """แสดงข้อมูลรายวิชาที่กรองตามเงื่อนไข (planner เลือกใช้ดัชนีรหัสวิชา/ปีการศึกษา/ภาคเรียน/สถานะ)"""
     print("\n--- ตัวเลือกการกรอง ---")
     print("1. กรองตามปีการศึกษา")
     print("2. กรองตามภาคเรียน")
     print("3. กรองตามสถานะ (Active)")
     print("4. กรองตามปีการศึกษาและภาคเรียน")
-    print("5. กลับไปเมนูหลัก")
-    filter_choice = input("กรุณาเลือกการกรอง (1-5): ")
-    
-    courses = read_all_records_from_file()
-    if not courses:
+    print("5. กรองตามช่วงปีการศึกษา")
+    print("6. สรุปจำนวนวิชาและหน่วยกิตรายภาคเรียน")
+    print("7. กลับไปเมนูหลัก")
+    print("8. กรองตามเงื่อนไขที่พิมพ์เอง")
+    filter_choice = input("กรุณาเลือกการกรอง (1-8): ")
+
+    if filter_choice == '6':
+        view_term_summary()
+        return
+    if filter_choice == '7':
+        return
+    if filter_choice not in ('1', '2', '3', '4', '5', '8'):
+        print("ตัวเลือกไม่ถูกต้อง")
+        return
+    if not os.path.exists(COURSE_FILE_PATH):
         print("ไม่พบข้อมูลรายวิชาในระบบ")
         return
-    
-    filtered_courses = []
-    
+
+    # นำเข้าในฟังก์ชันเพราะ module.query นำเข้าโมดูลนี้
+    from module.query import new_query, where, run_query_menu, show_query_result
+    title = "รายงานรายวิชาที่กรอง"
+    if filter_choice == '8':
+        run_query_menu('course', "year>=2566 and semester=1 and status=active", print_course_report, title)
+        return
+
+    query = new_query('course')
     if filter_choice == '1':
         try:
-            year = int(input("ป้อนปีการศึกษาที่ต้องการกรอง: "))
-            filtered_courses = [c for c in courses if c and c['ACADEMIC YEAR'] == year]
+            where(query, 'year', '=', int(input("ป้อนปีการศึกษาที่ต้องการกรอง: ")))
         except ValueError:
             print("ปีการศึกษาไม่ถูกต้อง")
             return
-    
+
     elif filter_choice == '2':
         try:
-            sem = int(input("ป้อนภาคเรียนที่ต้องการกรอง (1, 2, 3): "))
-            filtered_courses = [c for c in courses if c and c['SEMESTER'] == sem]
+            where(query, 'semester', '=', int(input("ป้อนภาคเรียนที่ต้องการกรอง (1, 2, 3): ")))
         except ValueError:
             print("ภาคเรียนไม่ถูกต้อง")
             return
-    
+
     elif filter_choice == '3':
-        filtered_courses = [c for c in courses if c and c['STATUS'] == 'Active']
-    
+        where(query, 'status', '=', 'Active')
+
     elif filter_choice == '4':
         try:
             year = int(input("ป้อนปีการศึกษาที่ต้องการกรอง: "))
             sem = int(input("ป้อนภาคเรียนที่ต้องการกรอง (1, 2, 3): "))
-            filtered_courses = [c for c in courses if c and c['ACADEMIC YEAR'] == year and c['SEMESTER'] == sem]
         except ValueError:
             print("ข้อมูลกรองไม่ถูกต้อง")
             return
-    
-    elif filter_choice == '5':
-        return
-    
+        where(query, 'year', '=', year)
+        where(query, 'semester', '=', sem)
+
     else:
-        print("ตัวเลือกไม่ถูกต้อง")
-        return
-    
-    if not filtered_courses:
-        print("ไม่พบข้อมูลที่ตรงตามเงื่อนไขการกรอง")
+        try:
+            year_from = int(input("ป้อนปีการศึกษาเริ่มต้น: "))
+            year_to = int(input("ป้อนปีการศึกษาสิ้นสุด: "))
+        except ValueError:
+            print("ปีการศึกษาไม่ถูกต้อง")
+            return
+        where(query, 'year', '>=', year_from)
+        where(query, 'year', '<=', year_to)
+
+    show_query_result(query, print_course_report, title, show_plan=False)
+
+def view_term_summary():
+    """แสดงสรุปจำนวนวิชาและหน่วยกิตรายภาคเรียนจากดัชนี"""
+    summary = get_term_summary()
+    if not summary:
+        print("ไม่พบข้อมูลรายวิชาในระบบ")
         return
-    
-    print_course_report(filtered_courses, title=f"รายงานรายวิชาที่กรอง ({len(filtered_courses)} รายการ)")
+
+    print("\n==========================================================================")
+    print("                     สรุปรายวิชาแยกตามภาคเรียน")
+    print("==========================================================================")
+    headers = ["ACADEMIC YEAR", "SEMESTER", "COURSES", "ACTIVE", "CREDITS", "ACTIVE CREDITS"]
+    col_widths = [15, 10, 10, 10, 10, 15]
+    header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
+    print(header_line)
+    print("-" * len(header_line))
+    for (academic_year, semester), data in summary:
+        row_data = [academic_year, semester, data['courses'], data['active_courses'],
+                    data['credits'], data['active_credits']]
+        print(" | ".join(f"{str(row_data[i]):<{col_widths[i]}}" for i in range(len(headers))))
+    print("--------------------------------------------------------------------------")
 
 def update_course():
     """แก้ไขข้อมูลรายวิชา"""
@@ -276,9 +389,7 @@ def update_course():
     
     if found:
         try:
-            with open(COURSE_FILE_PATH, 'wb') as f:
-                for record in new_records:
-                    f.write(record)
+            rewrite_course_file(new_records)
             print("แก้ไขข้อมูลสำเร็จ!")
         except IOError as e:
             print(f"เกิดข้อผิดพลาดในการแก้ไขไฟล์: {e}")
@@ -295,24 +406,27 @@ def delete_course():
     for course in courses:
         if course and course['COURSE ID'] == course_id_to_delete:
             found = True
-            print("ลบข้อมูลรายวิชาสำเร็จ!")
         else:
             remaining_records.append(course)
 
     if found:
+        if not resolve_dependent_registrations('course', course_id_to_delete):
+            return
         try:
-            with open(COURSE_FILE_PATH, 'wb') as f:
-                for course in remaining_records:
-                    record = create_course_record(
-                        course['COURSE ID'],
-                        course['COURSE NAME'],
-                        course['CREDIT'],
-                        course['ACADEMIC YEAR'],
-                        course['SEMESTER'],
-                        1 if course['STATUS'] == 'Active' else 0
-                    )
-                    if record:
-                        f.write(record)
+            new_records = []
+            for course in remaining_records:
+                record = create_course_record(
+                    course['COURSE ID'],
+                    course['COURSE NAME'],
+                    course['CREDIT'],
+                    course['ACADEMIC YEAR'],
+                    course['SEMESTER'],
+                    1 if course['STATUS'] == 'Active' else 0
+                )
+                if record:
+                    new_records.append(record)
+            rewrite_course_file(new_records)
+            print("ลบข้อมูลรายวิชาสำเร็จ!")
         except IOError as e:
             print(f"เกิดข้อผิดพลาดในการลบไฟล์: {e}")
     else:
@@ -328,6 +442,8 @@ def course_menu():
         print("4. ดูข้อมูลรายวิชาแบบกรอง")
         print("5. แก้ไขข้อมูลรายวิชา")
         print("6. ลบข้อมูลรายวิชา")
+        print("7. ค้นหารายวิชาด้วยชื่อ")
+        print("8. นำเข้ารายวิชาจากไฟล์ CSV/JSONL")
         print("0. กลับสู่เมนูหลัก")
         choice = input("กรุณาเลือกเมนู (1-0): ")
             
@@ -343,6 +459,10 @@ def course_menu():
             update_course()
         elif choice == '6':
             delete_course()
+        elif choice == '7':
+            search_courses_by_name()
+        elif choice == '8':
+            import_menu('courses')
         elif choice == '0':
             print("ย้อนกลับสู่เมนูหลัก...")
             break
@@ -0,0 +1,99 @@
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from module.index_store import load_index
+
+# -----------------------------
+# Path และ Format
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+COURSE_FILE_PATH = os.path.join(main_dir, 'CourseSubject.bin')
+
+COURSE_RECORD_FORMAT = '<10s50sB H B B'
+COURSE_RECORD_SIZE = struct.calcsize(COURSE_RECORD_FORMAT)
+
+def build_course_index(file_path=COURSE_FILE_PATH):
+    """สร้างดัชนีรายวิชาแบบผสม (ปีการศึกษา, ภาคเรียน, สถานะ) และสรุปรายภาคเรียน"""
+    entries = []
+    terms = {}
+    by_id = {}
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % COURSE_RECORD_SIZE
+        for record_no, unpacked in enumerate(struct.iter_unpack(COURSE_RECORD_FORMAT, data[:usable])):
+            course_id = unpacked[0].strip(b'\x00').decode('utf-8', errors='replace')
+            credit, academic_year, semester, is_active = unpacked[2], unpacked[3], unpacked[4], unpacked[5]
+            entries.append(((academic_year, semester, is_active), record_no))
+            by_id[course_id] = record_no
+
+            term = terms.setdefault((academic_year, semester), {
+                'courses': 0, 'active_courses': 0, 'credits': 0, 'active_credits': 0
+            })
+            term['courses'] += 1
+            term['credits'] += credit
+            if is_active == 1:
+                term['active_courses'] += 1
+                term['active_credits'] += credit
+    entries.sort()
+    return {
+        'keys': [key for key, _ in entries],
+        'records': [record_no for _, record_no in entries],
+        'terms': terms,
+        'by_id': by_id
+    }
+
+def get_course_index(file_path=COURSE_FILE_PATH):
+    """โหลดดัชนีรายวิชา (สร้างใหม่อัตโนมัติเมื่อไฟล์เปลี่ยน)"""
+    return load_index('course_composite', [file_path], lambda: build_course_index(file_path))
+
+def find_course_offsets(academic_year=None, semester=None, is_active=None,
+                        year_from=None, year_to=None, file_path=COURSE_FILE_PATH):
+    """หาตำแหน่ง (offset) ของรายวิชาที่ตรงเงื่อนไข โดยไม่ต้องอ่านไฟล์รายวิชาทั้งไฟล์
+
+    ระบุ academic_year สำหรับปีเดียว หรือ year_from/year_to สำหรับช่วงปี (รวมปีปลาย)
+    """
+    index = get_course_index(file_path)
+    keys = index['keys']
+
+    if academic_year is not None:
+        year_from = year_to = academic_year
+    if year_from is not None and year_to is not None and semester is not None and is_active is not None \
+            and year_from == year_to:
+        # ระบุครบทุกฟิลด์ ใช้ช่วงของคีย์ผสมได้โดยตรง
+        lo = bisect_left(keys, (year_from, semester, is_active))
+        hi = bisect_right(keys, (year_from, semester, is_active))
+    else:
+        lo = 0 if year_from is None else bisect_left(keys, (year_from,))
+        hi = len(keys) if year_to is None else bisect_left(keys, (year_to + 1,))
+
+    offsets = []
+    for i in range(lo, hi):
+        _, key_semester, key_active = keys[i]
+        if semester is not None and key_semester != semester:
+            continue
+        if is_active is not None and key_active != is_active:
+            continue
+        offsets.append(index['records'][i] * COURSE_RECORD_SIZE)
+    offsets.sort()
+    return offsets
+
+def get_term_summary(year_from=None, year_to=None, file_path=COURSE_FILE_PATH):
+    """คืนสรุปจำนวนวิชาและหน่วยกิตรายภาคเรียน [((ปี, ภาค), สรุป)] เรียงตามภาคเรียน"""
+    terms = get_course_index(file_path)['terms']
+    summary = []
+    for (academic_year, semester), data in sorted(terms.items()):
+        if year_from is not None and academic_year < year_from:
+            continue
+        if year_to is not None and academic_year > year_to:
+            continue
+        summary.append(((academic_year, semester), dict(data)))
+    return summary
+
+def find_course_offset_by_id(course_id, file_path=COURSE_FILE_PATH):
+    """หาตำแหน่ง (offset) ของรายวิชาจากรหัสวิชา หรือ None หากไม่พบ"""
+    record_no = get_course_index(file_path)['by_id'].get(course_id)
+    if record_no is None:
+        return None
+    return record_no * COURSE_RECORD_SIZE
@@ -0,0 +1,175 @@
+import os
+import struct
+from module.index_store import (load_index, append_index_delta, get_index_for_append, get_current_index,
+                                source_signature)
+from module import lsm
+
+# -----------------------------
+# หน่วยกิตรวมของนักเรียนต่อภาคเรียน
+# -----------------------------
+# ดัชนี credit_load เก็บหน่วยกิตที่ลงทะเบียนอยู่ของนักเรียนแยกตาม (ปีการศึกษา, ภาคเรียน)
+# ปรับแบบ incremental เมื่อเพิ่มหรือแก้สถานะการลงทะเบียน จึงตรวจเพดานหน่วยกิตได้ด้วยการค้นหา dict ครั้งเดียว
+# ดัชนีอ้างอิงทั้ง registration.bin และ CourseSubject.bin (แก้หน่วยกิต/ภาคเรียนของวิชาแล้วสร้างใหม่อัตโนมัติ)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+REGISTRATION_FILE_PATH = os.path.join(main_dir, 'registration.bin')
+COURSE_FILE_PATH = os.path.join(main_dir, 'CourseSubject.bin')
+SOURCE_PATHS = [REGISTRATION_FILE_PATH, COURSE_FILE_PATH]
+
+REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
+REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
+
+COURSE_RECORD_FORMAT = '<10s50sB H B B'
+COURSE_RECORD_SIZE = struct.calcsize(COURSE_RECORD_FORMAT)
+
+# หน่วยกิตสูงสุด/ต่ำสุดต่อภาคเรียน ตั้งด้วย COMPRO_MAX_CREDITS และ COMPRO_MIN_CREDITS (เพดาน 0 = ไม่จำกัด)
+MAX_TERM_CREDITS = int(os.environ.get('COMPRO_MAX_CREDITS', '22'))
+MIN_TERM_CREDITS = int(os.environ.get('COMPRO_MIN_CREDITS', '9'))
+
+def read_course_terms(file_path=COURSE_FILE_PATH):
+    """คืน dict รหัสวิชา -> (หน่วยกิต, ปีการศึกษา, ภาคเรียน)"""
+    courses = {}
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % COURSE_RECORD_SIZE
+        for unpacked in struct.iter_unpack(COURSE_RECORD_FORMAT, data[:usable]):
+            course_id = unpacked[0].strip(b'\x00').decode('utf-8', errors='replace')
+            courses[course_id] = (unpacked[2], unpacked[3], unpacked[4])
+    return courses
+
+def add_credits(index, student_id, course_id, sign):
+    """บวก/ลบหน่วยกิตของวิชาเข้าหน่วยกิตรวมของนักเรียนในภาคเรียนของวิชานั้น"""
+    course = index['courses'].get(course_id)
+    if course is None:
+        return
+    credit, academic_year, semester = course
+    loads = index['terms'].setdefault((academic_year, semester), {})
+    total = loads.get(student_id, 0) + sign * credit
+    if total > 0:
+        loads[student_id] = total
+    else:
+        loads.pop(student_id, None)
+        if not loads:
+            del index['terms'][(academic_year, semester)]
+
+# เหมือนดัชนี enrollment: เก็บ ID ของทุก record ที่ลงทะเบียนอยู่ของคู่ และนับหน่วยกิตครั้งเดียวต่อคู่
+def add_active(index, register_id, student_id, course_id):
+    active = index['pairs'].setdefault((student_id, course_id), set())
+    if not active:
+        add_credits(index, student_id, course_id, 1)
+    active.add(register_id)
+
+def remove_active(index, register_id, student_id, course_id):
+    pair = (student_id, course_id)
+    active = index['pairs'].get(pair)
+    if not active or register_id not in active:
+        return
+    active.discard(register_id)
+    if not active:
+        del index['pairs'][pair]
+        add_credits(index, student_id, course_id, -1)
+
+def build_credit_load_index(file_path=REGISTRATION_FILE_PATH, course_file_path=COURSE_FILE_PATH):
+    """สร้างดัชนีหน่วยกิตรวม (ปีการศึกษา, ภาคเรียน) -> {รหัสนักเรียน: หน่วยกิต} จากการลงทะเบียนที่ยังลงทะเบียนอยู่"""
+    index = {'terms': {}, 'pairs': {}, 'record_count': 0,
+             'course_signature': source_signature([course_file_path]),
+             'courses': read_course_terms(course_file_path)}
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+        for unpacked in struct.iter_unpack(REGISTRATION_RECORD_FORMAT, data[:usable]):
+            index['record_count'] += 1
+            if unpacked[4] != 1:
+                continue
+            student_id = unpacked[1].strip(b'\x00').decode('utf-8', errors='replace')
+            course_id = unpacked[2].strip(b'\x00').decode('utf-8', errors='replace')
+            add_active(index, unpacked[0], student_id, course_id)
+    return index
+
+def get_credit_load_index():
+    """โหลดดัชนีหน่วยกิตรวม (สร้างใหม่อัตโนมัติเมื่อ registration.bin หรือ CourseSubject.bin เปลี่ยน)"""
+    return load_index('credit_load', SOURCE_PATHS, build_credit_load_index, apply_registration_delta)
+
+def get_credit_load(student_id, academic_year, semester):
+    """คืนหน่วยกิตรวมที่นักเรียนลงทะเบียนอยู่ในภาคเรียน (รวมการเขียนที่ค้างในโหมด LSM)"""
+    index = get_credit_load_index()
+    total = index['terms'].get((academic_year, semester), {}).get(student_id, 0)
+    if lsm.has_pending():
+        # นำเข้าในฟังก์ชันเพราะ module.enrollment นำเข้าโมดูลนี้
+        from module.enrollment import effective_enrolled
+        for (_, course_id), entries in lsm.student_pair_overlays(student_id).items():
+            course = index['courses'].get(course_id)
+            if course is None or course[1:] != (academic_year, semester):
+                continue
+            base_ids = index['pairs'].get((student_id, course_id), ())
+            total += (effective_enrolled(base_ids, entries) - bool(base_ids)) * course[0]
+    return total
+
+def check_credit_limit(student_id, credit, academic_year, semester):
+    """ตรวจว่าลงทะเบียนวิชาที่มีหน่วยกิต credit เพิ่มได้โดยไม่เกินเพดาน คืนค่า (True/False, ข้อความ)"""
+    if MAX_TERM_CREDITS <= 0:
+        return True, ""
+    load = get_credit_load(student_id, academic_year, semester)
+    if load + credit > MAX_TERM_CREDITS:
+        return False, (f"นักเรียนรหัส {student_id} ลงทะเบียนภาคเรียน {academic_year}/{semester} "
+                       f"แล้ว {load} หน่วยกิต เพิ่มอีก {credit} หน่วยกิตจะเกินเพดาน {MAX_TERM_CREDITS} หน่วยกิต")
+    return True, ""
+
+def apply_registration_delta(index, delta):
+    """ปรับดัชนีด้วย delta ('add', ID, รหัสนักเรียน, รหัสวิชา, สถานะ)
+    หรือ ('status', ID, รหัสนักเรียน, รหัสวิชา, สถานะเดิม, สถานะใหม่)"""
+    kind, register_id, student_id, course_id = delta[:4]
+    if kind == 'add':
+        if delta[4] == 1:
+            add_active(index, register_id, student_id, course_id)
+        index['record_count'] += 1
+    else:
+        old_status, new_status = delta[4:]
+        if old_status == 1 and new_status != 1:
+            remove_active(index, register_id, student_id, course_id)
+        elif old_status != 1 and new_status == 1:
+            add_active(index, register_id, student_id, course_id)
+    return index
+
+def record_credit_load(register_id, student_id, course_id, status):
+    """ปรับดัชนีหลังต่อท้าย record การลงทะเบียนใหม่ (ไม่ต้องอ่าน registration.bin ใหม่ บันทึกเฉพาะ delta)"""
+    index = get_index_for_append('credit_load', REGISTRATION_FILE_PATH, REGISTRATION_RECORD_SIZE)
+    # หน่วยกิตของวิชาในดัชนีต้องตรงกับ CourseSubject.bin ปัจจุบันด้วย
+    if index is None or index['course_signature'] != source_signature([COURSE_FILE_PATH]):
+        return
+    delta = ('add', register_id, student_id, course_id, status)
+    append_index_delta('credit_load', SOURCE_PATHS, apply_registration_delta(index, delta), delta)
+
+def capture_credit_load():
+    """คืนดัชนีในหน่วยความจำที่ยังตรงกับไฟล์ (เรียกก่อนแก้สถานะ record แบบ in-place) หรือ None"""
+    return get_current_index('credit_load', SOURCE_PATHS)
+
+def apply_status_change(index, register_id, student_id, course_id, old_status, new_status):
+    """ปรับดัชนีที่เก็บไว้ก่อนแก้สถานะ record การลงทะเบียนแบบ in-place แล้วบันทึกเฉพาะ delta"""
+    if index is None:
+        return
+    delta = ('status', register_id, student_id, course_id, old_status, new_status)
+    append_index_delta('credit_load', SOURCE_PATHS, apply_registration_delta(index, delta), delta)
+
+def find_load_outliers(academic_year, semester, max_credits=MAX_TERM_CREDITS, min_credits=MIN_TERM_CREDITS):
+    """คืน (เกินเพดาน, ต่ำกว่าขั้นต่ำ) เป็นรายการ (รหัสนักเรียน, หน่วยกิต) ของภาคเรียน
+
+    อ่านจากดัชนีเฉพาะนักเรียนที่ลงทะเบียนในภาคเรียนนั้น ไม่ต้องสแกนไฟล์การลงทะเบียน
+    นักเรียนที่มีการเขียนค้างในโหมด LSM คำนวณใหม่ด้วย get_credit_load
+    """
+    loads = get_credit_load_index()['terms'].get((academic_year, semester), {})
+    if lsm.has_pending():
+        loads = dict(loads)
+        for student_id in lsm.pending_student_ids():
+            total = get_credit_load(student_id, academic_year, semester)
+            if total > 0:
+                loads[student_id] = total
+            else:
+                loads.pop(student_id, None)
+    over = sorted(((sid, c) for sid, c in loads.items() if max_credits > 0 and c > max_credits),
+                  key=lambda item: (-item[1], item[0]))
+    under = sorted(((sid, c) for sid, c in loads.items() if c < min_credits),
+                   key=lambda item: (item[1], item[0]))
+    return over, under
@@ -0,0 +1,291 @@
+import os
+import pickle
+import datetime
+from module import report, cdc, lsm, metrics, trace
+from module.cache import write_lock
+from module.index_store import INDEX_DIR
+
+# -----------------------------
+# รายงานการลงทะเบียนเฉพาะส่วนที่เปลี่ยนตั้งแต่รายงานครั้งก่อน
+# -----------------------------
+# บันทึก high-water mark (offset ของ CDC event ถัดไป และ ID การลงทะเบียนสูงสุด) พร้อมผลรวมไว้ทุกครั้งที่รัน
+# ครั้งถัดไปอ่านเฉพาะ event ใหม่จาก CDC log (เพิ่ม/แก้ไข/ลบ) แล้วปรับผลรวม ไม่ต้องอ่าน registration.bin ทั้งไฟล์
+# ผลรวมเก็บรายวิชา รายนักเรียน และรายวัน สถิติสาขา/ชั้นปีคำนวณจากผลรวมรายนักเรียนกับข้อมูลนักเรียนปัจจุบัน
+# (เหมือนรายงานเต็ม) และเก็บสถานะล่าสุดของแต่ละ ID ไว้ 1 ไบต์ เพื่อถอนผลของสถานะเดิมเมื่อแก้ไข/ลบ
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+STATE_FILE_PATH = os.path.join(INDEX_DIR, 'delta_report.state')
+REPORT_DELTA_FILE_PATH = os.path.join(main_dir, "register_delta_report.txt")
+REGISTRATION_FILE_PATH = os.path.join(main_dir, 'registration.bin')
+REGISTRATION_RECORD_SIZE = cdc.REGISTRATION_RECORD_SIZE
+
+# สถานะใน bytearray ของ ID: 0 = ไม่มี record, 1 = ถอน, 2 = ลงทะเบียน
+ABSENT = 0
+STATUS_SLOT = {1: 2, 0: 1}
+
+# จำนวนรายการเปลี่ยนแปลงที่แสดงในรายงาน
+CHANGE_LIST_LIMIT = 20
+# จำนวน event ที่อ่านจาก CDC log ต่อครั้ง
+EVENT_BATCH_SIZE = 10000
+
+# -----------------------------
+# สถานะ (high-water mark + ผลรวม)
+# -----------------------------
+def new_state():
+    return {
+        'cdc_offset': 0,
+        'last_register_id': 0,
+        'last_run': None,
+        'statuses': bytearray(),
+        'course_stats': {},      # รหัสวิชา -> [ลงทะเบียน, ถอน]
+        'student_stats': {},     # รหัสนักเรียน -> [ลงทะเบียน, ถอน]
+        'date_stats': {},        # YYYY-MM-DD -> จำนวนที่ลงทะเบียน
+    }
+
+def load_state():
+    try:
+        with open(STATE_FILE_PATH, 'rb') as f:
+            return pickle.load(f)
+    except (IOError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+
+def save_state(state):
+    tmp_path = STATE_FILE_PATH + '.tmp'
+    try:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, STATE_FILE_PATH)
+    except IOError as e:
+        print(f"เกิดข้อผิดพลาดในการบันทึกสถานะรายงาน: {e}")
+
+def present_count(state):
+    """จำนวนการลงทะเบียนที่มีอยู่ตามสถานะ"""
+    return len(state['statuses']) - state['statuses'].count(ABSENT)
+
+def adjust(state, course_id, student_id, day, status, sign):
+    """เพิ่ม (sign=1) หรือถอน (sign=-1) ผลของการลงทะเบียนหนึ่งรายการจากผลรวม"""
+    column = 0 if status == 1 else 1
+    for table, key in ((state['course_stats'], course_id), (state['student_stats'], student_id)):
+        counts = table.setdefault(key, [0, 0])
+        counts[column] += sign
+        if counts == [0, 0]:
+            del table[key]
+    if status == 1:
+        count = state['date_stats'].get(day, 0) + sign
+        if count:
+            state['date_stats'][day] = count
+        else:
+            state['date_stats'].pop(day, None)
+
+def apply_change(state, register_id, student_id, course_id, day, new_status):
+    """ตั้งสถานะล่าสุดของ ID (None = ลบ) คืนสถานะเดิม (None = ไม่เคยมี)"""
+    statuses = state['statuses']
+    if register_id >= len(statuses):
+        statuses.extend(bytes(register_id + 1 - len(statuses)))
+    slot = statuses[register_id]
+    old_status = None if slot == ABSENT else (1 if slot == STATUS_SLOT[1] else 0)
+    if old_status is not None:
+        adjust(state, course_id, student_id, day, old_status, -1)
+    if new_status is None:
+        statuses[register_id] = ABSENT
+    else:
+        adjust(state, course_id, student_id, day, new_status, 1)
+        statuses[register_id] = STATUS_SLOT[new_status]
+        state['last_register_id'] = max(state['last_register_id'], register_id)
+    return old_status
+
+@trace.traced('build delta report baseline', cat='stats')
+def build_baseline():
+    """อ่านการลงทะเบียนทั้งหมดหนึ่งครั้งเพื่อสร้างผลรวมตั้งต้น (ใช้ครั้งแรกหรือเมื่อข้อมูลเปลี่ยนนอก CDC log)"""
+    state = new_state()
+    # อ่าน offset ของ CDC log และข้อมูลภายใต้ lock เดียวกัน event ที่เขียนหลังจากนี้จึงไม่ถูกนับซ้ำหรือตกหล่น
+    with write_lock():
+        state['cdc_offset'] = cdc.event_count()
+        registrations = report.read_all_registrations()
+    for rec in registrations:
+        apply_change(state, rec['REGISTER ID'], rec['STUDENT ID'], rec['COURSE ID'],
+                     rec['DATE'].strftime("%Y-%m-%d"), rec['STATUS_CODE'])
+    return state
+
+def file_record_count():
+    try:
+        return os.path.getsize(REGISTRATION_FILE_PATH) // REGISTRATION_RECORD_SIZE
+    except OSError:
+        return 0
+
+# -----------------------------
+# ประมวลผล event ใหม่
+# -----------------------------
+@trace.traced('apply registration changes', cat='stats')
+def apply_events(state):
+    """ปรับผลรวมด้วย event ตั้งแต่ high-water mark คืนสรุปการเปลี่ยนแปลง"""
+    changes = {'add': 0, 'update': 0, 'delete': 0, 'registered': 0, 'dropped': 0, 'reregistered': 0,
+               'removed': 0, 'courses': {}, 'items': []}
+    offset = state['cdc_offset']
+    while True:
+        events = cdc.read_events(offset, EVENT_BATCH_SIZE)
+        if not events:
+            break
+        for event in events:
+            op = event['op']
+            if op not in ('add', 'update', 'delete'):
+                continue
+            changes[op] += 1
+            new_status = None if op == 'delete' else (1 if event['status'] == 'Registered' else 0)
+            old_status = apply_change(state, event['register_id'], event['student_id'], event['course_id'],
+                                      event['registration_date'][:10], new_status)
+            if old_status == new_status:
+                continue
+            if new_status is None:
+                kind = 'removed'
+            elif new_status == 1:
+                kind = 'registered' if old_status is None else 'reregistered'
+            else:
+                kind = 'dropped'
+            changes[kind] += 1
+            delta = changes['courses'].setdefault(event['course_id'], [0, 0])
+            if old_status is not None:
+                delta[0 if old_status == 1 else 1] -= 1
+            if new_status is not None:
+                delta[0 if new_status == 1 else 1] += 1
+            if len(changes['items']) < CHANGE_LIST_LIMIT:
+                changes['items'].append((kind, event))
+        offset = events[-1]['offset'] + 1
+    state['cdc_offset'] = offset
+    metrics.inc('delta_report_events_total', changes['add'] + changes['update'] + changes['delete'])
+    return changes
+
+def refresh_state():
+    """โหลดสถานะเดิมแล้วปรับด้วย event ใหม่ คืน (สถานะ, สรุปการเปลี่ยนแปลง, สถานะเดิม, เหตุผลที่สร้างฐานใหม่)"""
+    state = load_state()
+    reason = None
+    if state is None:
+        reason = "ยังไม่เคยสร้างรายงานแบบเปลี่ยนแปลง"
+    elif cdc.event_count() < state['cdc_offset']:
+        reason = "CDC log ถูกสร้างใหม่"
+    if reason:
+        state = build_baseline()
+        return state, None, None, reason
+
+    previous = {'cdc_offset': state['cdc_offset'], 'last_register_id': state['last_register_id'],
+                'last_run': state['last_run']}
+    changes = apply_events(state)
+    # ถ้าจำนวน record ไม่ตรงกับไฟล์ แสดงว่าข้อมูลเปลี่ยนโดยไม่ผ่าน CDC log (เช่นจัดเก็บภาคเรียน)
+    # ในโหมด LSM ที่มีการเขียนค้าง ไฟล์หลักยังไม่รวมการเขียนเหล่านั้นจึงข้ามการตรวจนี้
+    if not lsm.has_pending() and present_count(state) != file_record_count():
+        return build_baseline(), None, previous, "ข้อมูลการลงทะเบียนเปลี่ยนนอก CDC log"
+    return state, changes, previous, None
+
+# -----------------------------
+# สร้างรายงาน
+# -----------------------------
+def format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp else "-"
+
+CHANGE_LABELS = {
+    'registered': 'ลงทะเบียนใหม่',
+    'dropped': 'ถอน',
+    'reregistered': 'กลับมาลงทะเบียน',
+    'removed': 'ลบ',
+}
+
+def render_changes(changes, courses):
+    report_text = "🔄 การเปลี่ยนแปลงตั้งแต่รายงานครั้งก่อน\n"
+    report_text += "-" * 60 + "\n"
+    report_text += (f"- event ที่ประมวลผล: เพิ่ม {changes['add']}, แก้ไข {changes['update']}, "
+                    f"ลบ {changes['delete']}\n")
+    for kind, label in CHANGE_LABELS.items():
+        report_text += f"- {label}: {changes[kind]} รายการ\n"
+    # ไม่แสดงรายวิชาที่การเปลี่ยนแปลงหักล้างกันหมด
+    changed_courses = [(course_id, delta) for course_id, delta in changes['courses'].items() if delta != [0, 0]]
+    if changed_courses:
+        report_text += "\nรายวิชาที่เปลี่ยนมากที่สุด:\n"
+        ranked = sorted(changed_courses, key=lambda item: abs(item[1][0]) + abs(item[1][1]), reverse=True)
+        for course_id, (registered, dropped) in ranked[:10]:
+            course_name = courses.get(course_id, {}).get('course_name', 'ไม่ระบุ')
+            report_text += f"  {course_id} - {course_name}: ลงทะเบียน {registered:+d}, ถอน {dropped:+d}\n"
+    if changes['items']:
+        report_text += f"\nรายการล่าสุด (ไม่เกิน {CHANGE_LIST_LIMIT} รายการแรก):\n"
+        for kind, event in changes['items']:
+            report_text += (f"  [{CHANGE_LABELS[kind]}] ID {event['register_id']}: {event['student_id']} "
+                            f"{event['course_id']} ({event['time'][:19].replace('T', ' ')})\n")
+    return report_text + "\n"
+
+def render_aggregates(state, courses, students):
+    """สรุปผลรวมล่าสุด (รูปแบบเดียวกับส่วนสถิติของรายงานเต็ม)"""
+    student_dict = {s['STUDENT ID']: s for s in students}
+    major_stats = {}
+    year_stats = {}
+    for student_id, (registered, dropped) in state['student_stats'].items():
+        student_info = student_dict.get(student_id, {})
+        for table, key in ((major_stats, student_info.get('MAJOR', 'ไม่ระบุ')),
+                           (year_stats, student_info.get('YEAR', 'ไม่ระบุ'))):
+            counts = table.setdefault(key, [0, 0])
+            counts[0] += registered
+            counts[1] += dropped
+
+    report_text = "📊 ผลรวมล่าสุด\n"
+    report_text += "-" * 60 + "\n"
+    popular = sorted(state['course_stats'].items(), key=lambda item: item[1][0], reverse=True)
+    report_text += "🏆 วิชายอดนิยม (เรียงตามจำนวนผู้ลงทะเบียน):\n"
+    for i, (course_id, (registered, dropped)) in enumerate(popular[:10], 1):
+        total = registered + dropped
+        drop_rate = (dropped / total * 100) if total > 0 else 0
+        course_name = courses.get(course_id, {}).get('course_name', 'ไม่ระบุ')
+        report_text += f"{i}. {course_id} - {course_name}: ลงทะเบียน {registered} คน, ถอน {dropped} คน, "
+        report_text += f"อัตราการถอน: {drop_rate:.1f}%\n"
+    report_text += "\n🎯 สถิติการลงทะเบียนแยกตามสาขา:\n"
+    for major, (registered, dropped) in major_stats.items():
+        total = registered + dropped
+        drop_rate = (dropped / total * 100) if total > 0 else 0
+        report_text += f"- {major}: ลงทะเบียน {registered} คน, ถอน {dropped} คน (อัตราการถอน: {drop_rate:.1f}%)\n"
+    report_text += "\n📚 สถิติการลงทะเบียนแยกตามชั้นปี:\n"
+    for year, (registered, dropped) in sorted(year_stats.items(), key=lambda item: str(item[0])):
+        total = registered + dropped
+        drop_rate = (dropped / total * 100) if total > 0 else 0
+        report_text += f"- ปี {year}: ลงทะเบียน {registered} คน, ถอน {dropped} คน (อัตราการถอน: {drop_rate:.1f}%)\n"
+    report_text += "\n📅 วันที่มีการลงทะเบียนสูงสุด (5 อันดับแรก):\n"
+    for i, (date, count) in enumerate(sorted(state['date_stats'].items(), key=lambda x: x[1], reverse=True)[:5], 1):
+        report_text += f"{i}. {date}: {count} คน\n"
+
+    total_registered = sum(counts[0] for counts in state['course_stats'].values())
+    total_dropped = sum(counts[1] for counts in state['course_stats'].values())
+    overall_drop_rate = (total_dropped / (total_registered + total_dropped) * 100) \
+        if (total_registered + total_dropped) > 0 else 0
+    report_text += "\n📈 สรุปภาพรวมทั้งหมด:\n"
+    report_text += f"- จำนวนวิชาที่มีการลงทะเบียน: {len(state['course_stats'])} วิชา\n"
+    report_text += f"- จำนวนการลงทะเบียนทั้งหมด: {total_registered} คน\n"
+    report_text += f"- จำนวนการถอนทั้งหมด: {total_dropped} คน\n"
+    report_text += f"- อัตราการถอนโดยรวม: {overall_drop_rate:.1f}%\n"
+    report_text += (f"- จำนวนนักศึกษาที่ลงทะเบียน: "
+                    f"{sum(1 for counts in state['student_stats'].values() if counts[0] > 0)} คน\n")
+    return report_text
+
+@metrics.timed('report_build_seconds', report='registration_delta')
+def build_delta_report():
+    """ปรับผลรวมด้วยการเปลี่ยนแปลงตั้งแต่ครั้งก่อน บันทึก high-water mark ใหม่ แล้วคืนข้อความรายงาน"""
+    state, changes, previous, reason = refresh_state()
+    now = datetime.datetime.now()
+    courses = report.load_course_dict()
+    students = report.read_all_students()
+
+    report_text = "==========================================================================\n"
+    report_text += "               รายงานการลงทะเบียน (เฉพาะส่วนที่เปลี่ยน)\n"
+    report_text += "==========================================================================\n"
+    report_text += f"สร้างเมื่อ: {now.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    if previous is not None:
+        report_text += (f"รายงานครั้งก่อน: {format_time(previous['last_run'])} "
+                        f"(CDC offset {previous['cdc_offset']}, ID สูงสุด {previous['last_register_id']})\n")
+    report_text += f"ครั้งนี้: CDC offset {state['cdc_offset']}, ID สูงสุด {state['last_register_id']}\n\n"
+    if reason:
+        report_text += f"ℹ️ สร้างผลรวมตั้งต้นจากข้อมูลทั้งหมด ({reason})\n\n"
+    else:
+        report_text += render_changes(changes, courses)
+    report_text += render_aggregates(state, courses, students)
+    report_text += "--------------------------------------------------------------------------\n"
+
+    state['last_run'] = now.timestamp()
+    save_state(state)
+    print(report_text)
+    return report_text
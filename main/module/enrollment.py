@@ -0,0 +1,213 @@
+import os
+import struct
+from module.cache import get_cached_records, bump_generation, writing
+from module.index_store import load_index, append_index_delta, get_index_for_append
+from module.course_index import find_course_offset_by_id
+from module import lsm, credit_load
+
+# -----------------------------
+# Path และ Format
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+REGISTRATION_FILE_PATH = os.path.join(main_dir, 'registration.bin')
+COURSE_FILE_PATH = os.path.join(main_dir, 'CourseSubject.bin')
+CAPACITY_FILE_PATH = os.path.join(main_dir, 'course_capacity.bin')
+
+REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
+REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
+
+COURSE_RECORD_FORMAT = '<10s50sB H B B'
+COURSE_RECORD_SIZE = struct.calcsize(COURSE_RECORD_FORMAT)
+
+# รูปแบบของข้อมูลจำนวนที่นั่ง (รหัสวิชา, จำนวนที่นั่ง)
+CAPACITY_RECORD_FORMAT = '<10sH'
+CAPACITY_RECORD_SIZE = struct.calcsize(CAPACITY_RECORD_FORMAT)
+
+# จำนวนที่นั่งเริ่มต้นของวิชาที่ยังไม่ได้กำหนด (0 = ไม่จำกัด)
+DEFAULT_COURSE_CAPACITY = 0
+
+# -----------------------------
+# จำนวนที่นั่งของรายวิชา
+# -----------------------------
+def read_capacities_from_disk(file_path=CAPACITY_FILE_PATH):
+    """อ่านจำนวนที่นั่งของทุกวิชาจากไฟล์ไบนารี"""
+    records = []
+    try:
+        if not os.path.exists(file_path):
+            return records
+        with open(file_path, 'rb') as f:
+            while True:
+                record_data = f.read(CAPACITY_RECORD_SIZE)
+                if len(record_data) != CAPACITY_RECORD_SIZE:
+                    break
+                unpacked_data = struct.unpack(CAPACITY_RECORD_FORMAT, record_data)
+                records.append({
+                    'COURSE ID': unpacked_data[0].strip(b'\x00').decode('utf-8'),
+                    'CAPACITY': unpacked_data[1]
+                })
+    except (IOError, UnicodeDecodeError) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์จำนวนที่นั่ง: {e}")
+    return records
+
+def load_capacity_dict(file_path=CAPACITY_FILE_PATH):
+    """คืน dict รหัสวิชา -> จำนวนที่นั่ง"""
+    records = get_cached_records(file_path, 'capacity', read_capacities_from_disk, copy=False)
+    return {r['COURSE ID']: r['CAPACITY'] for r in records}
+
+def get_course_capacity(course_id):
+    """คืนจำนวนที่นั่งของวิชา (0 = ไม่จำกัด)"""
+    return load_capacity_dict().get(course_id, DEFAULT_COURSE_CAPACITY)
+
+def set_course_capacity(course_id, capacity, file_path=CAPACITY_FILE_PATH):
+    """กำหนดจำนวนที่นั่งของวิชา (0 = ไม่จำกัด)"""
+    capacities = load_capacity_dict(file_path)
+    capacities[course_id] = capacity
+    try:
+        with writing(file_path), open(file_path, 'wb') as f:
+            for cid, cap in capacities.items():
+                f.write(struct.pack(
+                    CAPACITY_RECORD_FORMAT,
+                    cid.encode('utf-8')[:10].ljust(10, b'\x00'),
+                    cap
+                ))
+        bump_generation(file_path)
+        return True
+    except (IOError, struct.error) as e:
+        print(f"เกิดข้อผิดพลาดในการบันทึกจำนวนที่นั่ง: {e}")
+        return False
+
+# -----------------------------
+# ดัชนีการลงทะเบียน (นักเรียน, วิชา) และจำนวนที่นั่งที่ใช้ไป
+# -----------------------------
+# ดัชนีเก็บ ID ของทุก record ที่ลงทะเบียนอยู่ของแต่ละคู่ (ปกติมีหนึ่งรายการ แต่ข้อมูลนำเข้าหรือ
+# การเปิดสถานะ record เก่าอาจทำให้มีหลายรายการ) คู่จะเลิกนับที่นั่งเมื่อไม่เหลือ record ที่ลงทะเบียนอยู่
+def add_active(index, register_id, student_id, course_id):
+    """เพิ่ม record ที่ลงทะเบียนอยู่ของคู่ (นับที่นั่งเมื่อเป็น record แรกของคู่)"""
+    active = index['pairs'].setdefault((student_id, course_id), set())
+    if not active:
+        index['seats'][course_id] = index['seats'].get(course_id, 0) + 1
+    active.add(register_id)
+
+def remove_active(index, register_id, student_id, course_id):
+    """ถอด record ออกจากคู่ (คืนที่นั่งเมื่อคู่ไม่เหลือ record ที่ลงทะเบียนอยู่)"""
+    pair = (student_id, course_id)
+    active = index['pairs'].get(pair)
+    if not active or register_id not in active:
+        return
+    active.discard(register_id)
+    if not active:
+        del index['pairs'][pair]
+        seats = index['seats'].get(course_id, 0) - 1
+        if seats > 0:
+            index['seats'][course_id] = seats
+        else:
+            index['seats'].pop(course_id, None)
+
+def build_enrollment_index(file_path=REGISTRATION_FILE_PATH):
+    """สร้างดัชนีคู่ (รหัสนักเรียน, รหัสวิชา) -> ID ที่ลงทะเบียนอยู่ และจำนวนที่นั่งที่ใช้ไปต่อวิชา"""
+    index = {'pairs': {}, 'seats': {}, 'record_count': 0}
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+        for unpacked in struct.iter_unpack(REGISTRATION_RECORD_FORMAT, data[:usable]):
+            index['record_count'] += 1
+            if unpacked[4] != 1:
+                continue
+            student_id = unpacked[1].strip(b'\x00').decode('utf-8', errors='replace')
+            course_id = unpacked[2].strip(b'\x00').decode('utf-8', errors='replace')
+            add_active(index, unpacked[0], student_id, course_id)
+    return index
+
+def apply_registration_delta(index, delta):
+    """ปรับดัชนีด้วย delta ('add', ID, รหัสนักเรียน, รหัสวิชา, สถานะ)
+    หรือ ('status', ID, รหัสนักเรียน, รหัสวิชา, สถานะเดิม, สถานะใหม่)"""
+    kind, register_id, student_id, course_id = delta[:4]
+    if kind == 'add':
+        if delta[4] == 1:
+            add_active(index, register_id, student_id, course_id)
+        index['record_count'] += 1
+    else:
+        old_status, new_status = delta[4:]
+        if old_status == 1 and new_status != 1:
+            remove_active(index, register_id, student_id, course_id)
+        elif old_status != 1 and new_status == 1:
+            add_active(index, register_id, student_id, course_id)
+    return index
+
+def get_enrollment_index(file_path=REGISTRATION_FILE_PATH):
+    """โหลดดัชนีการลงทะเบียน (สร้างใหม่อัตโนมัติเมื่อ registration.bin เปลี่ยน)"""
+    return load_index('enrollment', [file_path], lambda: build_enrollment_index(file_path),
+                      apply_registration_delta)
+
+def get_seats_taken(course_id):
+    """คืนจำนวนนักเรียนที่ลงทะเบียนอยู่ในวิชา (รวมการเขียนที่ค้างในโหมด LSM)"""
+    index = get_enrollment_index()
+    seats = index['seats'].get(course_id, 0)
+    if lsm.has_pending():
+        for (student_id, _), entries in lsm.course_pair_overlays(course_id).items():
+            base_ids = index['pairs'].get((student_id, course_id), ())
+            seats += effective_enrolled(base_ids, entries) - bool(base_ids)
+    return seats
+
+def is_enrolled(student_id, course_id):
+    """ตรวจว่านักเรียนลงทะเบียนวิชานี้อยู่แล้วหรือไม่ (รวมการเขียนที่ค้างในโหมด LSM)"""
+    base_ids = get_enrollment_index()['pairs'].get((student_id, course_id), ())
+    entries = lsm.pair_overlay(student_id, course_id) if lsm.has_pending() else None
+    if entries is None:
+        return bool(base_ids)
+    return effective_enrolled(base_ids, entries)
+
+def effective_enrolled(base_ids, entries):
+    """คู่ยังลงทะเบียนอยู่หรือไม่ เมื่อรวม record ที่ลงทะเบียนอยู่ในไฟล์หลัก (base_ids) กับสถานะล่าสุดในโหมด LSM"""
+    if any(status == 1 for status in entries.values()):
+        return True
+    return any(register_id not in entries for register_id in base_ids)
+
+def read_course_for_enrollment(course_id):
+    """อ่านข้อมูลรายวิชาจากตำแหน่งในดัชนี คืนค่า (credit, academic_year, semester, is_active) หรือ None"""
+    offset = find_course_offset_by_id(course_id)
+    if offset is None:
+        return None
+    try:
+        with open(COURSE_FILE_PATH, 'rb') as f:
+            f.seek(offset)
+            unpacked_data = struct.unpack(COURSE_RECORD_FORMAT, f.read(COURSE_RECORD_SIZE))
+        return unpacked_data[2:]
+    except (IOError, struct.error) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์รายวิชา: {e}")
+        return None
+
+def check_enrollment(student_id, course_id, status=1):
+    """ตรวจสอบว่าลงทะเบียนได้หรือไม่ คืนค่า (True/False, ข้อความ)"""
+    course = read_course_for_enrollment(course_id)
+    if course is None:
+        return False, f"ไม่พบรายวิชารหัส {course_id} ในระบบ"
+    if status != 1:
+        return True, ""
+    if course[3] != 1:
+        return False, f"รายวิชา {course_id} มีสถานะ Inactive ไม่สามารถลงทะเบียนได้"
+    if is_enrolled(student_id, course_id):
+        return False, f"นักเรียนรหัส {student_id} ลงทะเบียนวิชา {course_id} อยู่แล้ว"
+    capacity = get_course_capacity(course_id)
+    taken = get_seats_taken(course_id)
+    if capacity > 0 and taken >= capacity:
+        return False, f"รายวิชา {course_id} เต็มแล้ว ({taken}/{capacity} ที่นั่ง)"
+    return credit_load.check_credit_limit(student_id, course[0], course[1], course[2])
+
+def record_enrollment(register_id, student_id, course_id, status, file_path=REGISTRATION_FILE_PATH):
+    """ปรับดัชนีหลังต่อท้าย record การลงทะเบียนใหม่ (ไม่ต้องอ่าน registration.bin ใหม่ บันทึกเฉพาะ delta)"""
+    index = get_index_for_append('enrollment', file_path, REGISTRATION_RECORD_SIZE)
+    if index is None:
+        return
+    delta = ('add', register_id, student_id, course_id, status)
+    append_index_delta('enrollment', [file_path], apply_registration_delta(index, delta), delta)
+
+def apply_status_change(index, register_id, student_id, course_id, old_status, new_status,
+                        file_path=REGISTRATION_FILE_PATH):
+    """ปรับดัชนีที่เก็บไว้ก่อนแก้สถานะ record การลงทะเบียนแบบ in-place แล้วบันทึกเฉพาะ delta"""
+    if index is None:
+        return
+    delta = ('status', register_id, student_id, course_id, old_status, new_status)
+    append_index_delta('enrollment', [file_path], apply_registration_delta(index, delta), delta)
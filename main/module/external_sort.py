@@ -0,0 +1,203 @@
+import os
+import heapq
+import shutil
+import struct
+import tempfile
+from itertools import count
+from operator import itemgetter
+from module import metrics, trace, lsm
+
+# -----------------------------
+# เรียง record จากไฟล์ .bin แบบ external merge sort
+# -----------------------------
+# อ่าน record ทีละช่วง คำนวณคีย์เรียง (ไบต์) ครั้งเดียวต่อ record แล้วเก็บไว้จนครบงบหน่วยความจำ
+# จากนั้นเรียงและเขียนออกเป็น run ในไฟล์ชั่วคราว สุดท้าย merge ทุก run ด้วย heapq.merge
+# ข้อมูลที่ไม่เกินงบเรียงในหน่วยความจำโดยไม่เขียนไฟล์ชั่วคราว
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+STUDENT_FILE_PATH = os.path.join(main_dir, 'student.bin')
+REGISTRATION_FILE_PATH = os.path.join(main_dir, 'registration.bin')
+
+STUDENT_RECORD_FORMAT = '<16s50s50s20sBB'
+STUDENT_RECORD_SIZE = struct.calcsize(STUDENT_RECORD_FORMAT)
+REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
+REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
+
+# งบหน่วยความจำของ record ที่เก็บไว้ก่อนเขียน run (ไบต์) ตั้งด้วย COMPRO_SORT_MEMORY_MB
+MEMORY_BUDGET = int(float(os.environ.get('COMPRO_SORT_MEMORY_MB', '64')) * 1024 * 1024)
+# โฟลเดอร์ของไฟล์ run ชั่วคราว (ไม่ระบุ = โฟลเดอร์ชั่วคราวของระบบ)
+SORT_TMP_DIR = os.environ.get('COMPRO_SORT_TMP') or None
+
+# หน่วยความจำโดยประมาณต่อ record นอกจากคีย์และตัว record (tuple, bytes object, ช่องใน list)
+ENTRY_OVERHEAD = 120
+# จำนวน record ที่อ่านจากไฟล์ต่อครั้ง
+READ_CHUNK_RECORDS = 4096
+# จำนวน run สูงสุดที่ merge พร้อมกัน ถ้ามากกว่านี้จะ merge เป็นรอบ
+MERGE_FANIN = 64
+MIN_RUN_BUFFER = 64 * 1024
+
+RUN_KEY_LENGTH_FORMAT = '<H'
+RUN_KEY_LENGTH_SIZE = struct.calcsize(RUN_KEY_LENGTH_FORMAT)
+
+# -----------------------------
+# คีย์เรียงตามพจนานุกรมไทย
+# -----------------------------
+# สระหน้า (เ แ โ ใ ไ) เรียงตามพยัญชนะที่ตามมา จึงสลับไว้หลังพยัญชนะ
+THAI_LEADING_VOWELS = set('เแโใไ')
+# วรรณยุกต์และเครื่องหมายที่ไม่มีผลในการเรียงระดับแรก ใช้ตัดสินเมื่อระดับแรกเท่ากัน
+THAI_TONE_MARKS = set('็่้๊๋์ํ๎')
+
+def thai_sort_key(text):
+    """คืนคีย์เรียง (ไบต์) ของข้อความตามลำดับพจนานุกรมไทย
+
+    ระดับแรกเทียบตัวอักษรหลังสลับสระหน้าและตัดวรรณยุกต์ (อักษรละตินเทียบแบบตัวพิมพ์เล็ก)
+    ระดับที่สองเทียบวรรณยุกต์ ระดับสุดท้ายเทียบข้อความเดิม
+    """
+    chars = list(text)
+    i = 0
+    while i < len(chars) - 1:
+        if chars[i] in THAI_LEADING_VOWELS and chars[i + 1] not in THAI_LEADING_VOWELS:
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+            i += 1
+        i += 1
+    primary = ''.join(ch for ch in chars if ch not in THAI_TONE_MARKS).casefold()
+    secondary = ''.join(ch for ch in chars if ch in THAI_TONE_MARKS)
+    # \x00 น้อยกว่าทุกตัวอักษร ข้อความที่เป็นส่วนต้นของอีกข้อความจึงมาก่อน
+    return '\x00'.join((primary, secondary, text)).encode('utf-8')
+
+def decode_text(raw):
+    return raw.strip(b'\x00').decode('utf-8', errors='replace')
+
+def student_last_name_key(record):
+    """คีย์เรียงนักเรียนตามนามสกุล ชื่อ แล้วรหัสนักเรียน"""
+    student_id, first_name, last_name = struct.unpack_from('<16s50s50s', record)
+    return b'\x01'.join((thai_sort_key(decode_text(last_name)), thai_sort_key(decode_text(first_name)),
+                         student_id.rstrip(b'\x00')))
+
+def registration_date_key(record):
+    """คีย์เรียงการลงทะเบียนตามเวลาลงทะเบียนแล้ว ID (big-endian จึงเทียบแบบไบต์ได้ตรงลำดับ)"""
+    register_id, _, _, registration_date, _ = struct.unpack(REGISTRATION_RECORD_FORMAT, record)
+    return struct.pack('>QI', max(0, round(registration_date * 1000000)), register_id)
+
+# ชื่อการเรียง -> (ไฟล์, ขนาด record, ฟังก์ชันคีย์)
+SORT_ORDERS = {
+    'student_last_name': (STUDENT_FILE_PATH, STUDENT_RECORD_SIZE, student_last_name_key),
+    'registration_date': (REGISTRATION_FILE_PATH, REGISTRATION_RECORD_SIZE, registration_date_key),
+}
+
+# -----------------------------
+# อ่านและเขียน run
+# -----------------------------
+def iter_records(file_path, record_size):
+    """อ่าน record ไบนารีจากไฟล์ทีละช่วง (ไม่โหลดทั้งไฟล์)"""
+    if not os.path.exists(file_path):
+        return
+    total = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(record_size * READ_CHUNK_RECORDS)
+            if len(chunk) < record_size:
+                break
+            for pos in range(0, len(chunk) - record_size + 1, record_size):
+                yield chunk[pos:pos + record_size]
+            total += len(chunk)
+    metrics.record_read(os.path.basename(file_path), total, total // record_size)
+
+def write_run(entries, tmp_dir, run_no):
+    """เขียน (คีย์, record) ที่เรียงแล้วเป็นไฟล์ run คืน path"""
+    path = os.path.join(tmp_dir, f"run_{run_no:06d}.tmp")
+    with open(path, 'wb') as f:
+        for key, record in entries:
+            f.write(struct.pack(RUN_KEY_LENGTH_FORMAT, len(key)))
+            f.write(key)
+            f.write(record)
+    metrics.inc('external_sort_runs_total')
+    return path
+
+def read_run(path, record_size, buffer_size):
+    """อ่าน (คีย์, record) จากไฟล์ run ตามลำดับ"""
+    with open(path, 'rb', buffering=buffer_size) as f:
+        while True:
+            header = f.read(RUN_KEY_LENGTH_SIZE)
+            if len(header) < RUN_KEY_LENGTH_SIZE:
+                return
+            key = f.read(struct.unpack(RUN_KEY_LENGTH_FORMAT, header)[0])
+            yield key, f.read(record_size)
+
+def merge_runs(paths, record_size, reverse, buffer_size):
+    readers = [read_run(path, record_size, buffer_size) for path in paths]
+    return heapq.merge(*readers, key=itemgetter(0), reverse=reverse)
+
+# -----------------------------
+# เรียง
+# -----------------------------
+def sort_entries(file_path, record_size, key_fn, reverse=False, memory_budget=None):
+    """คืน generator ของ (คีย์, record ไบนารี) เรียงตามคีย์ ใช้หน่วยความจำไม่เกิน memory_budget โดยประมาณ
+
+    record ที่คีย์เท่ากันคงลำดับเดิมในไฟล์ ไฟล์ run ชั่วคราวถูกลบเมื่ออ่านจบหรือเลิกอ่าน generator
+    """
+    budget = memory_budget or MEMORY_BUDGET
+    tmp_dir = None
+    run_numbers = count()
+    runs = []
+    try:
+        with trace.span('external sort runs', cat='storage', file=os.path.basename(file_path)):
+            batch = []
+            used = 0
+            for record in iter_records(file_path, record_size):
+                key = key_fn(record)
+                batch.append((key, record))
+                used += len(key) + record_size + ENTRY_OVERHEAD
+                if used >= budget:
+                    if tmp_dir is None:
+                        tmp_dir = tempfile.mkdtemp(prefix='compro_sort_', dir=SORT_TMP_DIR)
+                    batch.sort(key=itemgetter(0), reverse=reverse)
+                    runs.append(write_run(batch, tmp_dir, next(run_numbers)))
+                    batch = []
+                    used = 0
+            batch.sort(key=itemgetter(0), reverse=reverse)
+            if runs and batch:
+                runs.append(write_run(batch, tmp_dir, next(run_numbers)))
+                batch = []
+
+            # merge เป็นรอบจนเหลือไม่เกิน MERGE_FANIN run แต่ละ run ได้บัฟเฟอร์อ่านตามส่วนของงบ
+            buffer_size = max(MIN_RUN_BUFFER, budget // (min(len(runs), MERGE_FANIN) + 1))
+            while len(runs) > MERGE_FANIN:
+                merged = []
+                for start in range(0, len(runs), MERGE_FANIN):
+                    group = runs[start:start + MERGE_FANIN]
+                    merged.append(write_run(merge_runs(group, record_size, reverse, buffer_size),
+                                            tmp_dir, next(run_numbers)))
+                    for path in group:
+                        os.remove(path)
+                runs = merged
+        if not runs:
+            # ไม่เกินงบหน่วยความจำ เรียงในหน่วยความจำอย่างเดียว
+            yield from batch
+        else:
+            yield from merge_runs(runs, record_size, reverse, buffer_size)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def merge_overlay_entries(entries, latest, key_fn, reverse=False):
+    """merge (คีย์, record การลงทะเบียน) ที่เรียงแล้วจากไฟล์หลักกับ record ล่าสุดที่ยังค้างในโหมด LSM
+
+    record ในไฟล์ที่มี ID อยู่ใน latest ถูกแทนด้วยรุ่นใน latest และ tombstone ถูกตัดออก
+    """
+    base = (entry for entry in entries
+            if struct.unpack_from(lsm.REGISTER_ID_FORMAT, entry[1])[0] not in latest)
+    pending = sorted(((key_fn(record), record) for record in latest.values() if not lsm.is_tombstone(record)),
+                     key=itemgetter(0), reverse=reverse)
+    return heapq.merge(base, pending, key=itemgetter(0), reverse=reverse)
+
+def sort_records(order, reverse=False, memory_budget=None, overlay=None):
+    """คืน generator ของ record ไบนารีเรียงตามการเรียงที่ตั้งชื่อไว้ใน SORT_ORDERS
+
+    overlay (dict ID -> record ล่าสุด จาก lsm.overlay()) ใช้กับการเรียงการลงทะเบียน เพื่อรวมการเขียนที่ค้าง
+    """
+    file_path, record_size, key_fn = SORT_ORDERS[order]
+    entries = sort_entries(file_path, record_size, key_fn, reverse, memory_budget)
+    if overlay:
+        entries = merge_overlay_entries(entries, overlay, key_fn, reverse)
+    return (record for _, record in entries)
@@ -0,0 +1,189 @@
+import os
+import pickle
+import threading
+from module import metrics, trace
+from module.cache import detach_shared_file
+
+# -----------------------------
+# ที่เก็บดัชนี (sidecar) ของไฟล์ .bin
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+INDEX_DIR = os.path.join(main_dir, 'index')
+
+# รุ่นของรูปแบบไฟล์ดัชนี เพิ่มเมื่อโครงสร้างข้อมูลของดัชนีเปลี่ยน ไฟล์รุ่นเก่าจะถูกสร้างใหม่
+INDEX_FORMAT = 3
+
+# name -> (signature, data) ดัชนีที่โหลดไว้แล้วในโปรเซสนี้
+_loaded = {}
+
+# name -> RLock ป้องกันไม่ให้สองเธรด (เช่นเธรด warm-up กับเมนู) สร้าง บันทึก หรือแทนดัชนีเดียวกันพร้อมกัน
+_index_locks = {}
+
+# ดัชนีที่ปรับทีละ record ต่อท้ายการเปลี่ยนแปลงลงไฟล์ <name>.delta แทนการเขียนดัชนีทั้งก้อนใหม่
+# รวมเป็นไฟล์ดัชนีใหม่ (compaction) เมื่อไฟล์ delta ใหญ่เกินสัดส่วนนี้ของไฟล์ดัชนี หรือเมื่อสร้างดัชนีใหม่
+DELTA_COMPACT_RATIO = 0.5
+
+def index_file_path(name):
+    """คืนพาธของไฟล์ดัชนีตามชื่อ"""
+    return os.path.join(INDEX_DIR, f"{name}.idx")
+
+def delta_file_path(name):
+    """คืนพาธของไฟล์ delta ของดัชนีตามชื่อ"""
+    return os.path.join(INDEX_DIR, f"{name}.delta")
+
+def source_signature(source_paths):
+    """คืนลายเซ็นของไฟล์ต้นทาง (mtime, size) ใช้ตรวจว่าดัชนียังตรงกับข้อมูลหรือไม่"""
+    signature = []
+    for path in source_paths:
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def _index_lock(name):
+    """คืนล็อกของดัชนีชื่อ name"""
+    return _index_locks.setdefault(name, threading.RLock())
+
+def save_index(name, source_paths, data, signature=None):
+    """บันทึกดัชนีลงดิสก์พร้อมลายเซ็นของไฟล์ต้นทาง"""
+    if signature is None:
+        signature = source_signature(source_paths)
+    path = index_file_path(name)
+    tmp_path = path + '.tmp'
+    with _index_lock(name):
+        try:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((INDEX_FORMAT, signature, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            # ไฟล์ดัชนีใหม่รวมทุก delta แล้ว
+            if os.path.exists(delta_file_path(name)):
+                os.remove(delta_file_path(name))
+        except IOError as e:
+            print(f"เกิดข้อผิดพลาดในการบันทึกดัชนี {name}: {e}")
+        # ให้เธรดอื่นเห็นดัชนีหลัง pickle เสร็จ ดัชนีที่เพิ่งสร้างจึงไม่ถูกแก้ระหว่างบันทึก
+        _loaded[name] = (signature, data)
+
+def append_index_delta(name, source_paths, data, delta, signature=None):
+    """บันทึกการเปลี่ยนแปลงของดัชนีโดยต่อท้ายไฟล์ delta แทนการเขียนดัชนีทั้งก้อนใหม่
+
+    data คือดัชนีในหน่วยความจำที่ปรับด้วย delta แล้ว delta ต้องเล่นซ้ำได้ด้วย apply_delta ที่ส่งให้ load_index
+    delta เป็น None เมื่อไฟล์ต้นทางเปลี่ยนโดยไม่กระทบดัชนี (เลื่อนลายเซ็นเท่านั้น)
+    แต่ละรายการเก็บลายเซ็นก่อนและหลังการเปลี่ยนแปลง ตอนโหลดจึงเล่นซ้ำเฉพาะ delta ที่ต่อเนื่องจากไฟล์ดัชนี
+    """
+    if signature is None:
+        signature = source_signature(source_paths)
+    with _index_lock(name):
+        entry = _loaded.get(name)
+        path = index_file_path(name)
+        if entry is None or entry[1] is not data or not os.path.exists(path):
+            # delta ต่อจากดัชนีที่บันทึกไว้ได้เฉพาะเมื่อ data คือดัชนีเดียวกับที่โหลดไว้
+            save_index(name, source_paths, data, signature)
+            return
+        _loaded[name] = (signature, data)
+        delta_path = delta_file_path(name)
+        try:
+            # ไฟล์ delta อาจใช้ inode ร่วมกับ snapshot ต้องแยกออกก่อนต่อท้าย
+            detach_shared_file(delta_path)
+            with open(delta_path, 'ab') as f:
+                pickle.dump((entry[0], signature, delta), f, protocol=pickle.HIGHEST_PROTOCOL)
+            compact = os.path.getsize(delta_path) > os.path.getsize(path) * DELTA_COMPACT_RATIO
+        except (IOError, OSError) as e:
+            print(f"เกิดข้อผิดพลาดในการบันทึกดัชนี {name}: {e}")
+            return
+        if compact:
+            save_index(name, source_paths, data, signature)
+
+def replay_deltas(name, data, signature, target, apply_delta):
+    """เล่น delta ที่ต่อเนื่องจากลายเซ็น signature ซ้ำบนดัชนีจนถึง target คืน (ลายเซ็นที่ไปถึง, ดัชนี)"""
+    try:
+        with open(delta_file_path(name), 'rb') as f:
+            while signature != target:
+                before, after, delta = pickle.load(f)
+                if before == signature:
+                    if delta is not None:
+                        data = apply_delta(data, delta)
+                    signature = after
+    except (IOError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+    return signature, data
+
+def load_index(name, source_paths, builder, apply_delta=None):
+    """โหลดดัชนีจากหน่วยความจำหรือดิสก์ และสร้างใหม่ด้วย builder หากไฟล์ต้นทางเปลี่ยน
+
+    apply_delta(ดัชนี, delta) คืนดัชนีที่ปรับแล้ว ใช้เล่นซ้ำการเปลี่ยนแปลงที่บันทึกด้วย append_index_delta
+    """
+    with _index_lock(name):
+        return _load_index_locked(name, source_paths, builder, apply_delta)
+
+def _load_index_locked(name, source_paths, builder, apply_delta):
+    signature = source_signature(source_paths)
+    entry = _loaded.get(name)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    try:
+        with open(index_file_path(name), 'rb') as f:
+            index_format, saved_signature, data = pickle.load(f)
+        if index_format != INDEX_FORMAT:
+            raise ValueError(f"รูปแบบดัชนีรุ่น {index_format}")
+        if saved_signature != signature and apply_delta is not None:
+            saved_signature, data = replay_deltas(name, data, saved_signature, signature, apply_delta)
+        if saved_signature == signature:
+            _loaded[name] = (signature, data)
+            return data
+    except (IOError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    with trace.span(f'build index {name}', cat='index'), \
+            metrics.timer('storage_operation_seconds', op='index_build', file=name):
+        data = builder()
+    metrics.inc('index_builds_total', index=name)
+    save_index(name, source_paths, data, signature)
+    return data
+
+def get_loaded_index(name):
+    """คืนดัชนีที่โหลดไว้ในหน่วยความจำ (อาจไม่ตรงกับไฟล์ปัจจุบัน) หรือ None"""
+    entry = _loaded.get(name)
+    return entry[1] if entry is not None else None
+
+def get_index_for_append(name, file_path, record_size):
+    """คืนดัชนีในหน่วยความจำที่ครอบคลุมทุก record ยกเว้น record สุดท้ายที่เพิ่งต่อท้ายไฟล์
+
+    ใช้กับดัชนีที่เก็บจำนวน record ไว้ใน 'record_count' หากดัชนีไม่ตรงกับไฟล์จะคืนค่า None
+    เพื่อให้สร้างใหม่ตอนใช้งานครั้งถัดไป
+    """
+    index = get_loaded_index(name)
+    if index is None:
+        return None
+    try:
+        record_count = os.path.getsize(file_path) // record_size
+    except OSError:
+        return None
+    if index.get('record_count') != record_count - 1:
+        return None
+    return index
+
+def get_current_index(name, source_paths):
+    """คืนดัชนีในหน่วยความจำเฉพาะเมื่อยังตรงกับไฟล์ต้นทางปัจจุบัน (เรียกก่อนเขียนไฟล์) หรือ None"""
+    entry = _loaded.get(name)
+    if entry is None or entry[0] != source_signature(source_paths):
+        return None
+    return entry[1]
+
+def capture_indexes(names, source_paths):
+    """เก็บดัชนีที่ยังตรงกับไฟล์ต้นทางไว้ก่อนแก้ไขไฟล์แบบ in-place คืน dict ชื่อ -> ดัชนี (หรือ None)"""
+    return {name: get_current_index(name, source_paths) for name in names}
+
+def drop_index(name):
+    """ลบดัชนีออกจากหน่วยความจำและดิสก์"""
+    with _index_lock(name):
+        _loaded.pop(name, None)
+        for path in (index_file_path(name), delta_file_path(name)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,344 @@
+import os
+import lzma
+import zlib
+import struct
+from datetime import datetime
+from module.cache import bump_generation, writing
+from module import metrics, lsm, cdc, waitlist, segments
+from module.index_store import load_index, append_index_delta, get_index_for_append
+
+# -----------------------------
+# Path และ Format
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+STUDENT_FILE_PATH = os.path.join(main_dir, 'student.bin')
+COURSE_FILE_PATH = os.path.join(main_dir, 'CourseSubject.bin')
+REGISTRATION_FILE_PATH = os.path.join(main_dir, 'registration.bin')
+
+STUDENT_RECORD_FORMAT = '<16s50s50s20sBB'
+STUDENT_RECORD_SIZE = struct.calcsize(STUDENT_RECORD_FORMAT)
+
+COURSE_RECORD_FORMAT = '<10s50sB H B B'
+COURSE_RECORD_SIZE = struct.calcsize(COURSE_RECORD_FORMAT)
+
+REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
+REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
+REGISTER_ID_FORMAT = '<I'
+
+# จำนวน record ที่อ่านต่อครั้งเมื่อสแกนหรือคัดลอกไฟล์
+CHUNK_RECORDS = 4096
+
+# -----------------------------
+# ดัชนีการลงทะเบียนแยกตามนักเรียนและรายวิชา
+# -----------------------------
+def build_registration_refs(file_path=REGISTRATION_FILE_PATH):
+    """สร้างดัชนี รหัสนักเรียน/รหัสวิชา -> ลำดับ record ใน registration.bin"""
+    by_student = {}
+    by_course = {}
+    record_count = 0
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+        for record_no, unpacked in enumerate(struct.iter_unpack(REGISTRATION_RECORD_FORMAT, data[:usable])):
+            student_id = unpacked[1].strip(b'\x00').decode('utf-8', errors='replace')
+            course_id = unpacked[2].strip(b'\x00').decode('utf-8', errors='replace')
+            by_student.setdefault(student_id, []).append(record_no)
+            by_course.setdefault(course_id, []).append(record_no)
+            record_count = record_no + 1
+    return {'by_student': by_student, 'by_course': by_course, 'record_count': record_count}
+
+def apply_registration_refs_delta(index, delta):
+    """ปรับดัชนีด้วย delta ('add', รหัสนักเรียน, รหัสวิชา) ของ record ที่ต่อท้ายไฟล์"""
+    _, student_id, course_id = delta
+    record_no = index['record_count']
+    index['by_student'].setdefault(student_id, []).append(record_no)
+    index['by_course'].setdefault(course_id, []).append(record_no)
+    index['record_count'] += 1
+    return index
+
+def get_registration_refs(file_path=REGISTRATION_FILE_PATH):
+    """โหลดดัชนีการลงทะเบียนแยกตามนักเรียนและรายวิชา"""
+    return load_index('registration_refs', [file_path], lambda: build_registration_refs(file_path),
+                      apply_registration_refs_delta)
+
+def record_registration_refs(student_id, course_id, file_path=REGISTRATION_FILE_PATH):
+    """ปรับดัชนีหลังต่อท้าย record การลงทะเบียนใหม่ (บันทึกเฉพาะ delta)"""
+    index = get_index_for_append('registration_refs', file_path, REGISTRATION_RECORD_SIZE)
+    if index is None:
+        return
+    delta = ('add', student_id, course_id)
+    append_index_delta('registration_refs', [file_path], apply_registration_refs_delta(index, delta), delta)
+
+def read_registration_records(record_nos, file_path=REGISTRATION_FILE_PATH):
+    """คืน record ไบนารีตามลำดับ record ที่ระบุ (อ่านเฉพาะ record เหล่านั้น)"""
+    records = []
+    with open(file_path, 'rb') as f:
+        for record_no in record_nos:
+            f.seek(record_no * REGISTRATION_RECORD_SIZE)
+            records.append(f.read(REGISTRATION_RECORD_SIZE))
+    return records
+
+def find_pending_dependents(kind, key):
+    """คืน record ล่าสุด (ไม่ใช่ tombstone) ที่ยังค้างในโหมด LSM ซึ่งอ้างถึงนักเรียนหรือรายวิชา
+
+    คืน (dict ID -> record, set ของ ID ทั้งหมดที่มีรุ่นใน LSM รวม tombstone)
+    """
+    if not lsm.has_pending():
+        return {}, set()
+    overlays = lsm.student_pair_overlays(key) if kind == 'student' else lsm.course_pair_overlays(key)
+    pending_ids = {register_id for entries in overlays.values() for register_id in entries}
+    records = {}
+    for register_id in sorted(pending_ids):
+        record_data = lsm.get(register_id)
+        if record_data is not None and not lsm.is_tombstone(record_data):
+            records[register_id] = record_data
+    return records, pending_ids
+
+def find_dependent_registrations(kind, key, file_path=REGISTRATION_FILE_PATH):
+    """คืนลำดับ record การลงทะเบียนที่อ้างถึงนักเรียน (kind='student') หรือรายวิชา (kind='course')"""
+    refs = get_registration_refs(file_path)
+    table = refs['by_student'] if kind == 'student' else refs['by_course']
+    return list(table.get(key, []))
+
+@metrics.timed('storage_operation_seconds', op='rewrite', file='registration.bin')
+def delete_registration_records(record_nos, file_path=REGISTRATION_FILE_PATH):
+    """ลบ record การลงทะเบียนตามลำดับที่ระบุ โดยคัดลอกไบต์ที่เหลือโดยไม่ต้องถอดรหัส และบันทึก CDC event ของ record ที่ลบ"""
+    to_delete = set(record_nos)
+    if not to_delete:
+        return 0
+    tmp_path = file_path + '.tmp'
+    removed = []
+    try:
+        with writing(file_path, copy_on_write=False):
+            with open(file_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                record_no = 0
+                while True:
+                    chunk = src.read(REGISTRATION_RECORD_SIZE * CHUNK_RECORDS)
+                    if not chunk:
+                        break
+                    for pos in range(0, len(chunk), REGISTRATION_RECORD_SIZE):
+                        if record_no in to_delete:
+                            removed.append(chunk[pos:pos + REGISTRATION_RECORD_SIZE])
+                        else:
+                            dst.write(chunk[pos:pos + REGISTRATION_RECORD_SIZE])
+                        record_no += 1
+            os.replace(tmp_path, file_path)
+            bump_generation(file_path)
+    except IOError as e:
+        print(f"เกิดข้อผิดพลาดในการลบการลงทะเบียนที่เกี่ยวข้อง: {e}")
+        return 0
+    cdc.append_events('delete', removed)
+    return len(removed)
+
+def resolve_dependent_registrations(kind, key):
+    """ตรวจการลงทะเบียนที่อ้างถึงข้อมูลที่จะลบ แล้วให้ผู้ใช้เลือกลบต่อเนื่องหรือยกเลิก
+
+    คืนค่า True หากลบข้อมูลหลักต่อได้ (ไม่มีการอ้างอิง หรือลบการลงทะเบียนที่เกี่ยวข้องแล้ว)
+    """
+    # record ในไฟล์หลักที่มีรุ่นใหม่กว่าในโหมด LSM ใช้รุ่นใน LSM (ลบด้วย tombstone) ส่วนที่เหลือลบจากไฟล์หลัก
+    pending, pending_ids = find_pending_dependents(kind, key)
+    record_nos = find_dependent_registrations(kind, key)
+    base_records = dict(zip(record_nos, read_registration_records(record_nos))) if record_nos else {}
+    record_nos = [record_no for record_no in record_nos
+                  if struct.unpack_from(REGISTER_ID_FORMAT, base_records[record_no])[0] not in pending_ids]
+    # ภาคเรียนที่จัดเก็บแล้วอยู่ใน segments/ ต้องลบด้วย ไม่เช่นนั้นจะเหลือ record ที่อ้างถึงข้อมูลที่ไม่มีอยู่
+    archived = segments.find_archived_dependents(kind, key)
+    archived_count = sum(len(records) for records in archived.values())
+    total = len(record_nos) + len(pending) + archived_count
+    if not total:
+        return True
+
+    label = "นักเรียน" if kind == 'student' else "รายวิชา"
+    print(f"⚠️ พบการลงทะเบียน {total} รายการที่อ้างถึง{label} {key}")
+    if archived_count:
+        print(f"   (อยู่ในภาคเรียนที่จัดเก็บแล้ว {archived_count} รายการ: {', '.join(archived)})")
+    print("1. ลบการลงทะเบียนที่เกี่ยวข้องทั้งหมดด้วย")
+    print("2. ยกเลิกการลบ")
+    choice = input("กรุณาเลือก (1-2): ")
+    if choice != '1':
+        print("ยกเลิกการลบ")
+        return False
+
+    removed_records = [base_records[record_no] for record_no in record_nos] + list(pending.values())
+    removed = delete_registration_records(record_nos) if record_nos else 0
+    if removed == len(record_nos):
+        for record_data in pending.values():
+            lsm.put(lsm.make_tombstone(record_data))
+        cdc.append_events('delete', list(pending.values()))
+        removed += len(pending)
+        if archived:
+            removed += segments.delete_archived_records(archived)
+    print(f"ลบการลงทะเบียนที่เกี่ยวข้อง {removed} รายการ")
+    if removed != total:
+        return False
+
+    if kind == 'student':
+        # ที่นั่งที่นักเรียนลงทะเบียนอยู่ว่างลง (ลบรายวิชาไม่ต้องเลื่อนคิวของวิชาที่กำลังจะถูกลบ)
+        freed_courses = [struct.unpack(REGISTRATION_RECORD_FORMAT, record_data)[2].strip(b'\x00').decode('utf-8')
+                         for record_data in removed_records if record_data[-1] == 1]
+        for course_id in freed_courses:
+            # นักเรียนที่กำลังถูกลบต้องไม่ถูกเลื่อนกลับขึ้นมาลงทะเบียนวิชาเดิม
+            waitlist.cancel_waitlist(key, course_id)
+        waitlist.release_seats(freed_courses)
+    return True
+
+# -----------------------------
+# ตรวจสอบความถูกต้องของข้อมูลทั้งสามไฟล์ (fsck)
+# -----------------------------
+def scan_records(file_path, record_size, decode, issues, label):
+    """สแกนไฟล์ทีละก้อนแบบสตรีม เรียก decode กับแต่ละ record และบันทึก record ที่ถอดรหัสไม่ได้"""
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, 'rb') as f:
+        record_no = 0
+        while True:
+            chunk = f.read(record_size * CHUNK_RECORDS)
+            if not chunk:
+                break
+            for pos in range(0, len(chunk), record_size):
+                record_data = chunk[pos:pos + record_size]
+                if len(record_data) != record_size:
+                    issues['undecodable'].append(
+                        (label, record_no, f"ข้อมูลท้ายไฟล์ไม่ครบ record ({len(record_data)} ไบต์)"))
+                    break
+                try:
+                    decode(record_no, record_data)
+                except (struct.error, UnicodeDecodeError, ValueError, OverflowError, OSError) as e:
+                    issues['undecodable'].append((label, record_no, str(e)))
+                record_no += 1
+
+@metrics.timed('storage_operation_seconds', op='fsck', file='all')
+def run_fsck():
+    """ตรวจสอบไฟล์ student.bin, CourseSubject.bin และ registration.bin ในการอ่านรอบเดียวต่อไฟล์
+
+    การเขียนที่ค้างในโหมด LSM ตรวจแทน record เดิมในไฟล์หลัก (ไม่รวมเข้าไฟล์ก่อน)
+    record ของภาคเรียนที่จัดเก็บแล้วใน segments/ ตรวจด้วยเกณฑ์เดียวกับ registration.bin
+    คืน dict ของปัญหาที่พบ: orphaned, duplicate, undecodable
+    """
+    issues = {'orphaned': [], 'duplicate': [], 'undecodable': []}
+    latest = lsm.overlay() if lsm.has_pending() else {}
+    student_ids = {}
+    course_ids = {}
+    register_ids = {}
+    active_pairs = {}
+
+    def decode_student(record_no, record_data):
+        unpacked = struct.unpack(STUDENT_RECORD_FORMAT, record_data)
+        student_id = unpacked[0].strip(b'\x00').decode('utf-8')
+        unpacked[1].strip(b'\x00').decode('utf-8')
+        unpacked[2].strip(b'\x00').decode('utf-8')
+        unpacked[3].strip(b'\x00').decode('utf-8')
+        if student_id in student_ids:
+            issues['duplicate'].append(
+                ('student.bin', record_no, f"รหัสนักเรียน {student_id} ซ้ำกับ record {student_ids[student_id]}"))
+        else:
+            student_ids[student_id] = record_no
+
+    def decode_course(record_no, record_data):
+        unpacked = struct.unpack(COURSE_RECORD_FORMAT, record_data)
+        course_id = unpacked[0].strip(b'\x00').decode('utf-8')
+        unpacked[1].strip(b'\x00').decode('utf-8')
+        if course_id in course_ids:
+            issues['duplicate'].append(
+                ('CourseSubject.bin', record_no, f"รหัสวิชา {course_id} ซ้ำกับ record {course_ids[course_id]}"))
+        else:
+            course_ids[course_id] = record_no
+
+    def check_registration(label, record_no, record_data):
+        unpacked = struct.unpack(REGISTRATION_RECORD_FORMAT, record_data)
+        register_id = unpacked[0]
+        student_id = unpacked[1].strip(b'\x00').decode('utf-8')
+        course_id = unpacked[2].strip(b'\x00').decode('utf-8')
+        datetime.fromtimestamp(unpacked[3])
+        if label == 'registration.bin' and register_id in latest:
+            # record นี้มีรุ่นใหม่กว่า (หรือถูกลบ) ในโหมด LSM
+            return
+        if register_id in register_ids:
+            issues['duplicate'].append(
+                (label, record_no, f"ID การลงทะเบียน {register_id} ซ้ำกับ record {register_ids[register_id]}"))
+        else:
+            register_ids[register_id] = record_no
+        if unpacked[4] == 1:
+            pair = (student_id, course_id)
+            if pair in active_pairs:
+                issues['duplicate'].append(
+                    (label, record_no,
+                     f"นักเรียน {student_id} ลงทะเบียนวิชา {course_id} ซ้ำกับ record {active_pairs[pair]}"))
+            else:
+                active_pairs[pair] = record_no
+        if student_id not in student_ids:
+            issues['orphaned'].append((label, record_no, f"ไม่พบนักเรียนรหัส {student_id}"))
+        if course_id not in course_ids:
+            issues['orphaned'].append((label, record_no, f"ไม่พบรายวิชารหัส {course_id}"))
+
+    def decode_registration(record_no, record_data):
+        check_registration('registration.bin', record_no, record_data)
+
+    # อ่านนักเรียนและรายวิชาก่อน เพื่อให้ตรวจการอ้างอิงได้ระหว่างสแกนการลงทะเบียนรอบเดียว
+    scan_records(STUDENT_FILE_PATH, STUDENT_RECORD_SIZE, decode_student, issues, 'student.bin')
+    scan_records(COURSE_FILE_PATH, COURSE_RECORD_SIZE, decode_course, issues, 'CourseSubject.bin')
+    scan_records(REGISTRATION_FILE_PATH, REGISTRATION_RECORD_SIZE, decode_registration, issues, 'registration.bin')
+    # record ที่ค้างในโหมด LSM อ้างด้วย ID การลงทะเบียนแทนลำดับ record
+    for register_id in sorted(latest):
+        if lsm.is_tombstone(latest[register_id]):
+            continue
+        try:
+            check_registration('lsm', register_id, latest[register_id])
+        except (struct.error, UnicodeDecodeError, ValueError, OverflowError, OSError) as e:
+            issues['undecodable'].append(('lsm', register_id, str(e)))
+    hot_count = len(register_ids)
+    # record ใน archive อ้างด้วยลำดับ record ภายใน archive ของภาคเรียนนั้น
+    archived_count = 0
+    for term_key, _ in segments.list_archived_terms():
+        label = f"segments/{term_key}"
+        try:
+            records = segments.read_archived_term(term_key)
+        except (ValueError, struct.error, zlib.error, lzma.LZMAError, OSError) as e:
+            issues['undecodable'].append((label, 0, f"อ่าน archive ไม่ได้: {e}"))
+            continue
+        for record_no, record_data in enumerate(records):
+            try:
+                check_registration(label, record_no, record_data)
+            except (struct.error, UnicodeDecodeError, ValueError, OverflowError, OSError) as e:
+                issues['undecodable'].append((label, record_no, str(e)))
+        archived_count += len(records)
+
+    issues['counts'] = {
+        'student.bin': len(student_ids),
+        'CourseSubject.bin': len(course_ids),
+        'registration.bin': hot_count
+    }
+    if archived_count:
+        issues['counts']['segments'] = archived_count
+    return issues
+
+def print_fsck_report(issues):
+    """แสดงผลการตรวจสอบความถูกต้องของข้อมูล"""
+    report = ""
+    report += "==========================================================================\n"
+    report += "                     ผลการตรวจสอบความถูกต้องของข้อมูล\n"
+    report += "==========================================================================\n"
+    for file_name, count in issues['counts'].items():
+        report += f"- {file_name}: {count} รายการ\n"
+
+    sections = [
+        ('orphaned', "การลงทะเบียนที่อ้างถึงข้อมูลที่ไม่มีอยู่"),
+        ('duplicate', "ข้อมูลซ้ำ"),
+        ('undecodable', "record ที่อ่านไม่ได้")
+    ]
+    for key, title in sections:
+        report += f"\n--- {title}: {len(issues[key])} รายการ ---\n"
+        for file_name, record_no, message in issues[key]:
+            report += f"  {file_name} record {record_no}: {message}\n"
+
+    total = sum(len(issues[key]) for key, _ in sections)
+    report += "\n--------------------------------------------------------------------------\n"
+    report += "✅ ไม่พบปัญหา\n" if total == 0 else f"⚠️ พบปัญหาทั้งหมด {total} รายการ\n"
+    print(report)
+    return report
+
+def check_data_integrity():
+    """ตรวจสอบความถูกต้องของข้อมูลทั้งหมดและแสดงผล"""
+    print_fsck_report(run_fsck())
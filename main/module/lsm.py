@@ -0,0 +1,452 @@
+import os
+import struct
+import threading
+from module.cache import bump_generation, writing
+from module import metrics, trace
+
+# -----------------------------
+# โหมดเขียนแบบ log-structured (LSM) สำหรับการลงทะเบียน
+# -----------------------------
+# เปิดด้วย COMPRO_LSM=1 การเพิ่ม/แก้สถานะ/ลบจะเขียนลง WAL และ memtable ในหน่วยความจำ
+# เมื่อ memtable เต็มจะถูกเขียนเป็น segment ที่เรียงตาม ID (ไฟล์ไม่เปลี่ยนอีก)
+# เธรดเบื้องหลังรวม segment เข้าด้วยกัน และ merge_into_base() รวมทั้งหมดกลับเข้า registration.bin
+LSM_ENABLED = os.environ.get('COMPRO_LSM', '').lower() in ('1', 'true', 'yes', 'on')
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+REGISTRATION_FILE_PATH = os.path.join(main_dir, 'registration.bin')
+LSM_DIR = os.path.join(main_dir, 'lsm')
+WAL_FILE_PATH = os.path.join(LSM_DIR, 'wal.log')
+
+REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
+REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
+REGISTER_ID_FORMAT = '<I'
+REGISTER_ID_SIZE = struct.calcsize(REGISTER_ID_FORMAT)
+
+# ค่าสถานะของ record ที่แทนการลบ (tombstone)
+TOMBSTONE_STATUS = 255
+
+# จำนวน record ใน memtable ก่อนเขียนเป็น segment
+MEMTABLE_LIMIT = 512
+
+# จำนวน segment ที่ทำให้เธรดเบื้องหลังเริ่มรวม segment
+COMPACTION_TRIGGER = 4
+
+# register_id -> record ไบนารีล่าสุด
+_memtable = {}
+# [{'path', 'seq', 'first_id', 'last_id', 'count'}] เรียงจากเก่าไปใหม่
+_segments = []
+# (รหัสนักเรียน, รหัสวิชา) -> {register_id: สถานะล่าสุด} ของ record ที่ยังไม่รวมเข้าไฟล์หลัก
+_pair_overlay = {}
+# รหัสวิชา -> set ของคู่ใน _pair_overlay
+_course_pairs = {}
+# รหัสนักเรียน -> set ของคู่ใน _pair_overlay
+_student_pairs = {}
+_max_id = 0
+_loaded = False
+_lock = threading.RLock()
+_compaction_event = threading.Event()
+_compactor = None
+
+def unpack_fields(record_data):
+    """คืน (ID, รหัสนักเรียน, รหัสวิชา, เวลา, สถานะ) ของ record ไบนารี"""
+    unpacked = struct.unpack(REGISTRATION_RECORD_FORMAT, record_data)
+    return (unpacked[0],
+            unpacked[1].strip(b'\x00').decode('utf-8', errors='replace'),
+            unpacked[2].strip(b'\x00').decode('utf-8', errors='replace'),
+            unpacked[3],
+            unpacked[4])
+
+def make_tombstone(record_data):
+    """สร้าง record tombstone จาก record เดิม (ฟิลด์เหมือนเดิม สถานะ = TOMBSTONE_STATUS)"""
+    return record_data[:-1] + bytes([TOMBSTONE_STATUS])
+
+def segment_path(seq):
+    return os.path.join(LSM_DIR, f"seg_{seq:06d}.bin")
+
+def _track(record_data):
+    """ปรับข้อมูลคู่ (นักเรียน, วิชา) และ ID สูงสุดตาม record ใหม่"""
+    global _max_id
+    register_id, student_id, course_id, _, status = unpack_fields(record_data)
+    pair = (student_id, course_id)
+    _pair_overlay.setdefault(pair, {})[register_id] = status
+    _course_pairs.setdefault(course_id, set()).add(pair)
+    _student_pairs.setdefault(student_id, set()).add(pair)
+    _max_id = max(_max_id, register_id)
+
+def _ensure_loaded():
+    """โหลด segment ที่มีอยู่และเล่น WAL ซ้ำเข้า memtable (ครั้งแรกที่ใช้งาน)"""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        if os.path.isdir(LSM_DIR):
+            names = sorted(n for n in os.listdir(LSM_DIR) if n.startswith('seg_') and n.endswith('.bin'))
+            for name in names:
+                path = os.path.join(LSM_DIR, name)
+                segment = read_segment_info(path, int(name[4:10]))
+                if segment is None:
+                    continue
+                _segments.append(segment)
+                for record_data in read_segment(path):
+                    _track(record_data)
+            if os.path.exists(WAL_FILE_PATH):
+                with open(WAL_FILE_PATH, 'rb') as f:
+                    data = f.read()
+                # ข้าม record ท้ายไฟล์ที่เขียนไม่ครบ
+                usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+                for pos in range(0, usable, REGISTRATION_RECORD_SIZE):
+                    record_data = data[pos:pos + REGISTRATION_RECORD_SIZE]
+                    _memtable[unpack_fields(record_data)[0]] = record_data
+                    _track(record_data)
+        _loaded = True
+
+def read_segment_info(path, seq):
+    """อ่านช่วง ID ของ segment จาก record แรกและสุดท้าย"""
+    size = os.path.getsize(path)
+    count = size // REGISTRATION_RECORD_SIZE
+    if count == 0:
+        return None
+    with open(path, 'rb') as f:
+        first_id = struct.unpack(REGISTER_ID_FORMAT, f.read(REGISTER_ID_SIZE))[0]
+        f.seek((count - 1) * REGISTRATION_RECORD_SIZE)
+        last_id = struct.unpack(REGISTER_ID_FORMAT, f.read(REGISTER_ID_SIZE))[0]
+    return {'path': path, 'seq': seq, 'first_id': first_id, 'last_id': last_id, 'count': count}
+
+def read_segment(path):
+    """คืน record ไบนารีทั้งหมดของ segment"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+    return [data[pos:pos + REGISTRATION_RECORD_SIZE] for pos in range(0, usable, REGISTRATION_RECORD_SIZE)]
+
+def has_pending():
+    """มีการเขียนที่ยังไม่รวมเข้า registration.bin หรือไม่"""
+    _ensure_loaded()
+    return bool(_memtable or _segments)
+
+def max_register_id():
+    """คืน ID การลงทะเบียนสูงสุดที่อยู่ใน memtable หรือ segment"""
+    _ensure_loaded()
+    return _max_id
+
+# -----------------------------
+# เขียน
+# -----------------------------
+@metrics.timed('storage_operation_seconds', op='lsm_put', file='lsm')
+def put(record_data):
+    """บันทึก record (เพิ่มใหม่, สถานะใหม่ หรือ tombstone) ลง WAL และ memtable"""
+    _ensure_loaded()
+    with writing(WAL_FILE_PATH, copy_on_write=False), _lock:
+        os.makedirs(LSM_DIR, exist_ok=True)
+        with open(WAL_FILE_PATH, 'ab') as f:
+            f.write(record_data)
+        metrics.record_write('lsm', len(record_data))
+        _memtable[unpack_fields(record_data)[0]] = record_data
+        _track(record_data)
+        if len(_memtable) >= MEMTABLE_LIMIT:
+            flush_memtable()
+
+@trace.traced('lsm flush', cat='storage')
+def flush_memtable():
+    """เขียน memtable เป็น segment ใหม่ที่เรียงตาม ID แล้วล้าง WAL"""
+    _ensure_loaded()
+    with _lock:
+        if not _memtable:
+            return None
+        seq = (_segments[-1]['seq'] + 1) if _segments else 1
+        path = segment_path(seq)
+        records = [_memtable[register_id] for register_id in sorted(_memtable)]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(records))
+        os.replace(tmp_path, path)
+        _segments.append(read_segment_info(path, seq))
+        _memtable.clear()
+        os.remove(WAL_FILE_PATH)
+        metrics.record_write('lsm', len(records) * REGISTRATION_RECORD_SIZE)
+        if len(_segments) >= COMPACTION_TRIGGER:
+            start_compactor()
+            _compaction_event.set()
+        return path
+
+# -----------------------------
+# อ่าน
+# -----------------------------
+def find_in_segment(segment, register_id):
+    """binary search หา record ตาม ID ใน segment (record ขนาดคงที่เรียงตาม ID)"""
+    if not segment['first_id'] <= register_id <= segment['last_id']:
+        return None
+    with open(segment['path'], 'rb') as f:
+        lo, hi = 0, segment['count']
+        while lo < hi:
+            mid = (lo + hi) // 2
+            f.seek(mid * REGISTRATION_RECORD_SIZE)
+            record_data = f.read(REGISTRATION_RECORD_SIZE)
+            mid_id = struct.unpack_from(REGISTER_ID_FORMAT, record_data)[0]
+            if mid_id == register_id:
+                return record_data
+            if mid_id < register_id:
+                lo = mid + 1
+            else:
+                hi = mid
+    return None
+
+def get(register_id):
+    """คืน record ล่าสุดของ ID จาก memtable หรือ segment (ใหม่ไปเก่า) หรือ None หากไม่อยู่ในโหมด LSM
+
+    record ที่คืนอาจเป็น tombstone (ตรวจด้วย is_tombstone)
+    """
+    _ensure_loaded()
+    with _lock:
+        if register_id in _memtable:
+            return _memtable[register_id]
+        for segment in reversed(_segments):
+            record_data = find_in_segment(segment, register_id)
+            if record_data is not None:
+                return record_data
+    return None
+
+def is_tombstone(record_data):
+    return record_data[-1] == TOMBSTONE_STATUS
+
+def overlay():
+    """คืน dict ID -> record ล่าสุดของทุก record ที่ยังไม่รวมเข้าไฟล์หลัก (รวม tombstone)"""
+    _ensure_loaded()
+    with _lock:
+        latest = {}
+        for segment in _segments:
+            for record_data in read_segment(segment['path']):
+                latest[unpack_fields(record_data)[0]] = record_data
+        latest.update(_memtable)
+    return latest
+
+def merge_overlay(records, decode, id_key):
+    """รวม record ที่ถอดรหัสแล้วจากไฟล์หลักกับการเขียนที่ยังค้างอยู่ในโหมด LSM
+
+    decode แปลง record ไบนารีเป็น dict รูปแบบเดียวกับ records, id_key คือชื่อฟิลด์ ID
+    record ที่ถูกแก้จะอยู่ตำแหน่งเดิม record ใหม่ต่อท้ายเรียงตาม ID และ tombstone จะถูกตัดออก
+    """
+    return apply_overlay(records, overlay(), decode, id_key)
+
+def apply_overlay(records, latest, decode, id_key):
+    """รวม records กับ dict ID -> record ไบนารีล่าสุด (ใช้ร่วมกับ overlay ที่อ่านจาก snapshot)"""
+    if not latest:
+        return records
+    merged = []
+    seen = set()
+    for record in records:
+        register_id = record[id_key]
+        record_data = latest.get(register_id)
+        if record_data is None:
+            merged.append(record)
+            continue
+        seen.add(register_id)
+        if not is_tombstone(record_data):
+            decoded = decode(record_data)
+            if decoded:
+                merged.append(decoded)
+    for register_id in sorted(set(latest) - seen):
+        record_data = latest[register_id]
+        if not is_tombstone(record_data):
+            decoded = decode(record_data)
+            if decoded:
+                merged.append(decoded)
+    return merged
+
+def overlay_matching(records, decode, id_key, keep):
+    """รวมผลที่อ่านผ่านดัชนีของไฟล์หลักกับการเขียนที่ยังค้างอยู่ในโหมด LSM โดยไม่ต้องสแกนทั้งไฟล์
+
+    record ที่มีรุ่นใหม่กว่าใน LSM ถูกตัดออก แล้วเพิ่ม record ล่าสุดที่ไม่ใช่ tombstone และ keep(record) เป็นจริง
+    (ต่อท้ายเรียงตาม ID) keep คือเงื่อนไขเดียวกับที่ใช้เลือก records จากดัชนี
+    """
+    latest = overlay()
+    if not latest:
+        return records
+    merged = [record for record in records if record[id_key] not in latest]
+    for register_id in sorted(latest):
+        record_data = latest[register_id]
+        if is_tombstone(record_data):
+            continue
+        decoded = decode(record_data)
+        if decoded and keep(decoded):
+            merged.append(decoded)
+    return merged
+
+def pair_overlay(student_id, course_id):
+    """คืน dict ID -> สถานะล่าสุดของคู่ (นักเรียน, วิชา) ที่ยังไม่รวมเข้าไฟล์หลัก หรือ None"""
+    _ensure_loaded()
+    with _lock:
+        entries = _pair_overlay.get((student_id, course_id))
+        return dict(entries) if entries else None
+
+def course_pair_overlays(course_id):
+    """คืน dict คู่ -> {ID: สถานะล่าสุด} ของวิชาที่ยังไม่รวมเข้าไฟล์หลัก"""
+    _ensure_loaded()
+    with _lock:
+        return {pair: dict(_pair_overlay[pair]) for pair in _course_pairs.get(course_id, ())}
+
+def student_pair_overlays(student_id):
+    """คืน dict คู่ -> {ID: สถานะล่าสุด} ของนักเรียนที่ยังไม่รวมเข้าไฟล์หลัก"""
+    _ensure_loaded()
+    with _lock:
+        return {pair: dict(_pair_overlay[pair]) for pair in _student_pairs.get(student_id, ())}
+
+def pending_student_ids():
+    """คืนรหัสนักเรียนที่มีการลงทะเบียนซึ่งยังไม่รวมเข้าไฟล์หลัก"""
+    _ensure_loaded()
+    with _lock:
+        return list(_student_pairs)
+
+# -----------------------------
+# รวม segment
+# -----------------------------
+@trace.traced('lsm compaction', cat='storage')
+@metrics.timed('storage_operation_seconds', op='lsm_compaction', file='lsm')
+def compact_segments():
+    """รวม segment ทั้งหมดในขณะนั้นเป็น segment เดียว (record ใหม่กว่าชนะ)
+
+    เขียน segment ที่รวมแล้วแทนไฟล์ของ segment ใหม่ที่สุดที่ถูกรวม segment ที่ flush ระหว่างนี้จึงยังใหม่กว่า
+    """
+    with _lock:
+        inputs = list(_segments)
+    if len(inputs) < 2:
+        return False
+    latest = {}
+    for segment in inputs:
+        for record_data in read_segment(segment['path']):
+            latest[unpack_fields(record_data)[0]] = record_data
+    target = inputs[-1]
+    tmp_path = target['path'] + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(latest[register_id] for register_id in sorted(latest)))
+    with _lock:
+        if _segments[:len(inputs)] != inputs:
+            # segment ถูกรวมเข้าไฟล์หลักไปแล้วระหว่างนี้
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, target['path'])
+        merged = read_segment_info(target['path'], target['seq'])
+        del _segments[:len(inputs)]
+        _segments.insert(0, merged)
+        for segment in inputs[:-1]:
+            os.remove(segment['path'])
+    return True
+
+def compaction_worker():
+    while True:
+        _compaction_event.wait()
+        _compaction_event.clear()
+        try:
+            compact_segments()
+        except (IOError, OSError, struct.error) as e:
+            print(f"เกิดข้อผิดพลาดในการรวม segment: {e}")
+
+def start_compactor():
+    """เริ่มเธรด daemon สำหรับรวม segment (ครั้งเดียว)"""
+    global _compactor
+    if _compactor is None:
+        _compactor = threading.Thread(target=compaction_worker, name='lsm-compaction', daemon=True)
+        _compactor.start()
+
+@trace.traced('lsm merge into base', cat='storage')
+@metrics.timed('storage_operation_seconds', op='lsm_merge', file='registration.bin')
+def merge_into_base(file_path=REGISTRATION_FILE_PATH):
+    """รวมการเขียนที่ค้างทั้งหมดเข้า registration.bin แล้วลบ WAL และ segment คืนจำนวน record ที่รวม
+
+    record ที่แก้จะเขียนทับตำแหน่งเดิม record ที่ลบจะถูกตัดออก และ record ใหม่ต่อท้ายเรียงตาม ID
+    """
+    _ensure_loaded()
+    global _max_id
+    with writing(file_path, copy_on_write=False), _lock:
+        latest = overlay()
+        if not latest:
+            return 0
+        data = b''
+        if os.path.exists(file_path):
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+
+        chunks = []
+        seen = set()
+        for pos in range(0, usable, REGISTRATION_RECORD_SIZE):
+            record_data = data[pos:pos + REGISTRATION_RECORD_SIZE]
+            register_id = struct.unpack_from(REGISTER_ID_FORMAT, record_data)[0]
+            replacement = latest.get(register_id)
+            if replacement is None:
+                chunks.append(record_data)
+                continue
+            seen.add(register_id)
+            if not is_tombstone(replacement):
+                chunks.append(replacement)
+        for register_id in sorted(set(latest) - seen):
+            if not is_tombstone(latest[register_id]):
+                chunks.append(latest[register_id])
+
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(chunks))
+        os.replace(tmp_path, file_path)
+        bump_generation(file_path)
+        metrics.record_write('registration.bin', len(chunks) * REGISTRATION_RECORD_SIZE)
+
+        for segment in _segments:
+            os.remove(segment['path'])
+        if os.path.exists(WAL_FILE_PATH):
+            os.remove(WAL_FILE_PATH)
+        _segments.clear()
+        _memtable.clear()
+        _pair_overlay.clear()
+        _course_pairs.clear()
+        _student_pairs.clear()
+        _max_id = 0
+    return len(latest)
+
+# -----------------------------
+# snapshot
+# -----------------------------
+def snapshot_into(dest_dir, link):
+    """บันทึกสถานะ LSM ขณะนี้ลง dest_dir คืน (จำนวน segment, จำนวน record ใน memtable)
+
+    segment ไม่ถูกแก้ไขหลังเขียนจึงใช้ link (hardlink) ได้ ส่วน memtable เขียนเป็น WAL ของ snapshot
+    """
+    _ensure_loaded()
+    with _lock:
+        if not _segments and not _memtable:
+            return 0, 0
+        os.makedirs(dest_dir, exist_ok=True)
+        for segment in _segments:
+            link(segment['path'], os.path.join(dest_dir, os.path.basename(segment['path'])))
+        if _memtable:
+            with open(os.path.join(dest_dir, os.path.basename(WAL_FILE_PATH)), 'wb') as f:
+                f.write(b''.join(_memtable[register_id] for register_id in sorted(_memtable)))
+        return len(_segments), len(_memtable)
+
+def read_overlay_dir(lsm_dir):
+    """อ่าน segment และ WAL ในโฟลเดอร์ LSM (เช่นของ snapshot) คืน dict ID -> record ล่าสุด"""
+    latest = {}
+    if not os.path.isdir(lsm_dir):
+        return latest
+    names = sorted(n for n in os.listdir(lsm_dir) if n.startswith('seg_') and n.endswith('.bin'))
+    paths = [os.path.join(lsm_dir, name) for name in names]
+    wal_path = os.path.join(lsm_dir, os.path.basename(WAL_FILE_PATH))
+    if os.path.exists(wal_path):
+        paths.append(wal_path)
+    for path in paths:
+        for record_data in read_segment(path):
+            latest[unpack_fields(record_data)[0]] = record_data
+    return latest
+
+def lsm_info():
+    """คืนสถานะของโหมด LSM"""
+    _ensure_loaded()
+    with _lock:
+        return {
+            'enabled': LSM_ENABLED,
+            'memtable': len(_memtable),
+            'segments': len(_segments),
+            'segment_records': sum(s['count'] for s in _segments)
+        }
@@ -0,0 +1,190 @@
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# -----------------------------
+# การตั้งค่า
+# -----------------------------
+# เปิดการเก็บ metrics ด้วย COMPRO_METRICS=1 (ต้องตั้งก่อนเริ่มโปรแกรม)
+# เมื่อปิด ฟังก์ชันที่ครอบด้วย timed() จะเป็นฟังก์ชันเดิมทุกประการ จึงไม่มีค่าใช้จ่ายเพิ่ม
+ENABLED = os.environ.get('COMPRO_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+METRICS_FILE_PATH = os.environ.get('COMPRO_METRICS_FILE', os.path.join(main_dir, 'metrics.prom'))
+
+# พอร์ตของ endpoint /metrics (ไม่ตั้ง = ไม่เปิด)
+METRICS_PORT = os.environ.get('COMPRO_METRICS_PORT')
+
+METRIC_PREFIX = 'compro_'
+
+# ขอบบนของ bucket ของฮิสโตแกรมเวลา (วินาที)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+METRIC_HELP = {
+    'storage_operation_seconds': ('histogram', 'Latency of storage operations'),
+    'report_build_seconds': ('histogram', 'Latency of report builds'),
+    'storage_bytes_read_total': ('counter', 'Bytes read from data files'),
+    'storage_bytes_written_total': ('counter', 'Bytes written to data files'),
+    'records_decoded_total': ('counter', 'Records decoded from data files'),
+    'cache_requests_total': ('counter', 'Decoded-record cache lookups'),
+    'index_builds_total': ('counter', 'Full rebuilds of sidecar indexes'),
+}
+
+# name -> {labels: value}
+_counters = {}
+# name -> {labels: [bucket_counts..., sum, count]}
+_histograms = {}
+_lock = threading.Lock()
+
+def label_key(labels):
+    """แปลง label เป็น tuple ที่เรียงแล้วสำหรับใช้เป็นคีย์"""
+    return tuple(sorted(labels.items()))
+
+def inc(name, value=1, **labels):
+    """เพิ่มค่า counter"""
+    if not ENABLED:
+        return
+    key = label_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+def observe(name, seconds, **labels):
+    """บันทึกเวลาที่ใช้ลงในฮิสโตแกรม"""
+    if not ENABLED:
+        return
+    key = label_key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        data = series.get(key)
+        if data is None:
+            data = series[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                data[i] += 1
+                break
+        data[-2] += seconds
+        data[-1] += 1
+
+def timed(name, **labels):
+    """decorator จับเวลาฟังก์ชันลงฮิสโตแกรม (ไม่ครอบฟังก์ชันเลยเมื่อปิด metrics)"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+@contextmanager
+def _timer(name, labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+def timer(name, **labels):
+    """context manager จับเวลาช่วงโค้ดลงฮิสโตแกรม (คืน nullcontext เมื่อปิด metrics)"""
+    if not ENABLED:
+        return nullcontext()
+    return _timer(name, labels)
+
+def record_read(file_name, bytes_read, records_decoded):
+    """นับจำนวนไบต์ที่อ่านและจำนวน record ที่ถอดรหัสจากไฟล์ข้อมูล"""
+    if not ENABLED:
+        return
+    inc('storage_bytes_read_total', bytes_read, file=file_name)
+    inc('records_decoded_total', records_decoded, file=file_name)
+
+def record_write(file_name, bytes_written):
+    """นับจำนวนไบต์ที่เขียนลงไฟล์ข้อมูล"""
+    inc('storage_bytes_written_total', bytes_written, file=file_name)
+
+def format_labels(key, extra=None):
+    """แปลง label เป็นข้อความรูปแบบ Prometheus"""
+    items = list(key) + (extra or [])
+    if not items:
+        return ''
+    body = ','.join(f'{k}="{str(v)}"' for k, v in items)
+    return '{' + body + '}'
+
+def render_prometheus():
+    """คืนค่า metrics ทั้งหมดในรูปแบบ Prometheus text exposition"""
+    lines = []
+    with _lock:
+        for name in sorted(_counters):
+            full_name = METRIC_PREFIX + name
+            _, help_text = METRIC_HELP.get(name, ('counter', name))
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} counter")
+            for key, value in sorted(_counters[name].items()):
+                lines.append(f"{full_name}{format_labels(key)} {value}")
+
+        for name in sorted(_histograms):
+            full_name = METRIC_PREFIX + name
+            _, help_text = METRIC_HELP.get(name, ('histogram', name))
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for key, data in sorted(_histograms[name].items()):
+                cumulative = 0
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    cumulative += data[i]
+                    lines.append(f"{full_name}_bucket{format_labels(key, [('le', bound)])} {cumulative}")
+                lines.append(f"{full_name}_bucket{format_labels(key, [('le', '+Inf')])} {data[-1]}")
+                lines.append(f"{full_name}_sum{format_labels(key)} {data[-2]:.6f}")
+                lines.append(f"{full_name}_count{format_labels(key)} {data[-1]}")
+    return '\n'.join(lines) + '\n'
+
+def write_metrics_file(file_path=METRICS_FILE_PATH):
+    """บันทึก metrics ลงไฟล์ข้อความ (เขียนไฟล์ชั่วคราวแล้วสลับ เพื่อให้ตัวอ่านไม่เห็นไฟล์ครึ่งๆ)"""
+    if not ENABLED:
+        return
+    tmp_path = file_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(render_prometheus())
+        os.replace(tmp_path, file_path)
+    except IOError as e:
+        print(f"เกิดข้อผิดพลาดในการบันทึก metrics: {e}")
+
+def start_metrics_server(port):
+    """เปิด endpoint /metrics บน localhost ในเธรดเบื้องหลัง"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if ENABLED:
+    atexit.register(write_metrics_file)
+    if METRICS_PORT:
+        try:
+            start_metrics_server(int(METRICS_PORT))
+        except (ValueError, OSError) as e:
+            print(f"ไม่สามารถเปิด endpoint ของ metrics ได้: {e}")
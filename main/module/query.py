@@ -0,0 +1,562 @@
+import os
+import re
+from datetime import datetime, timedelta
+from itertools import islice
+from module import student, course, register, lsm, metrics, trace
+from module.course_index import find_course_offsets, find_course_offset_by_id
+from module.integrity import find_dependent_registrations
+from module.time_index import find_registration_offsets_between
+from module.bitmap_index import get_student_bitmaps, evaluate_filter, bitmap_count, bitmap_offsets
+
+# -----------------------------
+# Query API ของนักเรียน รายวิชา และการลงทะเบียน
+# -----------------------------
+# query เป็น dict: ตารางหลัก, เงื่อนไข (and กันทั้งหมด), join, คอลัมน์ที่เลือก, การเรียง และจำนวนสูงสุด
+# planner เลือกวิธีอ่านตารางหลักจากดัชนีที่มี (point index, secondary index, bitmap) หรือ full scan
+# โดยเลือกวิธีที่ประมาณว่าอ่าน record น้อยที่สุด เงื่อนไขที่ดัชนีไม่ครอบคลุมจะกรองหลังอ่าน
+#
+#   q = new_query('registration')
+#   where(q, 'status', '=', 'registered')
+#   where(q, 'course.credit', '>=', 3)     # ฟิลด์ของตารางอื่น join ให้อัตโนมัติ
+#   order_by(q, 'date', descending=True)
+#   limit(q, 10)
+#   print_explain(q); rows = execute(q)
+
+TABLES = {
+    'student': {
+        'file': student.STUDENT_FILE_PATH,
+        'record_size': student.STUDENT_RECORD_SIZE,
+        'scan': student.read_all_records_from_file,
+        'fetch': student.read_students_at,
+    },
+    'course': {
+        'file': course.COURSE_FILE_PATH,
+        'record_size': course.COURSE_RECORD_SIZE,
+        'scan': course.read_all_records_from_file,
+        'fetch': course.read_courses_at,
+    },
+    'registration': {
+        'file': register.REGISTRATION_FILE_PATH,
+        'record_size': register.REGISTRATION_RECORD_SIZE,
+        'scan': register.read_all_records_from_file,
+        'fetch': register.read_registrations_at,
+    },
+}
+
+def parse_date(text):
+    return datetime.strptime(text.strip(), "%Y-%m-%d").date()
+
+def as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+def fold(value):
+    return value.lower() if isinstance(value, str) else value
+
+# ชื่อฟิลด์ -> (คีย์ใน record, แปลงข้อความที่ผู้ใช้ป้อน, ปรับค่าก่อนเปรียบเทียบ)
+# ฟิลด์ข้อความที่ปรับด้วย fold เทียบแบบไม่สนตัวพิมพ์ เช่นเดียวกับดัชนี bitmap
+FIELDS = {
+    'student': {
+        'id': ('STUDENT ID', str, None),
+        'first': ('FIRST NAME', str, fold),
+        'last': ('LAST NAME', str, fold),
+        'major': ('MAJOR', str, fold),
+        'year': ('YEAR', int, None),
+        'status': ('STATUS', str, fold),
+    },
+    'course': {
+        'id': ('COURSE ID', str, None),
+        'name': ('COURSE NAME', str, fold),
+        'credit': ('CREDIT', int, None),
+        'year': ('ACADEMIC YEAR', int, None),
+        'semester': ('SEMESTER', int, None),
+        'status': ('STATUS', str, fold),
+    },
+    'registration': {
+        'id': ('ID', int, None),
+        'student': ('STUDENT ID', str, None),
+        'course': ('COURSE ID', str, None),
+        'date': ('REGISTRATION DATE', parse_date, as_date),
+        'status': ('STATUS', str, fold),
+    },
+}
+
+# (ตารางซ้าย, ตารางขวา) -> (คีย์ในตารางซ้าย, คีย์ในตารางขวา)
+JOINS = {
+    ('registration', 'student'): ('STUDENT ID', 'STUDENT ID'),
+    ('registration', 'course'): ('COURSE ID', 'COURSE ID'),
+    ('student', 'registration'): ('STUDENT ID', 'STUDENT ID'),
+    ('course', 'registration'): ('COURSE ID', 'COURSE ID'),
+}
+
+OPERATORS = {
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '~': lambda a, b: isinstance(a, str) and b in a,
+    'in': lambda a, b: a in b,
+}
+
+ACCESS_NAMES = {
+    'scan': 'full scan',
+    'point': 'point index',
+    'secondary': 'secondary index',
+    'bitmap': 'bitmap index',
+}
+
+# -----------------------------
+# สร้าง query
+# -----------------------------
+def new_query(table):
+    """สร้าง query ใหม่ของตาราง 'student', 'course' หรือ 'registration'"""
+    if table not in TABLES:
+        raise ValueError(f"ไม่รู้จักตาราง: {table}")
+    return {'table': table, 'where': [], 'joins': [], 'select': None, 'order_by': [], 'limit': None}
+
+def join(query, table):
+    """join ตารางหลักกับ table (inner join ตามรหัสนักเรียน/รหัสวิชา)"""
+    if table == query['table'] or table in query['joins']:
+        return query
+    if (query['table'], table) not in JOINS:
+        raise ValueError(f"join {query['table']} กับ {table} ไม่ได้")
+    query['joins'].append(table)
+    return query
+
+def resolve_field(query, name):
+    """คืน (ตาราง, ชื่อฟิลด์) ของชื่อเช่น 'major' หรือ 'student.major' (join ตารางอื่นให้อัตโนมัติ)"""
+    table, sep, field = name.strip().lower().rpartition('.')
+    if not sep:
+        table = query['table']
+    if table not in FIELDS or field not in FIELDS[table]:
+        raise ValueError(f"ไม่รู้จักฟิลด์: {name}")
+    join(query, table)
+    return table, field
+
+def row_key(query, table, field):
+    """คีย์ของฟิลด์ในแถวผลลัพธ์ (ฟิลด์ของตารางที่ join มีชื่อตารางนำหน้า เช่น 'course.CREDIT')"""
+    key = FIELDS[table][field][0]
+    return key if table == query['table'] else f"{table}.{key}"
+
+def where(query, name, op, value):
+    """เพิ่มเงื่อนไข name op value (op: =, !=, <, <=, >, >=, ~ (มีข้อความ), in) ทุกเงื่อนไข and กัน"""
+    if op not in OPERATORS:
+        raise ValueError(f"ไม่รู้จักตัวดำเนินการ: {op}")
+    table, field = resolve_field(query, name)
+    adjust = FIELDS[table][field][2] or (lambda v: v)
+    value = tuple(adjust(v) for v in value) if op == 'in' else adjust(value)
+    query['where'].append((table, field, op, value))
+    return query
+
+def select(query, *names):
+    """เลือกคอลัมน์ที่คืน (ไม่เรียก = ทุกคอลัมน์)"""
+    query['select'] = [resolve_field(query, name) for name in names]
+    return query
+
+def order_by(query, name, descending=False):
+    query['order_by'].append((resolve_field(query, name), descending))
+    return query
+
+def limit(query, count):
+    query['limit'] = count
+    return query
+
+# -----------------------------
+# แปลงเงื่อนไขที่ผู้ใช้พิมพ์
+# -----------------------------
+CONDITION_PATTERN = re.compile(r'^([\w.]+)\s*(>=|<=|!=|=|<|>|~)\s*(.+)$')
+
+def parse_value(query, name, text):
+    table, field = resolve_field(query, name)
+    try:
+        return FIELDS[table][field][1](text.strip().strip('"'))
+    except ValueError:
+        raise ValueError(f"ค่าของ {name} ไม่ถูกต้อง: {text}")
+
+def where_text(query, text):
+    """เพิ่มเงื่อนไขจากข้อความเช่น 'course=CS101 and status=registered and date>=2024-01-01'
+
+    ค่าที่คั่นด้วย | ใช้กับ = หมายถึงค่าใดค่าหนึ่ง เช่น year=1|2
+    """
+    for part in re.split(r'\s+and\s+', text.strip(), flags=re.IGNORECASE):
+        match = CONDITION_PATTERN.match(part.strip())
+        if not match:
+            raise ValueError(f"เงื่อนไขไม่ถูกต้อง: {part}")
+        name, op, value_text = match.groups()
+        if op == '=' and '|' in value_text:
+            where(query, name, 'in', [parse_value(query, name, v) for v in value_text.split('|')])
+        else:
+            where(query, name, op, parse_value(query, name, value_text))
+    return query
+
+def order_text(query, text):
+    """เพิ่มการเรียงจากข้อความเช่น 'date desc, id'"""
+    for part in text.split(','):
+        words = part.split()
+        if not words or len(words) > 2 or (len(words) == 2 and words[1].lower() not in ('asc', 'desc')):
+            raise ValueError(f"การเรียงไม่ถูกต้อง: {part.strip()}")
+        order_by(query, words[0], descending=len(words) == 2 and words[1].lower() == 'desc')
+    return query
+
+# -----------------------------
+# วิธีอ่านตารางหลัก (access path)
+# -----------------------------
+# แต่ละฟังก์ชันรับเงื่อนไขของตารางหลัก คืน None หากใช้ไม่ได้
+# หรือ dict: ชนิด, ชื่อดัชนี, เงื่อนไขที่ดัชนีครอบคลุม และ offset ของ record ที่ต้องอ่าน
+def table_rows(table):
+    """จำนวน record ในไฟล์ของตาราง (จำนวนแถวที่ full scan ต้องอ่าน)"""
+    info = TABLES[table]
+    try:
+        return os.path.getsize(info['file']) // info['record_size']
+    except OSError:
+        return 0
+
+def student_bitmap_path(predicates):
+    # ดัชนี bitmap เก็บสาขาเป็นตัวพิมพ์เล็กและสถานะเป็น 1/0
+    keys = {'major': lambda v: v, 'year': lambda v: v,
+            'status': lambda v: {'active': 1, 'inactive': 0}.get(v, -1)}
+    uses = [p for p in predicates if p[1] in keys and p[2] in ('=', '!=', 'in')]
+    if not uses:
+        return None
+    bitmaps, record_count = get_student_bitmaps()
+    node = None
+    for _, field, op, value in uses:
+        values = value if op == 'in' else (value,)
+        term = None
+        for v in values:
+            leaf = ('eq', field, keys[field](v))
+            term = leaf if term is None else ('or', term, leaf)
+        if term is None:
+            term = ('eq', field, None)
+        if op == '!=':
+            term = ('not', term)
+        node = term if node is None else ('and', node, term)
+    bitmap = evaluate_filter(node, bitmaps, record_count)
+    return {'access': 'bitmap', 'index': 'student_bitmap', 'uses': uses, 'offsets': bitmap_offsets(bitmap),
+            'estimate': bitmap_count(bitmap)}
+
+def course_point_path(predicates):
+    for predicate in predicates:
+        if predicate[1] == 'id' and predicate[2] == '=':
+            offset = find_course_offset_by_id(predicate[3])
+            offsets = [] if offset is None else [offset]
+            return {'access': 'point', 'index': 'course_composite.by_id', 'uses': [predicate],
+                    'offsets': offsets, 'estimate': len(offsets)}
+    return None
+
+def course_composite_path(predicates):
+    year_from, year_to, semester, is_active = None, None, None, None
+    conflict = False
+    uses = []
+    for predicate in predicates:
+        _, field, op, value = predicate
+        if field == 'year' and op in ('=', '>=', '>', '<=', '<'):
+            if op in ('=', '>=', '>'):
+                low = value + 1 if op == '>' else value
+                year_from = low if year_from is None else max(year_from, low)
+            if op in ('=', '<=', '<'):
+                high = value - 1 if op == '<' else value
+                year_to = high if year_to is None else min(year_to, high)
+        elif field == 'semester' and op == '=':
+            conflict = conflict or (semester is not None and semester != value)
+            semester = value
+        elif field == 'status' and op == '=' and value in ('active', 'inactive'):
+            active = 1 if value == 'active' else 0
+            conflict = conflict or (is_active is not None and is_active != active)
+            is_active = active
+        else:
+            continue
+        uses.append(predicate)
+    if not uses:
+        return None
+    if conflict or (year_from is not None and year_to is not None and year_from > year_to):
+        offsets = []
+    else:
+        offsets = find_course_offsets(semester=semester, is_active=is_active,
+                                      year_from=year_from, year_to=year_to)
+    return {'access': 'secondary', 'index': 'course_composite', 'uses': uses, 'offsets': offsets,
+            'estimate': len(offsets)}
+
+def registration_point_path(predicates):
+    for predicate in predicates:
+        if predicate[1] == 'id' and predicate[2] == '=':
+            offset = register.find_registration_offset(predicate[3])
+            offsets = [] if offset is None else [offset]
+            return {'access': 'point', 'index': 'registration_order', 'uses': [predicate],
+                    'offsets': offsets, 'estimate': len(offsets)}
+    return None
+
+def registration_refs_path(predicates):
+    uses = [p for p in predicates if p[1] in ('student', 'course') and p[2] == '=']
+    if not uses:
+        return None
+    record_nos = None
+    for _, field, _, value in uses:
+        found = set(find_dependent_registrations(field, value))
+        record_nos = found if record_nos is None else record_nos & found
+    offsets = sorted(record_no * register.REGISTRATION_RECORD_SIZE for record_no in record_nos)
+    return {'access': 'secondary', 'index': 'registration_refs', 'uses': uses, 'offsets': offsets,
+            'estimate': len(offsets)}
+
+def registration_time_path(predicates):
+    start, end = None, None
+    uses = []
+    for predicate in predicates:
+        _, field, op, value = predicate
+        if field != 'date' or op not in ('=', '>=', '>', '<=', '<'):
+            continue
+        day = datetime(value.year, value.month, value.day)
+        if op in ('=', '>=', '>'):
+            low = day + timedelta(days=1) if op == '>' else day
+            start = low if start is None else max(start, low)
+        if op in ('=', '<=', '<'):
+            high = day if op == '<' else day + timedelta(days=1)
+            end = high if end is None else min(end, high)
+        uses.append(predicate)
+    if not uses:
+        return None
+    offsets = [] if start is not None and end is not None and start >= end \
+        else sorted(find_registration_offsets_between(start, end))
+    return {'access': 'secondary', 'index': 'registration_time', 'uses': uses, 'offsets': offsets,
+            'estimate': len(offsets)}
+
+# ลำดับในรายการใช้ตัดสินเมื่อประมาณจำนวนแถวได้เท่ากัน
+ACCESS_PATHS = {
+    'student': [student_bitmap_path],
+    'course': [course_point_path, course_composite_path],
+    'registration': [registration_point_path, registration_refs_path, registration_time_path],
+}
+
+def indexes_usable(table):
+    # ดัชนีของ registration.bin ยังไม่รวมการเขียนที่ค้างในโหมด LSM
+    return table != 'registration' or not lsm.has_pending()
+
+# -----------------------------
+# Planner
+# -----------------------------
+def plan_join(left, right, left_estimate):
+    """เลือกวิธี join: ค้นจากดัชนีทีละคีย์ (index lookup) หรือสร้าง hash จากการอ่านตารางขวาทั้งตาราง"""
+    right_rows = table_rows(right)
+    if right == 'course':
+        lookup_estimate = left_estimate
+    elif right == 'registration' and indexes_usable(right):
+        # ประมาณจากจำนวนการลงทะเบียนเฉลี่ยต่อแถวของตารางซ้าย
+        lookup_estimate = left_estimate * right_rows // max(1, table_rows(left))
+    else:
+        lookup_estimate = None
+    if lookup_estimate is not None and lookup_estimate < right_rows:
+        return {'table': right, 'strategy': 'index', 'estimate': lookup_estimate}
+    return {'table': right, 'strategy': 'hash', 'estimate': right_rows}
+
+@trace.traced('plan query', cat='query')
+def plan_query(query):
+    """เลือกวิธีอ่านตารางหลักและวิธี join คืน dict แผนที่ explain() และ execute() ใช้"""
+    table = query['table']
+    predicates = [p for p in query['where'] if p[0] == table]
+    scan_rows = table_rows(table)
+    best = {'access': 'scan', 'index': None, 'uses': [], 'offsets': None, 'estimate': scan_rows}
+    if indexes_usable(table):
+        for access_path in ACCESS_PATHS[table]:
+            candidate = access_path(predicates)
+            if candidate is not None and candidate['estimate'] < best['estimate']:
+                best = candidate
+    plan = dict(best)
+    plan['table'] = table
+    plan['scan_rows'] = scan_rows
+    plan['residual'] = [p for p in predicates if p not in best['uses']]
+    plan['joins'] = []
+    for right in query['joins']:
+        plan['joins'].append(plan_join(table, right, best['estimate']))
+    plan['post_join'] = [p for p in query['where'] if p[0] != table]
+    return plan
+
+def describe_predicates(query, predicates):
+    parts = []
+    for table, field, op, value in predicates:
+        name = field if table == query['table'] else f"{table}.{field}"
+        shown = '|'.join(str(v) for v in value) if op == 'in' else str(value)
+        parts.append(f"{name} {op} {shown}")
+    return ' and '.join(parts)
+
+def explain(query, plan=None):
+    """คืนบรรทัดข้อความอธิบายแผนที่เลือกและจำนวนแถวที่ประมาณว่าต้องอ่าน"""
+    plan = plan or plan_query(query)
+    file_name = os.path.basename(TABLES[plan['table']]['file'])
+    lines = [f"แผนการค้นหาตาราง {plan['table']}"]
+    step = f"อ่าน {file_name} ด้วย {ACCESS_NAMES[plan['access']]}"
+    if plan['index']:
+        step += f" ({plan['index']}: {describe_predicates(query, plan['uses'])})"
+    lines.append(f"{step} ประมาณ {plan['estimate']} แถว")
+    if plan['access'] == 'scan' and not indexes_usable(plan['table']):
+        lines.append("  (มีการเขียนที่ค้างในโหมด LSM จึงไม่ใช้ดัชนีของ registration.bin)")
+    if plan['residual']:
+        lines.append(f"กรองเพิ่ม: {describe_predicates(query, plan['residual'])}")
+    rows_read = plan['estimate']
+    for join_plan in plan['joins']:
+        strategy = 'ค้นจากดัชนีทีละคีย์' if join_plan['strategy'] == 'index' else 'hash join (อ่านทั้งตาราง)'
+        lines.append(f"join {join_plan['table']} ด้วย {strategy} ประมาณ {join_plan['estimate']} แถว")
+        rows_read += join_plan['estimate']
+    if plan['post_join']:
+        lines.append(f"กรองหลัง join: {describe_predicates(query, plan['post_join'])}")
+    if query['order_by']:
+        order = ', '.join(f"{field if table == query['table'] else table + '.' + field}"
+                          f"{' desc' if descending else ''}" for (table, field), descending in query['order_by'])
+        lines.append(f"เรียงตาม {order}")
+    if query['limit'] is not None:
+        lines.append(f"จำกัด {query['limit']} แถว")
+    lines.append(f"รวมอ่านประมาณ {rows_read} แถว (full scan ตารางหลัก {plan['scan_rows']} แถว)")
+    return lines
+
+def print_explain(query, plan=None):
+    print("\n" + "\n".join(explain(query, plan)))
+
+# -----------------------------
+# ทำงานตามแผน
+# -----------------------------
+def matches(query, row, predicates):
+    for table, field, op, value in predicates:
+        adjust = FIELDS[table][field][2]
+        actual = row[row_key(query, table, field)]
+        if adjust:
+            actual = adjust(actual)
+        try:
+            if not OPERATORS[op](actual, value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+def fetch_join_rows(left, right, strategy, keys):
+    """คืน dict คีย์ join -> record ของตารางขวา"""
+    right_key = JOINS[(left, right)][1]
+    if strategy == 'hash':
+        records = TABLES[right]['scan']()
+    elif right == 'course':
+        offsets = [find_course_offset_by_id(key) for key in keys]
+        records = course.read_courses_at(sorted(o for o in offsets if o is not None))
+    else:
+        record_nos = []
+        for key in keys:
+            record_nos.extend(find_dependent_registrations(left, key))
+        records = register.read_registrations_at(
+            sorted(record_no * register.REGISTRATION_RECORD_SIZE for record_no in record_nos))
+    lookup = {}
+    for record in records:
+        if record:
+            lookup.setdefault(record[right_key], []).append(record)
+    return lookup
+
+@trace.traced('execute query', cat='query')
+def execute(query, plan=None):
+    """ทำงานตามแผนแล้วคืนรายการแถว (dict)"""
+    plan = plan or plan_query(query)
+    table = plan['table']
+    metrics.inc('query_plans_total', table=table, access=plan['access'])
+    if plan['offsets'] is None:
+        rows = (r for r in TABLES[table]['scan']() if r)
+    else:
+        rows = iter(TABLES[table]['fetch'](plan['offsets']))
+    if plan['residual']:
+        rows = (r for r in rows if matches(query, r, plan['residual']))
+
+    if plan['joins']:
+        rows = list(rows)
+        for join_plan in plan['joins']:
+            right = join_plan['table']
+            left_key = JOINS[(table, right)][0]
+            lookup = fetch_join_rows(table, right, join_plan['strategy'], {r[left_key] for r in rows})
+            joined = []
+            for row in rows:
+                for match in lookup.get(row[left_key], []):
+                    merged = dict(row)
+                    merged.update((f"{right}.{key}", value) for key, value in match.items())
+                    joined.append(merged)
+            rows = joined
+        if plan['post_join']:
+            rows = [r for r in rows if matches(query, r, plan['post_join'])]
+
+    if query['order_by']:
+        rows = list(rows)
+        # เรียงจากคีย์รองไปคีย์หลัก (sort ของ Python คงลำดับเดิมเมื่อค่าเท่ากัน)
+        for (order_table, field), descending in reversed(query['order_by']):
+            rows.sort(key=lambda r: r[row_key(query, order_table, field)], reverse=descending)
+    if query['limit'] is not None:
+        rows = islice(rows, query['limit'])
+    rows = list(rows)
+
+    if query['select']:
+        keys = [row_key(query, t, f) for t, f in query['select']]
+        rows = [{key: row[key] for key in keys} for row in rows]
+    return rows
+
+# -----------------------------
+# เมนูกรองข้อมูล
+# -----------------------------
+def input_query(table, example):
+    """รับเงื่อนไข การเรียง จำนวนสูงสุด และคอลัมน์จากผู้ใช้ คืน query หรือ None"""
+    fields = ', '.join(FIELDS[table])
+    others = ', '.join(f"{right}.<ฟิลด์>" for left, right in JOINS if left == table)
+    print(f"\nฟิลด์: {fields} (ฟิลด์ของตารางอื่น: {others})")
+    print("ตัวดำเนินการ: = != < <= > >= ~ (มีข้อความ) รวมเงื่อนไขด้วย and ค่าหลายค่าคั่นด้วย | เช่น year=1|2")
+    print(f"ตัวอย่าง: {example}")
+    query = new_query(table)
+    try:
+        condition = input("เงื่อนไข (Enter = ทั้งหมด): ").strip()
+        if condition:
+            where_text(query, condition)
+        order = input("เรียงตาม เช่น id desc (Enter = ไม่เรียง): ").strip()
+        if order:
+            order_text(query, order)
+        count = input("จำนวนสูงสุด (Enter = ทั้งหมด): ").strip()
+        if count:
+            if not count.isdigit():
+                raise ValueError("จำนวนสูงสุดไม่ถูกต้อง")
+            limit(query, int(count))
+        columns = input(f"คอลัมน์ที่แสดง เช่น {', '.join(list(FIELDS[table])[:2])} (Enter = ตามรายงานปกติ): ").strip()
+        if columns:
+            select(query, *[c.strip() for c in columns.split(',') if c.strip()])
+    except ValueError as e:
+        print(e)
+        return None
+    return query
+
+def print_rows(rows, title):
+    """แสดงแถวผลลัพธ์ที่เลือกคอลัมน์เองในรูปแบบตาราง"""
+    headers = list(rows[0])
+    col_widths = [max(len(h), *(len(str(row[h])) for row in rows)) for h in headers]
+    col_widths = [min(width, 30) for width in col_widths]
+    print("\n==========================================================================")
+    print(f"                          {title}")
+    print("==========================================================================")
+    header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
+    print(header_line)
+    print("-" * len(header_line))
+    for row in rows:
+        row_data = [str(row[h]) for h in headers]
+        for i in range(len(row_data)):
+            if len(row_data[i]) > col_widths[i]:
+                row_data[i] = row_data[i][:col_widths[i]-3] + "..."
+        print(" | ".join(f"{row_data[i]:<{col_widths[i]}}" for i in range(len(headers))))
+    print("--------------------------------------------------------------------------")
+
+def run_query_menu(table, example, print_report, title):
+    """รับ query จากผู้ใช้ แสดงแผน แล้วแสดงผลด้วยรายงานของตาราง (หรือตารางคอลัมน์ที่เลือก)"""
+    query = input_query(table, example)
+    if query is None:
+        return
+    show_query_result(query, print_report, title)
+
+def show_query_result(query, print_report, title, show_plan=True):
+    """ทำงานตาม query แล้วแสดงผลด้วยรายงานของตาราง (ตัวเลือกกรองแบบเมนูตัวเลขไม่แสดงแผน)"""
+    plan = plan_query(query)
+    if show_plan:
+        print_explain(query, plan)
+    rows = execute(query, plan)
+    if not rows:
+        print("ไม่พบข้อมูลที่ตรงตามเงื่อนไขการกรอง")
+        return
+    if query['select']:
+        print_rows(rows, f"{title} ({len(rows)} รายการ)")
+    else:
+        print_report(rows, title=f"{title} ({len(rows)} รายการ)")
@@ -1,6 +1,18 @@
 import struct
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from module.cache import get_cached_records, bump_generation, writing
+from module import metrics, trace
+from module.index_store import load_index, append_index_delta, get_index_for_append, capture_indexes
+from module import enrollment, time_index, credit_load
+from module.enrollment import (check_enrollment, record_enrollment, set_course_capacity,
+                               get_course_capacity, get_seats_taken)
+from module.integrity import record_registration_refs, delete_registration_records
+from module.time_index import (record_registration_time, find_registration_offsets_between, get_histogram,
+                               adjust_histogram)
+from module import segments, lsm, cdc, waitlist
+from module.external_sort import sort_records
+from itertools import islice
 
 # กำหนดพาธของไฟล์ฐานข้อมูล
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -16,6 +28,16 @@ STUDENT_RECORD_SIZE = struct.calcsize(STUDENT_RECORD_FORMAT)
 REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
 REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
 
+# ฟิลด์ ID อยู่ที่ต้น record ใช้อ่านเฉพาะ ID ตอนค้นหาแบบ binary search
+REGISTER_ID_FORMAT = '<I'
+REGISTER_ID_SIZE = struct.calcsize(REGISTER_ID_FORMAT)
+
+# จำนวน record ที่อ่านต่อครั้งเมื่อต้องสแกนหา ID
+SCAN_CHUNK_RECORDS = 4096
+
+# ดัชนีที่อ้างอิง registration.bin ซึ่งไม่เปลี่ยนเมื่อแก้เฉพาะสถานะของ record
+STATUS_INDEPENDENT_INDEXES = ('registration_refs', 'registration_order')
+
 def create_registration_record(register_id, student_id, course_id, registration_date, status):
     """สร้างบันทึกข้อมูลการลงทะเบียนในรูปแบบไบนารี"""
     packed_student_id = student_id.encode('utf-8')[:16].ljust(16, b'\x00')
@@ -54,15 +76,27 @@ def read_registration_record(record_data):
         print(f"เกิดข้อผิดพลาดในการอันแพ็คข้อมูล: {e}")
         return None
 
+@metrics.timed('storage_operation_seconds', op='record_write', file='registration.bin')
 def write_record_to_file(record, file_path=REGISTRATION_FILE_PATH):
     """เขียนบันทึกข้อมูลลงในไฟล์ไบนารี"""
     try:
-        with open(file_path, 'ab') as f:
+        with writing(file_path), open(file_path, 'ab') as f:
             f.write(record)
+        bump_generation(file_path)
+        metrics.record_write('registration.bin', len(record))
     except IOError as e:
         print(f"เกิดข้อผิดพลาดในการเขียนไฟล์: {e}")
 
 def read_all_records_from_file(file_path=REGISTRATION_FILE_PATH):
+    """อ่านบันทึกข้อมูลทั้งหมด (ผ่านแคช อ่านดิสก์ใหม่เฉพาะเมื่อไฟล์เปลี่ยน) รวมการเขียนที่ค้างในโหมด LSM"""
+    records = get_cached_records(file_path, 'registration', read_records_from_disk)
+    if lsm.has_pending():
+        records = lsm.merge_overlay(records, read_registration_record, 'ID')
+    return records
+
+@trace.traced('full scan registration.bin', cat='storage')
+@metrics.timed('storage_operation_seconds', op='full_scan', file='registration.bin')
+def read_records_from_disk(file_path=REGISTRATION_FILE_PATH):
     """อ่านบันทึกข้อมูลทั้งหมดจากไฟล์ไบนารี"""
     records = []
     try:
@@ -76,28 +110,176 @@ def read_all_records_from_file(file_path=REGISTRATION_FILE_PATH):
                 record = read_registration_record(record_data)
                 if record:
                     records.append(record)
+            metrics.record_read('registration.bin', f.tell(), len(records))
     except IOError as e:
         print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
     return records
 
+@metrics.timed('storage_operation_seconds', op='record_read', file='registration.bin')
+def read_registrations_at(offsets, file_path=REGISTRATION_FILE_PATH):
+    """อ่านบันทึกข้อมูลการลงทะเบียนเฉพาะตำแหน่งที่ระบุ (เปิดไฟล์ครั้งเดียว)"""
+    records = []
+    try:
+        with open(file_path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                record_data = f.read(REGISTRATION_RECORD_SIZE)
+                if len(record_data) != REGISTRATION_RECORD_SIZE:
+                    continue
+                record = read_registration_record(record_data)
+                if record:
+                    records.append(record)
+    except (IOError, UnicodeDecodeError) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
+    return records
+
+def build_registration_order(file_path=REGISTRATION_FILE_PATH):
+    """ตรวจว่า registration.bin เรียงตาม ID จากน้อยไปมากหรือไม่ (อ่านเฉพาะฟิลด์ ID)"""
+    sorted_by_id = True
+    last_id = 0
+    record_count = 0
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+        for pos in range(0, usable, REGISTRATION_RECORD_SIZE):
+            register_id = struct.unpack_from(REGISTER_ID_FORMAT, data, pos)[0]
+            if record_count and register_id <= last_id:
+                sorted_by_id = False
+            last_id = max(last_id, register_id)
+            record_count += 1
+    return {'sorted': sorted_by_id, 'last_id': last_id, 'record_count': record_count}
+
+def apply_registration_order_delta(order, delta):
+    """ปรับสถานะการเรียงด้วย delta ('add', ID ที่ต่อท้าย) หรือ ('delete', ID สุดท้ายหลังลบ) ของไฟล์ที่ยังเรียงอยู่"""
+    if delta[0] == 'add':
+        register_id = delta[1]
+        if order['record_count'] and register_id <= order['last_id']:
+            order['sorted'] = False
+        order['last_id'] = max(order['last_id'], register_id)
+        order['record_count'] += 1
+    else:
+        order['last_id'] = delta[1]
+        order['record_count'] -= 1
+    return order
+
+def get_registration_order(file_path=REGISTRATION_FILE_PATH):
+    """โหลดสถานะการเรียงตาม ID ของ registration.bin (ตรวจใหม่อัตโนมัติเมื่อไฟล์เปลี่ยน)"""
+    return load_index('registration_order', [file_path], lambda: build_registration_order(file_path),
+                      apply_registration_order_delta)
+
+def record_registration_order(register_id, file_path=REGISTRATION_FILE_PATH):
+    """ปรับสถานะการเรียงตาม ID หลังต่อท้าย record ใหม่ (บันทึกเฉพาะ delta)"""
+    order = get_index_for_append('registration_order', file_path, REGISTRATION_RECORD_SIZE)
+    if order is None:
+        return
+    delta = ('add', register_id)
+    append_index_delta('registration_order', [file_path], apply_registration_order_delta(order, delta), delta)
+
+@metrics.timed('storage_operation_seconds', op='offset_lookup', file='registration.bin')
+def find_registration_offset(register_id, file_path=REGISTRATION_FILE_PATH):
+    """หาตำแหน่ง (offset) ของ record จาก ID การลงทะเบียน หรือ None หากไม่พบ
+
+    ถ้าไฟล์เรียงตาม ID จะใช้ binary search บน record ขนาดคงที่ (O(log N))
+    ถ้าไม่เรียงจะสแกนทั้งไฟล์
+    """
+    if not os.path.exists(file_path):
+        return None
+    order = get_registration_order(file_path)
+    try:
+        with open(file_path, 'rb') as f:
+            if order['sorted']:
+                lo, hi = 0, order['record_count']
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    f.seek(mid * REGISTRATION_RECORD_SIZE)
+                    mid_id = struct.unpack(REGISTER_ID_FORMAT, f.read(REGISTER_ID_SIZE))[0]
+                    if mid_id == register_id:
+                        return mid * REGISTRATION_RECORD_SIZE
+                    if mid_id < register_id:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                return None
+
+            record_no = 0
+            while True:
+                chunk = f.read(REGISTRATION_RECORD_SIZE * SCAN_CHUNK_RECORDS)
+                if len(chunk) < REGISTRATION_RECORD_SIZE:
+                    return None
+                for pos in range(0, len(chunk) - REGISTRATION_RECORD_SIZE + 1, REGISTRATION_RECORD_SIZE):
+                    if struct.unpack_from(REGISTER_ID_FORMAT, chunk, pos)[0] == register_id:
+                        return record_no * REGISTRATION_RECORD_SIZE
+                    record_no += 1
+    except (IOError, struct.error) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
+        return None
+
 def get_next_register_id():
-    """หา ID การลงทะเบียนถัดไป"""
-    records = read_all_records_from_file()
-    if not records:
-        return 1
-    valid_records = [r for r in records if r is not None]
-    if not valid_records:
-        return 1
-    return max(r['ID'] for r in valid_records) + 1
+    """หา ID การลงทะเบียนถัดไป (ต่อจาก ID สูงสุดทั้งในไฟล์หลักและใน archive)"""
+    order = get_registration_order()
+    last_id = order['last_id'] if order['record_count'] else 0
+    return max(last_id, segments.archived_max_register_id(), lsm.max_register_id()) + 1
 
-def read_student_by_id(student_id):
-    """อ่านข้อมูลนักเรียนจาก student.bin โดยใช้รหัสนักเรียน"""
+def find_registration(register_id):
+    """หาการลงทะเบียนตาม ID คืนค่า (record, offset) หรือ (None, None) หากไม่พบ
+
+    offset เป็น None เมื่อ record ล่าสุดอยู่ใน memtable/segment ของโหมด LSM
+    """
+    record_data = lsm.get(register_id)
+    if record_data is not None:
+        if lsm.is_tombstone(record_data):
+            return None, None
+        return read_registration_record(record_data), None
+    offset = find_registration_offset(register_id)
+    found = read_registrations_at([offset]) if offset is not None else []
+    if not found:
+        return None, None
+    return found[0], offset
+
+def read_base_records(register_ids, file_path=REGISTRATION_FILE_PATH):
+    """คืน dict ID -> record ไบนารีใน registration.bin ของ ID ที่ระบุ (ไม่รวมการเขียนที่ค้างในโหมด LSM)"""
+    wanted = set(register_ids)
+    found = {}
+    if not wanted or not os.path.exists(file_path):
+        return found
     try:
-        if not os.path.exists(STUDENT_FILE_PATH):
-            print("ไม่พบไฟล์ student.bin")
-            return None
-            
-        with open(STUDENT_FILE_PATH, 'rb') as f:
+        if get_registration_order(file_path)['sorted']:
+            offsets = [find_registration_offset(register_id, file_path) for register_id in sorted(wanted)]
+            with open(file_path, 'rb') as f:
+                for offset in offsets:
+                    if offset is None:
+                        continue
+                    f.seek(offset)
+                    record_data = f.read(REGISTRATION_RECORD_SIZE)
+                    found[struct.unpack_from(REGISTER_ID_FORMAT, record_data)[0]] = record_data
+            return found
+        # ไฟล์ไม่เรียงตาม ID: สแกนครั้งเดียวสำหรับทุก ID
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(REGISTRATION_RECORD_SIZE * SCAN_CHUNK_RECORDS)
+                if len(chunk) < REGISTRATION_RECORD_SIZE:
+                    break
+                for pos in range(0, len(chunk) - REGISTRATION_RECORD_SIZE + 1, REGISTRATION_RECORD_SIZE):
+                    register_id = struct.unpack_from(REGISTER_ID_FORMAT, chunk, pos)[0]
+                    if register_id in wanted:
+                        found[register_id] = chunk[pos:pos + REGISTRATION_RECORD_SIZE]
+    except (IOError, struct.error) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
+    return found
+
+def pending_registration_changes():
+    """คืนการเขียนที่ค้างในโหมด LSM เป็นรายการ (record เดิมในไฟล์หลักหรือ None, record ล่าสุดหรือ None เมื่อถูกลบ)"""
+    latest = lsm.overlay()
+    base = read_base_records(latest)
+    return [(base.get(register_id), None if lsm.is_tombstone(record_data) else record_data)
+            for register_id, record_data in latest.items()]
+
+def read_students_for_registration(file_path=STUDENT_FILE_PATH):
+    """อ่านข้อมูลนักเรียนทั้งหมดจาก student.bin ในรูปแบบที่ใช้ตอนลงทะเบียน"""
+    students = []
+    try:
+        with open(file_path, 'rb') as f:
             while True:
                 record_data = f.read(STUDENT_RECORD_SIZE)
                 if not record_data:
@@ -105,32 +287,39 @@ def read_student_by_id(student_id):
                 
                 try:
                     unpacked_data = struct.unpack(STUDENT_RECORD_FORMAT, record_data)
-                    current_student_id = unpacked_data[0].strip(b'\x00').decode('utf-8')
+                    status_map = {1: 'Active', 0: 'Inactive'}
+                    status_text = status_map.get(unpacked_data[5], 'Unknown')
                     
-                    if current_student_id == student_id:
-                        status_map = {1: 'Active', 0: 'Inactive'}
-                        status_text = status_map.get(unpacked_data[5], 'Unknown')
-                        
-                        return {
-                            'student_id': current_student_id,
-                            'first_name': unpacked_data[1].strip(b'\x00').decode('utf-8'),
-                            'last_name': unpacked_data[2].strip(b'\x00').decode('utf-8'),
-                            'major': unpacked_data[3].strip(b'\x00').decode('utf-8'),
-                            'year_level': unpacked_data[4],
-                            'status': status_text,
-                            'status_code': unpacked_data[5]
-                        }
+                    students.append({
+                        'student_id': unpacked_data[0].strip(b'\x00').decode('utf-8'),
+                        'first_name': unpacked_data[1].strip(b'\x00').decode('utf-8'),
+                        'last_name': unpacked_data[2].strip(b'\x00').decode('utf-8'),
+                        'major': unpacked_data[3].strip(b'\x00').decode('utf-8'),
+                        'year_level': unpacked_data[4],
+                        'status': status_text,
+                        'status_code': unpacked_data[5]
+                    })
                         
                 except (struct.error, UnicodeDecodeError) as e:
                     print(f"ข้อผิดพลาดในการอ่าน record: {e}")
                     continue
-                    
-        return None
         
     except IOError as e:
         print(f"เกิดข้อผิดพลาดในการอ่านไฟล์นักเรียน: {e}")
+    return students
+
+def read_student_by_id(student_id):
+    """อ่านข้อมูลนักเรียนจาก student.bin โดยใช้รหัสนักเรียน"""
+    if not os.path.exists(STUDENT_FILE_PATH):
+        print("ไม่พบไฟล์ student.bin")
         return None
 
+    students = get_cached_records(STUDENT_FILE_PATH, 'registration-student', read_students_for_registration, copy=False)
+    for student in students:
+        if student['student_id'] == student_id:
+            return dict(student)
+    return None
+
 def get_student_info_for_registration():
     """ดึงข้อมูลนักเรียนและยืนยันก่อนลงทะเบียน"""
     student_id = input("ป้อนรหัสนักเรียน: ").strip()
@@ -215,21 +404,55 @@ def add_registration():
     except ValueError:
         print("❌ สถานะไม่ถูกต้อง กรุณาป้อนเป็นตัวเลข 0 หรือ 1")
         return
+
+    allowed, message = check_enrollment(student['student_id'], course_id, status)
+    if not allowed:
+        print(f"❌ {message}")
+        if status == 1 and waitlist.can_join(student['student_id'], course_id):
+            offer_waitlist(student['student_id'], course_id)
+        return
         
     register_id = get_next_register_id()
     registration_date = datetime.now().timestamp()
     
-    record = create_registration_record(
-        register_id,
-        student['student_id'],
-        course_id,
-        registration_date,
-        status
-    )
-    if record:
-        write_record_to_file(record)
+    if append_registration(register_id, student['student_id'], course_id, registration_date, status):
         print("✅ เพิ่มข้อมูลการลงทะเบียนสำเร็จ!")
 
+def offer_waitlist(student_id, course_id):
+    """ถามว่าจะเข้าคิวรอของรายวิชาที่เต็มหรือไม่"""
+    position = len(waitlist.list_waiting(course_id))
+    confirm = input(f"รายวิชาเต็ม มีผู้รออยู่ {position} คน ต้องการเข้าคิวรอหรือไม่? (y/n): ").lower()
+    if confirm not in ('y', 'yes'):
+        return
+    tier = input(f"ระดับความสำคัญ {waitlist.MIN_TIER}-{waitlist.MAX_TIER} "
+                 f"({waitlist.MIN_TIER} = สูงสุด, Enter = {waitlist.DEFAULT_TIER}): ").strip()
+    try:
+        tier = int(tier) if tier else waitlist.DEFAULT_TIER
+    except ValueError:
+        print("ระดับความสำคัญไม่ถูกต้อง")
+        return
+    entry_id, message = waitlist.join_waitlist(student_id, course_id, tier)
+    print(f"{'✅' if entry_id else '❌'} {message}")
+
+def append_registration(register_id, student_id, course_id, registration_date, status):
+    """ต่อท้าย record การลงทะเบียนใหม่และปรับดัชนีทั้งหมด (ไม่ตรวจเงื่อนไขการลงทะเบียน)"""
+    record = create_registration_record(register_id, student_id, course_id, registration_date, status)
+    if not record:
+        return False
+    if lsm.LSM_ENABLED:
+        # ดัชนีของไฟล์หลักจะถูกสร้างใหม่เมื่อรวม LSM เข้าไฟล์หลัก
+        lsm.put(record)
+        cdc.append_event('add', record)
+        return True
+    write_record_to_file(record)
+    record_enrollment(register_id, student_id, course_id, status)
+    credit_load.record_credit_load(register_id, student_id, course_id, status)
+    record_registration_refs(student_id, course_id)
+    record_registration_time(registration_date, status)
+    record_registration_order(register_id)
+    cdc.append_event('add', record)
+    return True
+
 def view_registrations():
     """แสดงข้อมูลการลงทะเบียนทั้งหมด"""
     registrations = read_all_records_from_file()
@@ -238,6 +461,27 @@ def view_registrations():
         return
     print_registration_report(registrations, title="รายงานการลงทะเบียน")
 
+def view_registrations_by_date_order():
+    """แสดงการลงทะเบียนเรียงตามวันที่ (external merge sort ไม่โหลดทั้งไฟล์มาเรียง)"""
+    order = input("เรียงจาก 1. เก่าไปใหม่ 2. ใหม่ไปเก่า (Enter = 1): ").strip() or '1'
+    if order not in ('1', '2'):
+        print("ตัวเลือกไม่ถูกต้อง")
+        return
+    text = input("จำนวนที่แสดง (Enter = ทั้งหมด): ").strip()
+    if text and not text.isdigit():
+        print("จำนวนไม่ถูกต้อง")
+        return
+    # การเขียนที่ค้างในโหมด LSM ถูก merge เข้าลำดับระหว่างเรียง
+    pending = lsm.overlay() if lsm.has_pending() else None
+    records = sort_records('registration_date', reverse=order == '2', overlay=pending)
+    if text:
+        records = islice(records, int(text))
+    registrations = [r for r in (read_registration_record(data) for data in records) if r]
+    if not registrations:
+        print("ไม่พบข้อมูลการลงทะเบียนในระบบ")
+        return
+    print_registration_report(registrations, title=f"รายงานการลงทะเบียนเรียงตามวันที่ ({len(registrations)} รายการ)")
+
 def view_single_registration():
     """แสดงข้อมูลการลงทะเบียนรายการเดียวตามรหัส ID"""
     try:
@@ -246,8 +490,13 @@ def view_single_registration():
         print("รหัส ID ไม่ถูกต้อง กรุณาป้อนเป็นตัวเลข")
         return
     
-    registrations = read_all_records_from_file()
-    filtered_registrations = [r for r in registrations if r and r['ID'] == reg_id]
+    reg, _ = find_registration(reg_id)
+    filtered_registrations = [reg] if reg else []
+    if not filtered_registrations:
+        # ภาคเรียนที่ปิดแล้วถูกย้ายไปเก็บใน archive
+        record_data = segments.find_archived_registration(reg_id)
+        if record_data:
+            filtered_registrations = [read_registration_record(record_data)]
     
     if not filtered_registrations:
         print("ไม่พบรหัส ID การลงทะเบียนที่ต้องการดู")
@@ -256,102 +505,239 @@ def view_single_registration():
     print_registration_report(filtered_registrations, title="รายงานการลงทะเบียนรายการเดียว")
 
 def view_filtered_registrations():
-    """แสดงข้อมูลการลงทะเบียนที่กรองตามเงื่อนไข"""
+    """แสดงข้อมูลการลงทะเบียนที่กรองตามเงื่อนไข (planner เลือกใช้ดัชนี ID/รหัสนักเรียน/รหัสวิชา/เวลา และ join ข้อมูลนักเรียน/รายวิชา)"""
     print("\n--- ตัวเลือกการกรอง ---")
     print("1. กรองตามรหัสนักเรียน")
     print("2. กรองตามรหัสวิชา")
     print("3. กรองตามสถานะ (Registered)")
     print("4. กลับไปเมนูหลัก")
-    filter_choice = input("กรุณาเลือกการกรอง (1-4): ")
-    
-    registrations = read_all_records_from_file()
-    if not registrations:
+    print("5. กรองตามเงื่อนไขที่พิมพ์เอง")
+    filter_choice = input("กรุณาเลือกการกรอง (1-5): ")
+
+    if filter_choice == '4':
+        return
+    if filter_choice not in ('1', '2', '3', '5'):
+        print("ตัวเลือกไม่ถูกต้อง")
+        return
+    if not os.path.exists(REGISTRATION_FILE_PATH) and not lsm.has_pending():
         print("ไม่พบข้อมูลการลงทะเบียนในระบบ")
         return
-    
-    filtered_registrations = []
-    
+
+    # นำเข้าในฟังก์ชันเพราะ module.query นำเข้าโมดูลนี้
+    from module.query import new_query, where, run_query_menu, show_query_result
+    title = "รายงานการลงทะเบียนที่กรอง"
+    if filter_choice == '5':
+        run_query_menu('registration', "course=CS101 and status=registered and student.year=1",
+                       print_registration_report, title)
+        return
+
+    query = new_query('registration')
     if filter_choice == '1':
-        student_id = input("ป้อนรหัสนักเรียนที่ต้องการกรอง: ").strip()
-        filtered_registrations = [r for r in registrations if r and r['STUDENT ID'] == student_id]
-    
+        where(query, 'student', '=', input("ป้อนรหัสนักเรียนที่ต้องการกรอง: ").strip())
     elif filter_choice == '2':
-        course_id = input("ป้อนรหัสวิชาที่ต้องการกรอง: ").strip()
-        filtered_registrations = [r for r in registrations if r and r['COURSE ID'] == course_id]
-    
-    elif filter_choice == '3':
-        filtered_registrations = [r for r in registrations if r and r['STATUS'] == 'Registered']
-    
-    elif filter_choice == '4':
-        return
-    
+        where(query, 'course', '=', input("ป้อนรหัสวิชาที่ต้องการกรอง: ").strip())
     else:
+        where(query, 'status', '=', 'Registered')
+    show_query_result(query, print_registration_report, title, show_plan=False)
+
+def input_date(prompt):
+    """รับวันที่รูปแบบ YYYY-MM-DD จากผู้ใช้ คืนค่า datetime, None (เว้นว่าง) หรือ False (ไม่ถูกต้อง)"""
+    text = input(prompt).strip()
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        print("รูปแบบวันที่ไม่ถูกต้อง (YYYY-MM-DD)")
+        return False
+
+def view_registrations_by_date():
+    """แสดงการลงทะเบียนในช่วงวันที่ (อ่านเฉพาะ record ในช่วงจากดัชนีเวลา)"""
+    start = input_date("ป้อนวันที่เริ่มต้น YYYY-MM-DD (Enter = ไม่จำกัด): ")
+    if start is False:
+        return
+    end = input_date("ป้อนวันที่สิ้นสุด YYYY-MM-DD (Enter = ไม่จำกัด): ")
+    if end is False:
+        return
+    if end is not None:
+        # รวมทั้งวันสุดท้าย
+        end = end + timedelta(days=1)
+
+    hot = read_registrations_at(find_registration_offsets_between(start, end))
+    if lsm.has_pending():
+        # ดัชนีเวลายังไม่รวมการเขียนที่ค้างในโหมด LSM จึงแทน/เพิ่ม record จาก LSM ที่อยู่ในช่วง
+        hot = lsm.overlay_matching(
+            hot, read_registration_record, 'ID',
+            lambda r: (start is None or r['REGISTRATION DATE'] >= start) and (end is None or r['REGISTRATION DATE'] < end))
+        hot.sort(key=lambda r: r['REGISTRATION DATE'])
+    registrations = read_archived_registrations_between(start, end) + hot
+    if not registrations:
+        print("ไม่พบข้อมูลการลงทะเบียนในช่วงวันที่ที่ระบุ")
+        return
+    print_registration_report(registrations, title=f"รายงานการลงทะเบียนตามช่วงวันที่ ({len(registrations)} รายการ)")
+
+def read_archived_registrations_between(start, end):
+    """อ่านการลงทะเบียนในช่วง [start, end) จาก archive เฉพาะภาคเรียนและ block ที่ทับช่วงเวลา"""
+    start_ts = start.timestamp() if start else None
+    end_ts = end.timestamp() if end else None
+    registrations = []
+    for key, info in segments.list_archived_terms():
+        if start_ts is not None and info['max_ts'] < start_ts:
+            continue
+        if end_ts is not None and info['min_ts'] >= end_ts:
+            continue
+        for record_data in segments.read_archived_term(key, start_ts, end_ts):
+            record = read_registration_record(record_data)
+            if record:
+                registrations.append(record)
+    registrations.sort(key=lambda r: r['REGISTRATION DATE'])
+    return registrations
+
+def view_registration_histogram():
+    """แสดงจำนวนการลงทะเบียนรายวันหรือรายสัปดาห์จากฮิสโตแกรมที่คำนวณไว้
+
+    ฮิสโตแกรมคำนวณจาก registration.bin จึงครอบคลุมเฉพาะภาคเรียนปัจจุบัน ไม่รวมภาคเรียนที่จัดเก็บแล้ว
+    """
+    print("1. รายวัน")
+    print("2. รายสัปดาห์")
+    period_choice = input("กรุณาเลือก (1-2): ")
+    if period_choice not in ('1', '2'):
         print("ตัวเลือกไม่ถูกต้อง")
         return
-    
-    if not filtered_registrations:
-        print("ไม่พบข้อมูลที่ตรงตามเงื่อนไขการกรอง")
+    period = 'day' if period_choice == '1' else 'week'
+
+    start = input_date("ป้อนวันที่เริ่มต้น YYYY-MM-DD (Enter = ไม่จำกัด): ")
+    if start is False:
+        return
+    end = input_date("ป้อนวันที่สิ้นสุด YYYY-MM-DD (Enter = ไม่จำกัด): ")
+    if end is False:
         return
-    
-    print_registration_report(filtered_registrations, title=f"รายงานการลงทะเบียนที่กรอง ({len(filtered_registrations)} รายการ)")
+
+    if period == 'day':
+        start_key = start.strftime("%Y-%m-%d") if start else None
+        end_key = end.strftime("%Y-%m-%d") if end else None
+    else:
+        start_key = f"{start.isocalendar()[0]}-W{start.isocalendar()[1]:02d}" if start else None
+        end_key = f"{end.isocalendar()[0]}-W{end.isocalendar()[1]:02d}" if end else None
+
+    histogram = get_histogram(period, start_key, end_key)
+    if lsm.has_pending():
+        # ฮิสโตแกรมคำนวณจากไฟล์หลัก จึงปรับด้วยการเขียนที่ค้างในโหมด LSM
+        histogram = adjust_histogram(histogram, period, pending_registration_changes(), start_key, end_key)
+    if not histogram:
+        print("ไม่พบข้อมูลการลงทะเบียนในช่วงวันที่ที่ระบุ")
+        return
+
+    print("\n==========================================================================")
+    print("                  จำนวนการลงทะเบียน" + ("รายวัน" if period == 'day' else "รายสัปดาห์")
+          + " (ภาคเรียนปัจจุบัน)")
+    print("==========================================================================")
+    headers = ["PERIOD", "REGISTERED", "DROPPED"]
+    col_widths = [15, 12, 12]
+    header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
+    print(header_line)
+    print("-" * len(header_line))
+    for key, bucket in histogram:
+        row_data = [key, str(bucket['registered']), str(bucket['dropped'])]
+        print(" | ".join(f"{row_data[i]:<{col_widths[i]}}" for i in range(len(headers))))
+    print("--------------------------------------------------------------------------")
 
 def update_registration():
-    """แก้ไขข้อมูลการลงทะเบียน"""
+    """แก้ไขข้อมูลการลงทะเบียน (เขียนทับเฉพาะ record นั้นในไฟล์)"""
     try:
         reg_id_to_update = int(input("ป้อนรหัส ID การลงทะเบียนที่ต้องการแก้ไข: "))
     except ValueError:
         print("รหัส ID ไม่ถูกต้อง กรุณาป้อนเป็นตัวเลข")
         return
 
-    registrations = read_all_records_from_file()
-    found = False
-    new_records = []
-
-    for reg in registrations:
-        if reg and reg['ID'] == reg_id_to_update:
-            found = True
-            print("==========================================")
-            print("    พบข้อมูลการลงทะเบียนที่ต้องการแก้ไข")
-            print("==========================================")
-            print(f"ID การลงทะเบียน: {reg['ID']}")
-            print(f"รหัสนักเรียน: {reg['STUDENT ID']}")
-            print(f"รหัสวิชา: {reg['COURSE ID']}")
-            print(f"วันลงทะเบียน: {reg['REGISTRATION DATE'].strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"สถานะ: {reg['STATUS']}")
-            print("==========================================")
-
-            new_status = input("ป้อนสถานะใหม่ (1=Registered, 0=Dropped) (Enter เพื่อใช้ค่าเดิม): ")
-            if new_status:
-                try:
-                    new_status = int(new_status)
-                    if new_status not in [0, 1]:
-                        raise ValueError
-                    reg['STATUS'] = 'Registered' if new_status == 1 else 'Dropped'
-                except ValueError:
-                    print("สถานะไม่ถูกต้อง ใช้ค่าเดิม")
-        
-        if reg:
-            updated_record = create_registration_record(
-                reg['ID'],
-                reg['STUDENT ID'],
-                reg['COURSE ID'],
-                reg['REGISTRATION DATE'].timestamp(),
-                1 if reg['STATUS'] == 'Registered' else 0
-            )
-            if updated_record:
-                new_records.append(updated_record)
-    
-    if found:
+    reg, offset = find_registration(reg_id_to_update)
+    if not reg:
+        print("ไม่พบรหัส ID การลงทะเบียนที่ต้องการแก้ไข")
+        return
+
+    print("==========================================")
+    print("    พบข้อมูลการลงทะเบียนที่ต้องการแก้ไข")
+    print("==========================================")
+    print(f"ID การลงทะเบียน: {reg['ID']}")
+    print(f"รหัสนักเรียน: {reg['STUDENT ID']}")
+    print(f"รหัสวิชา: {reg['COURSE ID']}")
+    print(f"วันลงทะเบียน: {reg['REGISTRATION DATE'].strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"สถานะ: {reg['STATUS']}")
+    print("==========================================")
+
+    old_status = 1 if reg['STATUS'] == 'Registered' else 0
+    new_status = input("ป้อนสถานะใหม่ (1=Registered, 0=Dropped) (Enter เพื่อใช้ค่าเดิม): ")
+    if new_status:
         try:
-            if os.path.exists(REGISTRATION_FILE_PATH):
-                os.remove(REGISTRATION_FILE_PATH)
-            for record in new_records:
-                write_record_to_file(record)
-            print("แก้ไขข้อมูลสำเร็จ!")
-        except IOError as e:
-            print(f"เกิดข้อผิดพลาดในการแก้ไขไฟล์: {e}")
+            new_status = int(new_status)
+            if new_status not in [0, 1]:
+                raise ValueError
+        except ValueError:
+            print("สถานะไม่ถูกต้อง ใช้ค่าเดิม")
+            new_status = old_status
     else:
-        print("ไม่พบรหัส ID การลงทะเบียนที่ต้องการแก้ไข")
+        new_status = old_status
+
+    if new_status == 1 and old_status != 1:
+        allowed, message = check_enrollment(reg['STUDENT ID'], reg['COURSE ID'])
+        if not allowed:
+            print(f"❌ {message}")
+            return
+
+    if write_registration_status(reg, offset, new_status):
+        print("แก้ไขข้อมูลสำเร็จ!")
+
+def write_registration_status(reg, offset, new_status):
+    """เขียนทับสถานะของ record การลงทะเบียนที่ตำแหน่ง offset และปรับดัชนีที่เกี่ยวข้อง
+
+    ในโหมด LSM (หรือเมื่อ record อยู่ใน LSM อยู่แล้ว offset เป็น None) จะเขียน record ใหม่ลง LSM แทน
+    การถอนที่ทำให้ที่นั่งว่างลงจะเลื่อนคิวรอของวิชานั้นต่อ
+    """
+    old_status = 1 if reg['STATUS'] == 'Registered' else 0
+    updated_record = create_registration_record(
+        reg['ID'],
+        reg['STUDENT ID'],
+        reg['COURSE ID'],
+        reg['REGISTRATION DATE'].timestamp(),
+        new_status
+    )
+    if not updated_record:
+        return False
+    if lsm.LSM_ENABLED or offset is None:
+        lsm.put(updated_record)
+        cdc.append_event('update', updated_record)
+        if old_status == 1 and new_status != 1:
+            waitlist.release_seats([reg['COURSE ID']])
+        return True
+
+    indexes = capture_indexes(('enrollment', 'registration_time') + STATUS_INDEPENDENT_INDEXES,
+                              [REGISTRATION_FILE_PATH])
+    credit_index = credit_load.capture_credit_load()
+    try:
+        with metrics.timer('storage_operation_seconds', op='record_write', file='registration.bin'):
+            with writing(REGISTRATION_FILE_PATH), open(REGISTRATION_FILE_PATH, 'r+b') as f:
+                f.seek(offset)
+                f.write(updated_record)
+            bump_generation(REGISTRATION_FILE_PATH)
+        metrics.record_write('registration.bin', len(updated_record))
+    except IOError as e:
+        print(f"เกิดข้อผิดพลาดในการแก้ไขไฟล์: {e}")
+        return False
+
+    # ปรับดัชนีที่ยังตรงกับไฟล์ก่อนแก้ แทนการสร้างใหม่ทั้งหมด
+    enrollment.apply_status_change(indexes['enrollment'], reg['ID'], reg['STUDENT ID'],
+                                   reg['COURSE ID'], old_status, new_status)
+    credit_load.apply_status_change(credit_index, reg['ID'], reg['STUDENT ID'],
+                                    reg['COURSE ID'], old_status, new_status)
+    time_index.apply_status_change(indexes['registration_time'], reg['REGISTRATION DATE'].timestamp(),
+                                   old_status, new_status)
+    for name in STATUS_INDEPENDENT_INDEXES:
+        if indexes[name] is not None:
+            append_index_delta(name, [REGISTRATION_FILE_PATH], indexes[name], None)
+    cdc.append_event('update', updated_record)
+    if old_status == 1 and new_status != 1:
+        waitlist.release_seats([reg['COURSE ID']])
+    return True
 
 def delete_registration():
     """ลบข้อมูลการลงทะเบียนแบบถาวร"""
@@ -361,35 +747,233 @@ def delete_registration():
         print("รหัส ID ไม่ถูกต้อง กรุณาป้อนเป็นตัวเลข")
         return
 
-    registrations = read_all_records_from_file()
-    found = False
-    remaining_records = []
+    reg, offset = find_registration(reg_id_to_delete)
+    if reg is None:
+        print("ไม่พบรหัส ID การลงทะเบียนที่ต้องการลบ")
+        return
 
-    for reg in registrations:
-        if reg and reg['ID'] == reg_id_to_delete:
-            found = True
-            print("ลบข้อมูลการลงทะเบียนสำเร็จ!")
-        elif reg:
-            remaining_records.append(reg)
+    if remove_registration(reg, offset):
+        print("ลบข้อมูลการลงทะเบียนสำเร็จ!")
 
-    if found:
-        try:
-            if os.path.exists(REGISTRATION_FILE_PATH):
-                os.remove(REGISTRATION_FILE_PATH)
-            for reg in remaining_records:
-                record = create_registration_record(
-                    reg['ID'],
-                    reg['STUDENT ID'],
-                    reg['COURSE ID'],
-                    reg['REGISTRATION DATE'].timestamp(),
-                    1 if reg['STATUS'] == 'Registered' else 0
-                )
-                if record:
-                    write_record_to_file(record)
-        except IOError as e:
-            print(f"เกิดข้อผิดพลาดในการลบไฟล์: {e}")
+def remove_registration(reg, offset):
+    """ลบการลงทะเบียน (ในโหมด LSM หรือเมื่อ record อยู่ใน LSM จะเขียน tombstone แทนการเขียนไฟล์ใหม่)
+
+    การลบ record ที่ยังลงทะเบียนอยู่จะเลื่อนคิวรอของวิชานั้นต่อ
+    """
+    if lsm.LSM_ENABLED or offset is None:
+        record = create_registration_record(reg['ID'], reg['STUDENT ID'], reg['COURSE ID'],
+                                            reg['REGISTRATION DATE'].timestamp(), 0)
+        if not record:
+            return False
+        lsm.put(lsm.make_tombstone(record))
+        cdc.append_event('delete', record)
+    # delete_registration_records บันทึก CDC event ของ record ที่ลบเอง
+    elif not remove_registration_at(offset):
+        return False
+    if reg['STATUS'] == 'Registered':
+        waitlist.release_seats([reg['COURSE ID']])
+    return True
+
+def remove_registration_at(offset):
+    """ลบ record การลงทะเบียนที่ตำแหน่ง offset ออกจากไฟล์ คืนค่า True หากลบสำเร็จ"""
+    order = capture_indexes(('registration_order',), [REGISTRATION_FILE_PATH])['registration_order']
+    record_no = offset // REGISTRATION_RECORD_SIZE
+    if delete_registration_records([record_no]) != 1:
+        return False
+
+    # การลบ record ออกจากไฟล์ที่เรียงตาม ID แล้วยังคงเรียงอยู่ จึงไม่ต้องตรวจใหม่ทั้งไฟล์
+    if order is not None and order['sorted']:
+        last_id = read_last_register_id() if record_no == order['record_count'] - 1 else order['last_id']
+        delta = ('delete', last_id)
+        append_index_delta('registration_order', [REGISTRATION_FILE_PATH],
+                           apply_registration_order_delta(order, delta), delta)
+    return True
+
+def read_last_register_id(file_path=REGISTRATION_FILE_PATH):
+    """อ่าน ID ของ record สุดท้ายในไฟล์ (0 หากไม่มี record)"""
+    try:
+        size = os.path.getsize(file_path)
+        if size < REGISTRATION_RECORD_SIZE:
+            return 0
+        with open(file_path, 'rb') as f:
+            f.seek((size // REGISTRATION_RECORD_SIZE - 1) * REGISTRATION_RECORD_SIZE)
+            return struct.unpack(REGISTER_ID_FORMAT, f.read(REGISTER_ID_SIZE))[0]
+    except (IOError, struct.error):
+        return 0
+
+def manage_course_capacity():
+    """กำหนดหรือดูจำนวนที่นั่งของรายวิชา"""
+    course_id = input("ป้อนรหัสวิชา: ").strip()
+    if not course_id:
+        print("รหัสวิชาว่าง กรุณาลองใหม่")
+        return
+
+    capacity = get_course_capacity(course_id)
+    taken = get_seats_taken(course_id)
+    capacity_text = "ไม่จำกัด" if capacity == 0 else str(capacity)
+    print(f"วิชา {course_id}: ลงทะเบียนแล้ว {taken} คน, จำนวนที่นั่ง {capacity_text}")
+
+    new_capacity = input("ป้อนจำนวนที่นั่งใหม่ (0 = ไม่จำกัด) (Enter เพื่อใช้ค่าเดิม): ")
+    if not new_capacity:
+        return
+    try:
+        new_capacity = int(new_capacity)
+        if not 0 <= new_capacity <= 65535:
+            raise ValueError
+    except ValueError:
+        print("จำนวนที่นั่งไม่ถูกต้อง")
+        return
+    if set_course_capacity(course_id, new_capacity):
+        print("บันทึกจำนวนที่นั่งสำเร็จ!")
+        waitlist.release_seats([course_id])
+
+def merge_lsm_writes():
+    """แสดงสถานะโหมด LSM และรวมการเขียนที่ค้างทั้งหมดเข้าไฟล์หลัก"""
+    info = lsm.lsm_info()
+    print(f"โหมด LSM: {'เปิด' if info['enabled'] else 'ปิด'}, memtable {info['memtable']} รายการ, "
+          f"segment {info['segments']} ไฟล์ ({info['segment_records']} รายการ)")
+    if not lsm.has_pending():
+        print("ไม่มีการเขียนที่ค้างอยู่")
+        return
+    try:
+        merged = lsm.merge_into_base()
+    except (IOError, struct.error) as e:
+        print(f"เกิดข้อผิดพลาดในการรวมข้อมูล: {e}")
+        return
+    print(f"✅ รวม {merged} รายการเข้าไฟล์หลักสำเร็จ!")
+
+def archive_closed_terms():
+    """ย้ายการลงทะเบียนของภาคเรียนที่ปิดแล้วไปเก็บในไฟล์ archive ที่บีบอัด"""
+    print("แบ่งภาคเรียนตาม:")
+    print("1. ปี/ภาคเรียนของรายวิชา")
+    print("2. วันที่ลงทะเบียน")
+    partition_by = 'date' if input("กรุณาเลือก (1-2): ") == '2' else 'course'
+
+    counts = segments.summarize_hot_terms(partition_by)
+    if not counts:
+        print("ไม่พบข้อมูลการลงทะเบียนในไฟล์หลัก")
+        return
+    terms = sorted(counts, key=lambda key: segments.parse_term_key(key) or (0, 0))
+    print("\nภาคเรียนที่อยู่ในไฟล์หลัก:")
+    for key in terms:
+        print(f"- {key}: {counts[key]} รายการ")
+
+    latest = terms[-1]
+    text = input(f"ป้อนภาคเรียนที่ต้องการจัดเก็บ คั่นด้วยจุลภาค (Enter = ทุกภาคยกเว้น {latest}): ").strip()
+    selected = [key.strip() for key in text.split(',')] if text else terms[:-1]
+    selected = [key for key in selected if key in counts]
+    if not selected:
+        print("ไม่มีภาคเรียนที่จะจัดเก็บ")
+        return
+
+    codec = 'lzma' if input("รูปแบบการบีบอัด (1 = zlib, 2 = lzma): ") == '2' else 'zlib'
+    try:
+        moved = segments.archive_terms(selected, partition_by, codec)
+    except (IOError, struct.error) as e:
+        print(f"เกิดข้อผิดพลาดในการจัดเก็บข้อมูล: {e}")
+        return
+    for key, count in sorted(moved.items()):
+        print(f"จัดเก็บภาคเรียน {key}: {count} รายการ")
+    print("✅ จัดเก็บข้อมูลสำเร็จ!")
+
+def view_term_registrations():
+    """แสดงการลงทะเบียนของภาคเรียนหนึ่ง (อ่านจาก archive หากจัดเก็บแล้ว)"""
+    archived = dict(segments.list_archived_terms())
+    if archived:
+        print("ภาคเรียนที่จัดเก็บแล้ว: " + ", ".join(
+            f"{key} ({info['records']} รายการ, {info['codec']})" for key, info in archived.items()))
+    key = input("ป้อนภาคเรียน (ปี-ภาค เช่น 2567-1): ").strip()
+    if segments.parse_term_key(key) is None:
+        print("รูปแบบภาคเรียนไม่ถูกต้อง")
+        return
+
+    registrations = []
+    partition_by = archived[key]['partition_by'] if key in archived else 'course'
+    for record_data in segments.read_archived_term(key):
+        record = read_registration_record(record_data)
+        if record:
+            registrations.append(record)
+    resolve = segments.make_term_resolver(partition_by)
+    registrations += [r for r in read_all_records_from_file()
+                      if resolve(r['COURSE ID'], r['REGISTRATION DATE'].timestamp()) == key]
+    if not registrations:
+        print(f"ไม่พบข้อมูลการลงทะเบียนของภาคเรียน {key}")
+        return
+    print_registration_report(registrations, title=f"รายงานการลงทะเบียนภาคเรียน {key} ({len(registrations)} รายการ)")
+
+def view_credit_load_report():
+    """แสดงนักเรียนที่ลงทะเบียนเกินเพดานหรือต่ำกว่าหน่วยกิตขั้นต่ำในภาคเรียน (อ่านจากดัชนีหน่วยกิตรวม)"""
+    term = segments.parse_term_key(input("ป้อนภาคเรียน (ปี-ภาค เช่น 2567-1): "))
+    if term is None:
+        print("รูปแบบภาคเรียนไม่ถูกต้อง")
+        return
+    over, under = credit_load.find_load_outliers(*term)
+    if not over and not under:
+        print(f"ไม่พบนักเรียนที่หน่วยกิตเกินหรือต่ำกว่าเกณฑ์ในภาคเรียน {term[0]}-{term[1]}")
+        return
+
+    students = {}
+    if os.path.exists(STUDENT_FILE_PATH):
+        students = {s['student_id']: s for s in get_cached_records(
+            STUDENT_FILE_PATH, 'registration-student', read_students_for_registration, copy=False)}
+    headers = ["STUDENT ID", "NAME", "MAJOR", "CREDITS"]
+    col_widths = [16, 40, 20, 8]
+    for title, rows in ((f"เกินเพดาน {credit_load.MAX_TERM_CREDITS} หน่วยกิต", over),
+                        (f"ต่ำกว่า {credit_load.MIN_TERM_CREDITS} หน่วยกิต", under)):
+        print("\n==========================================================================")
+        print(f"      นักเรียนที่ลงทะเบียน{title} ภาคเรียน {term[0]}-{term[1]} ({len(rows)} คน)")
+        print("==========================================================================")
+        header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
+        print(header_line)
+        print("-" * len(header_line))
+        for student_id, credits in rows:
+            student = students.get(student_id, {})
+            name = f"{student.get('first_name', '')} {student.get('last_name', '')}".strip() or '-'
+            row_data = [student_id, name, student.get('major', '-'), str(credits)]
+            print(" | ".join(f"{row_data[i]:<{col_widths[i]}}" for i in range(len(headers))))
+        print("--------------------------------------------------------------------------")
+
+def manage_waitlist():
+    """ดูคิวรอและประวัติการเลื่อนคิวของรายวิชา และยกเลิกคำขอ"""
+    course_id = input("ป้อนรหัสวิชา: ").strip()
+    if not course_id:
+        print("รหัสวิชาว่าง กรุณาลองใหม่")
+        return
+
+    capacity = get_course_capacity(course_id)
+    capacity_text = "ไม่จำกัด" if capacity == 0 else str(capacity)
+    print(f"วิชา {course_id}: ลงทะเบียนแล้ว {get_seats_taken(course_id)} คน, จำนวนที่นั่ง {capacity_text}")
+    entries = waitlist.list_waiting(course_id)
+    history = sorted((r for r in waitlist.read_waitlist_from_disk()
+                      if r['COURSE ID'] == course_id and r['STATUS'] in ('Promoted', 'Skipped')),
+                     key=lambda r: r['RESOLVED AT'])
+
+    print("\n==========================================================================")
+    print(f"                     คิวรอวิชา {course_id} ({len(entries)} คน)")
+    print("==========================================================================")
+    headers = ["NO", "REQUEST ID", "STUDENT ID", "TIER", "REQUESTED AT"]
+    col_widths = [4, 10, 16, 4, 19]
+    header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
+    print(header_line)
+    print("-" * len(header_line))
+    for no, (tier, requested_at, entry_id, student_id) in enumerate(entries, 1):
+        row_data = [str(no), str(entry_id), student_id, str(tier),
+                    datetime.fromtimestamp(requested_at).strftime("%Y-%m-%d %H:%M:%S")]
+        print(" | ".join(f"{row_data[i]:<{col_widths[i]}}" for i in range(len(headers))))
+    if history:
+        print("\nประวัติการเลื่อนคิว:")
+        for r in history:
+            result = f"ลงทะเบียน ID {r['REGISTER ID']}" if r['STATUS'] == 'Promoted' else "ข้าม (ลงทะเบียนไม่ได้)"
+            print(f"- {r['RESOLVED AT'].strftime('%Y-%m-%d %H:%M:%S')} {r['STUDENT ID']}: {result}")
+    print("--------------------------------------------------------------------------")
+
+    student_id = input("ป้อนรหัสนักเรียนที่ต้องการยกเลิกคิวรอ (Enter เพื่อย้อนกลับ): ").strip()
+    if not student_id:
+        return
+    if waitlist.cancel_waitlist(student_id, course_id):
+        print("ยกเลิกคิวรอสำเร็จ!")
     else:
-        print("ไม่พบรหัส ID การลงทะเบียนที่ต้องการลบ")
+        print(f"ไม่พบนักเรียนรหัส {student_id} ในคิวรอวิชา {course_id}")
 
 def registration_menu():
     """เมนูย่อยสำหรับจัดการข้อมูลการลงทะเบียน (CRUD)"""
@@ -401,6 +985,15 @@ def registration_menu():
         print("4. ดูข้อมูลการลงทะเบียนแบบกรอง")
         print("5. แก้ไขข้อมูลการลงทะเบียน")
         print("6. ลบข้อมูลการลงทะเบียน")
+        print("7. กำหนดจำนวนที่นั่งของรายวิชา")
+        print("8. ดูข้อมูลการลงทะเบียนตามช่วงวันที่")
+        print("9. ดูจำนวนการลงทะเบียนรายวัน/รายสัปดาห์")
+        print("10. จัดเก็บการลงทะเบียนของภาคเรียนที่ปิดแล้ว")
+        print("11. ดูการลงทะเบียนตามภาคเรียน")
+        print("12. รวมการเขียนโหมด LSM เข้าไฟล์หลัก")
+        print("13. ดูการลงทะเบียนเรียงตามวันที่")
+        print("14. ดูนักเรียนที่หน่วยกิตเกิน/ต่ำกว่าเกณฑ์")
+        print("15. จัดการคิวรอของรายวิชา")
         print("0. กลับสู่เมนูหลัก")
         
         choice = input("กรุณาเลือกเมนู: ")
@@ -417,6 +1010,24 @@ def registration_menu():
             update_registration()
         elif choice == '6':
             delete_registration()
+        elif choice == '7':
+            manage_course_capacity()
+        elif choice == '8':
+            view_registrations_by_date()
+        elif choice == '9':
+            view_registration_histogram()
+        elif choice == '10':
+            archive_closed_terms()
+        elif choice == '11':
+            view_term_registrations()
+        elif choice == '12':
+            merge_lsm_writes()
+        elif choice == '13':
+            view_registrations_by_date_order()
+        elif choice == '14':
+            view_credit_load_report()
+        elif choice == '15':
+            manage_waitlist()
         elif choice == '0':
             print("ย้อนกลับสู่เมนูหลัก...")
             break
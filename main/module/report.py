@@ -2,6 +2,9 @@ import os
 import struct
 import datetime
 from collections import defaultdict
+from module.cache import get_cached_records
+from module import metrics, trace, lsm, compact_layout, segments
+from module.time_index import get_daily_registered_counts
 
 # -----------------------------
 # Path และ Format
@@ -44,24 +47,33 @@ def read_student_record(record_data):
         first_name = unpacked_data[1].strip(b'\x00').decode('utf-8')
         last_name = unpacked_data[2].strip(b'\x00').decode('utf-8')
         major = unpacked_data[3].strip(b'\x00').decode('utf-8')
-        year_level = unpacked_data[4]
-        status_code = unpacked_data[5]
-
-        return {
-            'STUDENT ID': student_id,
-            'FIRST NAME': first_name,
-            'LAST NAME': last_name,
-            'MAJOR': major,
-            'YEAR': year_level,
-            'STATUS': STATUS_MAPPING.get(status_code, 'ไม่ทราบ')
-        }
+        return student_from_fields(student_id, first_name, last_name, major, unpacked_data[4], unpacked_data[5])
     except struct.error:
         return None
 
+def student_from_fields(student_id, first_name, last_name, major, year_level, status_code):
+    return {
+        'STUDENT ID': student_id,
+        'FIRST NAME': first_name,
+        'LAST NAME': last_name,
+        'MAJOR': major,
+        'YEAR': year_level,
+        'STATUS': STATUS_MAPPING.get(status_code, 'ไม่ทราบ')
+    }
+
 def read_all_students(file_path=STUDENT_FILE_PATH):
+    return get_cached_records(file_path, 'report-student', read_students_from_disk)
+
+@trace.traced('read students', cat='storage')
+@metrics.timed('storage_operation_seconds', op='full_scan', file='student.bin')
+def read_students_from_disk(file_path=STUDENT_FILE_PATH):
     records = []
     if not os.path.exists(file_path):
         return records
+    if compact_layout.detect_version(file_path) == 2:
+        records = [student_from_fields(*row) for row in compact_layout.read_rows(file_path, 'student')]
+        metrics.record_read('student.bin', os.path.getsize(file_path), len(records))
+        return records
     with open(file_path, 'rb') as f:
         while True:
             record_data = f.read(STUDENT_RECORD_SIZE)
@@ -70,6 +82,7 @@ def read_all_students(file_path=STUDENT_FILE_PATH):
             record = read_student_record(record_data)
             if record:
                 records.append(record)
+        metrics.record_read('student.bin', f.tell(), len(records))
     return records
 
 # -----------------------------
@@ -93,8 +106,16 @@ def read_course_record(record_data):
 
 def load_course_dict(file_path=COURSE_FILE_PATH):
     courses = {}
+    for course in get_cached_records(file_path, 'report-course', read_courses_from_disk):
+        courses[course['course_id']] = course
+    return courses
+
+@trace.traced('read courses', cat='storage')
+@metrics.timed('storage_operation_seconds', op='full_scan', file='CourseSubject.bin')
+def read_courses_from_disk(file_path=COURSE_FILE_PATH):
+    records = []
     if not os.path.exists(file_path):
-        return courses
+        return records
     with open(file_path, 'rb') as f:
         while True:
             record_data = f.read(COURSE_RECORD_SIZE)
@@ -102,8 +123,9 @@ def load_course_dict(file_path=COURSE_FILE_PATH):
                 break
             course = read_course_record(record_data)
             if course:
-                courses[course['course_id']] = course
-    return courses
+                records.append(course)
+        metrics.record_read('CourseSubject.bin', f.tell(), len(records))
+    return records
 
 # -----------------------------
 # อ่าน register record
@@ -111,26 +133,53 @@ def load_course_dict(file_path=COURSE_FILE_PATH):
 def read_register_record(record_data):
     try:
         unpacked_data = struct.unpack(REGISTER_RECORD_FORMAT, record_data)
-        reg_id = unpacked_data[0]
         student_id = unpacked_data[1].strip(b'\x00').decode('utf-8')
         course_id = unpacked_data[2].strip(b'\x00').decode('utf-8')
-        reg_date = datetime.datetime.fromtimestamp(unpacked_data[3])
-        status = unpacked_data[4]
-        return {
-            'REGISTER ID': reg_id,
-            'STUDENT ID': student_id,
-            'COURSE ID': course_id,
-            'DATE': reg_date,
-            'STATUS': STATUS_MAPPING.get(status, 'ไม่ทราบ'),
-            'STATUS_CODE': status
-        }
+        return register_from_fields(unpacked_data[0], student_id, course_id, unpacked_data[3], unpacked_data[4])
     except struct.error:
         return None
 
+def register_from_fields(reg_id, student_id, course_id, timestamp, status):
+    return {
+        'REGISTER ID': reg_id,
+        'STUDENT ID': student_id,
+        'COURSE ID': course_id,
+        'DATE': datetime.datetime.fromtimestamp(timestamp),
+        'STATUS': STATUS_MAPPING.get(status, 'ไม่ทราบ'),
+        'STATUS_CODE': status
+    }
+
 def read_all_registrations(file_path=REGISTER_FILE_PATH):
+    """การลงทะเบียนของภาคเรียนปัจจุบัน (registration.bin และการเขียนที่ค้างในโหมด LSM) ไม่รวมภาคเรียนที่จัดเก็บแล้ว"""
+    records = get_cached_records(file_path, 'report-registration', read_registrations_from_disk)
+    if lsm.has_pending():
+        records = lsm.merge_overlay(records, read_register_record, 'REGISTER ID')
+    return records
+
+def read_archived_registrations():
+    """การลงทะเบียนของภาคเรียนที่จัดเก็บแล้วทั้งหมด เรียงจากภาคเรียนเก่าไปใหม่"""
+    records = []
+    for key, _ in segments.list_archived_terms():
+        for record_data in segments.read_archived_term(key):
+            record = read_register_record(record_data)
+            if record:
+                records.append(record)
+    return records
+
+def read_historical_registrations():
+    """การลงทะเบียนทุกภาคเรียน รวมภาคเรียนที่จัดเก็บแล้ว"""
+    return read_archived_registrations() + read_all_registrations()
+
+@trace.traced('read registrations', cat='storage')
+@metrics.timed('storage_operation_seconds', op='full_scan', file='registration.bin')
+def read_registrations_from_disk(file_path=REGISTER_FILE_PATH):
     records = []
     if not os.path.exists(file_path):
         return records
+    if compact_layout.detect_version(file_path) == 2:
+        records = [register_from_fields(*row) for row in compact_layout.read_rows(file_path, 'registration')]
+        metrics.record_read('registration.bin', os.path.getsize(file_path), len(records))
+        return records
     with open(file_path, 'rb') as f:
         while True:
             record_data = f.read(REGISTER_RECORD_SIZE)
@@ -139,11 +188,13 @@ def read_all_registrations(file_path=REGISTER_FILE_PATH):
             record = read_register_record(record_data)
             if record:
                 records.append(record)
+        metrics.record_read('registration.bin', f.tell(), len(records))
     return records
 
 # -----------------------------
 # Student Report
 # -----------------------------
+@metrics.timed('report_build_seconds', report='student')
 def print_student_report(records):
     report = ""
     report += "==========================================================================\n"
@@ -197,8 +248,12 @@ def print_student_report(records):
 # -----------------------------
 # ฟังก์ชันวิเคราะห์สถิติการลงทะเบียน
 # -----------------------------
-def analyze_registration_statistics(records, courses, students):
-    """วิเคราะห์สถิติการลงทะเบียนแบบละเอียด"""
+@metrics.timed('report_build_seconds', report='registration_statistics')
+def analyze_registration_statistics(records, courses, students, date_stats=None):
+    """วิเคราะห์สถิติการลงทะเบียนแบบละเอียด
+
+    หากส่ง date_stats (วันที่ -> จำนวนผู้ลงทะเบียน) จากดัชนีเวลามา จะไม่ต้องแปลงวันที่ของทุก record
+    """
     
     student_dict = {s['STUDENT ID']: s for s in students}
     
@@ -215,7 +270,6 @@ def analyze_registration_statistics(records, courses, students):
         course_id = rec['COURSE ID']
         status = rec['STATUS_CODE']
         student_id = rec['STUDENT ID']
-        date_key = rec['DATE'].strftime("%Y-%m-%d")
         
         student_info = student_dict.get(student_id, {})
         major = student_info.get('MAJOR', 'ไม่ระบุ')
@@ -237,8 +291,11 @@ def analyze_registration_statistics(records, courses, students):
         else:
             stats['year_stats'][year]['dropped'] += 1
         
-        if status == 1:
-            stats['date_stats'][date_key] += 1
+        if status == 1 and date_stats is None:
+            stats['date_stats'][rec['DATE'].strftime("%Y-%m-%d")] += 1
+
+    if date_stats is not None:
+        stats['date_stats'].update(date_stats)
     
     for course_id, course_data in stats['course_stats'].items():
         total = course_data['registered'] + course_data['dropped']
@@ -272,14 +329,91 @@ def analyze_registration_statistics(records, courses, students):
 # -----------------------------
 # Register Report + Course Name + สถิติ
 # -----------------------------
-def print_register_report(records, courses, students):
+def render_course_roster(course_id, course_info, reg_list, student_dict, total_dropped):
+    """สร้างส่วนรายชื่อผู้ลงทะเบียนของรายวิชาหนึ่ง (reg_list เฉพาะที่สถานะลงทะเบียน)"""
+    report = ""
+    course_name = course_info.get('course_name', 'ไม่ระบุ')
+    academic_year = course_info.get('academic_year', 'ไม่ระบุ')
+    semester = course_info.get('semester', 'ไม่ระบุ')
+    
+    report += f"วิชา: {course_id} - {course_name} [ปีการศึกษา {academic_year}, ภาคเรียน {semester}]\n"
+    report += "ส่วน: 1\n\n"
+    
+    headers = ["STUDENT ID", "FIRST NAME", "LAST NAME", "MAJOR", "YEAR", "REGISTRATION DATE", "STATUS"]
+    col_widths = [20, 20, 20, 15, 8, 20, 15]
+
+    header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
+    report += header_line + "\n"
+    report += "-" * len(header_line) + "\n"
+
+    for rec in reg_list:
+        student_info = student_dict.get(rec['STUDENT ID'], {})
+        row_data = [
+            rec["STUDENT ID"],
+            student_info.get('FIRST NAME', 'ไม่ระบุ'),
+            student_info.get('LAST NAME', 'ไม่ระบุ'),
+            student_info.get('MAJOR', 'ไม่ระบุ'),
+            str(student_info.get('YEAR', 'ไม่ระบุ')),
+            rec["DATE"].strftime("%Y-%m-%d"),
+            rec["STATUS"]
+        ]
+        row_line = " | ".join(f"{row_data[i]:<{col_widths[i]}}" for i in range(len(headers)))
+        report += row_line + "\n"
+
+    total_registered = len(reg_list)
+    total_students = total_registered + total_dropped
+    drop_rate = (total_dropped / total_students * 100) if total_students > 0 else 0
+    
+    report += f"\nจำนวนนักศึกษาทั้งหมดในส่วนนี้: {total_registered}\n"
+    
+    major_count = defaultdict(int)
+    year_count = defaultdict(int)
+    date_count = defaultdict(int)
+    
+    for rec in reg_list:
+        student_info = student_dict.get(rec['STUDENT ID'], {})
+        major = student_info.get('MAJOR', 'ไม่ระบุ')
+        year = student_info.get('YEAR', 'ไม่ระบุ')
+        date = rec["DATE"].strftime("%Y-%m-%d")
+        
+        major_count[major] += 1
+        year_count[year] += 1
+        date_count[date] += 1
+    
+    report += "- นักศึกษาแยกตามสาขา:\n"
+    for major, count in major_count.items():
+        report += f"  {major}: {count}\n"
+    
+    report += "\n--- สรุปสถานะ ---\n"
+    report += f"- ลงทะเบียน: {total_registered}\n"
+    report += f"- ถอน: {total_dropped}\n"
+    report += f"- อัตราการถอน: {drop_rate:.1f}%\n"
+    
+    if year_count:
+        max_year = max(year_count, key=year_count.get)
+        report += f"\n- ชั้นปีที่มีการลงทะเบียนมากที่สุด: ปี {max_year} [{year_count[max_year]} คน]\n"
+    
+    if major_count:
+        max_major = max(major_count, key=major_count.get)
+        min_major = min(major_count, key=major_count.get)
+        report += f"- สาขาที่มีการลงทะเบียนมากที่สุด: {max_major} [{major_count[max_major]} คน]\n"
+        report += f"- สาขาที่มีการลงทะเบียนน้อยที่สุด: {min_major} [{major_count[min_major]} คน]\n"
+    
+    if date_count:
+        max_date = max(date_count, key=date_count.get)
+        report += f"- วันที่ที่มีการลงทะเบียนมากที่สุด: {max_date} [{date_count[max_date]} คน]\n"
+    return report
+
+@metrics.timed('report_build_seconds', report='registration')
+def print_register_report(records, courses, students, date_stats=None):
     report = ""
     report += "==========================================================================\n"
     report += "                        รายงานการลงทะเบียน\n"
     report += "==========================================================================\n"
     report += f"สร้างเมื่อ: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
 
-    stats = analyze_registration_statistics(records, courses, students)
+    with trace.span('analyze registration statistics', cat='stats', records=len(records)):
+        stats = analyze_registration_statistics(records, courses, students, date_stats)
     student_dict = {s['STUDENT ID']: s for s in students}
     
     course_groups = defaultdict(list)
@@ -288,80 +422,8 @@ def print_register_report(records, courses, students):
             course_groups[rec['COURSE ID']].append(rec)
     
     for course_id, reg_list in course_groups.items():
-        course_info = courses.get(course_id, {})
-        course_name = course_info.get('course_name', 'ไม่ระบุ')
-        academic_year = course_info.get('academic_year', 'ไม่ระบุ')
-        semester = course_info.get('semester', 'ไม่ระบุ')
-        
-        report += f"วิชา: {course_id} - {course_name} [ปีการศึกษา {academic_year}, ภาคเรียน {semester}]\n"
-        report += "ส่วน: 1\n\n"
-        
-        headers = ["STUDENT ID", "FIRST NAME", "LAST NAME", "MAJOR", "YEAR", "REGISTRATION DATE", "STATUS"]
-        col_widths = [20, 20, 20, 15, 8, 20, 15]
-
-        header_line = " | ".join(f"{h:<{col_widths[i]}}" for i, h in enumerate(headers))
-        report += header_line + "\n"
-        report += "-" * len(header_line) + "\n"
-
-        for rec in reg_list:
-            student_info = student_dict.get(rec['STUDENT ID'], {})
-            row_data = [
-                rec["STUDENT ID"],
-                student_info.get('FIRST NAME', 'ไม่ระบุ'),
-                student_info.get('LAST NAME', 'ไม่ระบุ'),
-                student_info.get('MAJOR', 'ไม่ระบุ'),
-                str(student_info.get('YEAR', 'ไม่ระบุ')),
-                rec["DATE"].strftime("%Y-%m-%d"),
-                rec["STATUS"]
-            ]
-            row_line = " | ".join(f"{row_data[i]:<{col_widths[i]}}" for i in range(len(headers)))
-            report += row_line + "\n"
-
-        course_stat = stats['course_stats'][course_id]
-        total_registered = course_stat['registered']
-        total_dropped = course_stat['dropped']
-        total_students = total_registered + total_dropped
-        drop_rate = (total_dropped / total_students * 100) if total_students > 0 else 0
-        
-        report += f"\nจำนวนนักศึกษาทั้งหมดในส่วนนี้: {total_registered}\n"
-        
-        major_count = defaultdict(int)
-        year_count = defaultdict(int)
-        date_count = defaultdict(int)
-        
-        for rec in reg_list:
-            student_info = student_dict.get(rec['STUDENT ID'], {})
-            major = student_info.get('MAJOR', 'ไม่ระบุ')
-            year = student_info.get('YEAR', 'ไม่ระบุ')
-            date = rec["DATE"].strftime("%Y-%m-%d")
-            
-            major_count[major] += 1
-            year_count[year] += 1
-            date_count[date] += 1
-        
-        report += "- นักศึกษาแยกตามสาขา:\n"
-        for major, count in major_count.items():
-            report += f"  {major}: {count}\n"
-        
-        report += "\n--- สรุปสถานะ ---\n"
-        report += f"- ลงทะเบียน: {total_registered}\n"
-        report += f"- ถอน: {total_dropped}\n"
-        report += f"- อัตราการถอน: {drop_rate:.1f}%\n"
-        
-        if year_count:
-            max_year = max(year_count, key=year_count.get)
-            report += f"\n- ชั้นปีที่มีการลงทะเบียนมากที่สุด: ปี {max_year} [{year_count[max_year]} คน]\n"
-        
-        if major_count:
-            max_major = max(major_count, key=major_count.get)
-            min_major = min(major_count, key=major_count.get)
-            report += f"- สาขาที่มีการลงทะเบียนมากที่สุด: {max_major} [{major_count[max_major]} คน]\n"
-            report += f"- สาขาที่มีการลงทะเบียนน้อยที่สุด: {min_major} [{major_count[min_major]} คน]\n"
-        
-        if date_count:
-            max_date = max(date_count, key=date_count.get)
-            report += f"- วันที่ที่มีการลงทะเบียนมากที่สุด: {max_date} [{date_count[max_date]} คน]\n"
-        
+        report += render_course_roster(course_id, courses.get(course_id, {}), reg_list, student_dict,
+                                       stats['course_stats'][course_id]['dropped'])
         report += "\n" + "="*80 + "\n\n"
 
     # คำนวณ total_registrations ก่อนใช้งาน
@@ -439,8 +501,9 @@ def print_register_report(records, courses, students):
 # -----------------------------
 def write_report(report_string, filename):
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(report_string)
+        with trace.span('write report', cat='storage', chars=len(report_string)):
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(report_string)
         print(f"✅ บันทึกรายงานลงไฟล์ {filename} เรียบร้อย")
     except IOError as e:
         print(f"❌ Error writing file: {e}")
@@ -454,28 +517,53 @@ def generate_report():
         print("1. ดูรายงานนักเรียน")
         print("2. ดูรายงานการลงทะเบียน")
         print("3. ย้อนกลับไปหน้าแรก")
+        print("4. ส่งออกรายชื่อผู้ลงทะเบียนแยกไฟล์รายวิชา")
+        print("5. ดูรายงานการลงทะเบียนเฉพาะส่วนที่เปลี่ยนตั้งแต่ครั้งก่อน")
 
         choice = input("เลือกเมนู: ")
 
         if choice == '1':
-            students = read_all_students()
-            if students:
-                report = print_student_report(students)
-                write_report(report, REPORT_STUDENT_FILE_PATH)
-            else:
-                print("ไม่พบนักศึกษา")
+            with trace.span('student report', cat='report'):
+                students = read_all_students()
+                if students:
+                    with trace.span('render student report', cat='render', records=len(students)):
+                        report = print_student_report(students)
+                    write_report(report, REPORT_STUDENT_FILE_PATH)
+                else:
+                    print("ไม่พบนักศึกษา")
 
         elif choice == '2':
-            regs = read_all_registrations()
-            courses = load_course_dict()
-            students = read_all_students()
-            if regs:
-                report = print_register_report(regs, courses, students)
-                write_report(report, REPORT_REGISTER_FILE_PATH)
-            else:
-                print("ไม่พบข้อมูลการลงทะเบียน")
+            with trace.span('registration report', cat='report'):
+                with trace.span('load report data', cat='storage') as span_args:
+                    archived = read_archived_registrations()
+                    regs = archived + read_all_registrations()
+                    courses = load_course_dict()
+                    students = read_all_students()
+                    # ดัชนีเวลาครอบคลุมเฉพาะ registration.bin ไม่รวมการเขียนที่ค้างในโหมด LSM และภาคเรียนที่จัดเก็บแล้ว
+                    # จึงให้นับวันที่จาก record แทนในกรณีนั้น
+                    date_stats = None if lsm.has_pending() or archived else get_daily_registered_counts()
+                    span_args['records'] = len(regs) + len(courses) + len(students)
+                if regs:
+                    with trace.span('render registration report', cat='render', records=len(regs)):
+                        report = print_register_report(regs, courses, students, date_stats)
+                    write_report(report, REPORT_REGISTER_FILE_PATH)
+                else:
+                    print("ไม่พบข้อมูลการลงทะเบียน")
 
         elif choice == '3':
             break
+
+        elif choice == '4':
+            # นำเข้าในฟังก์ชันเพราะ module.roster นำเข้าโมดูลนี้
+            from module.roster import export_rosters_menu
+            export_rosters_menu()
+
+        elif choice == '5':
+            with trace.span('registration delta report', cat='report'):
+                # นำเข้าในฟังก์ชันเพราะ module.delta_report นำเข้าโมดูลนี้
+                from module.delta_report import build_delta_report, REPORT_DELTA_FILE_PATH
+                report = build_delta_report()
+                write_report(report, REPORT_DELTA_FILE_PATH)
+
         else:
             print("ตัวเลือกไม่ถูกต้อง")
\ No newline at end of file
@@ -0,0 +1,154 @@
+import os
+import re
+import csv
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from module import report, metrics, trace
+from module.external_sort import thai_sort_key
+
+# -----------------------------
+# ส่งออกรายชื่อผู้ลงทะเบียนแยกไฟล์ละรายวิชา
+# -----------------------------
+# จัดกลุ่มการลงทะเบียนตามรายวิชาครั้งเดียวในโปรเซสหลัก แล้วให้ worker pool เขียนไฟล์ของแต่ละวิชาพร้อมกัน
+# ข้อมูลนักเรียนและคีย์เรียงส่งให้แต่ละ worker ครั้งเดียวตอนเริ่ม (initializer) และใช้แบบอ่านอย่างเดียว
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+ROSTER_DIR = os.path.join(main_dir, 'rosters')
+
+ROSTER_FORMATS = ('txt', 'csv')
+CSV_HEADERS = ["STUDENT ID", "FIRST NAME", "LAST NAME", "MAJOR", "YEAR", "REGISTRATION DATE", "STATUS"]
+
+# จำนวน worker (ไม่ระบุ = จำนวน core) ตั้งด้วย COMPRO_ROSTER_WORKERS
+ROSTER_WORKERS = int(os.environ.get('COMPRO_ROSTER_WORKERS', '0')) or os.cpu_count() or 1
+# จำนวนรายวิชาที่ส่งให้ worker ต่อครั้ง ลดค่าใช้จ่ายในการส่งงานเมื่อมีหลายพันวิชา
+TASK_CHUNK_SIZE = 32
+
+# ตัวอักษรที่ใช้ในชื่อไฟล์ไม่ได้
+UNSAFE_FILE_CHARS = re.compile(r'[^\w.-]')
+
+# ข้อมูลที่ใช้ร่วมกันใน worker (ตั้งโดย init_worker)
+_students = {}
+_sort_keys = {}
+_options = {}
+
+def init_worker(students, sort_keys, formats, out_dir):
+    global _students, _sort_keys, _options
+    _students = students
+    _sort_keys = sort_keys
+    _options = {'formats': formats, 'out_dir': out_dir}
+
+def student_sort_keys(students):
+    """คำนวณคีย์เรียงตามนามสกุลและชื่อ (ลำดับพจนานุกรมไทย) ครั้งเดียวต่อนักเรียน"""
+    return {student_id: thai_sort_key(s['LAST NAME']) + b'\x01' + thai_sort_key(s['FIRST NAME'])
+            for student_id, s in students.items()}
+
+def roster_file_name(course_id, extension):
+    """ชื่อไฟล์รายชื่อของวิชา รหัสที่ต้องแทนตัวอักษรต่อท้ายด้วย hash ของรหัสเดิม (CS 101 กับ CS_101 ไม่ชนกัน)"""
+    safe_name = UNSAFE_FILE_CHARS.sub('_', course_id)
+    if safe_name != course_id or not safe_name:
+        safe_name = f"{safe_name}~{zlib.crc32(course_id.encode('utf-8')):08x}"
+    return f"{safe_name}.{extension}"
+
+def check_file_names(tasks):
+    """ตรวจว่ารายวิชาทุกวิชาได้ชื่อไฟล์ไม่ซ้ำกัน ก่อนเขียนไฟล์ใดทับกัน"""
+    seen = {}
+    for task in tasks:
+        name = roster_file_name(task[0], '')
+        if name in seen:
+            raise ValueError(f"รหัสวิชา {seen[name]} และ {task[0]} ได้ชื่อไฟล์รายชื่อเดียวกัน")
+        seen[name] = task[0]
+
+def write_course_roster(task):
+    """เขียนไฟล์รายชื่อของรายวิชาหนึ่ง (ทำงานใน worker) คืน (รหัสวิชา, จำนวนผู้ลงทะเบียน, ไบต์ที่เขียน)"""
+    course_id, course_info, reg_list, total_dropped = task
+    reg_list = sorted(reg_list, key=lambda rec: (_sort_keys.get(rec['STUDENT ID'], b''), rec['STUDENT ID']))
+    written = 0
+    for extension in _options['formats']:
+        path = os.path.join(_options['out_dir'], roster_file_name(course_id, extension))
+        if extension == 'txt':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(report.render_course_roster(course_id, course_info, reg_list, _students, total_dropped))
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_HEADERS)
+                for rec in reg_list:
+                    student_info = _students.get(rec['STUDENT ID'], {})
+                    writer.writerow([rec['STUDENT ID'], student_info.get('FIRST NAME', ''),
+                                     student_info.get('LAST NAME', ''), student_info.get('MAJOR', ''),
+                                     student_info.get('YEAR', ''), rec['DATE'].strftime("%Y-%m-%d"),
+                                     rec['STATUS']])
+        written += os.path.getsize(path)
+    return course_id, len(reg_list), written
+
+def build_roster_tasks(registrations, courses, academic_year=None, semester=None):
+    """จัดกลุ่มการลงทะเบียนตามรายวิชาครั้งเดียว คืนรายการงาน (รหัสวิชา, ข้อมูลวิชา, ผู้ลงทะเบียน, จำนวนถอน)"""
+    groups = {}
+    for rec in registrations:
+        group = groups.setdefault(rec['COURSE ID'], [[], 0])
+        if rec['STATUS_CODE'] == 1:
+            # ส่งเฉพาะฟิลด์ที่ใช้ ลดขนาดข้อมูลที่ต้องส่งให้ worker
+            group[0].append({'STUDENT ID': rec['STUDENT ID'], 'DATE': rec['DATE'], 'STATUS': rec['STATUS']})
+        else:
+            group[1] += 1
+    tasks = []
+    for course_id, (reg_list, total_dropped) in sorted(groups.items()):
+        course_info = courses.get(course_id, {})
+        if academic_year is not None and course_info.get('academic_year') != academic_year:
+            continue
+        if semester is not None and course_info.get('semester') != semester:
+            continue
+        tasks.append((course_id, course_info, reg_list, total_dropped))
+    return tasks
+
+@metrics.timed('report_build_seconds', report='roster')
+def export_rosters(formats=ROSTER_FORMATS, out_dir=ROSTER_DIR, workers=None,
+                   academic_year=None, semester=None):
+    """เขียนไฟล์รายชื่อผู้ลงทะเบียนของทุกรายวิชา (หรือเฉพาะปีการศึกษา/ภาคเรียนที่ระบุ)
+
+    คืนรายการ (รหัสวิชา, จำนวนผู้ลงทะเบียน, ไบต์ที่เขียน) workers=1 ทำงานในโปรเซสเดียว
+    ใช้เฉพาะการลงทะเบียนของภาคเรียนปัจจุบัน ไม่รวมภาคเรียนที่จัดเก็บแล้ว
+    """
+    workers = workers or ROSTER_WORKERS
+    with trace.span('load roster data', cat='storage'):
+        registrations = report.read_all_registrations()
+        courses = report.load_course_dict()
+        students = {s['STUDENT ID']: s for s in report.read_all_students()}
+        tasks = build_roster_tasks(registrations, courses, academic_year, semester)
+        sort_keys = student_sort_keys(students)
+    check_file_names(tasks)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with trace.span('write rosters', cat='render', records=len(tasks), workers=workers):
+        if workers == 1 or len(tasks) < 2:
+            init_worker(students, sort_keys, formats, out_dir)
+            results = [write_course_roster(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(students, sort_keys, formats, out_dir)) as pool:
+                results = list(pool.map(write_course_roster, tasks, chunksize=TASK_CHUNK_SIZE))
+    metrics.inc('roster_files_total', len(results) * len(formats))
+    return results
+
+def export_rosters_menu():
+    """เมนูส่งออกรายชื่อผู้ลงทะเบียนแยกรายวิชา"""
+    term = input("ปีการศึกษา/ภาคเรียน เช่น 2567/1 (Enter = ทุกรายวิชา): ").strip()
+    academic_year = semester = None
+    if term:
+        try:
+            year_text, _, semester_text = term.partition('/')
+            academic_year = int(year_text)
+            semester = int(semester_text) if semester_text else None
+        except ValueError:
+            print("ปีการศึกษา/ภาคเรียนไม่ถูกต้อง")
+            return
+    try:
+        results = export_rosters(academic_year=academic_year, semester=semester)
+    except (IOError, OSError, ValueError) as e:
+        print(f"เกิดข้อผิดพลาดในการส่งออกรายชื่อ: {e}")
+        return
+    if not results:
+        print("ไม่พบการลงทะเบียนของรายวิชาที่ระบุ")
+        return
+    students = sum(count for _, count, _ in results)
+    print(f"✅ ส่งออกรายชื่อ {len(results)} รายวิชา ({students} รายการ) ไปยัง {ROSTER_DIR}")
@@ -0,0 +1,224 @@
+import os
+import struct
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from module.index_store import load_index, append_index_delta, get_index_for_append
+
+# -----------------------------
+# Path และ Format
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+STUDENT_FILE_PATH = os.path.join(main_dir, 'student.bin')
+COURSE_FILE_PATH = os.path.join(main_dir, 'CourseSubject.bin')
+
+STUDENT_RECORD_FORMAT = '<16s50s50s20sBB'
+STUDENT_RECORD_SIZE = struct.calcsize(STUDENT_RECORD_FORMAT)
+
+COURSE_RECORD_FORMAT = '<10s50sB H B B'
+COURSE_RECORD_SIZE = struct.calcsize(COURSE_RECORD_FORMAT)
+
+# วรรณยุกต์และเครื่องหมายกำกับภาษาไทยที่ตัดทิ้งเพื่อให้ค้นหาแบบใกล้เคียงได้
+# (ไม้ไต่คู้ ไม้เอก ไม้โท ไม้ตรี ไม้จัตวา การันต์ นิคหิต ยามักการ)
+THAI_IGNORED_MARKS = set('็่้๊๋์ํ๎')
+
+# ขนาดของ n-gram ที่ใช้ทำดัชนีค้นหาแบบใกล้เคียง
+NGRAM_SIZE = 3
+
+# n-gram ที่พบในเกินสัดส่วนนี้ของรายการจะไม่ใช้หา candidate (ช่วยให้ค้นหาได้เร็วกับข้อมูลขนาดใหญ่)
+COMMON_GRAM_RATIO = 0.2
+
+# คะแนนความคล้ายขั้นต่ำ (Dice coefficient) ของการค้นหาแบบใกล้เคียง
+DEFAULT_MIN_SCORE = 0.5
+
+def fold_text(text):
+    """แปลงข้อความให้อยู่ในรูปมาตรฐานสำหรับค้นหา (ตัวพิมพ์เล็ก ไม่สนวรรณยุกต์/เครื่องหมายกำกับ)"""
+    text = unicodedata.normalize('NFD', text.strip().casefold())
+    chars = []
+    for ch in text:
+        if ch in THAI_IGNORED_MARKS:
+            continue
+        # ตัดเครื่องหมายกำกับของอักษรละติน แต่เก็บสระบน/ล่างของภาษาไทยไว้
+        if unicodedata.combining(ch) and not ('฀' <= ch <= '๿'):
+            continue
+        chars.append(ch)
+    return unicodedata.normalize('NFC', ' '.join(''.join(chars).split()))
+
+def make_ngrams(key):
+    """แยกข้อความเป็นชุดของ n-gram (เติมตัวคั่นหัวท้าย)"""
+    padded = f"^{key}$"
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+def new_search_index():
+    """สร้างโครงสร้างดัชนีค้นหาเปล่า"""
+    return {
+        'prefix': [],                 # รายการ (key, record_no) เรียงตาม key
+        'entries': [],                # entry_id -> record_no
+        'entry_gram_count': [],       # entry_id -> จำนวน n-gram ของ key
+        'grams': defaultdict(list),   # n-gram -> [entry_id]
+        'record_count': 0
+    }
+
+def add_search_keys(index, record_no, texts, keep_sorted=True):
+    """เพิ่มคีย์ค้นหาของ record หนึ่งรายการลงในดัชนี
+
+    คีย์ prefix ได้จากข้อความทุกฟิลด์ต่อกันโดยเริ่มได้จากทุกคำ (ค้นหาด้วยชื่อ นามสกุล
+    หรือชื่อเต็มก็ได้) ส่วนคีย์ใกล้เคียงได้จากแต่ละฟิลด์และแต่ละคำในฟิลด์
+    """
+    keys = [fold_text(text) for text in texts]
+    keys = [key for key in keys if key]
+    if not keys:
+        index['record_count'] = max(index['record_count'], record_no + 1)
+        return
+
+    words = ' '.join(keys).split(' ')
+    prefix_keys = {' '.join(words[i:]) for i in range(len(words))}
+    for key in prefix_keys:
+        if keep_sorted:
+            insort(index['prefix'], (key, record_no))
+        else:
+            index['prefix'].append((key, record_no))
+
+    fuzzy_keys = set(keys)
+    for key in keys:
+        fuzzy_keys.update(key.split(' '))
+    for key in fuzzy_keys:
+        entry_id = len(index['entries'])
+        grams = make_ngrams(key)
+        index['entries'].append(record_no)
+        index['entry_gram_count'].append(len(grams))
+        for gram in grams:
+            index['grams'][gram].append(entry_id)
+    index['record_count'] = max(index['record_count'], record_no + 1)
+
+def build_search_index(file_path, record_format, text_fields):
+    """สร้างดัชนีค้นหาจากไฟล์ไบนารีด้วยการอ่านไฟล์หนึ่งรอบ"""
+    index = new_search_index()
+    record_size = struct.calcsize(record_format)
+    if not os.path.exists(file_path):
+        return index
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % record_size
+    for record_no, unpacked in enumerate(struct.iter_unpack(record_format, data[:usable])):
+        texts = []
+        for field in text_fields:
+            try:
+                texts.append(unpacked[field].strip(b'\x00').decode('utf-8'))
+            except UnicodeDecodeError:
+                continue
+        # เรียง prefix ทีเดียวตอนท้าย เร็วกว่า insort ทีละรายการ
+        add_search_keys(index, record_no, texts, keep_sorted=False)
+    index['prefix'].sort()
+    return index
+
+def prefix_search(index, query, limit=50):
+    """ค้นหา record ที่มีคีย์ขึ้นต้นด้วยข้อความที่ระบุ คืนค่า record_no ตามลำดับตัวอักษร"""
+    key = fold_text(query)
+    if not key:
+        return []
+    prefix = index['prefix']
+    results = []
+    seen = set()
+    i = bisect_left(prefix, (key,))
+    while i < len(prefix) and prefix[i][0].startswith(key):
+        record_no = prefix[i][1]
+        if record_no not in seen:
+            seen.add(record_no)
+            results.append(record_no)
+            if len(results) >= limit:
+                break
+        i += 1
+    return results
+
+def fuzzy_search(index, query, limit=20, min_score=DEFAULT_MIN_SCORE):
+    """ค้นหาแบบใกล้เคียงด้วย n-gram คืนค่า [(record_no, score)] เรียงตามคะแนน"""
+    key = fold_text(query)
+    if not key:
+        return []
+    query_grams = make_ngrams(key)
+    common_limit = max(len(index['entries']) * COMMON_GRAM_RATIO, 1000)
+
+    hits = defaultdict(int)
+    for gram in query_grams:
+        postings = index['grams'].get(gram)
+        if not postings or len(postings) > common_limit:
+            continue
+        for entry_id in postings:
+            hits[entry_id] += 1
+
+    best = {}
+    for entry_id, common in hits.items():
+        score = 2.0 * common / (len(query_grams) + index['entry_gram_count'][entry_id])
+        if score < min_score:
+            continue
+        record_no = index['entries'][entry_id]
+        if score > best.get(record_no, 0):
+            best[record_no] = score
+
+    return sorted(best.items(), key=lambda x: (-x[1], x[0]))[:limit]
+
+def search_records(index, query, record_size, limit=20):
+    """ค้นหาแบบ prefix ก่อน แล้วเติมด้วยผลแบบใกล้เคียง คืนค่า [(offset, score)]"""
+    results = [(record_no, 1.0) for record_no in prefix_search(index, query, limit)]
+    if len(results) < limit:
+        found = {record_no for record_no, _ in results}
+        for record_no, score in fuzzy_search(index, query, limit):
+            if record_no not in found:
+                results.append((record_no, score))
+                found.add(record_no)
+            if len(results) >= limit:
+                break
+    return [(record_no * record_size, score) for record_no, score in results]
+
+# -----------------------------
+# ดัชนีของนักเรียนและรายวิชา
+# -----------------------------
+def get_student_search_index(file_path=STUDENT_FILE_PATH):
+    """โหลดดัชนีค้นหาชื่อ-นามสกุลนักเรียน"""
+    return load_index(
+        'student_search', [file_path],
+        lambda: build_search_index(file_path, STUDENT_RECORD_FORMAT, [1, 2]),
+        apply_appended_keys
+    )
+
+def get_course_search_index(file_path=COURSE_FILE_PATH):
+    """โหลดดัชนีค้นหาชื่อวิชา"""
+    return load_index(
+        'course_search', [file_path],
+        lambda: build_search_index(file_path, COURSE_RECORD_FORMAT, [1]),
+        apply_appended_keys
+    )
+
+def search_students(query, limit=20, file_path=STUDENT_FILE_PATH):
+    """ค้นหานักเรียนด้วยชื่อหรือนามสกุล คืนค่า [(offset, score)]"""
+    return search_records(get_student_search_index(file_path), query, STUDENT_RECORD_SIZE, limit)
+
+def search_courses(query, limit=20, file_path=COURSE_FILE_PATH):
+    """ค้นหารายวิชาด้วยชื่อวิชา คืนค่า [(offset, score)]"""
+    return search_records(get_course_search_index(file_path), query, COURSE_RECORD_SIZE, limit)
+
+def apply_appended_keys(index, delta):
+    """เล่นซ้ำ delta (ลำดับ record, ข้อความ) ที่บันทึกตอนต่อท้ายไฟล์ลงในดัชนี"""
+    record_no, texts = delta
+    add_search_keys(index, record_no, texts)
+    return index
+
+def index_appended_student(first_name, last_name, file_path=STUDENT_FILE_PATH):
+    """เพิ่ม record ที่เพิ่งต่อท้าย student.bin ลงในดัชนีโดยไม่ต้องสร้างใหม่ทั้งหมด (บันทึกเฉพาะ delta)"""
+    index = get_index_for_append('student_search', file_path, STUDENT_RECORD_SIZE)
+    if index is None:
+        return
+    delta = (index['record_count'], [first_name, last_name])
+    append_index_delta('student_search', [file_path], apply_appended_keys(index, delta), delta)
+
+def index_appended_course(course_name, file_path=COURSE_FILE_PATH):
+    """เพิ่ม record ที่เพิ่งต่อท้าย CourseSubject.bin ลงในดัชนีโดยไม่ต้องสร้างใหม่ทั้งหมด (บันทึกเฉพาะ delta)"""
+    index = get_index_for_append('course_search', file_path, COURSE_RECORD_SIZE)
+    if index is None:
+        return
+    delta = (index['record_count'], [course_name])
+    append_index_delta('course_search', [file_path], apply_appended_keys(index, delta), delta)
@@ -0,0 +1,373 @@
+import os
+import json
+import lzma
+import zlib
+import struct
+from datetime import datetime
+from itertools import chain
+from module.cache import bump_generation, writing
+from module import metrics, trace, lsm
+
+# -----------------------------
+# Path และ Format
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+REGISTRATION_FILE_PATH = os.path.join(main_dir, 'registration.bin')
+COURSE_FILE_PATH = os.path.join(main_dir, 'CourseSubject.bin')
+SEGMENT_DIR = os.path.join(main_dir, 'segments')
+MANIFEST_FILE_PATH = os.path.join(SEGMENT_DIR, 'manifest.json')
+
+REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
+REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
+
+COURSE_RECORD_FORMAT = '<10s50sB H B B'
+COURSE_RECORD_SIZE = struct.calcsize(COURSE_RECORD_FORMAT)
+
+# -----------------------------
+# รูปแบบไฟล์ archive ของภาคเรียนที่ปิดแล้ว (.rseg)
+# -----------------------------
+# [header][block 0][block 1]...[ตารางดัชนี block][trailer]
+# แต่ละ block คือ record การลงทะเบียนขนาดคงที่ (เรียงตาม ID) ที่บีบอัดแล้ว
+# ตารางดัชนีเก็บช่วง ID และช่วงเวลาของแต่ละ block จึงคลายบีบอัดเฉพาะ block ที่ต้องใช้
+ARCHIVE_MAGIC = b'CRSEG1\x00\x00'
+ARCHIVE_HEADER_FORMAT = '<8sBH'          # magic, codec, จำนวน record ต่อ block
+ARCHIVE_HEADER_SIZE = struct.calcsize(ARCHIVE_HEADER_FORMAT)
+BLOCK_ENTRY_FORMAT = '<QIIIIdd'         # offset, ขนาดบีบอัด, จำนวน record, ID แรก, ID สุดท้าย, เวลาน้อยสุด, เวลามากสุด
+BLOCK_ENTRY_SIZE = struct.calcsize(BLOCK_ENTRY_FORMAT)
+ARCHIVE_TRAILER_FORMAT = '<QI8s'        # offset ของตารางดัชนี, จำนวน block, magic
+ARCHIVE_TRAILER_SIZE = struct.calcsize(ARCHIVE_TRAILER_FORMAT)
+
+CODECS = {
+    'zlib': (1, lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (2, lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+CODEC_NAMES = {code: name for name, (code, _, _) in CODECS.items()}
+
+# จำนวน record ต่อ block
+ARCHIVE_BLOCK_RECORDS = 1024
+
+# -----------------------------
+# ภาคเรียนของการลงทะเบียน
+# -----------------------------
+def term_key(academic_year, semester):
+    """คืนคีย์ภาคเรียนรูปแบบ 'ปี-ภาค' เช่น 2567-1"""
+    return f"{academic_year}-{semester}"
+
+def parse_term_key(key):
+    """แปลง 'ปี-ภาค' เป็น (ปี, ภาค) หรือ None หากรูปแบบไม่ถูกต้อง"""
+    try:
+        year, semester = key.strip().split('-')
+        return int(year), int(semester)
+    except ValueError:
+        return None
+
+def term_for_date(timestamp):
+    """คืน (ปีการศึกษา พ.ศ., ภาคเรียน) ตามวันที่ลงทะเบียน
+
+    ภาค 1 = มิ.ย.-ต.ค., ภาค 2 = พ.ย.-มี.ค., ภาคฤดูร้อน (3) = เม.ย.-พ.ค.
+    """
+    date = datetime.fromtimestamp(timestamp)
+    if 6 <= date.month <= 10:
+        return date.year + 543, 1
+    if date.month >= 11:
+        return date.year + 543, 2
+    if date.month <= 3:
+        return date.year + 542, 2
+    return date.year + 542, 3
+
+def load_course_terms(file_path=COURSE_FILE_PATH):
+    """คืน dict รหัสวิชา -> (ปีการศึกษา, ภาคเรียน)"""
+    terms = {}
+    if not os.path.exists(file_path):
+        return terms
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % COURSE_RECORD_SIZE
+    for unpacked in struct.iter_unpack(COURSE_RECORD_FORMAT, data[:usable]):
+        course_id = unpacked[0].strip(b'\x00').decode('utf-8', errors='replace')
+        terms[course_id] = (unpacked[3], unpacked[4])
+    return terms
+
+def make_term_resolver(partition_by='course'):
+    """คืนฟังก์ชัน (รหัสวิชา, เวลา) -> คีย์ภาคเรียน
+
+    partition_by='course' ใช้ปี/ภาคของรายวิชา (วิชาที่ไม่พบจะใช้วันที่ลงทะเบียนแทน)
+    partition_by='date' ใช้วันที่ลงทะเบียน
+    """
+    course_terms = load_course_terms() if partition_by == 'course' else {}
+
+    def resolve(course_id, timestamp):
+        term = course_terms.get(course_id)
+        if term is None:
+            term = term_for_date(timestamp)
+        return term_key(*term)
+    return resolve
+
+# -----------------------------
+# manifest ของ segment ที่จัดเก็บแล้ว
+# -----------------------------
+def load_manifest():
+    """โหลด manifest ของ archive segment"""
+    try:
+        with open(MANIFEST_FILE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {'terms': {}, 'max_register_id': 0}
+
+def save_manifest(manifest):
+    """บันทึก manifest (เขียนไฟล์ชั่วคราวแล้วสลับ)"""
+    os.makedirs(SEGMENT_DIR, exist_ok=True)
+    tmp_path = MANIFEST_FILE_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_FILE_PATH)
+
+def archived_max_register_id():
+    """คืน ID การลงทะเบียนสูงสุดที่ถูกจัดเก็บไปแล้ว (ใช้กัน ID ซ้ำเมื่อไฟล์หลักว่าง)"""
+    return load_manifest().get('max_register_id', 0)
+
+def archive_file_path(key):
+    """คืนพาธของไฟล์ archive ของภาคเรียน"""
+    return os.path.join(SEGMENT_DIR, f"registration_{key}.rseg")
+
+# -----------------------------
+# เขียน/อ่านไฟล์ archive
+# -----------------------------
+def record_fields(record_data):
+    """คืน (ID, เวลา) ของ record ไบนารี"""
+    unpacked = struct.unpack(REGISTRATION_RECORD_FORMAT, record_data)
+    return unpacked[0], unpacked[3]
+
+@metrics.timed('storage_operation_seconds', op='archive_write', file='segments')
+def write_archive(path, records, codec='zlib', block_records=ARCHIVE_BLOCK_RECORDS):
+    """เขียน record ไบนารี (เรียงตาม ID แล้ว) ลงไฟล์ archive แบบแบ่ง block คืนจำนวนไบต์ที่เขียน"""
+    codec_id, compress, _ = CODECS[codec]
+    entries = []
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack(ARCHIVE_HEADER_FORMAT, ARCHIVE_MAGIC, codec_id, block_records))
+        for start in range(0, len(records), block_records):
+            block = records[start:start + block_records]
+            fields = [record_fields(r) for r in block]
+            payload = compress(b''.join(block))
+            entries.append((f.tell(), len(payload), len(block), fields[0][0], fields[-1][0],
+                            min(ts for _, ts in fields), max(ts for _, ts in fields)))
+            f.write(payload)
+        index_offset = f.tell()
+        for entry in entries:
+            f.write(struct.pack(BLOCK_ENTRY_FORMAT, *entry))
+        f.write(struct.pack(ARCHIVE_TRAILER_FORMAT, index_offset, len(entries), ARCHIVE_MAGIC))
+        size = f.tell()
+    os.replace(tmp_path, path)
+    metrics.record_write('segments', size)
+    return size
+
+def read_archive_index(path):
+    """อ่าน header และตารางดัชนี block ของไฟล์ archive คืนค่า (ชื่อ codec, รายการ block)"""
+    with open(path, 'rb') as f:
+        magic, codec_id, _ = struct.unpack(ARCHIVE_HEADER_FORMAT, f.read(ARCHIVE_HEADER_SIZE))
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f"ไฟล์ {path} ไม่ใช่ archive การลงทะเบียน")
+        f.seek(-ARCHIVE_TRAILER_SIZE, os.SEEK_END)
+        index_offset, block_count, trailer_magic = struct.unpack(ARCHIVE_TRAILER_FORMAT,
+                                                                 f.read(ARCHIVE_TRAILER_SIZE))
+        if trailer_magic != ARCHIVE_MAGIC:
+            raise ValueError(f"ไฟล์ {path} ไม่สมบูรณ์")
+        f.seek(index_offset)
+        table = f.read(block_count * BLOCK_ENTRY_SIZE)
+    blocks = [dict(zip(('offset', 'length', 'records', 'first_id', 'last_id', 'min_ts', 'max_ts'), entry))
+              for entry in struct.iter_unpack(BLOCK_ENTRY_FORMAT, table)]
+    return CODEC_NAMES[codec_id], blocks
+
+@trace.traced('read archive blocks', cat='storage')
+@metrics.timed('storage_operation_seconds', op='archive_read', file='segments')
+def read_archive_blocks(path, block_filter=None):
+    """คืน record ไบนารีจาก block ที่ block_filter(block) เป็นจริง (ทุก block หากไม่ระบุ)"""
+    codec, blocks = read_archive_index(path)
+    decompress = CODECS[codec][2]
+    records = []
+    with open(path, 'rb') as f:
+        for block in blocks:
+            if block_filter is not None and not block_filter(block):
+                continue
+            f.seek(block['offset'])
+            data = decompress(f.read(block['length']))
+            metrics.record_read('segments', block['length'], block['records'])
+            records.extend(data[pos:pos + REGISTRATION_RECORD_SIZE]
+                           for pos in range(0, len(data), REGISTRATION_RECORD_SIZE))
+    return records
+
+# -----------------------------
+# จัดเก็บภาคเรียนที่ปิดแล้ว
+# -----------------------------
+def summarize_hot_terms(partition_by='course', file_path=REGISTRATION_FILE_PATH):
+    """คืน dict คีย์ภาคเรียน -> จำนวน record ที่ยังอยู่ใน registration.bin (รวมการเขียนที่ค้างในโหมด LSM)"""
+    resolve = make_term_resolver(partition_by)
+    latest = lsm.overlay() if lsm.has_pending() else {}
+    counts = {}
+    data = b''
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+    # record ที่มีรุ่นใหม่กว่าใน LSM นับจากรุ่นใหม่แทน
+    base = (unpacked for unpacked in struct.iter_unpack(REGISTRATION_RECORD_FORMAT, data[:usable])
+            if unpacked[0] not in latest)
+    pending = (struct.unpack(REGISTRATION_RECORD_FORMAT, record_data)
+               for record_data in latest.values() if not lsm.is_tombstone(record_data))
+    for unpacked in chain(base, pending):
+        course_id = unpacked[2].strip(b'\x00').decode('utf-8', errors='replace')
+        key = resolve(course_id, unpacked[3])
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+@trace.traced('archive terms', cat='storage')
+def archive_terms(term_keys, partition_by='course', codec='zlib', file_path=REGISTRATION_FILE_PATH):
+    """ย้าย record ของภาคเรียนที่ระบุออกจาก registration.bin ไปเก็บใน archive ที่บีบอัดแล้ว
+
+    หากภาคเรียนนั้นมี archive อยู่แล้วจะรวม record เดิมกับใหม่ คืน dict คีย์ภาคเรียน -> จำนวนที่ย้าย
+    """
+    # ถือล็อกการเขียนตลอด archive และไฟล์หลักจึงเปลี่ยนพร้อมกันในมุมมองของ snapshot
+    with writing(file_path, copy_on_write=False):
+        return _archive_terms_locked(set(term_keys), partition_by, codec, file_path)
+
+def write_term_archive(key, records, codec, partition_by):
+    """เขียน archive ของภาคเรียนจาก record ที่เรียงตาม ID แล้ว คืนข้อมูลของภาคเรียนสำหรับ manifest"""
+    path = archive_file_path(key)
+    size = write_archive(path, records, codec)
+    ids = [record_fields(r)[0] for r in records]
+    timestamps = [record_fields(r)[1] for r in records]
+    return {
+        'file': os.path.basename(path),
+        'codec': codec,
+        'records': len(records),
+        'bytes': size,
+        'first_id': ids[0],
+        'last_id': ids[-1],
+        'min_ts': min(timestamps),
+        'max_ts': max(timestamps),
+        'partition_by': partition_by
+    }
+
+def _archive_terms_locked(term_keys, partition_by, codec, file_path):
+    if lsm.has_pending():
+        lsm.merge_into_base(file_path)
+    resolve = make_term_resolver(partition_by)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+
+    hot = []
+    moved = {}
+    for pos in range(0, usable, REGISTRATION_RECORD_SIZE):
+        record_data = data[pos:pos + REGISTRATION_RECORD_SIZE]
+        unpacked = struct.unpack(REGISTRATION_RECORD_FORMAT, record_data)
+        course_id = unpacked[2].strip(b'\x00').decode('utf-8', errors='replace')
+        key = resolve(course_id, unpacked[3])
+        if key in term_keys:
+            moved.setdefault(key, []).append(record_data)
+        else:
+            hot.append(record_data)
+    if not moved:
+        return {}
+
+    # เขียน archive ให้เสร็จก่อน แล้วจึงตัด record ออกจากไฟล์หลัก
+    os.makedirs(SEGMENT_DIR, exist_ok=True)
+    manifest = load_manifest()
+    for key, records in moved.items():
+        path = archive_file_path(key)
+        if os.path.exists(path):
+            records = read_archive_blocks(path) + records
+        records.sort(key=lambda r: record_fields(r)[0])
+        manifest['terms'][key] = write_term_archive(key, records, codec, partition_by)
+        manifest['max_register_id'] = max(manifest.get('max_register_id', 0), manifest['terms'][key]['last_id'])
+    save_manifest(manifest)
+
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(hot))
+        f.write(data[usable:])
+    os.replace(tmp_path, file_path)
+    bump_generation(file_path)
+    return {key: len(records) for key, records in moved.items()}
+
+# -----------------------------
+# อ่านข้อมูลที่จัดเก็บแล้ว
+# -----------------------------
+def list_archived_terms():
+    """คืนรายการ (คีย์ภาคเรียน, ข้อมูล) ของภาคเรียนที่จัดเก็บแล้ว เรียงตามภาคเรียน"""
+    terms = load_manifest()['terms']
+    return sorted(terms.items(), key=lambda item: parse_term_key(item[0]) or (0, 0))
+
+def read_archived_term(key, start_ts=None, end_ts=None):
+    """คืน record ไบนารีของภาคเรียนที่จัดเก็บแล้ว (กรองช่วงเวลา [start_ts, end_ts) ได้)
+
+    คลายบีบอัดเฉพาะ block ที่ช่วงเวลาทับกับช่วงที่ขอ
+    """
+    path = archive_file_path(key)
+    if not os.path.exists(path):
+        return []
+
+    def overlaps(block):
+        if start_ts is not None and block['max_ts'] < start_ts:
+            return False
+        if end_ts is not None and block['min_ts'] >= end_ts:
+            return False
+        return True
+
+    records = read_archive_blocks(path, overlaps)
+    if start_ts is None and end_ts is None:
+        return records
+    return [r for r in records
+            if (start_ts is None or record_fields(r)[1] >= start_ts)
+            and (end_ts is None or record_fields(r)[1] < end_ts)]
+
+def find_archived_dependents(kind, key):
+    """คืน dict คีย์ภาคเรียน -> record ไบนารีใน archive ที่อ้างถึงนักเรียน (kind='student') หรือรายวิชา (kind='course')"""
+    field = 1 if kind == 'student' else 2
+    encoded = key.encode('utf-8')
+    dependents = {}
+    for term_key, _ in list_archived_terms():
+        records = [record_data for record_data in read_archived_term(term_key)
+                   if struct.unpack(REGISTRATION_RECORD_FORMAT, record_data)[field].strip(b'\x00') == encoded]
+        if records:
+            dependents[term_key] = records
+    return dependents
+
+def delete_archived_records(term_records):
+    """ลบ record ที่ระบุ (dict คีย์ภาคเรียน -> record ไบนารี) ออกจาก archive โดยเขียน archive ของภาคเรียนนั้นใหม่
+
+    archive ที่ไม่เหลือ record ถูกลบทั้งไฟล์ ID สูงสุดใน manifest คงเดิมเพื่อไม่ให้ ID ถูกใช้ซ้ำ คืนจำนวน record ที่ลบ
+    """
+    removed = 0
+    with writing(MANIFEST_FILE_PATH, copy_on_write=False):
+        manifest = load_manifest()
+        for key, records in term_records.items():
+            info = manifest['terms'].get(key)
+            path = archive_file_path(key)
+            if info is None or not os.path.exists(path):
+                continue
+            doomed = {record_fields(r)[0] for r in records}
+            current = read_archive_blocks(path)
+            remaining = [r for r in current if record_fields(r)[0] not in doomed]
+            removed += len(current) - len(remaining)
+            if remaining:
+                manifest['terms'][key] = write_term_archive(key, remaining, info['codec'], info['partition_by'])
+            else:
+                os.remove(path)
+                del manifest['terms'][key]
+        save_manifest(manifest)
+    return removed
+
+def find_archived_registration(register_id):
+    """หา record ไบนารีของ ID การลงทะเบียนใน archive (คลายบีบอัดเพียง block เดียว) หรือ None"""
+    for key, info in list_archived_terms():
+        if not info['first_id'] <= register_id <= info['last_id']:
+            continue
+        records = read_archive_blocks(archive_file_path(key),
+                                      lambda block: block['first_id'] <= register_id <= block['last_id'])
+        for record_data in records:
+            if record_fields(record_data)[0] == register_id:
+                return record_data
+    return None
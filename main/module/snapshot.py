@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import shutil
+from datetime import datetime
+from module.cache import write_lock, file_generation
+from module import metrics, trace, lsm, report, compact_layout
+
+# -----------------------------
+# Snapshot ข้อมูลขณะระบบทำงาน
+# -----------------------------
+# snapshot แต่ละชุดเป็นโฟลเดอร์ snapshots/gen_XXXXXX ที่มีเลข generation เพิ่มขึ้นเรื่อย ๆ
+# ไฟล์ข้อมูลถูก hardlink (ไม่คัดลอก) การสร้างจึงใช้เวลาเพียงไม่กี่มิลลิวินาที
+# ผู้เขียนไฟล์แบบ in-place จะแยกไฟล์ออกเป็น inode ใหม่ก่อนเขียน (ดู cache.writing) snapshot จึงไม่เปลี่ยนตาม
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+SNAPSHOT_DIR = os.path.join(main_dir, 'snapshots')
+SNAPSHOT_INFO_NAME = 'snapshot.json'
+
+# ไฟล์ตารางข้อมูลที่อยู่ใน main/
+DATA_FILES = ('student.bin', 'CourseSubject.bin', 'registration.bin', 'course_capacity.bin', 'waitlist.bin')
+
+# โฟลเดอร์ที่ทุกไฟล์ถูกเขียนใหม่แล้ว os.replace เท่านั้น (ไม่แก้ไขไฟล์เดิม) จึง hardlink ได้ทั้งโฟลเดอร์
+LINKED_DIRS = ('index', 'segments')
+
+def snapshot_path(generation):
+    return os.path.join(SNAPSHOT_DIR, f"gen_{generation:06d}")
+
+def link_or_copy(src, dst):
+    """สร้าง hardlink หากระบบไฟล์รองรับ ไม่เช่นนั้นคัดลอกไฟล์"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def load_snapshot_info(path):
+    """อ่านข้อมูลของ snapshot จาก snapshot.json หรือ None หากไม่ใช่ snapshot ที่สมบูรณ์"""
+    try:
+        with open(os.path.join(path, SNAPSHOT_INFO_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+def list_snapshots():
+    """คืนรายการข้อมูล snapshot ที่สมบูรณ์ เรียงตาม generation"""
+    snapshots = []
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return snapshots
+    for name in sorted(os.listdir(SNAPSHOT_DIR)):
+        if not name.startswith('gen_') or name.endswith('.tmp'):
+            continue
+        info = load_snapshot_info(os.path.join(SNAPSHOT_DIR, name))
+        if info is not None:
+            snapshots.append(info)
+    return snapshots
+
+def next_generation():
+    """คืนเลข generation ถัดไป (นับรวมโฟลเดอร์ที่สร้างไม่สำเร็จ เพื่อไม่ให้เลขซ้ำ)"""
+    generations = [0]
+    if os.path.isdir(SNAPSHOT_DIR):
+        for name in os.listdir(SNAPSHOT_DIR):
+            if name.startswith('gen_'):
+                try:
+                    generations.append(int(name[4:10]))
+                except ValueError:
+                    pass
+    return max(generations) + 1
+
+# -----------------------------
+# สร้างและลบ snapshot
+# -----------------------------
+@trace.traced('create snapshot', cat='storage')
+@metrics.timed('storage_operation_seconds', op='snapshot', file='all')
+def create_snapshot():
+    """สร้าง snapshot ของทุกตาราง ดัชนี archive และการเขียนที่ค้างในโหมด LSM ณ จุดเวลาเดียวกัน
+
+    ถือล็อกการเขียนเฉพาะช่วงสร้าง hardlink คืนข้อมูลของ snapshot
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    generation = next_generation()
+    path = snapshot_path(generation)
+    tmp_path = path + '.tmp'
+    os.makedirs(tmp_path)
+
+    files = {}
+    start = time.perf_counter()
+    with write_lock():
+        for name in DATA_FILES:
+            src = os.path.join(main_dir, name)
+            if not os.path.exists(src):
+                continue
+            link_or_copy(src, os.path.join(tmp_path, name))
+            st = os.stat(src)
+            files[name] = {'bytes': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                           'generation': file_generation(src)}
+        for dir_name in LINKED_DIRS:
+            src_dir = os.path.join(main_dir, dir_name)
+            if not os.path.isdir(src_dir):
+                continue
+            os.makedirs(os.path.join(tmp_path, dir_name))
+            for name in os.listdir(src_dir):
+                if name.endswith('.tmp'):
+                    continue
+                link_or_copy(os.path.join(src_dir, name), os.path.join(tmp_path, dir_name, name))
+        lsm_segments, lsm_memtable = lsm.snapshot_into(os.path.join(tmp_path, 'lsm'), link_or_copy)
+    locked_ms = (time.perf_counter() - start) * 1000
+
+    info = {
+        'generation': generation,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'locked_ms': round(locked_ms, 3),
+        'files': files,
+        'lsm_segments': lsm_segments,
+        'lsm_memtable': lsm_memtable
+    }
+    with open(os.path.join(tmp_path, SNAPSHOT_INFO_NAME), 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    # เปลี่ยนชื่อโฟลเดอร์เมื่อเขียนครบแล้ว snapshot ที่สร้างไม่เสร็จจึงไม่ถูกนำไปใช้
+    os.rename(tmp_path, path)
+    return info
+
+def compact_snapshot(generation, version=2):
+    """แปลงไฟล์นักเรียนและการลงทะเบียนของ snapshot เป็นรูปแบบ v2 (หรือกลับเป็น v1)
+
+    ไฟล์ถูกเขียนใหม่แล้ว os.replace จึงไม่กระทบไฟล์ข้อมูลปัจจุบันที่ใช้ inode เดิม คืน dict ชื่อไฟล์ -> (ขนาดเดิม, ขนาดใหม่)
+    """
+    path = snapshot_path(generation)
+    info = load_snapshot_info(path)
+    if info is None:
+        return None
+    sizes = {}
+    for name in compact_layout.FILE_KINDS:
+        file_path = os.path.join(path, name)
+        if os.path.exists(file_path):
+            sizes[name] = compact_layout.convert_file(file_path, version)
+            info['files'][name]['bytes'] = sizes[name][1]
+    info['layout'] = version
+    tmp_path = os.path.join(path, SNAPSHOT_INFO_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(path, SNAPSHOT_INFO_NAME))
+    return sizes
+
+def delete_snapshot(generation):
+    """ลบ snapshot (ไฟล์ข้อมูลปัจจุบันไม่ได้รับผลกระทบ) คืนค่า True หากลบสำเร็จ"""
+    path = snapshot_path(generation)
+    if load_snapshot_info(path) is None:
+        return False
+    shutil.rmtree(path)
+    return True
+
+# -----------------------------
+# รายงานจาก snapshot
+# -----------------------------
+def load_snapshot_data(generation):
+    """คืน (การลงทะเบียน, รายวิชา, นักเรียน) ของ snapshot ในรูปแบบเดียวกับ module.report"""
+    path = snapshot_path(generation)
+    students = report.read_students_from_disk(os.path.join(path, report.STUDENT_FILE_NAME))
+    courses = {c['course_id']: c for c in report.read_courses_from_disk(os.path.join(path, report.COURSE_FILE_NAME))}
+    registrations = report.read_registrations_from_disk(os.path.join(path, report.REGISTER_FILE_NAME))
+    latest = lsm.read_overlay_dir(os.path.join(path, 'lsm'))
+    if latest:
+        registrations = lsm.apply_overlay(registrations, latest, report.read_register_record, 'REGISTER ID')
+    return registrations, courses, students
+
+def generate_snapshot_report(generation):
+    """สร้างรายงานนักเรียนและการลงทะเบียนจาก snapshot โดยบันทึกรายงานไว้ในโฟลเดอร์ของ snapshot"""
+    path = snapshot_path(generation)
+    with trace.span('snapshot report', cat='report', generation=generation):
+        registrations, courses, students = load_snapshot_data(generation)
+        if students:
+            report.write_report(report.print_student_report(students),
+                                os.path.join(path, os.path.basename(report.REPORT_STUDENT_FILE_PATH)))
+        else:
+            print("ไม่พบนักศึกษา")
+        if registrations:
+            # ดัชนีเวลาเป็นของข้อมูลปัจจุบัน จึงให้นับวันที่จาก record ของ snapshot
+            report.write_report(report.print_register_report(registrations, courses, students, None),
+                                os.path.join(path, os.path.basename(report.REPORT_REGISTER_FILE_PATH)))
+        else:
+            print("ไม่พบข้อมูลการลงทะเบียน")
+
+# -----------------------------
+# เมนู
+# -----------------------------
+def print_snapshot_list(snapshots):
+    print(f"{'GEN':<6} | {'CREATED':<20} | {'LOCK (ms)':<10} | FILES")
+    print("-" * 70)
+    for info in snapshots:
+        files = ", ".join(f"{name} {meta['bytes']:,}B" for name, meta in info['files'].items())
+        print(f"{info['generation']:<6} | {info['created']:<20} | {info['locked_ms']:<10} | {files}")
+
+def input_generation(snapshots):
+    """ให้ผู้ใช้เลือก generation ของ snapshot คืนเลข generation หรือ None"""
+    if not snapshots:
+        print("ยังไม่มี snapshot")
+        return None
+    print_snapshot_list(snapshots)
+    latest = snapshots[-1]['generation']
+    text = input(f"ป้อนเลข generation (Enter = {latest}): ").strip()
+    try:
+        generation = int(text) if text else latest
+    except ValueError:
+        print("เลข generation ไม่ถูกต้อง")
+        return None
+    if generation not in {info['generation'] for info in snapshots}:
+        print(f"ไม่พบ snapshot generation {generation}")
+        return None
+    return generation
+
+def snapshot_menu():
+    """เมนูสำรองข้อมูลด้วย snapshot"""
+    while True:
+        print("\n===== สำรองข้อมูล (snapshot) =====")
+        print("1. สร้าง snapshot")
+        print("2. ดูรายการ snapshot")
+        print("3. สร้างรายงานจาก snapshot")
+        print("4. ลบ snapshot")
+        print("5. บีบอัด snapshot เป็นรูปแบบ v2")
+        print("0. กลับสู่เมนูหลัก")
+
+        choice = input("กรุณาเลือกเมนู: ")
+
+        if choice == '1':
+            try:
+                info = create_snapshot()
+            except (IOError, OSError) as e:
+                print(f"เกิดข้อผิดพลาดในการสร้าง snapshot: {e}")
+                continue
+            print(f"✅ สร้าง snapshot generation {info['generation']} สำเร็จ "
+                  f"(หยุดการเขียน {info['locked_ms']} ms) ที่ {snapshot_path(info['generation'])}")
+        elif choice == '2':
+            snapshots = list_snapshots()
+            if snapshots:
+                print_snapshot_list(snapshots)
+            else:
+                print("ยังไม่มี snapshot")
+        elif choice == '3':
+            generation = input_generation(list_snapshots())
+            if generation is not None:
+                try:
+                    generate_snapshot_report(generation)
+                except (IOError, OSError) as e:
+                    print(f"เกิดข้อผิดพลาดในการอ่าน snapshot: {e}")
+        elif choice == '4':
+            generation = input_generation(list_snapshots())
+            if generation is not None and delete_snapshot(generation):
+                print(f"ลบ snapshot generation {generation} สำเร็จ!")
+        elif choice == '5':
+            generation = input_generation(list_snapshots())
+            if generation is None:
+                continue
+            try:
+                sizes = compact_snapshot(generation)
+            except (IOError, OSError, ValueError) as e:
+                print(f"เกิดข้อผิดพลาดในการแปลง snapshot: {e}")
+                continue
+            for name, (old_size, new_size) in sizes.items():
+                print(f"- {name}: {old_size:,} -> {new_size:,} ไบต์")
+            print(f"✅ แปลง snapshot generation {generation} เป็นรูปแบบ v2 สำเร็จ!")
+        elif choice == '0':
+            break
+        else:
+            print("ตัวเลือกไม่ถูกต้อง กรุณาลองใหม่อีกครั้ง")
@@ -0,0 +1,302 @@
+import os
+import sqlite3
+from datetime import datetime
+from module import metrics
+from module.storage_backend import status_code
+
+# -----------------------------
+# Backend SQLite (sqlite3 ของ Python, WAL mode)
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+SQLITE_FILE_PATH = os.environ.get('COMPRO_SQLITE_PATH', os.path.join(main_dir, 'compro.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    major TEXT NOT NULL,
+    year_level INTEGER NOT NULL,
+    status INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS courses (
+    course_id TEXT PRIMARY KEY,
+    course_name TEXT NOT NULL,
+    credit INTEGER NOT NULL,
+    academic_year INTEGER NOT NULL,
+    semester INTEGER NOT NULL,
+    is_active INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registrations (
+    register_id INTEGER PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    course_id TEXT NOT NULL,
+    registration_date REAL NOT NULL,
+    status INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_students_major_year ON students (major, year_level);
+CREATE INDEX IF NOT EXISTS idx_courses_term ON courses (academic_year, semester, is_active);
+CREATE INDEX IF NOT EXISTS idx_registrations_student ON registrations (student_id);
+CREATE INDEX IF NOT EXISTS idx_registrations_course ON registrations (course_id, status);
+CREATE INDEX IF NOT EXISTS idx_registrations_status ON registrations (status);
+CREATE INDEX IF NOT EXISTS idx_registrations_date ON registrations (registration_date);
+"""
+
+# path -> sqlite3.Connection
+_connections = {}
+
+def get_connection(db_path=None):
+    """เปิด (หรือคืน) การเชื่อมต่อฐานข้อมูล พร้อมสร้างตารางและดัชนีหากยังไม่มี"""
+    db_path = db_path or SQLITE_FILE_PATH
+    conn = _connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _connections[db_path] = conn
+    return conn
+
+def close(db_path=None):
+    """ปิดการเชื่อมต่อฐานข้อมูล (ทั้งหมดหากไม่ระบุ path)"""
+    paths = [db_path] if db_path else list(_connections)
+    for path in paths:
+        conn = _connections.pop(path, None)
+        if conn is not None:
+            conn.close()
+
+def execute_write(sql, params=()):
+    """รันคำสั่งแก้ไขข้อมูลในทรานแซกชันเดียว คืนจำนวนแถวที่เปลี่ยน"""
+    conn = get_connection()
+    try:
+        with metrics.timer('storage_operation_seconds', op='sql_write', file='sqlite'):
+            with conn:
+                return conn.execute(sql, params).rowcount
+    except sqlite3.Error as e:
+        print(f"เกิดข้อผิดพลาดในการเขียนฐานข้อมูล: {e}")
+        return 0
+
+def query(sql, params=()):
+    """รันคำสั่ง SELECT คืนรายการแถว"""
+    with metrics.timer('storage_operation_seconds', op='sql_read', file='sqlite'):
+        return get_connection().execute(sql, params).fetchall()
+
+# -----------------------------
+# แปลงแถวเป็น dict รูปแบบเดียวกับ backend .bin
+# -----------------------------
+STUDENT_COLUMNS = "student_id, first_name, last_name, major, year_level, status"
+COURSE_COLUMNS = "course_id, course_name, credit, academic_year, semester, is_active"
+REGISTRATION_COLUMNS = "register_id, student_id, course_id, registration_date, status"
+
+def student_from_row(row):
+    return {
+        'STUDENT ID': row[0],
+        'FIRST NAME': row[1],
+        'LAST NAME': row[2],
+        'MAJOR': row[3],
+        'YEAR': row[4],
+        'STATUS': 'Active' if row[5] == 1 else 'Inactive'
+    }
+
+def course_from_row(row):
+    return {
+        'COURSE ID': row[0],
+        'COURSE NAME': row[1],
+        'CREDIT': row[2],
+        'ACADEMIC YEAR': row[3],
+        'SEMESTER': row[4],
+        'STATUS': 'Active' if row[5] == 1 else 'Inactive'
+    }
+
+def registration_from_row(row):
+    return {
+        'ID': row[0],
+        'STUDENT ID': row[1],
+        'COURSE ID': row[2],
+        'REGISTRATION DATE': datetime.fromtimestamp(row[3]),
+        'STATUS': 'Registered' if row[4] == 1 else 'Dropped'
+    }
+
+def student_params(record):
+    return (record['STUDENT ID'], record['FIRST NAME'], record['LAST NAME'],
+            record['MAJOR'], record['YEAR'], status_code(record['STATUS']))
+
+def course_params(record):
+    return (record['COURSE ID'], record['COURSE NAME'], record['CREDIT'],
+            record['ACADEMIC YEAR'], record['SEMESTER'], status_code(record['STATUS']))
+
+# -----------------------------
+# นักเรียน
+# -----------------------------
+def list_students():
+    return [student_from_row(row) for row in query(f"SELECT {STUDENT_COLUMNS} FROM students ORDER BY rowid")]
+
+def get_student(student_id):
+    rows = query(f"SELECT {STUDENT_COLUMNS} FROM students WHERE student_id = ?", (student_id,))
+    return student_from_row(rows[0]) if rows else None
+
+def add_student(record):
+    return execute_write(f"INSERT INTO students ({STUDENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                         student_params(record)) == 1
+
+def update_student(student_id, changes):
+    record = get_student(student_id)
+    if record is None:
+        return False
+    record.update(changes)
+    return execute_write(
+        "UPDATE students SET student_id = ?, first_name = ?, last_name = ?, major = ?, year_level = ?, status = ? "
+        "WHERE student_id = ?", student_params(record) + (student_id,)) == 1
+
+def delete_student(student_id):
+    return execute_write("DELETE FROM students WHERE student_id = ?", (student_id,)) == 1
+
+# -----------------------------
+# รายวิชา
+# -----------------------------
+def list_courses():
+    return [course_from_row(row) for row in query(f"SELECT {COURSE_COLUMNS} FROM courses ORDER BY rowid")]
+
+def get_course(course_id):
+    rows = query(f"SELECT {COURSE_COLUMNS} FROM courses WHERE course_id = ?", (course_id,))
+    return course_from_row(rows[0]) if rows else None
+
+def add_course(record):
+    return execute_write(f"INSERT INTO courses ({COURSE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                         course_params(record)) == 1
+
+def update_course(course_id, changes):
+    record = get_course(course_id)
+    if record is None:
+        return False
+    record.update(changes)
+    return execute_write(
+        "UPDATE courses SET course_id = ?, course_name = ?, credit = ?, academic_year = ?, semester = ?, is_active = ? "
+        "WHERE course_id = ?", course_params(record) + (course_id,)) == 1
+
+def delete_course(course_id):
+    return execute_write("DELETE FROM courses WHERE course_id = ?", (course_id,)) == 1
+
+# -----------------------------
+# การลงทะเบียน
+# -----------------------------
+def list_registrations():
+    return [registration_from_row(row)
+            for row in query(f"SELECT {REGISTRATION_COLUMNS} FROM registrations ORDER BY register_id")]
+
+def get_registration(register_id):
+    rows = query(f"SELECT {REGISTRATION_COLUMNS} FROM registrations WHERE register_id = ?", (register_id,))
+    return registration_from_row(rows[0]) if rows else None
+
+def add_registration(student_id, course_id, status, registration_date=None):
+    """เพิ่มการลงทะเบียนใหม่ คืน ID ใหม่ (ต่อจาก ID สูงสุด เหมือน backend .bin) หรือ None"""
+    if registration_date is None:
+        registration_date = datetime.now().timestamp()
+    conn = get_connection()
+    try:
+        with metrics.timer('storage_operation_seconds', op='sql_write', file='sqlite'):
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO registrations (register_id, student_id, course_id, registration_date, status) "
+                    "VALUES ((SELECT COALESCE(MAX(register_id), 0) + 1 FROM registrations), ?, ?, ?, ?)",
+                    (student_id, course_id, registration_date, status))
+        return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"เกิดข้อผิดพลาดในการเขียนฐานข้อมูล: {e}")
+        return None
+
+def set_registration_status(register_id, status):
+    return execute_write("UPDATE registrations SET status = ? WHERE register_id = ?",
+                         (status, register_id)) == 1
+
+def delete_registration(register_id):
+    return execute_write("DELETE FROM registrations WHERE register_id = ?", (register_id,)) == 1
+
+def find_registrations(student_id=None, course_id=None, status=None, date_from=None, date_to=None):
+    """ค้นหาการลงทะเบียนตามเงื่อนไข ช่วงวันที่เป็น [date_from, date_to)"""
+    conditions = []
+    params = []
+    if student_id is not None:
+        conditions.append("student_id = ?")
+        params.append(student_id)
+    if course_id is not None:
+        conditions.append("course_id = ?")
+        params.append(course_id)
+    if status is not None:
+        conditions.append("status = ?")
+        params.append(status_code(status))
+    if date_from is not None:
+        conditions.append("registration_date >= ?")
+        params.append(date_from.timestamp() if isinstance(date_from, datetime) else date_from)
+    if date_to is not None:
+        conditions.append("registration_date < ?")
+        params.append(date_to.timestamp() if isinstance(date_to, datetime) else date_to)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = query(f"SELECT {REGISTRATION_COLUMNS} FROM registrations{where} ORDER BY register_id", params)
+    return [registration_from_row(row) for row in rows]
+
+def count_registrations_by_course():
+    counts = {}
+    rows = query("SELECT course_id, status, COUNT(*) FROM registrations GROUP BY course_id, status")
+    for course_id, status, count in rows:
+        bucket = counts.setdefault(course_id, {'registered': 0, 'dropped': 0})
+        bucket['registered' if status == 1 else 'dropped'] += count
+    return counts
+
+# -----------------------------
+# นำเข้าข้อมูลจำนวนมาก (ใช้ตอนย้ายข้อมูลจากไฟล์ .bin)
+# -----------------------------
+def import_records(students, courses, registrations, db_path=None, replace=False):
+    """นำเข้าข้อมูลทั้งสามตารางในทรานแซกชันเดียว
+
+    คืน dict ชื่อตาราง -> (จำนวนที่นำเข้า, จำนวนที่ข้ามเพราะคีย์ซ้ำ)
+    """
+    conn = get_connection(db_path)
+    result = {}
+    tables = [
+        ('students', STUDENT_COLUMNS, [student_params(r) for r in students]),
+        ('courses', COURSE_COLUMNS, [course_params(r) for r in courses]),
+        ('registrations', REGISTRATION_COLUMNS,
+         [(r['ID'], r['STUDENT ID'], r['COURSE ID'], r['REGISTRATION DATE'].timestamp(), status_code(r['STATUS']))
+          for r in registrations]),
+    ]
+    with conn:
+        for table, columns, rows in tables:
+            if replace:
+                conn.execute(f"DELETE FROM {table}")
+            before = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            placeholders = ", ".join("?" * len(rows[0])) if rows else ""
+            if rows:
+                conn.executemany(f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({placeholders})", rows)
+            after = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            result[table] = (after - before, len(rows) - (after - before))
+    return result
+
+def count_rows(db_path=None):
+    """คืนจำนวนแถวของแต่ละตาราง"""
+    conn = get_connection(db_path)
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ('students', 'courses', 'registrations')}
+
+BACKEND = {
+    'name': 'sqlite',
+    'list_students': list_students,
+    'get_student': get_student,
+    'add_student': add_student,
+    'update_student': update_student,
+    'delete_student': delete_student,
+    'list_courses': list_courses,
+    'get_course': get_course,
+    'add_course': add_course,
+    'update_course': update_course,
+    'delete_course': delete_course,
+    'list_registrations': list_registrations,
+    'get_registration': get_registration,
+    'add_registration': add_registration,
+    'set_registration_status': set_registration_status,
+    'delete_registration': delete_registration,
+    'find_registrations': find_registrations,
+    'count_registrations_by_course': count_registrations_by_course,
+    'close': close,
+}
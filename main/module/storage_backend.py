@@ -0,0 +1,41 @@
+from importlib import import_module
+
+# -----------------------------
+# เลือก storage backend
+# -----------------------------
+# แต่ละ backend คือ dict ชื่อคำสั่ง -> ฟังก์ชัน ที่มีคำสั่งชุดเดียวกัน (ดู BACKEND_OPERATIONS)
+# ใช้เปรียบเทียบ backend ด้วยชุดงานเดียวกัน (benchmark_backends.py)
+# เมนูและรายงานของโปรแกรมอ่าน/เขียนไฟล์ .bin โดยตรงเสมอ (ดัชนี, LSM, CDC และคิวรอผูกกับไฟล์ .bin)
+# backend SQLite จึงเป็นปลายทางของการย้ายข้อมูล (migrate_to_sqlite.py) และการเปรียบเทียบเท่านั้น ไม่บันทึก CDC event
+
+BACKEND_MODULES = {
+    'bin': 'module.bin_backend',
+    'sqlite': 'module.sqlite_backend',
+}
+
+# คำสั่งที่ทุก backend ต้องมี
+# record ใช้รูปแบบ dict เดียวกับ read_all_records_from_file ของ student.py, course.py และ register.py
+BACKEND_OPERATIONS = (
+    'list_students', 'get_student', 'add_student', 'update_student', 'delete_student',
+    'list_courses', 'get_course', 'add_course', 'update_course', 'delete_course',
+    'list_registrations', 'get_registration', 'add_registration',
+    'set_registration_status', 'delete_registration',
+    'find_registrations', 'count_registrations_by_course', 'close',
+)
+
+def get_backend(name):
+    """คืนตารางฟังก์ชันของ backend ตามชื่อ ('bin' หรือ 'sqlite')"""
+    name = name.lower()
+    if name not in BACKEND_MODULES:
+        raise ValueError(f"ไม่รู้จัก storage backend '{name}' (ใช้ได้: {', '.join(BACKEND_MODULES)})")
+    backend = import_module(BACKEND_MODULES[name]).BACKEND
+    missing = [op for op in BACKEND_OPERATIONS if op not in backend]
+    if missing:
+        raise ValueError(f"backend '{name}' ไม่มีคำสั่ง: {', '.join(missing)}")
+    return backend
+
+def status_code(status):
+    """แปลงสถานะข้อความ (Active/Registered) หรือตัวเลขเป็น 1/0"""
+    if isinstance(status, str):
+        return 1 if status in ('Active', 'Registered') else 0
+    return 1 if status == 1 else 0
@@ -1,5 +1,13 @@
 import struct
 import os
+from module.cache import get_cached_records, bump_generation, writing
+from module import metrics, trace
+from module.search import search_students, index_appended_student
+from module.bitmap_index import record_student_bitmaps, filter_students, bitmap_offsets
+from module.integrity import resolve_dependent_registrations
+from module.external_sort import sort_records
+from module.bulk_import import import_menu
+from itertools import islice
 
 # ชื่อไฟล์สำหรับจัดเก็บข้อมูลนักเรียน
 STUDENT_FILE_NAME = 'student.bin'
@@ -54,15 +62,24 @@ def read_student_record(record_data):
         print(f"เกิดข้อผิดพลาดในการอันแพ็คข้อมูล: {e}")
         return None
 
+@metrics.timed('storage_operation_seconds', op='record_write', file='student.bin')
 def write_record_to_file(record, file_path=STUDENT_FILE_PATH):
     """เขียนบันทึกข้อมูลลงในไฟล์ไบนารี"""
     try:
-        with open(file_path, 'ab') as f:
+        with writing(file_path), open(file_path, 'ab') as f:
             f.write(record)
+        bump_generation(file_path)
+        metrics.record_write('student.bin', len(record))
     except IOError as e:
         print(f"เกิดข้อผิดพลาดในการเขียนไฟล์: {e}")
 
 def read_all_records_from_file(file_path=STUDENT_FILE_PATH):
+    """อ่านบันทึกข้อมูลทั้งหมด (ผ่านแคช อ่านดิสก์ใหม่เฉพาะเมื่อไฟล์เปลี่ยน)"""
+    return get_cached_records(file_path, 'student', read_records_from_disk)
+
+@trace.traced('full scan student.bin', cat='storage')
+@metrics.timed('storage_operation_seconds', op='full_scan', file='student.bin')
+def read_records_from_disk(file_path=STUDENT_FILE_PATH):
     """อ่านบันทึกข้อมูลทั้งหมดจากไฟล์ไบนารี"""
     records = []
     try:
@@ -76,10 +93,55 @@ def read_all_records_from_file(file_path=STUDENT_FILE_PATH):
                 record = read_student_record(record_data)
                 if record:
                     records.append(record)
+            metrics.record_read('student.bin', f.tell(), len(records))
     except IOError as e:
         print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
     return records
 
+@metrics.timed('storage_operation_seconds', op='record_read', file='student.bin')
+def read_student_at(offset, file_path=STUDENT_FILE_PATH):
+    """อ่านบันทึกข้อมูลนักเรียนหนึ่งรายการจากตำแหน่ง (offset) ในไฟล์"""
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            record_data = f.read(STUDENT_RECORD_SIZE)
+        if len(record_data) != STUDENT_RECORD_SIZE:
+            return None
+        return read_student_record(record_data)
+    except (IOError, UnicodeDecodeError) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
+        return None
+
+def read_students_at(offsets, file_path=STUDENT_FILE_PATH):
+    """อ่านบันทึกข้อมูลนักเรียนเฉพาะตำแหน่งที่ระบุ (เปิดไฟล์ครั้งเดียว)"""
+    records = []
+    try:
+        with open(file_path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                record_data = f.read(STUDENT_RECORD_SIZE)
+                if len(record_data) != STUDENT_RECORD_SIZE:
+                    continue
+                record = read_student_record(record_data)
+                if record:
+                    records.append(record)
+    except (IOError, UnicodeDecodeError) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์: {e}")
+    return records
+
+@metrics.timed('storage_operation_seconds', op='rewrite', file='student.bin')
+def rewrite_student_file(records, file_path=STUDENT_FILE_PATH):
+    """เขียนไฟล์นักเรียนใหม่ทั้งไฟล์จากรายการ record ไบนารี (เปิดไฟล์ครั้งเดียว)"""
+    with writing(file_path, copy_on_write=False):
+        # ลบไฟล์เดิมก่อน ไฟล์ใหม่จึงไม่ใช้ inode ร่วมกับ snapshot
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        with open(file_path, 'wb') as f:
+            for record in records:
+                f.write(record)
+        bump_generation(file_path)
+    metrics.record_write('student.bin', len(records) * STUDENT_RECORD_SIZE)
+
 def print_student_report(records, title="รายงานนักศึกษา"):
     """แสดงรายงานนักศึกษาในรูปแบบตาราง"""
     report = ""
@@ -122,6 +184,8 @@ def add_student():
     record = create_student_record(student_id, first_name, last_name, major, year_level, status)
     if record:
         write_record_to_file(record)
+        index_appended_student(first_name, last_name)
+        record_student_bitmaps(record)
         print("เพิ่มข้อมูลนักเรียนสำเร็จ!")
 
 def view_students():
@@ -132,6 +196,21 @@ def view_students():
         return
     print_student_report(students, title="รายงานนักศึกษา")
 
+def view_students_by_last_name():
+    """แสดงรายชื่อนักเรียนเรียงตามนามสกุล (external merge sort ตามลำดับพจนานุกรมไทย ไม่โหลดทั้งไฟล์มาเรียง)"""
+    text = input("จำนวนที่แสดง (Enter = ทั้งหมด): ").strip()
+    if text and not text.isdigit():
+        print("จำนวนไม่ถูกต้อง")
+        return
+    records = sort_records('student_last_name')
+    if text:
+        records = islice(records, int(text))
+    students = [s for s in (read_student_record(r) for r in records) if s]
+    if not students:
+        print("ไม่พบข้อมูลนักเรียนในระบบ")
+        return
+    print_student_report(students, title=f"รายชื่อนักศึกษาเรียงตามนามสกุล ({len(students)} คน)")
+
 def view_single_student():
     """แสดงข้อมูลนักเรียนรายบุคคลโดยค้นหาด้วยรหัสนักเรียน"""
     student_id_to_view = input("ป้อนรหัสนักเรียนที่ต้องการดู: ")
@@ -154,44 +233,81 @@ def view_single_student():
     if not found:
         print("ไม่พบรหัสนักเรียนที่ต้องการ")
 
+def search_students_by_name():
+    """ค้นหานักเรียนด้วยชื่อหรือนามสกุล (ขึ้นต้นด้วย หรือสะกดใกล้เคียง)"""
+    query = input("ป้อนชื่อหรือนามสกุลที่ต้องการค้นหา: ").strip()
+    if not query:
+        print("กรุณาป้อนคำค้นหา")
+        return
+
+    results = search_students(query)
+    students = []
+    for offset, _ in results:
+        student = read_student_at(offset)
+        if student:
+            students.append(student)
+
+    if not students:
+        print("ไม่พบนักเรียนที่ตรงกับคำค้นหา")
+        return
+
+    print_student_report(students, title=f"ผลการค้นหา \"{query}\" ({len(students)} รายการ)")
+
 def view_filtered_students():
-    """แสดงข้อมูลนักเรียนโดยกรองตามเงื่อนไข"""
+    """แสดงข้อมูลนักเรียนโดยกรองตามเงื่อนไข (planner ใช้ดัชนี bitmap แล้วอ่านเฉพาะ record ที่ตรง)"""
     print("\n--- กรองข้อมูลนักเรียน ---")
     print("เลือกเงื่อนไขการกรอง:")
     print("1. กรองตามสาขาวิชา")
     print("2. กรองตามชั้นปี")
     print("3. กรองตามสถานะ")
-    filter_choice = input("กรุณาเลือก (1-3): ")
+    print("4. กรองตามเงื่อนไขที่รวมกันด้วย and/or/not")
+    filter_choice = input("กรุณาเลือก (1-4): ")
 
-    students = read_all_records_from_file()
-    if not students:
+    if filter_choice == '4':
+        view_students_by_expression()
+        return
+    if filter_choice not in ('1', '2', '3'):
+        print("ตัวเลือกไม่ถูกต้อง")
+        return
+    if not os.path.exists(STUDENT_FILE_PATH):
         print("ไม่พบข้อมูลนักเรียนในระบบ")
         return
 
-    filtered_students = []
-    
+    # นำเข้าในฟังก์ชันเพราะ module.query นำเข้าโมดูลนี้
+    from module.query import new_query, where, show_query_result
+    query = new_query('student')
     if filter_choice == '1':
-        major_filter = input("ป้อนสาขาวิชาที่ต้องการกรอง: ")
-        filtered_students = [s for s in students if s and s['MAJOR'].lower() == major_filter.lower()]
+        where(query, 'major', '=', input("ป้อนสาขาวิชาที่ต้องการกรอง: "))
     elif filter_choice == '2':
         try:
-            year_filter = int(input("ป้อนชั้นปีที่ต้องการกรอง (1, 2, 3, 4, ...): "))
-            filtered_students = [s for s in students if s and s['YEAR'] == year_filter]
+            where(query, 'year', '=', int(input("ป้อนชั้นปีที่ต้องการกรอง (1, 2, 3, 4, ...): ")))
         except ValueError:
             print("กรุณาป้อนชั้นปีเป็นตัวเลข")
             return
-    elif filter_choice == '3':
-        status_filter = input("ป้อนสถานะที่ต้องการกรอง (Active/Inactive): ")
-        filtered_students = [s for s in students if s and s['STATUS'].lower() == status_filter.lower()]
     else:
-        print("ตัวเลือกไม่ถูกต้อง")
+        where(query, 'status', '=', input("ป้อนสถานะที่ต้องการกรอง (Active/Inactive): "))
+    show_query_result(query, print_student_report, "รายงานนักศึกษาที่กรอง", show_plan=False)
+
+def view_students_by_expression():
+    """แสดงข้อมูลนักเรียนตามเงื่อนไขที่รวมกันด้วย and/or/not (คำนวณจากดัชนี bitmap แล้วอ่านเฉพาะ record ที่ตรง)"""
+    print("ป้อนเงื่อนไขจาก major=สาขา, year=ชั้นปี, status=Active/Inactive รวมกันด้วย and, or, not และวงเล็บ")
+    print('ตัวอย่าง: major="computer science" and (year=1 or year=2) and status=active')
+    condition = input("เงื่อนไข: ").strip()
+    if not condition:
+        print("ไม่ได้ป้อนเงื่อนไข")
         return
 
-    if not filtered_students:
+    try:
+        bitmap, count = filter_students(condition)
+    except ValueError as e:
+        print(e)
+        return
+    if count == 0:
         print("ไม่พบข้อมูลนักเรียนที่ตรงกับเงื่อนไข")
         return
 
-    print_student_report(filtered_students, title="รายงานนักศึกษาที่กรอง")
+    filtered_students = read_students_at(bitmap_offsets(bitmap))
+    print_student_report(filtered_students, title=f"รายงานนักศึกษาที่กรอง ({count} คน)")
 
 def update_student():
     """แก้ไขข้อมูลนักเรียน"""
@@ -254,9 +370,7 @@ def update_student():
     
     if found:
         try:
-            os.remove(STUDENT_FILE_PATH)
-            for record in new_records:
-                write_record_to_file(record)
+            rewrite_student_file(new_records)
             print("แก้ไขข้อมูลสำเร็จ!")
         except IOError as e:
             print(f"เกิดข้อผิดพลาดในการแก้ไขไฟล์: {e}")
@@ -274,13 +388,14 @@ def delete_student():
     for student in students:
         if student and student['STUDENT ID'] == student_id_to_delete:
             found = True
-            print("ลบข้อมูลนักเรียนสำเร็จ!")
         elif student:
             remaining_records.append(student)
 
     if found:
+        if not resolve_dependent_registrations('student', student_id_to_delete):
+            return
         try:
-            os.remove(STUDENT_FILE_PATH)
+            new_records = []
             for student in remaining_records:
                 record = create_student_record(
                     student['STUDENT ID'],
@@ -291,7 +406,9 @@ def delete_student():
                     1 if student['STATUS'] == 'Active' else 0
                 )
                 if record:
-                    write_record_to_file(record)
+                    new_records.append(record)
+            rewrite_student_file(new_records)
+            print("ลบข้อมูลนักเรียนสำเร็จ!")
         except IOError as e:
             print(f"เกิดข้อผิดพลาดในการลบไฟล์: {e}")
     else:
@@ -307,6 +424,10 @@ def student_menu():
         print("4. ดูข้อมูลนักเรียนแบบกรอง")
         print("5. แก้ไขข้อมูลนักเรียน")
         print("6. ลบข้อมูลนักเรียน")
+        print("7. ค้นหานักเรียนด้วยชื่อ")
+        print("8. ดูรายชื่อนักเรียนเรียงตามนามสกุล")
+        print("9. อัปเดตนักเรียนแบบกลุ่ม")
+        print("10. นำเข้านักเรียนจากไฟล์ CSV/JSONL")
         print("0. กลับสู่เมนูหลัก")
         
         choice = input("กรุณาเลือกเมนู: ")
@@ -323,6 +444,16 @@ def student_menu():
             update_student()
         elif choice == '6':
             delete_student()
+        elif choice == '7':
+            search_students_by_name()
+        elif choice == '8':
+            view_students_by_last_name()
+        elif choice == '9':
+            # นำเข้าในฟังก์ชันเพราะ module.query (ที่ bulk_update ใช้) นำเข้าโมดูลนี้
+            from module.bulk_update import bulk_update_menu
+            bulk_update_menu()
+        elif choice == '10':
+            import_menu('students')
         elif choice == '0':
             print("ย้อนกลับสู่เมนูหลัก...")
             break
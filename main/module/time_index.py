@@ -0,0 +1,181 @@
+import os
+import struct
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime
+from heapq import merge
+from module.index_store import load_index, append_index_delta, get_index_for_append
+
+# -----------------------------
+# Path และ Format
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+REGISTRATION_FILE_PATH = os.path.join(main_dir, 'registration.bin')
+
+REGISTRATION_RECORD_FORMAT = '<I16s16sdB'
+REGISTRATION_RECORD_SIZE = struct.calcsize(REGISTRATION_RECORD_FORMAT)
+
+# record ที่ต่อท้ายด้วยเวลาเก่ากว่าเวลาล่าสุดในดัชนีเก็บแยกในรายการ 'late' ที่เรียงแล้ว (แทรกลงอาร์เรย์หลักเป็น O(N))
+# เมื่อมีเกินจำนวนนี้จึงรวมเข้าอาร์เรย์หลักครั้งเดียว
+LATE_ENTRY_LIMIT = 4096
+
+def day_key(timestamp):
+    """คืนคีย์รายวัน (YYYY-MM-DD) ของเวลาลงทะเบียน"""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+def week_key(timestamp):
+    """คืนคีย์รายสัปดาห์ตามมาตรฐาน ISO (YYYY-Www) ของเวลาลงทะเบียน"""
+    iso_year, iso_week, _ = datetime.fromtimestamp(timestamp).isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+def add_to_histogram(histogram, key, status, sign=1):
+    """เพิ่ม (sign=1) หรือลด (sign=-1) จำนวนในฮิสโตแกรมตามสถานะ (1 = ลงทะเบียน, 0 = ถอน)"""
+    bucket = histogram.setdefault(key, {'registered': 0, 'dropped': 0})
+    if status == 1:
+        bucket['registered'] += sign
+    else:
+        bucket['dropped'] += sign
+    if not bucket['registered'] and not bucket['dropped']:
+        del histogram[key]
+
+def add_to_histograms(index, timestamp, status, sign=1):
+    try:
+        add_to_histogram(index['daily'], day_key(timestamp), status, sign)
+        add_to_histogram(index['weekly'], week_key(timestamp), status, sign)
+    except (ValueError, OverflowError, OSError):
+        pass
+
+def build_time_index(file_path=REGISTRATION_FILE_PATH):
+    """สร้างดัชนีเวลาลงทะเบียน (เวลาเรียงลำดับ + ลำดับ record) และฮิสโตแกรมรายวัน/รายสัปดาห์"""
+    entries = []
+    daily = {}
+    weekly = {}
+    if os.path.exists(file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % REGISTRATION_RECORD_SIZE
+        for record_no, unpacked in enumerate(struct.iter_unpack(REGISTRATION_RECORD_FORMAT, data[:usable])):
+            timestamp, status = unpacked[3], unpacked[4]
+            entries.append((timestamp, record_no))
+            try:
+                add_to_histogram(daily, day_key(timestamp), status)
+                add_to_histogram(weekly, week_key(timestamp), status)
+            except (ValueError, OverflowError, OSError):
+                continue
+    entries.sort()
+    return {
+        'timestamps': array('d', [timestamp for timestamp, _ in entries]),
+        'records': array('I', [record_no for _, record_no in entries]),
+        'late': [],
+        'daily': daily,
+        'weekly': weekly,
+        'record_count': len(entries)
+    }
+
+def fold_late_entries(index):
+    """รวมรายการ 'late' เข้าอาร์เรย์หลักที่เรียงตามเวลา"""
+    entries = list(merge(zip(index['timestamps'], index['records']), index['late']))
+    index['timestamps'] = array('d', [timestamp for timestamp, _ in entries])
+    index['records'] = array('I', [record_no for _, record_no in entries])
+    index['late'] = []
+
+def apply_time_delta(index, delta):
+    """ปรับดัชนีด้วย delta ('add', เวลา, สถานะ) ของ record ที่ต่อท้ายไฟล์
+    หรือ ('status', เวลา, สถานะเดิม, สถานะใหม่) ของการแก้สถานะแบบ in-place"""
+    if delta[0] == 'add':
+        _, timestamp, status = delta
+        record_no = index['record_count']
+        timestamps = index['timestamps']
+        # เวลาลงทะเบียนเกือบทั้งหมดใหม่กว่าทุก record จึงต่อท้ายอาร์เรย์ได้
+        if not timestamps or timestamp >= timestamps[-1]:
+            timestamps.append(timestamp)
+            index['records'].append(record_no)
+        else:
+            insort(index['late'], (timestamp, record_no))
+            if len(index['late']) > LATE_ENTRY_LIMIT:
+                fold_late_entries(index)
+        add_to_histograms(index, timestamp, status)
+        index['record_count'] += 1
+    else:
+        _, timestamp, old_status, new_status = delta
+        if old_status != new_status:
+            add_to_histograms(index, timestamp, old_status, -1)
+            add_to_histograms(index, timestamp, new_status)
+    return index
+
+def get_time_index(file_path=REGISTRATION_FILE_PATH):
+    """โหลดดัชนีเวลาลงทะเบียน (สร้างใหม่อัตโนมัติเมื่อ registration.bin เปลี่ยน)"""
+    return load_index('registration_time', [file_path], lambda: build_time_index(file_path), apply_time_delta)
+
+def record_registration_time(timestamp, status, file_path=REGISTRATION_FILE_PATH):
+    """ปรับดัชนีเวลาหลังต่อท้าย record การลงทะเบียนใหม่ (บันทึกเฉพาะ delta)"""
+    index = get_index_for_append('registration_time', file_path, REGISTRATION_RECORD_SIZE)
+    if index is None:
+        return
+    delta = ('add', timestamp, status)
+    append_index_delta('registration_time', [file_path], apply_time_delta(index, delta), delta)
+
+def apply_status_change(index, timestamp, old_status, new_status, file_path=REGISTRATION_FILE_PATH):
+    """ปรับฮิสโตแกรมที่เก็บไว้ก่อนแก้สถานะ record การลงทะเบียนแบบ in-place แล้วบันทึกเฉพาะ delta"""
+    if index is None:
+        return
+    delta = ('status', timestamp, old_status, new_status)
+    append_index_delta('registration_time', [file_path], apply_time_delta(index, delta), delta)
+
+def find_registration_offsets_between(start, end, file_path=REGISTRATION_FILE_PATH):
+    """หาตำแหน่ง (offset) ของการลงทะเบียนที่มีเวลาในช่วง [start, end) เรียงตามเวลา
+
+    start และ end เป็น datetime หรือ timestamp (None = ไม่จำกัด)
+    """
+    index = get_time_index(file_path)
+    timestamps = index['timestamps']
+    start_ts = start.timestamp() if isinstance(start, datetime) else start
+    end_ts = end.timestamp() if isinstance(end, datetime) else end
+    lo = 0 if start_ts is None else bisect_left(timestamps, start_ts)
+    hi = len(timestamps) if end_ts is None else bisect_left(timestamps, end_ts)
+    late = index['late']
+    late_lo = 0 if start_ts is None else bisect_left(late, (start_ts,))
+    late_hi = len(late) if end_ts is None else bisect_left(late, (end_ts,))
+    entries = merge(zip(timestamps[lo:hi], index['records'][lo:hi]), late[late_lo:late_hi])
+    return [record_no * REGISTRATION_RECORD_SIZE for _, record_no in entries]
+
+def get_histogram(period='day', start_key=None, end_key=None, file_path=REGISTRATION_FILE_PATH):
+    """คืนฮิสโตแกรมจำนวนการลงทะเบียน [(คีย์, {'registered', 'dropped'})] เรียงตามเวลา
+
+    period เป็น 'day' (คีย์ YYYY-MM-DD) หรือ 'week' (คีย์ YYYY-Www) และกรองช่วงคีย์ได้ (รวมปลายทั้งสองข้าง)
+    """
+    index = get_time_index(file_path)
+    histogram = index['daily'] if period == 'day' else index['weekly']
+    result = []
+    for key in sorted(histogram):
+        if start_key is not None and key < start_key:
+            continue
+        if end_key is not None and key > end_key:
+            continue
+        result.append((key, dict(histogram[key])))
+    return result
+
+def adjust_histogram(histogram, period, changes, start_key=None, end_key=None):
+    """ปรับฮิสโตแกรมจาก get_histogram ด้วยการเปลี่ยนแปลงที่ยังไม่อยู่ในไฟล์ (เช่นการเขียนที่ค้างในโหมด LSM)
+
+    changes คือรายการ (record เดิมในไฟล์หรือ None, record ใหม่หรือ None เมื่อถูกลบ) แบบไบนารี
+    """
+    period_key = day_key if period == 'day' else week_key
+    buckets = dict(histogram)
+    for old_record, new_record in changes:
+        for record_data, sign in ((old_record, -1), (new_record, 1)):
+            if record_data is None:
+                continue
+            _, _, _, timestamp, status = struct.unpack(REGISTRATION_RECORD_FORMAT, record_data)
+            key = period_key(timestamp)
+            if (start_key is not None and key < start_key) or (end_key is not None and key > end_key):
+                continue
+            bucket = buckets.setdefault(key, {'registered': 0, 'dropped': 0})
+            bucket['registered' if status == 1 else 'dropped'] += sign
+    return [(key, bucket) for key, bucket in sorted(buckets.items()) if bucket['registered'] or bucket['dropped']]
+
+def get_daily_registered_counts(file_path=REGISTRATION_FILE_PATH):
+    """คืน dict วันที่ -> จำนวนผู้ลงทะเบียน (สถานะลงทะเบียน) สำหรับใช้ในรายงาน"""
+    daily = get_time_index(file_path)['daily']
+    return {key: bucket['registered'] for key, bucket in daily.items() if bucket['registered'] > 0}
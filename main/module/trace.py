@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# -----------------------------
+# Trace แบบ Chrome trace-event (เปิดดูได้ใน chrome://tracing หรือ Perfetto)
+# -----------------------------
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+DEFAULT_TRACE_FILE_PATH = os.path.join(main_dir, 'trace.json')
+
+ENABLED = False
+TRACE_FILE_PATH = None
+
+_events = []
+_lock = threading.Lock()
+_start = time.perf_counter()
+
+def enable_tracing(file_path=None):
+    """เปิดการเก็บ trace และบันทึกลงไฟล์เมื่อจบโปรแกรม"""
+    global ENABLED, TRACE_FILE_PATH
+    if not ENABLED:
+        atexit.register(write_trace_file)
+    ENABLED = True
+    TRACE_FILE_PATH = file_path or DEFAULT_TRACE_FILE_PATH
+
+def now_us():
+    """เวลาปัจจุบันนับจากเริ่มโปรแกรม (ไมโครวินาที)"""
+    return (time.perf_counter() - _start) * 1_000_000
+
+@contextmanager
+def _span(name, cat, args):
+    start = now_us()
+    try:
+        yield args
+    finally:
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': round(start, 3),
+            'dur': round(now_us() - start, 3),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args
+        }
+        with _lock:
+            _events.append(event)
+
+def span(name, cat='app', **args):
+    """context manager สร้าง span หนึ่งช่วง คืน dict args ให้ผู้เรียกเติมข้อมูล (เช่น records)"""
+    if not ENABLED:
+        return nullcontext({})
+    return _span(name, cat, dict(args))
+
+def traced(name, cat='app'):
+    """decorator ครอบฟังก์ชันด้วย span และบันทึกจำนวน record หากผลลัพธ์เป็น list/dict"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _span(name, cat, {}) as span_args:
+                result = func(*args, **kwargs)
+                if isinstance(result, (list, dict)):
+                    span_args['records'] = len(result)
+                return result
+        return wrapper
+    return decorator
+
+def write_trace_file(file_path=None):
+    """บันทึก trace ทั้งหมดเป็นไฟล์ JSON"""
+    file_path = file_path or TRACE_FILE_PATH
+    if not ENABLED or not file_path:
+        return
+    with _lock:
+        events = list(_events)
+    events.append({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                   'args': {'name': 'compro registration'}})
+    try:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    except IOError as e:
+        print(f"เกิดข้อผิดพลาดในการบันทึก trace: {e}")
+
+# COMPRO_TRACE=1 บันทึกลง trace.json, ค่าอื่นที่ไม่ใช่ 0/false/no/off คือพาธไฟล์ trace
+_trace_setting = os.environ.get('COMPRO_TRACE', '').strip()
+if _trace_setting and _trace_setting.lower() not in ('0', 'false', 'no', 'off'):
+    enable_tracing(None if _trace_setting.lower() in ('1', 'true', 'yes', 'on') else _trace_setting)
@@ -0,0 +1,231 @@
+import os
+import heapq
+import struct
+from datetime import datetime
+from module.cache import bump_generation, writing
+from module.index_store import load_index, save_index, get_index_for_append
+from module.enrollment import (check_enrollment, get_course_capacity, get_seats_taken, is_enrolled,
+                               read_course_for_enrollment)
+from module import metrics, trace
+
+# -----------------------------
+# คิวรอลงทะเบียน (waitlist) ของรายวิชาที่เต็ม
+# -----------------------------
+# waitlist.bin เก็บคำขอทุกรายการแบบต่อท้าย (ID = ลำดับ record เริ่มที่ 1) และแก้สถานะแบบ in-place
+# เมื่อเลื่อนขึ้นลงทะเบียนหรือยกเลิก จึงเป็นบันทึกการเลื่อนคิวไปด้วย
+# ดัชนี waitlist เก็บ heap ต่อรายวิชาเรียงตาม (ระดับความสำคัญ, เวลาที่ขอ, ID) เลื่อนคิวได้ใน O(log n)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+main_dir = os.path.dirname(current_dir)
+WAITLIST_FILE_PATH = os.path.join(main_dir, 'waitlist.bin')
+
+# รูปแบบของคำขอ (ID, รหัสนักเรียน, รหัสวิชา, ระดับความสำคัญ, เวลาที่ขอ, สถานะ, ID การลงทะเบียนที่ได้, เวลาที่ปิดคำขอ)
+WAITLIST_RECORD_FORMAT = '<I16s10sBdBId'
+WAITLIST_RECORD_SIZE = struct.calcsize(WAITLIST_RECORD_FORMAT)
+# ตำแหน่งของฟิลด์สถานะ ID การลงทะเบียน และเวลาที่ปิดคำขอ (เขียนทับเฉพาะส่วนนี้)
+WAITLIST_RESULT_OFFSET = struct.calcsize('<I16s10sBd')
+WAITLIST_RESULT_FORMAT = '<BId'
+
+WAITLIST_STATUS = {0: 'Cancelled', 1: 'Waiting', 2: 'Promoted', 3: 'Skipped'}
+STATUS_CANCELLED, STATUS_WAITING, STATUS_PROMOTED, STATUS_SKIPPED = 0, 1, 2, 3
+
+# ระดับความสำคัญ (เลขน้อยได้ก่อน)
+MIN_TIER, MAX_TIER = 1, 9
+DEFAULT_TIER = 5
+
+def read_waitlist_record(record_data):
+    """แปลง record ไบนารีเป็น dict"""
+    unpacked = struct.unpack(WAITLIST_RECORD_FORMAT, record_data)
+    return {
+        'ID': unpacked[0],
+        'STUDENT ID': unpacked[1].strip(b'\x00').decode('utf-8', errors='replace'),
+        'COURSE ID': unpacked[2].strip(b'\x00').decode('utf-8', errors='replace'),
+        'TIER': unpacked[3],
+        'REQUESTED AT': datetime.fromtimestamp(unpacked[4]),
+        'STATUS': WAITLIST_STATUS.get(unpacked[5], 'Unknown'),
+        'REGISTER ID': unpacked[6] or None,
+        'RESOLVED AT': datetime.fromtimestamp(unpacked[7]) if unpacked[7] else None,
+    }
+
+def read_waitlist_from_disk(file_path=WAITLIST_FILE_PATH):
+    """อ่านคำขอทั้งหมดจาก waitlist.bin"""
+    records = []
+    try:
+        if not os.path.exists(file_path):
+            return records
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % WAITLIST_RECORD_SIZE
+        for pos in range(0, usable, WAITLIST_RECORD_SIZE):
+            records.append(read_waitlist_record(data[pos:pos + WAITLIST_RECORD_SIZE]))
+    except (IOError, struct.error, ValueError) as e:
+        print(f"เกิดข้อผิดพลาดในการอ่านไฟล์คิวรอ: {e}")
+    return records
+
+# -----------------------------
+# ดัชนี heap ต่อรายวิชา
+# -----------------------------
+def build_waitlist_index(file_path=WAITLIST_FILE_PATH):
+    """สร้าง heap ของคำขอที่ยังรออยู่ต่อรายวิชา และ dict (นักเรียน, วิชา) -> ID คำขอ"""
+    heaps = {}
+    waiting = {}
+    for record in read_waitlist_from_disk(file_path):
+        if record['STATUS'] != 'Waiting':
+            continue
+        heaps.setdefault(record['COURSE ID'], []).append(
+            (record['TIER'], record['REQUESTED AT'].timestamp(), record['ID'], record['STUDENT ID']))
+        waiting[(record['STUDENT ID'], record['COURSE ID'])] = record['ID']
+    for heap in heaps.values():
+        heapq.heapify(heap)
+    record_count = os.path.getsize(file_path) // WAITLIST_RECORD_SIZE if os.path.exists(file_path) else 0
+    return {'heaps': heaps, 'waiting': waiting, 'record_count': record_count}
+
+def get_waitlist_index():
+    """โหลดดัชนีคิวรอ (สร้างใหม่อัตโนมัติเมื่อ waitlist.bin เปลี่ยน)"""
+    return load_index('waitlist', [WAITLIST_FILE_PATH], build_waitlist_index)
+
+def discard_stale(index, course_id):
+    """ตัดคำขอที่ถูกยกเลิกแล้วออกจากหัว heap (ลบแบบ lazy) คืนคำขอแรกที่ยังรออยู่หรือ None"""
+    heap = index['heaps'].get(course_id)
+    while heap:
+        tier, requested_at, entry_id, student_id = heap[0]
+        if index['waiting'].get((student_id, course_id)) == entry_id:
+            return heap[0]
+        heapq.heappop(heap)
+    index['heaps'].pop(course_id, None)
+    return None
+
+def list_waiting(course_id):
+    """คืนคำขอที่ยังรออยู่ของรายวิชาเรียงตามลำดับคิว [(ระดับ, เวลาที่ขอ, ID, รหัสนักเรียน)]"""
+    index = get_waitlist_index()
+    return sorted(entry for entry in index['heaps'].get(course_id, ())
+                  if index['waiting'].get((entry[3], course_id)) == entry[2])
+
+# -----------------------------
+# เขียนคำขอ
+# -----------------------------
+def write_result(entry_id, status, register_id=0, resolved_at=None):
+    """เขียนทับสถานะของคำขอใน waitlist.bin"""
+    offset = (entry_id - 1) * WAITLIST_RECORD_SIZE + WAITLIST_RESULT_OFFSET
+    with writing(WAITLIST_FILE_PATH), open(WAITLIST_FILE_PATH, 'r+b') as f:
+        f.seek(offset)
+        f.write(struct.pack(WAITLIST_RESULT_FORMAT, status, register_id,
+                            resolved_at or datetime.now().timestamp()))
+    bump_generation(WAITLIST_FILE_PATH)
+
+def join_waitlist(student_id, course_id, tier=DEFAULT_TIER):
+    """เพิ่มนักเรียนเข้าคิวรอของรายวิชา คืน (ID คำขอ, ข้อความ) ID เป็น None หากเพิ่มไม่ได้"""
+    if not MIN_TIER <= tier <= MAX_TIER:
+        return None, f"ระดับความสำคัญต้องอยู่ระหว่าง {MIN_TIER}-{MAX_TIER}"
+    index = get_waitlist_index()
+    if (student_id, course_id) in index['waiting']:
+        return None, f"นักเรียนรหัส {student_id} อยู่ในคิวรอวิชา {course_id} แล้ว"
+    entry_id = index['record_count'] + 1
+    requested_at = datetime.now().timestamp()
+    try:
+        record = struct.pack(WAITLIST_RECORD_FORMAT, entry_id,
+                             student_id.encode('utf-8')[:16].ljust(16, b'\x00'),
+                             course_id.encode('utf-8')[:10].ljust(10, b'\x00'),
+                             tier, requested_at, STATUS_WAITING, 0, 0.0)
+        with writing(WAITLIST_FILE_PATH), open(WAITLIST_FILE_PATH, 'ab') as f:
+            f.write(record)
+        bump_generation(WAITLIST_FILE_PATH)
+    except (IOError, struct.error) as e:
+        return None, f"เกิดข้อผิดพลาดในการบันทึกคิวรอ: {e}"
+
+    index = get_index_for_append('waitlist', WAITLIST_FILE_PATH, WAITLIST_RECORD_SIZE)
+    if index is not None:
+        heapq.heappush(index['heaps'].setdefault(course_id, []), (tier, requested_at, entry_id, student_id))
+        index['waiting'][(student_id, course_id)] = entry_id
+        index['record_count'] += 1
+        save_index('waitlist', [WAITLIST_FILE_PATH], index)
+    position = len(list_waiting(course_id))
+    return entry_id, f"เข้าคิวรอวิชา {course_id} แล้ว (คำขอ ID {entry_id}, มีผู้รอ {position} คน)"
+
+def cancel_waitlist(student_id, course_id):
+    """ยกเลิกคำขอที่ยังรออยู่ คืนค่า True หากยกเลิกสำเร็จ"""
+    index = get_waitlist_index()
+    entry_id = index['waiting'].get((student_id, course_id))
+    if entry_id is None:
+        return False
+    try:
+        write_result(entry_id, STATUS_CANCELLED)
+    except (IOError, struct.error) as e:
+        print(f"เกิดข้อผิดพลาดในการแก้ไขคิวรอ: {e}")
+        return False
+    # รายการใน heap ถูกตัดออกเมื่อขึ้นมาถึงหัวคิว
+    del index['waiting'][(student_id, course_id)]
+    save_index('waitlist', [WAITLIST_FILE_PATH], index)
+    return True
+
+# -----------------------------
+# เลื่อนคิวขึ้นลงทะเบียน
+# -----------------------------
+def has_free_seat(course_id):
+    capacity = get_course_capacity(course_id)
+    return capacity == 0 or get_seats_taken(course_id) < capacity
+
+def can_join(student_id, course_id):
+    """ตรวจว่าเหตุที่ลงทะเบียนไม่ได้คือรายวิชาเต็ม (เข้าคิวรอได้) หรือไม่"""
+    course = read_course_for_enrollment(course_id)
+    if course is None or course[3] != 1 or is_enrolled(student_id, course_id):
+        return False
+    return not has_free_seat(course_id)
+
+@trace.traced('waitlist promote', cat='storage')
+def promote_waiting(course_id):
+    """เลื่อนนักเรียนในคิวขึ้นลงทะเบียนจนที่นั่งเต็มหรือคิวหมด
+
+    คำขอที่ลงทะเบียนไม่ได้แล้ว (เช่น นักเรียน Inactive หรือหน่วยกิตเกินเพดาน) ถูกบันทึกเป็น Skipped
+    คืนรายการ (รหัสนักเรียน, ID การลงทะเบียนหรือ None, ข้อความ)
+    """
+    # นำเข้าในฟังก์ชันเพราะ module.register นำเข้าโมดูลนี้
+    from module.register import append_registration, get_next_register_id, read_student_by_id
+
+    index = get_waitlist_index()
+    if discard_stale(index, course_id) is None:
+        return []
+    results = []
+    try:
+        while has_free_seat(course_id):
+            head = discard_stale(index, course_id)
+            if head is None:
+                break
+            heapq.heappop(index['heaps'][course_id])
+            _, _, entry_id, student_id = head
+            del index['waiting'][(student_id, course_id)]
+
+            student = read_student_by_id(student_id)
+            if not student or student['status_code'] != 1:
+                allowed, message = False, f"นักเรียนรหัส {student_id} ไม่อยู่ในสถานะ Active"
+            else:
+                allowed, message = check_enrollment(student_id, course_id)
+            if not allowed:
+                write_result(entry_id, STATUS_SKIPPED)
+                metrics.inc('waitlist_skipped_total')
+                results.append((student_id, None, message))
+                continue
+
+            register_id = get_next_register_id()
+            now = datetime.now().timestamp()
+            if not append_registration(register_id, student_id, course_id, now, 1):
+                # คืนคำขอเข้าคิวเพื่อลองใหม่ครั้งถัดไป
+                heapq.heappush(index['heaps'].setdefault(course_id, []), head)
+                index['waiting'][(student_id, course_id)] = entry_id
+                break
+            write_result(entry_id, STATUS_PROMOTED, register_id, now)
+            metrics.inc('waitlist_promotions_total')
+            results.append((student_id, register_id, f"เลื่อนนักเรียนรหัส {student_id} ขึ้นลงทะเบียนวิชา {course_id} (ID {register_id})"))
+    except (IOError, struct.error) as e:
+        print(f"เกิดข้อผิดพลาดในการเลื่อนคิวรอ: {e}")
+    finally:
+        save_index('waitlist', [WAITLIST_FILE_PATH], index)
+    return results
+
+def print_promotions(results):
+    for _, register_id, message in results:
+        print(f"{'✅' if register_id else '⚠️'} คิวรอ: {message}")
+
+def release_seats(course_ids):
+    """เรียกเมื่อที่นั่งของวิชาว่างลง (ถอน/ลบการลงทะเบียน หรือเพิ่มจำนวนที่นั่ง) เลื่อนคิวรอของแต่ละวิชาและแสดงผล"""
+    for course_id in sorted(set(course_ids)):
+        print_promotions(promote_waiting(course_id))
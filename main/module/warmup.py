@@ -0,0 +1,54 @@
+import os
+import struct
+import threading
+from importlib import import_module
+from module import metrics
+
+# -----------------------------
+# โหลดดัชนีล่วงหน้าในเธรดเบื้องหลัง
+# -----------------------------
+# ปิดการ warm-up ได้ด้วย COMPRO_WARMUP=0
+WARMUP_ENABLED = os.environ.get('COMPRO_WARMUP', '1').lower() not in ('0', 'false', 'no', 'off')
+
+# (โมดูล, ฟังก์ชันโหลดดัชนี) เรียงตามเมนูที่ใช้บ่อยก่อน
+INDEX_WARMERS = [
+    ('module.enrollment', 'get_enrollment_index'),
+    ('module.register', 'get_registration_order'),
+    ('module.integrity', 'get_registration_refs'),
+    ('module.time_index', 'get_time_index'),
+    ('module.course_index', 'get_course_index'),
+    ('module.search', 'get_student_search_index'),
+    ('module.search', 'get_course_search_index'),
+    ('module.bitmap_index', 'get_student_bitmaps'),
+]
+
+_thread = None
+
+# (ฟังก์ชันโหลดดัชนี, ข้อผิดพลาด) ที่เกิดระหว่าง warm-up ไม่พิมพ์ออกจอเพราะจะทับพรอมต์ของเมนู
+# ดัชนีที่โหลดไม่สำเร็จจะถูกโหลดอีกครั้งตอนใช้งานจริงและแสดงข้อผิดพลาดตอนนั้น
+_errors = []
+
+def warm_indexes(warmers=INDEX_WARMERS):
+    """โหลดหรือสร้างดัชนีทั้งหมดไว้ล่วงหน้า คืนรายชื่อดัชนีที่โหลดสำเร็จ"""
+    loaded = []
+    for module_name, func_name in warmers:
+        try:
+            getattr(import_module(module_name), func_name)()
+            loaded.append(func_name)
+        except (IOError, struct.error, ValueError) as e:
+            _errors.append((func_name, e))
+            metrics.inc('index_warmup_errors_total', index=func_name)
+    return loaded
+
+def warmup_errors():
+    """คืนรายการ (ฟังก์ชันโหลดดัชนี, ข้อผิดพลาด) ที่เกิดระหว่าง warm-up"""
+    return list(_errors)
+
+def start_index_warmup():
+    """เริ่มเธรด daemon สำหรับโหลดดัชนีล่วงหน้า (ไม่ทำซ้ำหากเริ่มแล้ว)"""
+    global _thread
+    if not WARMUP_ENABLED or _thread is not None:
+        return _thread
+    _thread = threading.Thread(target=warm_indexes, name='index-warmup', daemon=True)
+    _thread.start()
+    return _thread
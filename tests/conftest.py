@@ -0,0 +1,42 @@
+import os
+import sys
+import shutil
+import pytest
+
+# -----------------------------
+# สำเนาข้อมูลสำหรับเทสต์
+# -----------------------------
+# ทุกเทสต์ทำงานกับสำเนาของ main/ ใน tmp_path (ไฟล์ .bin ที่ commit ไว้ไม่ถูกแก้)
+# พาธของข้อมูลทั้งหมดคำนวณจากตำแหน่งของ module/ จึงต้องโหลด module ใหม่จากสำเนาทุกเทสต์
+MAIN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main')
+
+# ไฟล์และโฟลเดอร์ที่สร้างขึ้นระหว่างใช้งาน ไม่คัดลอกไปยังสำเนา
+GENERATED = ('__pycache__', 'index', 'lsm', 'cdc', 'snapshots', 'rosters', 'compro.db*',
+             'metrics.prom', 'trace.json', '*.tmp')
+
+def purge_modules():
+    for name in list(sys.modules):
+        if name == 'module' or name.startswith('module.'):
+            del sys.modules[name]
+
+@pytest.fixture
+def main_copy(tmp_path, monkeypatch):
+    """คัดลอก main/ ไปยัง tmp_path แล้วให้ import module จากสำเนา คืนพาธของสำเนา
+
+    ตัวแปร COMPRO_* ถูกล้าง เทสต์ตั้งค่าที่ต้องการด้วย monkeypatch.setenv ก่อน import module
+    """
+    dest = tmp_path / 'main'
+    shutil.copytree(MAIN_DIR, dest, ignore=shutil.ignore_patterns(*GENERATED))
+    for name in list(os.environ):
+        if name.startswith('COMPRO_'):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv('COMPRO_WARMUP', '0')
+    monkeypatch.syspath_prepend(str(dest))
+    purge_modules()
+    yield dest
+    purge_modules()
+
+@pytest.fixture
+def restart(main_copy):
+    """คืนฟังก์ชันที่ล้าง module ที่โหลดไว้ เพื่อจำลองการเปิดโปรแกรมใหม่บนข้อมูลชุดเดิม"""
+    return purge_modules
@@ -0,0 +1,68 @@
+import os
+
+def brute_force(students, keep):
+    return sorted(s['STUDENT ID'] for s in students if keep(s))
+
+def matched_ids(student, bitmap_index, condition):
+    bitmap, count = bitmap_index.filter_students(condition)
+    ids = sorted(s['STUDENT ID'] for s in student.read_students_at(bitmap_index.bitmap_offsets(bitmap)))
+    assert count == len(ids)
+    return ids
+
+def assert_filters_match(student, bitmap_index):
+    students = student.read_all_records_from_file()
+    major = students[0]['MAJOR']
+    cases = [
+        (f'major="{major.upper()}"', lambda s: s['MAJOR'].lower() == major.lower()),
+        (f'major="{major}" and (year=1 or year=2)', lambda s: s['MAJOR'].lower() == major.lower() and s['YEAR'] in (1, 2)),
+        ('not status=active or year=4', lambda s: s['STATUS'] != 'Active' or s['YEAR'] == 4),
+        ('year=99', lambda s: False),
+    ]
+    for condition, keep in cases:
+        assert matched_ids(student, bitmap_index, condition) == brute_force(students, keep)
+
+def test_combined_filters_match_brute_force(main_copy):
+    from module import student, bitmap_index
+
+    assert_filters_match(student, bitmap_index)
+
+def test_counts_come_from_bitmaps_alone(main_copy, monkeypatch):
+    from module import student, bitmap_index
+
+    expected = len(brute_force(student.read_all_records_from_file(), lambda s: s['STATUS'] == 'Active'))
+    bitmap_index.get_student_bitmaps()
+    monkeypatch.setattr(student, 'read_records_from_disk', lambda *args, **kwargs: 1 / 0)
+    assert bitmap_index.count_students('status=active') == expected
+
+def test_appended_students_update_bitmaps_without_rebuild(main_copy, restart):
+    from module import student, bitmap_index, bin_backend, index_store
+
+    bitmap_index.get_student_bitmaps()
+    for i, (year, status) in enumerate(((1, 'Active'), (4, 'Inactive'))):
+        assert bin_backend.add_student({'STUDENT ID': f'B0000{i}', 'FIRST NAME': 'Bit', 'LAST NAME': 'Map',
+                                        'MAJOR': 'Bitmap Studies', 'YEAR': year, 'STATUS': status})
+    assert_filters_match(student, bitmap_index)
+    assert matched_ids(student, bitmap_index, 'major="bitmap studies" and not status=active') == ['B00001']
+    assert os.path.exists(index_store.delta_file_path('student_bitmap'))
+
+    restart()
+    from module import student, bitmap_index
+    builds = []
+    original = bitmap_index.build_student_bitmaps
+    bitmap_index.build_student_bitmaps = lambda *args: builds.append(1) or original(*args)
+    assert_filters_match(student, bitmap_index)
+    assert builds == []
+
+def test_encoded_bitmaps_round_trip(main_copy):
+    from module import bitmap_index
+
+    # ก้อนแรกเกิน ARRAY_CONTAINER_LIMIT จึงเก็บแบบ bitmap ก้อนถัดไปเก็บแบบอาร์เรย์
+    dense = list(range(0, 70000, 5)) + [131071]
+    for members in ([], [0, 5, 70000], dense):
+        bitmap = sum(1 << m for m in members)
+        assert bitmap_index.bitmap_members(bitmap_index.decode_bitmap(bitmap_index.encode_bitmap(bitmap))) == members
+
+    encoded = bitmap_index.encode_bitmap(sum(1 << m for m in dense[:-1]))
+    for m in (131071, 131072, 300000):
+        encoded = bitmap_index.append_encoded_bit(encoded, m)
+    assert bitmap_index.bitmap_members(bitmap_index.decode_bitmap(encoded)) == dense + [131072, 300000]
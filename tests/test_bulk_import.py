@@ -0,0 +1,58 @@
+import os
+import pytest
+
+ROWS = [
+    "STUDENT ID,FIRST NAME,LAST NAME,MAJOR,YEAR,STATUS",
+    "I00001,Anong,Boonmee,CS,1,Active",
+    "I00002,Chai,Dee,CS,9999,Active",
+    "I00003,Ek,Fah,IT,2,",
+    "I00001,Dup,Licate,CS,1,Active",
+]
+
+def write_source(tmp_path, rows=ROWS):
+    path = tmp_path / 'students.csv'
+    path.write_text('\n'.join(rows) + '\n', encoding='utf-8')
+    return str(path)
+
+def test_import_appends_valid_rows_and_writes_rejects(main_copy, tmp_path):
+    from module import bulk_import, student
+
+    before = {s['STUDENT ID'] for s in student.read_all_records_from_file()}
+    result = bulk_import.import_file('students', write_source(tmp_path), batch_rows=2)
+    assert (result['rows'], result['imported'], result['rejected']) == (4, 2, 2)
+    after = {s['STUDENT ID'] for s in student.read_all_records_from_file()}
+    assert after - before == {'I00001', 'I00003'}
+    with open(result['rejects_path'], encoding='utf-8') as f:
+        rejects = f.read()
+    assert 'I00002' in rejects and 'I00001,Dup' in rejects
+    assert not os.path.exists(student.STUDENT_FILE_PATH + '.import')
+
+def test_failed_import_leaves_data_file_unchanged(main_copy, tmp_path, monkeypatch):
+    from module import bulk_import, student
+
+    size = os.path.getsize(student.STUDENT_FILE_PATH)
+    original = bulk_import.iter_source_rows
+
+    def failing_rows(path):
+        yield from list(original(path))[:2]
+        raise OSError("อ่านไฟล์ต้นทางไม่ได้")
+
+    monkeypatch.setattr(bulk_import, 'iter_source_rows', failing_rows)
+    with pytest.raises(OSError):
+        bulk_import.import_file('students', write_source(tmp_path), batch_rows=1)
+    assert os.path.getsize(student.STUDENT_FILE_PATH) == size
+    assert not os.path.exists(student.STUDENT_FILE_PATH + '.import')
+
+def test_interrupted_final_append_is_truncated(main_copy, tmp_path, monkeypatch):
+    from module import bulk_import, student
+
+    size = os.path.getsize(student.STUDENT_FILE_PATH)
+
+    def partial_copy(src, dst):
+        dst.write(src.read(10))
+        raise OSError("ดิสก์เต็ม")
+
+    monkeypatch.setattr(bulk_import.shutil, 'copyfileobj', partial_copy)
+    with pytest.raises(OSError):
+        bulk_import.import_file('students', write_source(tmp_path))
+    assert os.path.getsize(student.STUDENT_FILE_PATH) == size
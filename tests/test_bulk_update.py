@@ -0,0 +1,86 @@
+import pytest
+
+def by_id(records):
+    return {r['STUDENT ID']: r for r in records}
+
+def expected_after(records, keep, change):
+    """ผลที่ควรได้จากการแก้แบบทีละ record คืน (dict รหัส -> record, จำนวนที่ตรงเงื่อนไข, จำนวนที่เปลี่ยน)"""
+    expected = {}
+    matched = changed = 0
+    for record in records:
+        new = dict(record)
+        if keep(record):
+            matched += 1
+            change(new)
+            changed += new != record
+        expected[record['STUDENT ID']] = new
+    return expected, matched, changed
+
+def test_bulk_update_matches_record_by_record_edit(main_copy):
+    from module import bulk_update, student, bitmap_index
+
+    before = student.read_all_records_from_file()
+
+    def change(r):
+        r['YEAR'] += 1
+        r['MAJOR'] = 'Undeclared'
+    expected, matched, changed = expected_after(
+        before, lambda r: r['STATUS'] == 'Active' and r['YEAR'] < 4, change)
+    result = bulk_update.bulk_update('status=active and year<4', 'year+=1, major=Undeclared')
+    assert result == {'records': len(before), 'matched': matched, 'changed': changed, 'skipped': 0}
+    assert matched > 0
+
+    after = student.read_all_records_from_file()
+    assert [r['STUDENT ID'] for r in after] == [r['STUDENT ID'] for r in before]
+    assert by_id(after) == expected
+    # ดัชนี bitmap เห็นค่าใหม่หลังไฟล์เปลี่ยน
+    assert bitmap_index.filter_students('major=undeclared')[1] == matched
+
+def test_unchanged_values_are_not_counted(main_copy):
+    from module import bulk_update, student
+
+    major = student.read_all_records_from_file()[0]['MAJOR']
+    result = bulk_update.bulk_update(f'major="{major}"', f'major={major}')
+    assert result['matched'] > 0 and result['changed'] == 0
+
+def test_dry_run_reports_without_writing(main_copy):
+    from module import bulk_update
+
+    data = (main_copy / 'student.bin').read_bytes()
+    preview = bulk_update.bulk_update('year=1', 'year+=1', dry_run=True)
+    assert (main_copy / 'student.bin').read_bytes() == data
+    assert preview['changed'] > 0
+    assert bulk_update.bulk_update('year=1', 'year+=1') == preview
+    assert (main_copy / 'student.bin').read_bytes() != data
+
+def test_year_out_of_range_is_skipped(main_copy):
+    from module import bulk_update
+
+    data = (main_copy / 'student.bin').read_bytes()
+    result = bulk_update.bulk_update('year=1', 'year-=5')
+    assert result['matched'] == result['skipped'] > 0 and result['changed'] == 0
+    assert (main_copy / 'student.bin').read_bytes() == data
+
+def test_year_end_promotion(main_copy):
+    from module import bulk_update, student
+
+    before = student.read_all_records_from_file()
+
+    def promote(r):
+        if r['YEAR'] >= 4:
+            r['STATUS'] = 'Inactive'
+        else:
+            r['YEAR'] += 1
+    expected, matched, changed = expected_after(before, lambda r: r['STATUS'] == 'Active', promote)
+    result = bulk_update.year_end_promotion(final_year=4)
+    assert (result['matched'], result['changed']) == (matched, changed)
+    assert by_id(student.read_all_records_from_file()) == expected
+
+@pytest.mark.parametrize('assignments', ['id=X1', 'major+=1', 'year=abc', 'status=maybe', 'first=' + 'ก' * 17, 'year'])
+def test_invalid_assignments_are_rejected(main_copy, assignments):
+    from module import bulk_update
+
+    data = (main_copy / 'student.bin').read_bytes()
+    with pytest.raises(ValueError):
+        bulk_update.bulk_update('', assignments)
+    assert (main_copy / 'student.bin').read_bytes() == data
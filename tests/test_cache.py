@@ -0,0 +1,22 @@
+def test_cached_records_reread_only_after_write(main_copy, monkeypatch):
+    from module import cache, student, bin_backend
+
+    reads = []
+    original = student.read_records_from_disk
+    monkeypatch.setattr(student, 'read_records_from_disk',
+                        lambda *args, **kwargs: reads.append(1) or original(*args, **kwargs))
+
+    first = student.read_all_records_from_file()
+    again = student.read_all_records_from_file()
+    assert len(reads) == 1
+    assert again == first and again[0] is not first[0]
+
+    # แก้ข้อมูลที่คืนไปไม่กระทบแคช
+    first[0]['FIRST NAME'] = 'Mutated'
+    assert student.read_all_records_from_file()[0]['FIRST NAME'] != 'Mutated'
+
+    generation = cache.file_generation(student.STUDENT_FILE_PATH)
+    assert bin_backend.update_student(again[0]['STUDENT ID'], {'FIRST NAME': 'Changed'})
+    assert cache.file_generation(student.STUDENT_FILE_PATH) > generation
+    assert student.read_all_records_from_file()[0]['FIRST NAME'] == 'Changed'
+    assert len(reads) == 2
@@ -0,0 +1,53 @@
+import shutil
+import sys
+
+def copy_data(main_copy, tmp_path):
+    target = tmp_path / 'export'
+    target.mkdir()
+    for name in ('student.bin', 'registration.bin'):
+        shutil.copy(main_copy / name, target / name)
+    return target
+
+def test_v2_round_trip_keeps_rows_and_shrinks_files(main_copy, tmp_path):
+    from module import compact_layout
+
+    target = copy_data(main_copy, tmp_path)
+    for name, kind in compact_layout.FILE_KINDS.items():
+        path = str(target / name)
+        rows = compact_layout.read_rows(path, kind)
+        old_size, new_size = compact_layout.convert_file(path, 2)
+        assert compact_layout.detect_version(path) == 2
+        assert new_size < old_size
+        if kind == 'registration':
+            # เวลาใน v2 เก็บเป็นวินาทีเต็ม
+            rows = [row[:3] + (int(row[3]),) + row[4:] for row in rows]
+        assert compact_layout.read_rows(path, kind) == rows
+        compact_layout.convert_file(path, 1)
+        assert compact_layout.detect_version(path) == 1
+        assert compact_layout.read_rows(path, kind) == rows
+
+def test_student_v1_round_trip_is_byte_identical(main_copy, tmp_path):
+    from module import compact_layout
+
+    path = str(copy_data(main_copy, tmp_path) / 'student.bin')
+    original = (main_copy / 'student.bin').read_bytes()
+    compact_layout.convert_file(path, 2)
+    compact_layout.convert_file(path, 1)
+    with open(path, 'rb') as f:
+        assert f.read() == original
+
+def test_reports_read_v2_files(main_copy, tmp_path):
+    from module import compact_layout, report
+
+    path = str(copy_data(main_copy, tmp_path) / 'registration.bin')
+    expected = [r['REGISTER ID'] for r in report.read_registrations_from_disk(path)]
+    compact_layout.convert_file(path, 2)
+    assert [r['REGISTER ID'] for r in report.read_registrations_from_disk(path)] == expected
+
+def test_convert_tool_skips_live_files(main_copy, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'convert_layout', raising=False)
+    import convert_layout
+    from module import compact_layout
+
+    assert convert_layout.convert(2, [str(main_copy)]) == len(compact_layout.FILE_KINDS)
+    assert compact_layout.detect_version(str(main_copy / 'student.bin')) == 1
@@ -0,0 +1,49 @@
+def brute_force_ids(courses, keep):
+    return sorted(c['COURSE ID'] for c in courses if keep(c))
+
+def ids_at(course, offsets):
+    return sorted(c['COURSE ID'] for c in course.read_courses_at(offsets))
+
+def test_offsets_match_brute_force_filters(main_copy):
+    from module import course, course_index
+
+    courses = course.read_all_records_from_file()
+    years = sorted({c['ACADEMIC YEAR'] for c in courses})
+    year, semester = courses[0]['ACADEMIC YEAR'], courses[0]['SEMESTER']
+    cases = [
+        ({'academic_year': year}, lambda c: c['ACADEMIC YEAR'] == year),
+        ({'semester': semester}, lambda c: c['SEMESTER'] == semester),
+        ({'is_active': 1}, lambda c: c['STATUS'] == 'Active'),
+        ({'academic_year': year, 'semester': semester, 'is_active': 1},
+         lambda c: (c['ACADEMIC YEAR'], c['SEMESTER'], c['STATUS']) == (year, semester, 'Active')),
+        ({'year_from': years[0], 'year_to': years[-1] - 1}, lambda c: years[0] <= c['ACADEMIC YEAR'] < years[-1]),
+        ({'year_from': years[-1] + 1}, lambda c: False),
+    ]
+    for kwargs, keep in cases:
+        assert ids_at(course, course_index.find_course_offsets(**kwargs)) == brute_force_ids(courses, keep)
+    for c in courses:
+        assert course.read_course_at(course_index.find_course_offset_by_id(c['COURSE ID']))['COURSE ID'] == c['COURSE ID']
+
+def test_term_summary_tracks_writes(main_copy):
+    from module import course, course_index, bin_backend
+
+    def brute_force_summary():
+        summary = {}
+        for c in course.read_all_records_from_file():
+            term = summary.setdefault((c['ACADEMIC YEAR'], c['SEMESTER']),
+                                      {'courses': 0, 'active_courses': 0, 'credits': 0, 'active_credits': 0})
+            term['courses'] += 1
+            term['credits'] += c['CREDIT']
+            if c['STATUS'] == 'Active':
+                term['active_courses'] += 1
+                term['active_credits'] += c['CREDIT']
+        return sorted(summary.items())
+
+    assert course_index.get_term_summary() == brute_force_summary()
+    assert bin_backend.add_course({'COURSE ID': 'IDX999', 'COURSE NAME': 'Index Test', 'CREDIT': 3,
+                                   'ACADEMIC YEAR': 2599, 'SEMESTER': 2, 'STATUS': 'Inactive'})
+    assert course_index.get_term_summary() == brute_force_summary()
+    assert ids_at(course, course_index.find_course_offsets(academic_year=2599, semester=2)) == ['IDX999']
+    assert bin_backend.update_course('IDX999', {'STATUS': 'Active'})
+    assert course_index.get_term_summary(year_from=2599) == [
+        ((2599, 2), {'courses': 1, 'active_courses': 1, 'credits': 3, 'active_credits': 3})]
@@ -0,0 +1,51 @@
+def pick_course(bin_backend, credit_load):
+    """คืน (รหัสวิชา, (หน่วยกิต, ปีการศึกษา, ภาคเรียน)) ของวิชาที่เปิดอยู่วิชาแรก"""
+    terms = credit_load.read_course_terms()
+    course_id = next(c['COURSE ID'] for c in bin_backend.list_courses() if c['STATUS'] == 'Active')
+    return course_id, terms[course_id]
+
+def brute_force_load(register, credit_load, student_id, academic_year, semester):
+    """หน่วยกิตรวมจากการลงทะเบียนที่ยังลงทะเบียนอยู่ นับครั้งเดียวต่อวิชา"""
+    terms = credit_load.read_course_terms()
+    courses = {r['COURSE ID'] for r in register.read_all_records_from_file()
+               if r['STUDENT ID'] == student_id and r['STATUS'] == 'Registered'}
+    return sum(terms[c][0] for c in courses if c in terms and terms[c][1:] == (academic_year, semester))
+
+def test_incremental_index_matches_rebuild(main_copy):
+    from module import credit_load, bin_backend, register
+
+    assert credit_load.get_credit_load_index() == credit_load.build_credit_load_index()
+    course_id, (credit, year, semester) = pick_course(bin_backend, credit_load)
+    student_id = 'T00001'
+    first = bin_backend.add_registration(student_id, course_id, 1)
+    second = bin_backend.add_registration(student_id, course_id, 1)
+    assert credit_load.get_credit_load(student_id, year, semester) == credit
+    for register_id, status in ((second, 0), (first, 0), (second, 1)):
+        assert bin_backend.set_registration_status(register_id, status)
+        assert credit_load.get_credit_load_index() == credit_load.build_credit_load_index()
+        assert (credit_load.get_credit_load(student_id, year, semester)
+                == brute_force_load(register, credit_load, student_id, year, semester))
+
+def test_dropping_duplicate_row_keeps_credits(main_copy):
+    from module import credit_load, bin_backend
+
+    course_id, (credit, year, semester) = pick_course(bin_backend, credit_load)
+    credit_load.get_credit_load_index()
+    first = bin_backend.add_registration('T00001', course_id, 1)
+    latest = bin_backend.add_registration('T00001', course_id, 1)
+    assert bin_backend.set_registration_status(latest, 0)
+    assert credit_load.get_credit_load('T00001', year, semester) == credit
+    assert bin_backend.set_registration_status(first, 0)
+    assert credit_load.get_credit_load('T00001', year, semester) == 0
+
+def test_credit_ceiling(main_copy, monkeypatch):
+    monkeypatch.setenv('COMPRO_MAX_CREDITS', '5')
+    from module import credit_load, bin_backend
+
+    course_id, (credit, year, semester) = pick_course(bin_backend, credit_load)
+    bin_backend.add_registration('T00001', course_id, 1)
+    allowed, message = credit_load.check_credit_limit('T00001', 6 - credit, year, semester)
+    assert not allowed and 'เกินเพดาน' in message
+    assert credit_load.check_credit_limit('T00001', 5 - credit, year, semester)[0]
+    over, _ = credit_load.find_load_outliers(year, semester, max_credits=credit - 1)
+    assert ('T00001', credit) in over
@@ -0,0 +1,31 @@
+import pytest
+
+def aggregates(state):
+    """คืนส่วนของสถานะที่รายงานใช้ (ไม่รวม high-water mark และเวลาที่สร้าง)"""
+    return {
+        'statuses': bytes(state['statuses']).rstrip(b'\x00'),
+        'course_stats': state['course_stats'],
+        'student_stats': state['student_stats'],
+        'date_stats': state['date_stats'],
+    }
+
+@pytest.mark.parametrize('lsm_mode', ['0', '1'])
+def test_cdc_delta_matches_full_rebuild(main_copy, monkeypatch, lsm_mode):
+    monkeypatch.setenv('COMPRO_LSM', lsm_mode)
+    from module import delta_report, register, bin_backend
+
+    delta_report.build_delta_report()
+    records = register.read_all_records_from_file()
+    registered = [r for r in records if r['STATUS'] == 'Registered']
+    dropped = next(r for r in records if r['STATUS'] == 'Dropped')
+    added = bin_backend.add_registration(registered[0]['STUDENT ID'], dropped['COURSE ID'], 1)
+    assert bin_backend.set_registration_status(registered[1]['ID'], 0)
+    assert bin_backend.set_registration_status(dropped['ID'], 1)
+    assert bin_backend.delete_registration(registered[2]['ID'])
+    assert bin_backend.delete_registration(added)
+
+    state, changes, previous, reason = delta_report.refresh_state()
+    assert reason is None and previous is not None
+    assert (changes['add'], changes['update'], changes['delete']) == (1, 2, 2)
+    assert (changes['dropped'], changes['reregistered'], changes['removed']) == (1, 1, 2)
+    assert aggregates(state) == aggregates(delta_report.build_baseline())
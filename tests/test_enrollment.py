@@ -0,0 +1,69 @@
+import os
+
+def pick_unenrolled_pair(bin_backend, enrollment):
+    """คืน (รหัสนักเรียน, รหัสวิชา) ที่เปิดอยู่และยังไม่ได้ลงทะเบียนกัน"""
+    courses = [c['COURSE ID'] for c in bin_backend.list_courses() if c['STATUS'] == 'Active']
+    for student in bin_backend.list_students():
+        for course_id in courses:
+            if not enrollment.is_enrolled(student['STUDENT ID'], course_id):
+                return student['STUDENT ID'], course_id
+
+def assert_matches_rebuild(enrollment):
+    assert enrollment.get_enrollment_index() == enrollment.build_enrollment_index()
+
+def test_incremental_index_matches_rebuild(main_copy, restart):
+    from module import enrollment, bin_backend, index_store
+
+    assert_matches_rebuild(enrollment)
+    student_id, course_id = pick_unenrolled_pair(bin_backend, enrollment)
+    first = bin_backend.add_registration(student_id, course_id, 1)
+    assert_matches_rebuild(enrollment)
+    # record ที่สองของคู่เดิม (เช่นจากการนำเข้า) และ record ที่ถอนแล้ว
+    second = bin_backend.add_registration(student_id, course_id, 1)
+    dropped = bin_backend.add_registration(student_id, course_id, 0)
+    assert_matches_rebuild(enrollment)
+    for register_id, status in ((second, 0), (first, 0), (dropped, 1), (first, 1)):
+        assert bin_backend.set_registration_status(register_id, status)
+        assert_matches_rebuild(enrollment)
+    expected = enrollment.get_enrollment_index()
+    assert os.path.exists(index_store.delta_file_path('enrollment'))
+
+    restart()
+    from module import enrollment
+    builds = []
+    original = enrollment.build_enrollment_index
+    enrollment.build_enrollment_index = lambda *args: builds.append(1) or original(*args)
+    assert enrollment.get_enrollment_index() == expected
+    assert builds == []
+
+def test_dropping_one_of_two_active_rows_keeps_the_seat(main_copy):
+    from module import enrollment, bin_backend
+
+    student_id, course_id = pick_unenrolled_pair(bin_backend, enrollment)
+    seats = enrollment.get_seats_taken(course_id)
+    first = bin_backend.add_registration(student_id, course_id, 1)
+    latest = bin_backend.add_registration(student_id, course_id, 1)
+    assert enrollment.get_seats_taken(course_id) == seats + 1
+
+    assert bin_backend.set_registration_status(latest, 0)
+    assert enrollment.is_enrolled(student_id, course_id)
+    assert enrollment.get_seats_taken(course_id) == seats + 1
+    assert bin_backend.set_registration_status(first, 0)
+    assert not enrollment.is_enrolled(student_id, course_id)
+    assert enrollment.get_seats_taken(course_id) == seats
+
+def test_check_enrollment_rejects_duplicates_and_full_courses(main_copy, monkeypatch):
+    monkeypatch.setenv('COMPRO_MAX_CREDITS', '0')
+    from module import enrollment, bin_backend
+
+    student_id, course_id = pick_unenrolled_pair(bin_backend, enrollment)
+    assert enrollment.check_enrollment(student_id, course_id)[0]
+    bin_backend.add_registration(student_id, course_id, 1)
+    allowed, message = enrollment.check_enrollment(student_id, course_id)
+    assert not allowed and 'อยู่แล้ว' in message
+
+    other = next(s['STUDENT ID'] for s in bin_backend.list_students()
+                 if not enrollment.is_enrolled(s['STUDENT ID'], course_id))
+    assert enrollment.set_course_capacity(course_id, enrollment.get_seats_taken(course_id))
+    allowed, message = enrollment.check_enrollment(other, course_id)
+    assert not allowed and 'เต็ม' in message
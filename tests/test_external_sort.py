@@ -0,0 +1,75 @@
+import os
+import struct
+
+import pytest
+
+def brute_force(external_sort, order, reverse=False):
+    """เรียง record ทั้งไฟล์ในหน่วยความจำด้วย sorted ใช้เทียบผลของ external sort"""
+    file_path, record_size, key_fn = external_sort.SORT_ORDERS[order]
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    records = [data[pos:pos + record_size] for pos in range(0, len(data) - record_size + 1, record_size)]
+    return sorted(records, key=key_fn, reverse=reverse)
+
+@pytest.mark.parametrize('order', ['student_last_name', 'registration_date'])
+@pytest.mark.parametrize('reverse', [False, True])
+def test_spilled_runs_match_in_memory_sort(main_copy, monkeypatch, tmp_path, order, reverse):
+    sort_dir = tmp_path / 'sort'
+    sort_dir.mkdir()
+    from module import external_sort
+
+    # งบเล็กจนต้องเขียน run หลายไฟล์ และ fan-in ต่ำจน merge หลายรอบ
+    monkeypatch.setattr(external_sort, 'SORT_TMP_DIR', str(sort_dir))
+    monkeypatch.setattr(external_sort, 'MERGE_FANIN', 3)
+    runs = []
+    original = external_sort.write_run
+    monkeypatch.setattr(external_sort, 'write_run',
+                        lambda *args: runs.append(1) or original(*args))
+
+    expected = brute_force(external_sort, order, reverse)
+    assert list(external_sort.sort_records(order, reverse, memory_budget=1024)) == expected
+    assert len(runs) > external_sort.MERGE_FANIN
+    assert os.listdir(sort_dir) == []
+
+def test_within_budget_sorts_without_temp_files(main_copy, monkeypatch, tmp_path):
+    sort_dir = tmp_path / 'sort'
+    sort_dir.mkdir()
+    from module import external_sort
+
+    monkeypatch.setattr(external_sort, 'SORT_TMP_DIR', str(sort_dir))
+    monkeypatch.setattr(external_sort, 'write_run', lambda *args: pytest.fail("ไม่ควรเขียน run"))
+    assert list(external_sort.sort_records('student_last_name')) == brute_force(external_sort, 'student_last_name')
+    assert os.listdir(sort_dir) == []
+
+def test_overlay_replaces_and_drops_pending_records(main_copy, monkeypatch):
+    monkeypatch.setenv('COMPRO_LSM', '1')
+    from module import external_sort, lsm, register, bin_backend
+
+    records = register.read_records_from_disk()
+    changed, removed = records[0], records[1]
+    added = bin_backend.add_registration(removed['STUDENT ID'], changed['COURSE ID'], 1)
+    assert bin_backend.set_registration_status(changed['ID'], 0)
+    assert bin_backend.delete_registration(removed['ID'])
+    pending = lsm.overlay()
+    assert lsm.has_pending()
+
+    key_fn = external_sort.registration_date_key
+    latest = {struct.unpack_from(lsm.REGISTER_ID_FORMAT, data)[0]: data
+              for data in brute_force(external_sort, 'registration_date')}
+    latest.update(pending)
+    for reverse in (False, True):
+        expected = sorted((data for data in latest.values() if not lsm.is_tombstone(data)),
+                          key=key_fn, reverse=reverse)
+        result = list(external_sort.sort_records('registration_date', reverse, memory_budget=1024,
+                                                 overlay=pending))
+        assert result == expected
+        ids = [struct.unpack_from(lsm.REGISTER_ID_FORMAT, data)[0] for data in result]
+        assert added in ids and removed['ID'] not in ids
+
+def test_thai_sort_key_follows_dictionary_order(main_copy):
+    from module.external_sort import thai_sort_key
+
+    # สระหน้าเรียงตามพยัญชนะที่ตามมา วรรณยุกต์ตัดสินเมื่อตัวอักษรเท่ากัน
+    words = ['ไก่', 'กา', 'เกม', 'ขาว', 'ก้า', 'กาง', 'Abc', 'abd']
+    assert sorted(words, key=thai_sort_key) == ['Abc', 'abd', 'กา', 'ก้า', 'กาง', 'เกม', 'ไก่', 'ขาว']
+    assert thai_sort_key('กา') < thai_sort_key('กาก')
@@ -0,0 +1,48 @@
+import os
+import struct
+
+def archived_student(segments):
+    """จัดเก็บภาคเรียนแรกที่มีข้อมูล คืน (คีย์ภาคเรียน, รหัสนักเรียนที่มี record ใน archive)"""
+    key = next(iter(segments.summarize_hot_terms()))
+    assert segments.archive_terms([key])
+    record_data = segments.read_archived_term(key)[0]
+    student_id = struct.unpack(segments.REGISTRATION_RECORD_FORMAT, record_data)[1].strip(b'\x00').decode('utf-8')
+    return key, student_id
+
+def test_cascade_delete_removes_archived_dependents(main_copy, monkeypatch):
+    monkeypatch.setattr('builtins.input', lambda prompt='': '1')
+    from module import segments, integrity, bin_backend
+
+    _, student_id = archived_student(segments)
+    assert integrity.resolve_dependent_registrations('student', student_id)
+    assert bin_backend.delete_student(student_id)
+    assert segments.find_archived_dependents('student', student_id) == {}
+    issues = integrity.run_fsck()
+    assert issues['orphaned'] == [] and issues['duplicate'] == []
+
+def test_fsck_reports_orphans_in_archive(main_copy):
+    from module import segments, integrity, bin_backend
+
+    key, student_id = archived_student(segments)
+    assert bin_backend.delete_student(student_id)
+    orphaned = integrity.run_fsck()['orphaned']
+    assert any(label == f"segments/{key}" and student_id in message for label, _, message in orphaned)
+
+def test_incremental_refs_match_rebuild(main_copy, restart):
+    from module import integrity, bin_backend, index_store
+
+    assert integrity.get_registration_refs() == integrity.build_registration_refs()
+    course_id = next(c['COURSE ID'] for c in bin_backend.list_courses() if c['STATUS'] == 'Active')
+    for student_id in ('T00001', 'T00002', 'T00001'):
+        bin_backend.add_registration(student_id, course_id, 1)
+        assert integrity.get_registration_refs() == integrity.build_registration_refs()
+    assert os.path.exists(index_store.delta_file_path('registration_refs'))
+    expected = integrity.get_registration_refs()
+
+    restart()
+    from module import integrity
+    builds = []
+    original = integrity.build_registration_refs
+    integrity.build_registration_refs = lambda *args: builds.append(1) or original(*args)
+    assert integrity.get_registration_refs() == expected
+    assert builds == []
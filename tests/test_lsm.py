@@ -0,0 +1,67 @@
+import pytest
+
+def registration_view(register):
+    """คืนการลงทะเบียนทั้งหมดที่ผู้ใช้เห็น (รวมการเขียนที่ค้างในโหมด LSM) เรียงตาม ID"""
+    return sorted((r['ID'], r['STUDENT ID'], r['COURSE ID'], r['REGISTRATION DATE'], r['STATUS'])
+                  for r in register.read_all_records_from_file())
+
+def apply_writes(register, bin_backend):
+    """เพิ่ม แก้สถานะ และลบการลงทะเบียนผ่าน backend คืน (ID ที่เพิ่ม, ID ที่ลบ)"""
+    records = register.read_all_records_from_file()
+    registered = next(r for r in records if r['STATUS'] == 'Registered')
+    removed = next(r for r in records if r['ID'] != registered['ID'])
+    added = bin_backend.add_registration(removed['STUDENT ID'], registered['COURSE ID'], 1)
+    assert added is not None
+    assert bin_backend.set_registration_status(registered['ID'], 0)
+    assert bin_backend.delete_registration(removed['ID'])
+    # แก้ record ที่ยังค้างอยู่ใน LSM ซ้ำ รุ่นใหม่กว่าต้องชนะ
+    assert bin_backend.set_registration_status(added, 0)
+    return added, removed['ID']
+
+def test_merge_into_base_matches_overlay_view(main_copy, monkeypatch):
+    monkeypatch.setenv('COMPRO_LSM', '1')
+    from module import lsm, register, bin_backend
+
+    base_bytes = (main_copy / 'registration.bin').read_bytes()
+    added, removed = apply_writes(register, bin_backend)
+    expected = registration_view(register)
+
+    assert lsm.has_pending()
+    assert (main_copy / 'registration.bin').read_bytes() == base_bytes
+    ids = [row[0] for row in expected]
+    assert added in ids and removed not in ids
+    assert next(row for row in expected if row[0] == added)[4] == 'Dropped'
+
+    assert lsm.merge_into_base() > 0
+    assert not lsm.has_pending()
+    assert registration_view(register) == expected
+    assert sorted((r['ID'], r['STUDENT ID'], r['COURSE ID'], r['REGISTRATION DATE'], r['STATUS'])
+                  for r in register.read_records_from_disk()) == expected
+
+def test_pending_writes_survive_restart(main_copy, monkeypatch, restart):
+    monkeypatch.setenv('COMPRO_LSM', '1')
+    from module import lsm, register, bin_backend
+
+    # flush memtable บ่อยเพื่อให้มีทั้ง segment และ WAL แล้วรวม segment
+    monkeypatch.setattr(lsm, 'MEMTABLE_LIMIT', 2)
+    apply_writes(register, bin_backend)
+    lsm.compact_segments()
+    expected = registration_view(register)
+
+    restart()
+    from module import lsm, register
+    assert lsm.has_pending()
+    assert registration_view(register) == expected
+
+@pytest.mark.parametrize('kind', ['student', 'course'])
+def test_cascade_delete_removes_pending_dependents(main_copy, monkeypatch, kind):
+    monkeypatch.setenv('COMPRO_LSM', '1')
+    monkeypatch.setattr('builtins.input', lambda prompt='': '1')
+    from module import register, bin_backend, integrity
+
+    apply_writes(register, bin_backend)
+    target = register.read_all_records_from_file()[0]
+    key = target['STUDENT ID'] if kind == 'student' else target['COURSE ID']
+    assert integrity.resolve_dependent_registrations(kind, key)
+    field = 'STUDENT ID' if kind == 'student' else 'COURSE ID'
+    assert all(r[field] != key for r in register.read_all_records_from_file())
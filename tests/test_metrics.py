@@ -0,0 +1,35 @@
+import urllib.request
+
+def test_disabled_metrics_leave_functions_unwrapped(main_copy):
+    from module import metrics
+
+    def work():
+        return 1
+
+    assert not metrics.ENABLED
+    assert metrics.timed('storage_operation_seconds', op='x')(work) is work
+    metrics.inc('cache_requests_total')
+    assert metrics.render_prometheus() == '\n'
+
+def test_enabled_metrics_count_reads_writes_and_latency(main_copy, tmp_path, monkeypatch):
+    metrics_file = tmp_path / 'metrics.prom'
+    monkeypatch.setenv('COMPRO_METRICS', '1')
+    monkeypatch.setenv('COMPRO_METRICS_FILE', str(metrics_file))
+    from module import metrics, student, bin_backend
+
+    records = student.read_all_records_from_file()
+    assert bin_backend.update_student(records[0]['STUDENT ID'], {'FIRST NAME': 'Metric'})
+    metrics.write_metrics_file()
+    text = metrics_file.read_text(encoding='utf-8')
+    assert f'compro_records_decoded_total{{file="student.bin"}} {len(records)}' in text
+    assert 'compro_storage_bytes_written_total{file="student.bin"}' in text
+    assert '# TYPE compro_storage_operation_seconds histogram' in text
+    assert 'compro_storage_operation_seconds_count{file="student.bin",op="rewrite"} 1' in text
+
+    server = metrics.start_metrics_server(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert 'compro_records_decoded_total' in response.read().decode('utf-8')
+    finally:
+        server.shutdown()
@@ -0,0 +1,68 @@
+import pytest
+
+def run_menu(monkeypatch, module, report_name, view, answers):
+    """เรียกเมนูกรองด้วยคำตอบที่กำหนด คืนรายการ record ที่ส่งให้รายงาน (None หากไม่ได้แสดงรายงาน)"""
+    shown = []
+    monkeypatch.setattr(module, report_name, lambda records, title="": shown.append(records))
+    answers = iter(answers)
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    view()
+    return shown[0] if shown else None
+
+def ids(records, key):
+    return sorted(r[key] for r in records)
+
+def test_registration_filter_menu_keeps_numbered_choices(main_copy, monkeypatch):
+    from module import register
+
+    registrations = register.read_all_records_from_file()
+    sample = registrations[0]
+    cases = [
+        (['1', sample['STUDENT ID']], lambda r: r['STUDENT ID'] == sample['STUDENT ID']),
+        (['2', sample['COURSE ID']], lambda r: r['COURSE ID'] == sample['COURSE ID']),
+        (['3'], lambda r: r['STATUS'] == 'Registered'),
+        (['5', f"course={sample['COURSE ID']}", '', '', ''], lambda r: r['COURSE ID'] == sample['COURSE ID']),
+    ]
+    for answers, keep in cases:
+        shown = run_menu(monkeypatch, register, 'print_registration_report',
+                         register.view_filtered_registrations, answers)
+        assert ids(shown, 'ID') == ids(filter(keep, registrations), 'ID')
+    assert run_menu(monkeypatch, register, 'print_registration_report',
+                    register.view_filtered_registrations, ['4']) is None
+
+def test_course_filter_menu_keeps_numbered_choices(main_copy, monkeypatch):
+    from module import course
+
+    courses = course.read_all_records_from_file()
+    year, semester = courses[0]['ACADEMIC YEAR'], courses[0]['SEMESTER']
+    cases = [
+        (['1', str(year)], lambda c: c['ACADEMIC YEAR'] == year),
+        (['2', str(semester)], lambda c: c['SEMESTER'] == semester),
+        (['3'], lambda c: c['STATUS'] == 'Active'),
+        (['4', str(year), str(semester)], lambda c: (c['ACADEMIC YEAR'], c['SEMESTER']) == (year, semester)),
+        (['5', str(year - 1), str(year)], lambda c: year - 1 <= c['ACADEMIC YEAR'] <= year),
+        (['8', f"year={year}", '', '', ''], lambda c: c['ACADEMIC YEAR'] == year),
+    ]
+    for answers, keep in cases:
+        shown = run_menu(monkeypatch, course, 'print_course_report', course.view_filtered_courses, answers)
+        assert ids(shown, 'COURSE ID') == ids(filter(keep, courses), 'COURSE ID')
+    assert run_menu(monkeypatch, course, 'print_course_report', course.view_filtered_courses, ['7']) is None
+
+def test_student_filter_menu_keeps_numbered_choices(main_copy, monkeypatch):
+    from module import student
+
+    students = student.read_all_records_from_file()
+    if not students:
+        pytest.skip("ไม่มีข้อมูลนักเรียน")
+    sample = students[0]
+    cases = [
+        (['1', sample['MAJOR'].upper()], lambda s: s['MAJOR'].lower() == sample['MAJOR'].lower()),
+        (['2', str(sample['YEAR'])], lambda s: s['YEAR'] == sample['YEAR']),
+        (['3', 'inactive'], lambda s: s['STATUS'] == 'Inactive'),
+        (['4', f"year={sample['YEAR']} or status=inactive"],
+         lambda s: s['YEAR'] == sample['YEAR'] or s['STATUS'] == 'Inactive'),
+    ]
+    for answers, keep in cases:
+        shown = run_menu(monkeypatch, student, 'print_student_report', student.view_filtered_students, answers)
+        expected = ids(filter(keep, students), 'STUDENT ID')
+        assert (ids(shown, 'STUDENT ID') if shown else []) == expected
@@ -0,0 +1,68 @@
+import os
+from datetime import datetime
+
+def assert_matches_rebuild(register):
+    assert register.get_registration_order() == register.build_registration_order()
+
+def active_course(bin_backend):
+    return next(c['COURSE ID'] for c in bin_backend.list_courses() if c['STATUS'] == 'Active')
+
+def test_incremental_order_matches_rebuild(main_copy, restart, monkeypatch):
+    from module import register, bin_backend, index_store
+
+    # ดัชนีนี้เล็กมาก ปิดการรวม delta เพื่อให้เล่น delta ซ้ำตอนโหลดใหม่
+    monkeypatch.setattr(index_store, 'DELTA_COMPACT_RATIO', 1000)
+
+    assert_matches_rebuild(register)
+    course_id = active_course(bin_backend)
+    ids = [bin_backend.add_registration('T00001', course_id, 1) for _ in range(3)]
+    assert_matches_rebuild(register)
+    assert register.get_registration_order()['sorted']
+
+    # ลบ record กลางไฟล์และ record สุดท้าย
+    for register_id in (ids[1], ids[2]):
+        assert bin_backend.delete_registration(register_id)
+        assert_matches_rebuild(register)
+    assert register.find_registration(ids[0])[0]['ID'] == ids[0]
+    assert os.path.exists(index_store.delta_file_path('registration_order'))
+    expected = register.get_registration_order()
+
+    restart()
+    from module import register
+    builds = []
+    original = register.build_registration_order
+    register.build_registration_order = lambda *args: builds.append(1) or original(*args)
+    assert register.get_registration_order() == expected
+    assert builds == []
+
+def test_out_of_order_id_marks_file_unsorted(main_copy):
+    from module import register, bin_backend
+
+    register.get_registration_order()
+    first_id = register.build_registration_order()['last_id']
+    assert register.append_registration(first_id, 'T00001', active_course(bin_backend),
+                                        datetime.now().timestamp(), 1)
+    assert not register.get_registration_order()['sorted']
+    assert_matches_rebuild(register)
+
+def test_status_change_keeps_status_independent_indexes(main_copy, restart, monkeypatch):
+    from module import register, integrity, bin_backend, index_store
+
+    monkeypatch.setattr(index_store, 'DELTA_COMPACT_RATIO', 1000)
+
+    register.get_registration_order()
+    integrity.get_registration_refs()
+    register_id = bin_backend.add_registration('T00001', active_course(bin_backend), 1)
+    assert bin_backend.set_registration_status(register_id, 0)
+    for name in register.STATUS_INDEPENDENT_INDEXES:
+        assert os.path.exists(index_store.delta_file_path(name))
+
+    restart()
+    from module import register, integrity
+    builds = []
+    for module, name in ((register, 'build_registration_order'), (integrity, 'build_registration_refs')):
+        original = getattr(module, name)
+        setattr(module, name, lambda *args, original=original: builds.append(1) or original(*args))
+    register.get_registration_order()
+    integrity.get_registration_refs()
+    assert builds == []
@@ -0,0 +1,19 @@
+def run_report_menu(monkeypatch, report, answers):
+    answers = iter(answers)
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    report.generate_report()
+
+def test_report_menu_keeps_back_at_three(main_copy, monkeypatch, capsys):
+    from module import report, roster, delta_report
+
+    calls = []
+    monkeypatch.setattr(roster, 'export_rosters_menu', lambda: calls.append('roster'))
+    monkeypatch.setattr(delta_report, 'build_delta_report', lambda: calls.append('delta') or "")
+    monkeypatch.setattr(report, 'write_report', lambda text, path: calls.append(path))
+
+    run_report_menu(monkeypatch, report, ['3'])
+    assert calls == []
+    assert "3. ย้อนกลับไปหน้าแรก" in capsys.readouterr().out
+
+    run_report_menu(monkeypatch, report, ['4', '5', '3'])
+    assert calls == ['roster', 'delta', delta_report.REPORT_DELTA_FILE_PATH]
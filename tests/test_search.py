@@ -0,0 +1,75 @@
+import os
+
+def brute_force_prefix(records, fields, query):
+    """ลำดับ record ที่มีคำใดคำหนึ่งในฟิลด์ข้อความขึ้นต้นด้วย query (ไม่สนตัวพิมพ์)"""
+    query = query.casefold()
+    return {record_no for record_no, record in enumerate(records)
+            if any(word.casefold().startswith(query) for field in fields for word in record[field].split())}
+
+def test_prefix_search_matches_brute_force(main_copy):
+    from module import search, student, course
+
+    students = student.read_all_records_from_file()
+    for query in ('su', 'Won', 'supaporn wong', 'KH'):
+        found = {offset // search.STUDENT_RECORD_SIZE for offset, score in search.search_students(query, limit=500)
+                 if score == 1.0}
+        if ' ' not in query:
+            assert found == brute_force_prefix(students, ('FIRST NAME', 'LAST NAME'), query)
+        else:
+            assert found and all(students[no]['FIRST NAME'].casefold().startswith('supaporn') for no in found)
+    courses = course.read_all_records_from_file()
+    found = {offset // search.COURSE_RECORD_SIZE for offset, score in search.search_courses('machine', limit=500)
+             if score == 1.0}
+    assert found == brute_force_prefix(courses, ('COURSE NAME',), 'machine')
+
+def test_fuzzy_search_tolerates_typos(main_copy):
+    from module import search, student
+
+    students = student.read_all_records_from_file()
+    target = next(no for no, s in enumerate(students) if s['LAST NAME'] == 'Suwannarat')
+    results = search.search_students('Suwanarat')
+    assert target * search.STUDENT_RECORD_SIZE in [offset for offset, _ in results]
+    assert all(0 < score < 1.0 for _, score in results)
+
+def test_appended_index_matches_rebuild(main_copy):
+    from module import search, bin_backend
+
+    search.get_student_search_index()
+    for i, (first, last) in enumerate((('Ploy', 'Suwan'), ('Somchai', 'Wongsa'), ('Ánna', 'Kh'))):
+        assert bin_backend.add_student({'STUDENT ID': f'T{i:05d}', 'FIRST NAME': first, 'LAST NAME': last,
+                                        'MAJOR': 'CS', 'YEAR': 1, 'STATUS': 'Active'})
+    incremental = search.get_student_search_index()
+    rebuilt = search.build_search_index(search.STUDENT_FILE_PATH, search.STUDENT_RECORD_FORMAT, [1, 2])
+    assert incremental['record_count'] == rebuilt['record_count']
+    assert sorted(incremental['prefix']) == rebuilt['prefix']
+    for query in ('su', 'anna', 'wongsa', 'Somchay', 'kh'):
+        assert (search.search_records(incremental, query, search.STUDENT_RECORD_SIZE, 100)
+                == search.search_records(rebuilt, query, search.STUDENT_RECORD_SIZE, 100))
+
+def test_appended_keys_replayed_from_delta_log(main_copy, restart):
+    from module import search, bin_backend, index_store
+
+    search.get_student_search_index()
+    for i in range(3):
+        assert bin_backend.add_student({'STUDENT ID': f'T{i:05d}', 'FIRST NAME': f'Zyxwv{i}', 'LAST NAME': 'Delta',
+                                        'MAJOR': 'CS', 'YEAR': 1, 'STATUS': 'Active'})
+    assert os.path.exists(index_store.delta_file_path('student_search'))
+    expected = search.search_students('Zyxwv1')
+
+    restart()
+    from module import search
+    builds = []
+    original = search.build_search_index
+    search.build_search_index = lambda *args: builds.append(1) or original(*args)
+    assert search.search_students('Zyxwv1') == expected
+    assert expected and builds == []
+
+def test_full_save_compacts_delta_log(main_copy):
+    from module import search, bin_backend, index_store
+
+    index = search.get_student_search_index()
+    assert bin_backend.add_student({'STUDENT ID': 'T00001', 'FIRST NAME': 'Compact', 'LAST NAME': 'Me',
+                                    'MAJOR': 'CS', 'YEAR': 1, 'STATUS': 'Active'})
+    assert os.path.exists(index_store.delta_file_path('student_search'))
+    index_store.save_index('student_search', [search.STUDENT_FILE_PATH], index)
+    assert not os.path.exists(index_store.delta_file_path('student_search'))
@@ -0,0 +1,39 @@
+import sys
+
+def archive_first_term(segments):
+    """จัดเก็บภาคเรียนแรกที่มีข้อมูล คืนจำนวน record ที่จัดเก็บ"""
+    key = next(iter(segments.summarize_hot_terms()))
+    assert segments.archive_terms([key])
+    return len(segments.read_archived_term(key))
+
+def test_list_registrations_and_migration_include_archived_terms(main_copy, tmp_path, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'migrate_to_sqlite', raising=False)
+    from module import segments, bin_backend, sqlite_backend
+    import migrate_to_sqlite
+
+    before = {r['ID'] for r in bin_backend.list_registrations()}
+    assert archive_first_term(segments)
+    assert {r['ID'] for r in bin_backend.list_registrations()} == before
+
+    db_path = str(tmp_path / 'migrated.db')
+    try:
+        migrate_to_sqlite.migrate(db_path)
+        assert sqlite_backend.count_rows(db_path)['registrations'] == len(before)
+    finally:
+        sqlite_backend.close()
+
+def test_register_report_includes_archived_terms(main_copy, monkeypatch):
+    from module import segments, report
+
+    total = len(report.read_all_registrations())
+    archived = archive_first_term(segments)
+    assert len(report.read_all_registrations()) == total - archived
+    assert len(report.read_historical_registrations()) == total
+
+    rendered = []
+    monkeypatch.setattr(report, 'print_register_report',
+                        lambda records, *args: rendered.append(records) or "")
+    answers = iter(['2', '3'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    report.generate_report()
+    assert len(rendered[0]) == total
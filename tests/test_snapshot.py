@@ -0,0 +1,40 @@
+import os
+import pytest
+
+def snapshot_view(snapshot, generation):
+    """คืน (การลงทะเบียน, รหัสวิชา, นักเรียน) ของ snapshot ในรูปที่เปรียบเทียบได้"""
+    registrations, courses, students = snapshot.load_snapshot_data(generation)
+    return (sorted((r['REGISTER ID'], r['STUDENT ID'], r['COURSE ID'], r['STATUS_CODE']) for r in registrations),
+            sorted(courses),
+            sorted((s['STUDENT ID'], s['FIRST NAME']) for s in students))
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+@pytest.mark.parametrize('lsm_mode', ['0', '1'])
+def test_snapshot_isolated_from_later_writes(main_copy, monkeypatch, lsm_mode):
+    monkeypatch.setenv('COMPRO_LSM', lsm_mode)
+    from module import snapshot, register, bin_backend
+
+    generation = snapshot.create_snapshot()['generation']
+    snapshot_dir = snapshot.snapshot_path(generation)
+    before = snapshot_view(snapshot, generation)
+    files_before = {name: read_file(os.path.join(snapshot_dir, name))
+                    for name in snapshot.DATA_FILES if os.path.exists(os.path.join(snapshot_dir, name))}
+
+    # แก้ข้อมูลทุกรูปแบบหลังสร้าง snapshot: เขียนทับ in-place, ต่อท้าย, ลบ record และเขียนไฟล์ใหม่
+    records = register.read_all_records_from_file()
+    registered = next(r for r in records if r['STATUS'] == 'Registered')
+    assert bin_backend.set_registration_status(registered['ID'], 0)
+    assert bin_backend.add_registration(registered['STUDENT ID'], registered['COURSE ID'], 1) is not None
+    assert bin_backend.delete_registration(records[-1]['ID'])
+    student = bin_backend.list_students()[0]
+    assert bin_backend.update_student(student['STUDENT ID'], {'FIRST NAME': 'Changed'})
+
+    assert snapshot_view(snapshot, generation) == before
+    for name, data in files_before.items():
+        assert read_file(os.path.join(snapshot_dir, name)) == data
+    current = sorted((r['ID'], r['STUDENT ID'], r['COURSE ID'], 1 if r['STATUS'] == 'Registered' else 0)
+                     for r in register.read_all_records_from_file())
+    assert current != before[0]
@@ -0,0 +1,30 @@
+import pytest
+
+def test_backends_share_operations(main_copy):
+    from module import storage_backend, sqlite_backend
+
+    try:
+        for name in storage_backend.BACKEND_MODULES:
+            backend = storage_backend.get_backend(name)
+            assert all(op in backend for op in storage_backend.BACKEND_OPERATIONS)
+    finally:
+        sqlite_backend.close()
+    with pytest.raises(ValueError):
+        storage_backend.get_backend('postgres')
+
+def test_sqlite_backend_round_trip_leaves_cdc_log_alone(main_copy, tmp_path, monkeypatch):
+    monkeypatch.setenv('COMPRO_SQLITE_PATH', str(tmp_path / 'backend.db'))
+    from module import storage_backend, cdc
+
+    backend = storage_backend.get_backend('sqlite')
+    events = cdc.event_count()
+    try:
+        register_id = backend['add_registration']('T00001', 'CS101', 1)
+        assert backend['get_registration'](register_id)['STATUS'] == 'Registered'
+        assert backend['set_registration_status'](register_id, 0)
+        assert backend['get_registration'](register_id)['STATUS'] == 'Dropped'
+        assert backend['delete_registration'](register_id)
+        assert backend['get_registration'](register_id) is None
+    finally:
+        backend['close']()
+    assert cdc.event_count() == events
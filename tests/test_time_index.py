@@ -0,0 +1,55 @@
+import os
+
+def assert_matches_rebuild(time_index):
+    index = time_index.get_time_index()
+    rebuilt = time_index.build_time_index()
+    assert index['daily'] == rebuilt['daily'] and index['weekly'] == rebuilt['weekly']
+    assert index['record_count'] == rebuilt['record_count']
+    timestamps = sorted(rebuilt['timestamps'])
+    for start, end in ((None, None), (timestamps[0], timestamps[len(timestamps) // 2]), (timestamps[-1], None)):
+        # record ที่เวลาเท่ากันอาจเรียงต่างกันได้ จึงเทียบแบบไม่สนลำดับภายในเวลาเดียวกัน
+        assert (sorted(time_index.find_registration_offsets_between(start, end))
+                == sorted(rebuilt_offsets(time_index, rebuilt, start, end)))
+
+def rebuilt_offsets(time_index, rebuilt, start, end):
+    return [record_no * time_index.REGISTRATION_RECORD_SIZE
+            for timestamp, record_no in zip(rebuilt['timestamps'], rebuilt['records'])
+            if (start is None or timestamp >= start) and (end is None or timestamp < end)]
+
+def test_incremental_index_matches_rebuild(main_copy, restart):
+    from module import time_index, bin_backend, index_store
+
+    assert_matches_rebuild(time_index)
+    course_id = next(c['COURSE ID'] for c in bin_backend.list_courses() if c['STATUS'] == 'Active')
+    newest = bin_backend.add_registration('T00001', course_id, 1)
+    # record ที่ต่อท้ายด้วยเวลาเก่ากว่า record ล่าสุด (เช่นจากการนำเข้า)
+    oldest = min(time_index.build_time_index()['timestamps'])
+    late = bin_backend.add_registration('T00001', course_id, 0, registration_date=oldest + 1)
+    assert time_index.get_time_index()['late']
+    assert_matches_rebuild(time_index)
+    for register_id, status in ((newest, 0), (late, 1)):
+        assert bin_backend.set_registration_status(register_id, status)
+        assert_matches_rebuild(time_index)
+    assert os.path.exists(index_store.delta_file_path('registration_time'))
+    expected = time_index.find_registration_offsets_between(None, None)
+
+    restart()
+    from module import time_index
+    builds = []
+    original = time_index.build_time_index
+    time_index.build_time_index = lambda *args: builds.append(1) or original(*args)
+    assert time_index.find_registration_offsets_between(None, None) == expected
+    assert builds == []
+
+def test_late_entries_fold_into_arrays(main_copy, monkeypatch):
+    from module import time_index, bin_backend
+
+    monkeypatch.setattr(time_index, 'LATE_ENTRY_LIMIT', 1)
+    course_id = next(c['COURSE ID'] for c in bin_backend.list_courses() if c['STATUS'] == 'Active')
+    oldest = min(time_index.build_time_index()['timestamps'])
+    for offset in (3, 1):
+        bin_backend.add_registration('T00001', course_id, 1, registration_date=oldest + offset)
+    index = time_index.get_time_index()
+    assert index['late'] == []
+    assert list(index['timestamps']) == sorted(index['timestamps'])
+    assert_matches_rebuild(time_index)
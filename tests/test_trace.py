@@ -0,0 +1,36 @@
+import json
+import sys
+
+def test_trace_file_has_nested_spans_with_record_counts(main_copy, tmp_path, monkeypatch):
+    trace_file = tmp_path / 'trace.json'
+    monkeypatch.setenv('COMPRO_TRACE', str(trace_file))
+    from module import trace, report
+
+    answers = iter(['2', '3'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    monkeypatch.setattr(report, 'write_report', lambda text, path: None)
+    report.generate_report()
+    trace.write_trace_file()
+
+    events = json.loads(trace_file.read_text(encoding='utf-8'))['traceEvents']
+    spans = {event['name']: event for event in events if event['ph'] == 'X'}
+    outer, inner = spans['registration report'], spans['load report data']
+    assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+    assert inner['args']['records'] > 0
+    assert spans['read registrations']['args']['records'] > 0
+    assert 'render registration report' in spans
+
+def test_trace_disabled_values(main_copy, monkeypatch, restart):
+    for value in ('0', 'off', ''):
+        monkeypatch.setenv('COMPRO_TRACE', value)
+        restart()
+        from module import trace
+        assert not trace.ENABLED
+
+def test_main_trace_argument(main_copy, monkeypatch):
+    monkeypatch.delitem(sys.modules, 'main', raising=False)
+    import main
+
+    assert main.parse_trace_argument([]) == (False, None)
+    assert main.parse_trace_argument(['--trace']) == (True, None)
+    assert main.parse_trace_argument(['--trace', 'out.json']) == (True, 'out.json')
@@ -0,0 +1,56 @@
+import pytest
+
+def pick_full_course(register, bin_backend, enrollment, waiter_count):
+    """เลือกวิชาที่เปิดอยู่ที่มีการลงทะเบียนอย่างน้อยหนึ่งที่ แล้วตั้งจำนวนที่นั่งให้เต็มพอดี
+
+    คืน (รหัสวิชา, จำนวนที่นั่ง, ID การลงทะเบียนหนึ่งรายการของวิชา, รหัสนักเรียนที่เข้าคิวได้)
+    """
+    students = [s['STUDENT ID'] for s in bin_backend.list_students() if s['STATUS'] == 'Active']
+    registrations = register.read_all_records_from_file()
+    for course in bin_backend.list_courses():
+        course_id = course['COURSE ID']
+        holders = [r for r in registrations if r['COURSE ID'] == course_id and r['STATUS'] == 'Registered']
+        waiters = [sid for sid in students if not enrollment.is_enrolled(sid, course_id)]
+        if course['STATUS'] == 'Active' and holders and len(waiters) >= waiter_count:
+            seats = enrollment.get_seats_taken(course_id)
+            assert enrollment.set_course_capacity(course_id, seats)
+            return course_id, seats, holders[0]['ID'], waiters[:waiter_count]
+    pytest.skip("ไม่มีรายวิชาที่ใช้ทดสอบคิวรอได้")
+
+@pytest.mark.parametrize('lsm_mode', ['0', '1'])
+def test_waitlist_promotes_by_tier_then_request_time(main_copy, monkeypatch, lsm_mode):
+    monkeypatch.setenv('COMPRO_LSM', lsm_mode)
+    monkeypatch.setenv('COMPRO_MAX_CREDITS', '0')
+    from module import register, bin_backend, enrollment, waitlist
+
+    course_id, seats, held_id, (late_low, first_high, second_high, middle) = \
+        pick_full_course(register, bin_backend, enrollment, 4)
+    for student_id, tier in ((late_low, 5), (first_high, 1), (second_high, 1), (middle, 3)):
+        assert waitlist.can_join(student_id, course_id)
+        entry_id, _ = waitlist.join_waitlist(student_id, course_id, tier)
+        assert entry_id is not None
+
+    def waiting():
+        return [entry[3] for entry in waitlist.list_waiting(course_id)]
+
+    assert waiting() == [first_high, second_high, middle, late_low]
+
+    # ลบการลงทะเบียนเดิม ที่นั่งว่างหนึ่งที่ คิวแรกขึ้นลงทะเบียน
+    assert bin_backend.delete_registration(held_id)
+    assert enrollment.is_enrolled(first_high, course_id)
+    assert waiting() == [second_high, middle, late_low]
+
+    # เพิ่มที่นั่งสองที่ เลื่อนสองคิวถัดไปตามลำดับ
+    assert enrollment.set_course_capacity(course_id, seats + 2)
+    promoted = waitlist.promote_waiting(course_id)
+    assert [student_id for student_id, register_id, _ in promoted if register_id] == [second_high, middle]
+    assert waiting() == [late_low]
+
+    # ถอนการลงทะเบียนที่เลื่อนขึ้นมา คิวสุดท้ายได้ที่นั่งแทน
+    promoted_id = next(r['ID'] for r in register.read_all_records_from_file()
+                       if r['STUDENT ID'] == first_high and r['COURSE ID'] == course_id
+                       and r['STATUS'] == 'Registered')
+    assert bin_backend.set_registration_status(promoted_id, 0)
+    assert enrollment.is_enrolled(late_low, course_id)
+    assert waiting() == []
+    assert enrollment.get_seats_taken(course_id) == seats + 2
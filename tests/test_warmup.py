@@ -0,0 +1,41 @@
+import threading
+
+def test_warmup_errors_are_recorded_quietly(main_copy, monkeypatch, capsys):
+    from module import warmup, cache
+
+    def broken():
+        raise ValueError("ดัชนีเสีย")
+
+    monkeypatch.setattr(cache, 'broken_warmer', broken, raising=False)
+    loaded = warmup.warm_indexes([('module.enrollment', 'get_enrollment_index'), ('module.cache', 'broken_warmer')])
+    assert loaded == ['get_enrollment_index']
+    assert [name for name, _ in warmup.warmup_errors()] == ['broken_warmer']
+    assert capsys.readouterr().out == ''
+
+def test_warmup_alongside_writes_keeps_indexes_consistent(main_copy):
+    from module import warmup, bin_backend, enrollment, integrity, register
+
+    course_id = next(c['COURSE ID'] for c in bin_backend.list_courses() if c['STATUS'] == 'Active')
+    thread = threading.Thread(target=warmup.warm_indexes)
+    thread.start()
+    for _ in range(20):
+        bin_backend.add_registration('T00001', course_id, 1)
+    thread.join()
+    assert enrollment.get_enrollment_index() == enrollment.build_enrollment_index()
+    assert integrity.get_registration_refs() == integrity.build_registration_refs()
+    assert register.get_registration_order() == register.build_registration_order()
+
+def test_concurrent_cache_use_keeps_byte_count(main_copy):
+    from module import cache, student
+
+    def worker():
+        for _ in range(50):
+            student.read_all_records_from_file()
+            cache.invalidate_cache(student.STUDENT_FILE_PATH)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.cache_info()['bytes'] == sum(cost for _, _, cost in cache._cache.values())